@@ -416,6 +416,36 @@
             suiteDir = "agent-health-report-tests";
           };
 
+          dns-query-log-exporter-tests = helpers.mkPytestCheck {
+            name = "dns-query-log-exporter-tests";
+            src = ./modules/monitoring/scripts;
+            suiteDir = "dns-query-log-exporter-tests";
+            extraPackages = ps: [
+              ps.requests
+              ps.prometheus-client
+              ps.python-snappy
+            ];
+          };
+
+          textfile-exporter-tests = helpers.mkPytestCheck {
+            name = "textfile-exporter-tests";
+            src = ./scripts;
+            suiteDir = "textfile-exporter-tests";
+          };
+
+          log-summarizer-tests = helpers.mkPytestCheck {
+            name = "log-summarizer-tests";
+            src = ./scripts;
+            suiteDir = "log-summarizer-tests";
+          };
+
+          email-contacts-mcp-tests = helpers.mkPytestCheck {
+            name = "email-contacts-mcp-tests";
+            src = ./scripts;
+            suiteDir = "email-contacts-mcp-tests";
+            extraPackages = ps: [ ps.mcp ];
+          };
+
           node-red-admin-tests =
             let
               pytestPython = pkgs.python312.withPackages (ps: [ ps.pytest ]);
@@ -477,6 +507,20 @@
             suiteDir = "tests";
           };
 
+          hermes-local-extract-tests = helpers.mkPytestCheck {
+            name = "hermes-local-extract-tests";
+            src = pkgs.runCommand "hermes-local-extract-src" { } ''
+              mkdir -p "$out/tests"
+              cp ${./tests/hermes-local-extract}/*.py "$out/tests/"
+              cp ${./pkgs/hermes-local-extract/extract_worker.py} "$out/extract_worker.py"
+            '';
+            suiteDir = "tests";
+            extraPackages = ps: [
+              ps.aiohttp
+              ps.trafilatura
+            ];
+          };
+
           drafts-mcp-check-tests = helpers.mkPytestCheck {
             name = "drafts-mcp-check-tests";
             src = ./scripts/drafts-mcp-check;
@@ -0,0 +1,140 @@
+"""Test fixtures for dns-query-log-exporter."""
+from __future__ import annotations
+
+import importlib.util
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / "dns-query-log-exporter.py"
+_MODULE = None
+
+
+def load_exporter_module():
+    """The script's filename has dashes, so it is loaded from its path.
+
+    Loaded once per session: its metrics live in prometheus_client's global
+    registry, which refuses a second registration of the same names.
+    """
+    global _MODULE
+    if _MODULE is None:
+        spec = importlib.util.spec_from_file_location("dns_query_log_exporter", SCRIPT)
+        _MODULE = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_MODULE)
+    return _MODULE
+
+
+class FakeLoki:
+    """A local /loki/api/v1/push endpoint that records what it is sent.
+
+    `statuses` is consumed one per request; once empty every push gets 204.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.statuses = []
+        self.peers = set()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                fake.peers.add(self.client_address)
+                fake.requests.append({"path": self.path, "headers": dict(self.headers),
+                                      "body": body})
+                status = fake.statuses.pop(0) if fake.statuses else 204
+                payload = b"" if status == 204 else json.dumps({"status": status}).encode()
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *a):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def delivered(self):
+        return [r for r in self.requests if r.get("status", 204) < 300]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_loki():
+    loki = FakeLoki()
+    yield loki
+    loki.close()
+
+
+@pytest.fixture
+def m(monkeypatch):
+    mod = load_exporter_module()
+    # No real PTR lookups from tests
+    monkeypatch.setattr(mod, "resolver", mod.ReverseResolver(lookup=lambda ip: (f"host-{ip}.lan", [], [ip])))
+    return mod
+
+
+def make_entry(row, ip="192.168.1.10", qname="example.com", ts=None):
+    return {
+        "rowNumber": row,
+        "timestamp": ts or f"2026-10-01T00:{row // 60 % 60:02d}:{row % 60:02d}.{row % 1000:03d}Z",
+        "clientIpAddress": ip,
+        "protocol": "Udp",
+        "rcode": "NoError",
+        "qtype": "a",
+        "responseType": "Recursive",
+        "qname": qname,
+        "qclass": "IN",
+        "answer": "1.2.3.4",
+    }
+
+
+class QueryLog:
+    """Technitium's query log API: rows oldest..newest, paged either way.
+
+    `on_fetch` runs before every page is served, so a test can write or purge
+    rows between the exporter's requests. A `start` filter renumbers the
+    matching rows from 1, as the real server may -- an exporter that compares
+    those numbers with its cursor loses rows.
+    """
+
+    def __init__(self, newest=10, oldest=1):
+        self.oldest = oldest
+        self.newest = newest
+        self.on_fetch = None
+        self.requests = []
+
+    def __call__(self, page_number=1, entries_per_page=100, descending=True, start=None):
+        self.requests.append((page_number, entries_per_page, descending))
+        if self.on_fetch:
+            self.on_fetch(self)
+        entries = [make_entry(n) for n in range(self.oldest, self.newest + 1)]
+        if start:
+            entries = [dict(e, rowNumber=i) for i, e in
+                       enumerate((e for e in entries if e["timestamp"] >= start), 1)]
+        if descending:
+            entries.reverse()
+        chunk = entries[(page_number - 1) * entries_per_page:page_number * entries_per_page]
+        return {"entries": chunk, "totalPages": -(-len(entries) // entries_per_page)}
+
+
+@pytest.fixture
+def query_log(m, monkeypatch, tmp_path):
+    """Technitium serving rows 1..10; the cursor starts at row 0."""
+    log = QueryLog()
+    monkeypatch.setattr(m, "fetch_query_logs", log)
+    monkeypatch.setattr(m, "STATE_FILE", str(tmp_path / "last_row.txt"))
+    monkeypatch.setattr(m.time, "sleep", lambda s: None)
+    m.save_cursor({"row": 0, "ts": None})
+    return log
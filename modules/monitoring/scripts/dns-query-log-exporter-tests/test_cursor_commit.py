@@ -0,0 +1,57 @@
+def _client(m, monkeypatch, url, tmp_path, **kw):
+    kw.setdefault("max_age", 0)  # flush at the end of every poll
+    client = m.LokiClient(url=url, max_retries=0, timeout=1,
+                          spool_dir=str(tmp_path / "spool"), **kw)
+    monkeypatch.setattr(m, "loki", client)
+    monkeypatch.setattr(m, "read_ahead", None)
+    return client
+
+
+def test_cursor_advances_once_loki_acks(m, monkeypatch, tmp_path, fake_loki, query_log):
+    _client(m, monkeypatch, fake_loki.url, tmp_path)
+    assert m.process_new_logs() == (10, "caught_up")
+    assert m.load_cursor()["row"] == 10
+    assert len(fake_loki.requests) == 1
+
+
+def test_spooled_batches_count_as_durable(m, monkeypatch, tmp_path, fake_loki, query_log):
+    client = _client(m, monkeypatch, fake_loki.url, tmp_path)
+    fake_loki.statuses = [503]
+    assert m.process_new_logs() == (10, "caught_up")
+    assert m.load_cursor()["row"] == 10
+    assert len(client._spool_files()) == 1
+
+    # Next poll: the spool is replayed before the new rows are pushed.
+    query_log.newest = 12
+    assert m.process_new_logs() == (2, "caught_up")
+    assert client._spool_files() == []
+    assert len(fake_loki.requests) == 3
+
+
+def test_cursor_stays_when_batch_is_neither_sent_nor_spooled(m, monkeypatch, tmp_path,
+                                                             query_log):
+    client = _client(m, monkeypatch, "http://127.0.0.1:9", tmp_path)
+    monkeypatch.setattr(client, "_spool", lambda body, count: False)
+    assert m.process_new_logs() == (0, "failed")
+    assert m.load_cursor()["row"] == 0
+
+
+def test_batch_stays_open_across_polls_until_it_is_due(m, monkeypatch, tmp_path,
+                                                       fake_loki, query_log):
+    client = _client(m, monkeypatch, fake_loki.url, tmp_path, max_age=60)
+    assert m.process_new_logs() == (10, "caught_up")
+    assert fake_loki.requests == []
+    assert m.load_cursor()["row"] == 0
+    assert 0 < client.due_in() <= 60
+
+    # The next poll reads on from the open batch, not from the saved cursor.
+    query_log.newest = 12
+    assert m.process_new_logs() == (2, "caught_up")
+    assert client.pending == 12
+    assert fake_loki.requests == []
+
+    client.max_age = 0
+    assert m.process_new_logs() == (0, "caught_up")
+    assert len(fake_loki.requests) == 1
+    assert m.load_cursor()["row"] == 12
+    assert client.due_in() is None
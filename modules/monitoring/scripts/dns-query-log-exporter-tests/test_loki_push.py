@@ -0,0 +1,224 @@
+import gzip
+import json
+import os
+
+import pytest
+import snappy
+
+from conftest import make_entry
+
+
+def _read_varint(buf, i):
+    shift = value = 0
+    while True:
+        b = buf[i]
+        i += 1
+        value |= (b & 0x7f) << shift
+        shift += 7
+        if not b & 0x80:
+            return value, i
+
+
+def _fields(buf):
+    """Decode one protobuf message into [(field, value)] (varint or bytes)."""
+    out, i = [], 0
+    while i < len(buf):
+        key, i = _read_varint(buf, i)
+        if key & 7 == 0:
+            value, i = _read_varint(buf, i)
+        else:
+            n, i = _read_varint(buf, i)
+            value, i = bytes(buf[i:i + n]), i + n
+        out.append((key >> 3, value))
+    return out
+
+
+def decode_push(body):
+    """PushRequest -> {labels: [(ts_ns, line)]}"""
+    streams = {}
+    for _, stream in _fields(snappy.uncompress(body)):
+        fields = _fields(stream)
+        labels = next(v for f, v in fields if f == 1).decode()
+        for f, entry in fields:
+            if f != 2:
+                continue
+            e = dict(_fields(entry))
+            ts = dict(_fields(e[1]))
+            streams.setdefault(labels, []).append(
+                (ts[1] * 1_000_000_000 + ts.get(2, 0), e[2].decode()))
+    return streams
+
+
+def test_protobuf_push_groups_streams_and_keeps_timestamps(m, fake_loki, tmp_path):
+    client = m.LokiClient(url=fake_loki.url, spool_dir=str(tmp_path / "spool"))
+    client.add([make_entry(1, ts="2026-10-01T00:00:00.123456Z"),
+                make_entry(2, ts="2026-10-01T00:00:01Z"),
+                make_entry(3, ip="10.0.0.5", qname='we"ird.example')])
+    assert client.flush() is True
+
+    (req,) = fake_loki.requests
+    assert req["path"] == "/loki/api/v1/push"
+    assert req["headers"]["Content-Type"] == "application/x-protobuf"
+    streams = decode_push(req["body"])
+    key = ('{client_hostname="host-192.168.1.10.lan", client_ip="192.168.1.10", '
+           'job="dns_query_logs", protocol="udp", qtype="A", rcode="noerror", '
+           'response_type="recursive"}')
+    assert [ts for ts, _ in streams[key]] == [1_790_812_800_123_456_000, 1_790_812_801_000_000_000]
+    (other,) = [k for k in streams if k != key]
+    assert 'client_ip="10.0.0.5"' in other
+    assert json.loads(streams[other][0][1])["domain"] == 'we"ird.example'
+
+
+def test_gzip_json_fallback(m, fake_loki, tmp_path):
+    client = m.LokiClient(url=fake_loki.url, encoding="gzip", spool_dir=str(tmp_path / "spool"))
+    client.add([make_entry(1), make_entry(2, ip="10.0.0.5")])
+    assert client.flush() is True
+    (req,) = fake_loki.requests
+    assert req["headers"]["Content-Encoding"] == "gzip"
+    doc = json.loads(gzip.decompress(req["body"]))
+    assert sorted(s["stream"]["client_ip"] for s in doc["streams"]) == ["10.0.0.5", "192.168.1.10"]
+    assert all(isinstance(v[0], str) for s in doc["streams"] for v in s["values"])
+
+
+def test_protobuf_snappy_is_much_smaller_than_json(m, tmp_path):
+    entries = [make_entry(i, ip=f"192.168.1.{i % 8}") for i in range(1, 2001)]
+    streams = m.group_streams(entries)
+    pb = m.ENCODINGS["snappy"][3](streams)
+    assert len(pb) * 3 < len(m.encode_json(streams))
+
+
+def test_batches_flush_on_size_and_age(m, tmp_path, monkeypatch):
+    client = m.LokiClient(url="http://unused", max_bytes=2000, max_age=60,
+                          spool_dir=str(tmp_path / "spool"))
+    client.add([make_entry(1)])
+    assert not client.should_flush()
+    client.add([make_entry(i) for i in range(2, 40)])
+    assert client.should_flush()
+
+    client = m.LokiClient(url="http://unused", max_age=5, spool_dir=str(tmp_path / "spool"))
+    client.add([make_entry(1)])
+    now = m.time.monotonic()
+    monkeypatch.setattr(m.time, "monotonic", lambda: now + 6)
+    assert client.should_flush()
+
+
+def test_keep_alive_session_is_reused(m, fake_loki, tmp_path):
+    client = m.LokiClient(url=fake_loki.url, spool_dir=str(tmp_path / "spool"))
+    for i in range(5):
+        client.add([make_entry(i + 1)])
+        assert client.flush()
+    assert len(fake_loki.requests) == 5
+    assert len(fake_loki.peers) == 1
+
+
+def test_retries_429_and_5xx_with_backoff(m, fake_loki, tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(m.time, "sleep", sleeps.append)
+    fake_loki.statuses = [429, 503]
+    client = m.LokiClient(url=fake_loki.url, backoff=0.5, spool_dir=str(tmp_path / "spool"))
+    client.add([make_entry(1)])
+    assert client.flush() is True
+    assert len(fake_loki.requests) == 3
+    assert sleeps == [0.5, 1.0]
+    assert client._spool_files() == []
+
+
+def test_client_errors_are_not_retried_and_count_as_dropped(m, fake_loki, tmp_path):
+    fake_loki.statuses = [400]
+    client = m.LokiClient(url=fake_loki.url, spool_dir=str(tmp_path / "spool"))
+    before = m.dns_query_log_dropped_rows_total._value.get()
+    client.add([make_entry(1), make_entry(2)])
+    assert client.flush() is True
+    assert len(fake_loki.requests) == 1
+    assert m.dns_query_log_dropped_rows_total._value.get() - before == 2
+
+
+def test_outage_spools_then_replays_in_order(m, fake_loki, tmp_path, monkeypatch):
+    monkeypatch.setattr(m.time, "sleep", lambda s: None)
+    client = m.LokiClient(url=fake_loki.url, max_retries=1, spool_dir=str(tmp_path / "spool"))
+    # Two attempts for the first batch, one spool replay while the second queues.
+    fake_loki.statuses = [503] * 3
+    for row in (1, 2):
+        client.add([make_entry(row)])
+        assert client.flush() is True  # durable on disk, not lost
+    assert len(client._spool_files()) == 2
+
+    # Loki is back: the spool drains oldest first, then the new batch follows.
+    fake_loki.requests.clear()
+    client.add([make_entry(3)])
+    assert client.flush() is True
+    assert client._spool_files() == []
+    lines = [ts for r in fake_loki.requests for v in decode_push(r["body"]).values()
+             for ts, _ in v]
+    assert lines == sorted(lines) and len(lines) == 3
+
+
+def test_spool_is_bounded_and_evictions_are_counted(m, tmp_path, monkeypatch):
+    monkeypatch.setattr(m.time, "sleep", lambda s: None)
+    client = m.LokiClient(url="http://127.0.0.1:9", max_retries=0, timeout=1,
+                          spool_dir=str(tmp_path / "spool"), spool_max_bytes=1)
+    before = m.dns_query_log_dropped_rows_total._value.get()
+    for row in range(1, 4):
+        client.add([make_entry(row)])
+        assert client.flush() is True
+    assert len(client._spool_files()) == 1
+    assert m.dns_query_log_dropped_rows_total._value.get() - before == 2
+
+
+def test_spool_left_by_the_other_encoding_is_replayed_in_its_own(m, fake_loki, tmp_path,
+                                                                 monkeypatch):
+    monkeypatch.setattr(m.time, "sleep", lambda s: None)
+    spool = str(tmp_path / "spool")
+    # A run without python-snappy spooled gzipped JSON ...
+    old = m.LokiClient(url=fake_loki.url, encoding="gzip", max_retries=0, spool_dir=spool)
+    fake_loki.statuses = [503]
+    old.add([make_entry(1)])
+    assert old.flush() is True
+    # ... and this one pushes protobuf, queued behind it.
+    client = m.LokiClient(url=fake_loki.url, encoding="snappy", spool_dir=spool)
+    assert client._spool_files() == old._spool_files()
+    assert m.dns_loki_spool_batches._value.get() == 1
+    fake_loki.requests.clear()
+    client.add([make_entry(2)])
+    assert client.flush() is True
+    assert client._spool_files() == []
+
+    replayed, new = fake_loki.requests
+    assert replayed["headers"]["Content-Type"] == "application/json"
+    assert replayed["headers"]["Content-Encoding"] == "gzip"
+    doc = json.loads(gzip.decompress(replayed["body"]))
+    assert [s["stream"]["client_ip"] for s in doc["streams"]] == ["192.168.1.10"]
+    assert new["headers"]["Content-Type"] == "application/x-protobuf"
+    assert "Content-Encoding" not in new["headers"]
+    assert len(decode_push(new["body"])) == 1
+
+
+def test_spool_bound_counts_both_encodings(m, tmp_path, monkeypatch):
+    monkeypatch.setattr(m.time, "sleep", lambda s: None)
+    spool = str(tmp_path / "spool")
+    old = m.LokiClient(url="http://127.0.0.1:9", encoding="gzip", max_retries=0, timeout=1,
+                       spool_dir=spool)
+    old.add([make_entry(1), make_entry(2)])
+    assert old.flush() is True
+    client = m.LokiClient(url="http://127.0.0.1:9", encoding="snappy", max_retries=0,
+                          timeout=1, spool_dir=spool, spool_max_bytes=1)
+    before = m.dns_query_log_dropped_rows_total._value.get()
+    client.add([make_entry(3)])
+    assert client.flush() is True
+    [kept] = client._spool_files()
+    assert kept.endswith(".pb.sz")
+    assert m.dns_query_log_dropped_rows_total._value.get() - before == 2
+
+
+def test_unwritable_spool_reports_failure(m, tmp_path, monkeypatch):
+    monkeypatch.setattr(m.time, "sleep", lambda s: None)
+    client = m.LokiClient(url="http://127.0.0.1:9", max_retries=0, timeout=1,
+                          spool_dir=str(tmp_path / "spool"))
+    (tmp_path / "spool").chmod(0o500)
+    try:
+        client.add([make_entry(1)])
+        if os.access(tmp_path / "spool", os.W_OK):
+            pytest.skip("running as a user that ignores directory permissions")
+        assert client.flush() is False
+    finally:
+        (tmp_path / "spool").chmod(0o700)
@@ -0,0 +1,143 @@
+"""Cursor paging against a query log that grows and is purged while it is read,
+and the adaptive poll interval that follows from each pass."""
+import pytest
+
+
+class RecordingLoki:
+    """Flushes every page; `rows` is every row number pushed, in order."""
+
+    def __init__(self):
+        self.rows = []
+        self.pending = 0
+
+    def add(self, entries):
+        self.rows.extend(e["rowNumber"] for e in entries)
+        self.pending += len(entries)
+
+    def should_flush(self):
+        return self.pending > 0
+
+    def flush(self):
+        self.pending = 0
+        return True
+
+    def drain_spool(self):
+        return True
+
+
+@pytest.fixture
+def pushed(m, monkeypatch, query_log):
+    loki = RecordingLoki()
+    monkeypatch.setattr(m, "loki", loki)
+    monkeypatch.setattr(m, "BATCH_SIZE", 100)
+    return loki.rows
+
+
+def _dropped(m):
+    return m.dns_query_log_dropped_rows_total._value.get()
+
+
+def test_pages_forward_through_a_large_backlog(m, query_log, pushed):
+    query_log.newest = 350
+    assert m.process_new_logs() == (350, "caught_up")
+    assert pushed == list(range(1, 351))
+    assert m.load_cursor()["row"] == 350
+
+
+def test_resumes_on_the_page_holding_the_cursor(m, query_log, pushed):
+    query_log.newest = 350
+    m.save_cursor({"row": 250, "ts": None})
+    assert m.process_new_logs() == (100, "caught_up")
+    assert pushed == list(range(251, 351))
+    # Head probe, oldest probe, then straight to ascending page 3.
+    assert query_log.requests[2] == (3, 100, False)
+
+
+def test_rows_written_during_the_read_are_not_lost(m, query_log, pushed):
+    query_log.newest = 250
+
+    def write(log):
+        log.newest += 37
+    query_log.on_fetch = write
+
+    m.process_new_logs()
+    m.process_new_logs()
+    assert pushed == list(range(1, len(pushed) + 1))
+    assert pushed[-1] >= 250
+
+
+def test_purge_during_the_read_re_probes_instead_of_skipping(m, query_log, pushed):
+    query_log.newest = 400
+    m.save_cursor({"row": 150, "ts": None})
+
+    def purge(log):
+        # Retention removes 60 of the oldest rows once the read is under way.
+        if len(log.requests) == 4:
+            log.oldest = 61
+    query_log.on_fetch = purge
+
+    before = _dropped(m)
+    assert m.process_new_logs() == (250, "caught_up")
+    assert pushed == list(range(151, 401))
+    assert _dropped(m) == before
+
+
+def test_rows_purged_before_the_cursor_reached_them_are_counted(m, query_log, pushed):
+    query_log.newest, query_log.oldest = 300, 200
+    m.save_cursor({"row": 150, "ts": None})
+    before = _dropped(m)
+    assert m.process_new_logs() == (101, "caught_up")
+    assert pushed == list(range(200, 301))
+    assert _dropped(m) - before == 49
+
+
+def test_renumbering_time_filter_is_not_used(m, query_log, pushed):
+    # The fake renumbers a `start`-filtered result from 1. Paging by row
+    # number alone never asks for one, so the cursor's numbering holds.
+    query_log.newest = 250
+    m.save_cursor({"row": 120, "ts": "2026-10-01T00:02:00.120Z"})
+    assert m.process_new_logs() == (130, "caught_up")
+    assert pushed == list(range(121, 251))
+
+
+def test_time_budget_leaves_the_rest_for_the_next_poll(m, query_log, pushed, monkeypatch):
+    query_log.newest = 350
+    clock = iter([0.0, 1.0] + [99.0] * 100)  # time for two pages
+    monkeypatch.setattr(m.time, "monotonic", lambda: next(clock))
+    pushed_now, state = m.process_new_logs(deadline=10.0)
+    assert state == "behind"
+    assert pushed_now == 200
+    assert m.process_new_logs(deadline=float("inf"))[1] == "caught_up"
+    assert pushed == list(range(1, 351))
+
+
+@pytest.fixture
+def intervals(m, monkeypatch):
+    monkeypatch.setattr(m, "POLL_INTERVAL", 15)
+    monkeypatch.setattr(m, "POLL_INTERVAL_MIN", 1.0)
+    monkeypatch.setattr(m, "POLL_INTERVAL_MAX", 60.0)
+    monkeypatch.setattr(m, "BATCH_SIZE", 100)
+    return m.next_poll_interval
+
+
+def test_still_behind_polls_again_at_once(intervals):
+    assert intervals(30.0, 500, "behind") == 1.0
+
+
+def test_busy_resolver_halves_the_interval_down_to_the_minimum(intervals):
+    assert intervals(16.0, 100, "caught_up") == 8.0
+    assert intervals(1.5, 400, "caught_up") == 1.0
+
+
+def test_idle_resolver_backs_off_up_to_the_maximum(intervals):
+    assert intervals(10.0, 0, "caught_up") == 15.0
+    assert intervals(50.0, 0, "caught_up") == 60.0
+
+
+def test_light_traffic_keeps_the_interval(intervals):
+    assert intervals(10.0, 5, "caught_up") == 10.0
+
+
+def test_failure_returns_to_the_configured_interval(intervals):
+    assert intervals(1.0, 0, "failed") == 15.0
+    assert intervals(60.0, 0, "failed") == 15.0
@@ -0,0 +1,178 @@
+"""ReverseResolver: the LRU bound, TTLs, timeout parking, concurrency and metrics.
+
+Every resolver here gets an injected lookup and clock, so nothing touches
+real DNS and expiry is driven by hand rather than by sleeping.
+"""
+import socket
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Lookup:
+    """gethostbyaddr stand-in: names from `names`, herror for the rest."""
+
+    def __init__(self, names=None):
+        self.names = names or {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, ip):
+        with self._lock:
+            self.calls.append(ip)
+        if ip not in self.names:
+            raise socket.herror(1, "Unknown host")
+        return self.names[ip] + ".", [], [ip]
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def resolver(m, clock, lookup, **kwargs):
+    kwargs.setdefault("timeout", 5)
+    return m.ReverseResolver(lookup=lookup, clock=clock, **kwargs)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_answers_are_cached_and_trailing_dot_dropped(m, clock):
+    lookup = Lookup({"10.0.0.1": "nas.lan"})
+    r = resolver(m, clock, lookup)
+    assert r.resolve(["10.0.0.1", "10.0.0.1"]) == {"10.0.0.1": "nas.lan"}
+    assert r.resolve(["10.0.0.1"]) == {"10.0.0.1": "nas.lan"}
+    assert lookup.calls == ["10.0.0.1"]
+    assert (r.hits, r.misses) == (1, 1)
+
+
+def test_ip_without_a_ptr_maps_to_itself(m, clock):
+    r = resolver(m, clock, Lookup())
+    assert r.resolve(["10.0.0.9", "not-an-ip"]) == {"10.0.0.9": "10.0.0.9",
+                                                    "not-an-ip": "not-an-ip"}
+
+
+def test_positive_and_negative_answers_expire_on_their_own_ttls(m, clock):
+    lookup = Lookup({"10.0.0.1": "nas.lan"})
+    r = resolver(m, clock, lookup, positive_ttl=100, negative_ttl=10)
+    r.resolve(["10.0.0.1", "10.0.0.2"])
+    clock.now += 10
+    r.resolve(["10.0.0.1", "10.0.0.2"])
+    assert lookup.calls.count("10.0.0.1") == 1 and lookup.calls.count("10.0.0.2") == 2
+    clock.now += 100
+    r.resolve(["10.0.0.1"])
+    assert lookup.calls.count("10.0.0.1") == 2
+
+
+def test_cache_holds_at_most_max_entries_evicting_least_recently_used(m, clock):
+    lookup = Lookup({f"10.0.0.{i}": f"h{i}" for i in range(4)})
+    r = resolver(m, clock, lookup, max_entries=2)
+    r.resolve(["10.0.0.0"])
+    r.resolve(["10.0.0.1"])
+    r.resolve(["10.0.0.0"])          # 10.0.0.0 is now the most recently used
+    r.resolve(["10.0.0.2"])
+    assert list(r._cache) == ["10.0.0.0", "10.0.0.2"]
+    assert sample("dns_rdns_cache_entries") == 2
+    r.resolve(["10.0.0.1"])
+    assert lookup.calls.count("10.0.0.1") == 2
+
+
+def test_timed_out_lookup_is_parked_then_replaced_by_its_late_answer(m, clock):
+    release = threading.Event()
+
+    def slow(ip):
+        release.wait(5)
+        return "late.lan.", [], [ip]
+
+    r = resolver(m, clock, slow, timeout=0.05, negative_ttl=300)
+    before = sample("dns_rdns_lookup_timeouts_total")
+    assert r.resolve(["10.0.0.1"]) == {"10.0.0.1": "10.0.0.1"}
+    assert sample("dns_rdns_lookup_timeouts_total") == before + 1
+    # Parked for at most 60s, however long the negative TTL, and not waited on again.
+    assert r._cache["10.0.0.1"] == (clock.now + 60, None)
+    assert r.resolve(["10.0.0.1"]) == {"10.0.0.1": "10.0.0.1"}
+    assert sample("dns_rdns_lookup_timeouts_total") == before + 1
+
+    release.set()
+    r._pool.shutdown(wait=True)      # the completion callback has run once this returns
+    assert r.resolve(["10.0.0.1"]) == {"10.0.0.1": "late.lan"}
+    assert "10.0.0.1" not in r._pending
+
+
+def test_pending_lookup_is_shared_not_resubmitted(m, clock):
+    release = threading.Event()
+    lookup = Lookup({"10.0.0.1": "nas.lan"})
+
+    def slow(ip):
+        release.wait(5)
+        return lookup(ip)
+
+    r = resolver(m, clock, slow, timeout=0.05)
+    r.resolve(["10.0.0.1"])
+    clock.now += 61                  # the park expires while the lookup is still out
+    r.resolve(["10.0.0.1"])
+    release.set()
+    r._pool.shutdown(wait=True)
+    assert lookup.calls == ["10.0.0.1"]
+
+
+def test_lookups_run_in_parallel_up_to_the_worker_count(m, clock):
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+    gate = threading.Barrier(3, timeout=5)
+
+    def lookup(ip):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        try:
+            gate.wait()              # hold each lookup until three are running at once
+        except threading.BrokenBarrierError:
+            pass
+        with lock:
+            running -= 1
+        return f"h-{ip}.", [], [ip]
+
+    r = resolver(m, clock, lookup, workers=3)
+    ips = [f"10.0.1.{i}" for i in range(9)]
+    out = r.resolve(ips)
+    assert out == {ip: f"h-{ip}" for ip in ips}
+    assert peak == 3
+
+
+def test_one_slow_ip_costs_one_timeout_per_batch(m, clock):
+    def lookup(ip):
+        if ip == "10.0.0.99":
+            threading.Event().wait(1)
+        return f"h-{ip}.", [], [ip]
+
+    r = resolver(m, clock, lookup, timeout=0.2, workers=8)
+    started = time.monotonic()
+    out = r.resolve([f"10.0.0.{i}" for i in range(5)] + ["10.0.0.99"])
+    assert time.monotonic() - started < 0.9
+    assert out["10.0.0.99"] == "10.0.0.99" and out["10.0.0.4"] == "h-10.0.0.4"
+
+
+def test_hit_and_miss_metrics(m, clock):
+    r = resolver(m, clock, Lookup({"10.0.0.1": "nas.lan"}))
+    hit = sample("dns_rdns_cache_requests_total", result="hit")
+    miss = sample("dns_rdns_cache_requests_total", result="miss")
+    r.resolve(["10.0.0.1", "10.0.0.2"])
+    r.resolve(["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+    assert sample("dns_rdns_cache_requests_total", result="hit") == hit + 2
+    assert sample("dns_rdns_cache_requests_total", result="miss") == miss + 3
+    assert sample("dns_rdns_cache_hit_ratio") == pytest.approx(2 / 5)
@@ -6,32 +6,59 @@ Also exposes Prometheus metrics on 127.0.0.1:9275 (METRICS_PORT; the deployed
 unit sets 9275 in modules/monitoring/services/dns-query-logs.nix).
 """
 
+import gzip
 import json
 import os
 import socket
 import sys
+import threading
 import time
 import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from functools import lru_cache
 
 import requests
-from prometheus_client import Counter, Gauge, start_http_server
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+try:
+    import snappy
+except ImportError:  # python-snappy missing: push gzipped JSON instead
+    snappy = None
 
 # Configuration
 TECHNITIUM_URL = os.getenv('TECHNITIUM_URL', 'http://10.88.0.1:5380')
 TECHNITIUM_TOKEN = os.getenv('TECHNITIUM_TOKEN', '')
 LOKI_URL = os.getenv('LOKI_URL', 'http://localhost:3100')
-POLL_INTERVAL = int(os.getenv('POLL_INTERVAL', '15'))  # seconds
+POLL_INTERVAL = int(os.getenv('POLL_INTERVAL', '15'))  # seconds, the starting interval
+# The interval adapts between these bounds: it drops to the minimum while a
+# backlog remains and backs off toward the maximum while the resolver is idle.
+POLL_INTERVAL_MIN = float(os.getenv('POLL_INTERVAL_MIN', '1'))
+POLL_INTERVAL_MAX = float(os.getenv('POLL_INTERVAL_MAX', '60'))
+# Wall-clock budget for one poll's catch-up; whatever is left over is read on
+# the next poll, which then comes round at POLL_INTERVAL_MIN.
+POLL_TIME_BUDGET = float(os.getenv('POLL_TIME_BUDGET', '10'))
 STATE_FILE = os.getenv('STATE_FILE', '/var/lib/dns-query-exporter/last_row.txt')
 BATCH_SIZE = int(os.getenv('BATCH_SIZE', '100'))  # entries per API call
 METRICS_PORT = int(os.getenv('METRICS_PORT', '9275'))  # Prometheus metrics port
+# Loki push batching, retries and the on-disk spool used while Loki is down
+LOKI_BATCH_BYTES = int(os.getenv('LOKI_BATCH_BYTES', str(1024 * 1024)))  # uncompressed
+LOKI_BATCH_AGE = float(os.getenv('LOKI_BATCH_AGE', '5'))  # seconds
+LOKI_MAX_RETRIES = int(os.getenv('LOKI_MAX_RETRIES', '4'))
+LOKI_SPOOL_DIR = os.getenv('LOKI_SPOOL_DIR', '/var/lib/dns-query-exporter/spool')
+LOKI_SPOOL_MAX_BYTES = int(os.getenv('LOKI_SPOOL_MAX_BYTES', str(256 * 1024 * 1024)))
+# Reverse-DNS (PTR) lookups for client_hostname: how long one poll waits for a
+# batch of lookups, how many run at once, and how long answers are kept.
+RDNS_TIMEOUT = float(os.getenv('RDNS_TIMEOUT', '1.0'))  # seconds
+RDNS_WORKERS = int(os.getenv('RDNS_WORKERS', '16'))
+RDNS_CACHE_SIZE = int(os.getenv('RDNS_CACHE_SIZE', '4096'))  # entries
+RDNS_POSITIVE_TTL = int(os.getenv('RDNS_POSITIVE_TTL', '3600'))  # seconds
+RDNS_NEGATIVE_TTL = int(os.getenv('RDNS_NEGATIVE_TTL', '300'))  # seconds
 
 APP_NAME = 'Query Logs (Sqlite)'
 CLASS_PATH = 'QueryLogsSqlite.App'
 
-# Cache for IP to hostname lookups (avoid excessive DNS queries)
-hostname_cache = {}
-
 # Prometheus metrics
 # dns_queries_total is intentionally LOW cardinality: aggregated by rcode/qtype/protocol
 # ONLY. The per-query detail (domain, client_ip, client_hostname) is deliberately NOT on
@@ -51,6 +78,27 @@ dns_query_log_last_row = Gauge(
     'Last row number processed from DNS query logs'
 )
 
+dns_query_log_lag_rows = Gauge(
+    'dns_query_log_lag_rows',
+    'Rows written by Technitium but not yet pushed to Loki, as of the last poll'
+)
+
+dns_query_log_lag_seconds = Gauge(
+    'dns_query_log_lag_seconds',
+    'Age of the newest pushed row when rows are still pending (0 when caught up)'
+)
+
+dns_query_log_dropped_rows_total = Counter(
+    'dns_query_log_dropped_rows_total',
+    'Rows lost before reaching Loki: purged by Technitium before export, '
+    'rejected by Loki as unacceptable, or evicted from a full push spool'
+)
+
+dns_query_log_poll_interval_seconds = Gauge(
+    'dns_query_log_poll_interval_seconds',
+    'Current adaptive poll interval'
+)
+
 # Health monitoring metrics
 authentication_failures_total = Counter(
     'authentication_failures_total',
@@ -91,51 +139,246 @@ consecutive_failures = Gauge(
     'Number of consecutive API failures (resets to 0 on success)'
 )
 
+# Reverse-DNS resolver metrics. Hit ratio in PromQL:
+#   rate(dns_rdns_cache_requests_total{result="hit"}[5m])
+#     / ignoring(result) sum without(result) (rate(dns_rdns_cache_requests_total[5m]))
+dns_rdns_cache_requests_total = Counter(
+    'dns_rdns_cache_requests_total',
+    'Client IP hostname lookups by cache outcome',
+    ['result']  # hit, miss
+)
+# Pre-initialised for the same reason as api_errors_total above.
+for _result in ('hit', 'miss'):
+    dns_rdns_cache_requests_total.labels(result=_result)
+
+dns_rdns_cache_hit_ratio = Gauge(
+    'dns_rdns_cache_hit_ratio',
+    'Fraction of client IP lookups answered from the cache since start-up'
+)
+
+dns_rdns_cache_entries = Gauge(
+    'dns_rdns_cache_entries',
+    'Entries in the reverse-DNS cache (positive and negative)'
+)
+
+dns_rdns_lookup_seconds = Histogram(
+    'dns_rdns_lookup_seconds',
+    'Latency of reverse-DNS (PTR) lookups that completed',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+dns_rdns_lookup_timeouts_total = Counter(
+    'dns_rdns_lookup_timeouts_total',
+    'PTR lookups still unanswered when the poll stopped waiting for them'
+)
+
+# Loki push client metrics
+dns_loki_push_requests_total = Counter(
+    'dns_loki_push_requests_total',
+    'Loki push requests by outcome',
+    ['outcome']  # ok, retryable, rejected
+)
+# Pre-initialised for the same reason as api_errors_total above.
+for _outcome in ('ok', 'retryable', 'rejected'):
+    dns_loki_push_requests_total.labels(outcome=_outcome)
+
+dns_loki_push_bytes_total = Counter(
+    'dns_loki_push_bytes_total',
+    'Request body bytes acknowledged by Loki, by encoding',
+    ['encoding']
+)
+
+dns_loki_push_entries_total = Counter(
+    'dns_loki_push_entries_total',
+    'Log lines acknowledged by Loki'
+)
+
+dns_loki_encode_seconds_total = Counter(
+    'dns_loki_encode_seconds_total',
+    'CPU seconds spent encoding and compressing push bodies'
+)
+
+dns_loki_push_seconds = Histogram(
+    'dns_loki_push_seconds',
+    'Latency of individual Loki push requests',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+dns_loki_spool_batches = Gauge(
+    'dns_loki_spool_batches',
+    'Undelivered push batches waiting in the on-disk spool'
+)
+
+dns_loki_spool_bytes = Gauge(
+    'dns_loki_spool_bytes',
+    'Size of the on-disk push spool'
+)
+
 # Fail-fast configuration
 MAX_CONSECUTIVE_FAILURES = 3
 current_consecutive_failures = 0
 
 
-def get_hostname(ip_address):
-    """Get hostname for IP address via reverse DNS lookup."""
-    if ip_address in hostname_cache:
-        return hostname_cache[ip_address]
+class ReverseResolver:
+    """Concurrent PTR lookups behind a bounded LRU cache with TTLs.
 
-    try:
-        # Try reverse DNS lookup
-        hostname, _, _ = socket.gethostbyaddr(ip_address)
-        # Remove trailing dot if present
-        hostname = hostname.rstrip('.')
-        hostname_cache[ip_address] = hostname
+    resolve() looks up a batch's unique IPs in parallel on a small thread pool
+    and waits at most `timeout` for the lot, so one slow PTR costs a poll that
+    long, not one timeout per entry. An answer that arrives after the wait is
+    still cached by the lookup's completion callback. Positive answers live for
+    positive_ttl, failures for negative_ttl; an IP whose lookup timed out is
+    parked as a short-lived negative entry so the next poll does not wait on it
+    again while it is still pending. `lookup` and `clock` are injectable for tests.
+    """
+
+    def __init__(self, timeout=RDNS_TIMEOUT, workers=RDNS_WORKERS, max_entries=RDNS_CACHE_SIZE,
+                 positive_ttl=RDNS_POSITIVE_TTL, negative_ttl=RDNS_NEGATIVE_TTL,
+                 lookup=socket.gethostbyaddr, clock=time.monotonic):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._lookup = lookup
+        self._clock = clock
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rdns')
+        # Reentrant: a lookup that has already finished runs its completion
+        # callback inside add_done_callback, with the lock held.
+        self._lock = threading.RLock()
+        self._cache = OrderedDict()  # ip -> (expires_at, hostname or None)
+        self._pending = {}           # ip -> Future
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, ip, now):
+        entry = self._cache.get(ip)
+        if entry is None or entry[0] <= now:
+            return False, None
+        self._cache.move_to_end(ip)
+        return True, entry[1]
+
+    def _put(self, ip, hostname, ttl):
+        self._cache[ip] = (self._clock() + ttl, hostname)
+        self._cache.move_to_end(ip)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _ptr(self, ip):
+        started = time.monotonic()
+        try:
+            hostname = self._lookup(ip)[0].rstrip('.')
+        except (OSError, UnicodeError, ValueError):
+            # No PTR, resolver failure, or not an IP address at all
+            hostname = None
+        dns_rdns_lookup_seconds.observe(time.monotonic() - started)
         return hostname
-    except (socket.herror, socket.gaierror, socket.timeout):
-        # If reverse lookup fails, use IP as hostname
-        hostname_cache[ip_address] = ip_address
-        return ip_address
 
+    def _done(self, ip, future):
+        hostname = future.result()
+        with self._lock:
+            self._pending.pop(ip, None)
+            self._put(ip, hostname, self.positive_ttl if hostname else self.negative_ttl)
+
+    def resolve(self, ips):
+        """Map each IP to its hostname, or to itself when it has none."""
+        now = self._clock()
+        out = {}
+        futures = []
+        with self._lock:
+            for ip in set(ips):
+                found, hostname = self._get(ip, now)
+                if found:
+                    self.hits += 1
+                    out[ip] = hostname or ip
+                    continue
+                self.misses += 1
+                future = self._pending.get(ip)
+                if future is None:
+                    future = self._pool.submit(self._ptr, ip)
+                    self._pending[ip] = future
+                    future.add_done_callback(lambda f, ip=ip: self._done(ip, f))
+                futures.append((ip, future))
+
+        if futures:
+            wait([f for _, f in futures], timeout=self.timeout)
+        timed_out = 0
+        with self._lock:
+            for ip, future in futures:
+                if future.done():
+                    out[ip] = future.result() or ip
+                else:
+                    timed_out += 1
+                    out[ip] = ip
+                    self._put(ip, None, min(self.negative_ttl, 60))
+            lookups = self.hits + self.misses
+            dns_rdns_cache_entries.set(len(self._cache))
+            dns_rdns_cache_hit_ratio.set(self.hits / lookups if lookups else 0)
+        hits = len(out) - len(futures)
+        if hits:
+            dns_rdns_cache_requests_total.labels(result='hit').inc(hits)
+        if futures:
+            dns_rdns_cache_requests_total.labels(result='miss').inc(len(futures))
+        if timed_out:
+            dns_rdns_lookup_timeouts_total.inc(timed_out)
+        return out
+
+
+resolver = ReverseResolver()
+
+
+def get_hostname(ip_address):
+    """Get hostname for IP address via reverse DNS lookup (cached)."""
+    return resolver.resolve([ip_address])[ip_address]
+
+
+def load_cursor():
+    """Load the high-water cursor: the last row pushed and its timestamp.
 
-def get_last_row_number():
-    """Get the last processed row number from state file."""
+    The state file holds {"row": N, "ts": "<iso8601>"}; a bare row number is
+    the pre-cursor format and comes back with ts None. None means there is no
+    state file at all (first start).
+    """
+    try:
+        with open(STATE_FILE, 'r') as f:
+            raw = f.read().strip()
+    except FileNotFoundError:
+        return None
+    except OSError:
+        return {'row': 0, 'ts': None}
     try:
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, 'r') as f:
-                return int(f.read().strip())
-    except (FileNotFoundError, ValueError):
-        pass
-    return 0
-
-
-def save_last_row_number(row_number):
-    """Save the last processed row number to state file."""
-    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
-    with open(STATE_FILE, 'w') as state_file:
-        state_file.write(str(row_number))
+        state = json.loads(raw)
+    except ValueError:
+        return {'row': 0, 'ts': None}
+    if isinstance(state, int):
+        return {'row': state, 'ts': None}
+    if isinstance(state, dict) and isinstance(state.get('row'), int):
+        return {'row': state['row'], 'ts': state.get('ts')}
+    return {'row': 0, 'ts': None}
+
+
+def save_cursor(cursor):
+    """Persist the cursor atomically (temp file, fsync, rename).
+
+    A crash leaves either the previous cursor or the new one, never a torn
+    file that would restart the export from row 0.
+    """
+    directory = os.path.dirname(STATE_FILE) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{STATE_FILE}.tmp"
+    with open(tmp, 'w') as state_file:
+        json.dump({'row': cursor['row'], 'ts': cursor['ts']}, state_file)
+        state_file.flush()
+        os.fsync(state_file.fileno())
+    os.replace(tmp, STATE_FILE)
     # Update Prometheus gauge
-    dns_query_log_last_row.set(row_number)
+    dns_query_log_last_row.set(cursor['row'])
+
 
+def fetch_query_logs(page_number=1, entries_per_page=BATCH_SIZE, descending=True):
+    """Fetch query logs from Technitium DNS API.
 
-def fetch_query_logs(page_number=1, entries_per_page=BATCH_SIZE):
-    """Fetch query logs from Technitium DNS API."""
+    Newest first by default; descending=False pages forward from the oldest
+    retained row, which is how the cursor reads without losing rows.
+    """
     global current_consecutive_failures
 
     try:
@@ -146,6 +389,7 @@ def fetch_query_logs(page_number=1, entries_per_page=BATCH_SIZE):
             'classPath': CLASS_PATH,
             'pageNumber': page_number,
             'entriesPerPage': entries_per_page,
+            'descendingOrder': 'true' if descending else 'false',
         }
 
         response = requests.get(url, params=params, timeout=10)
@@ -202,148 +446,518 @@ def fetch_query_logs(page_number=1, entries_per_page=BATCH_SIZE):
         return None
 
 
-def format_loki_push(entries):
+def _label_value(value):
+    """Escape a label value for Loki's {k="v"} selector syntax."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+@lru_cache(maxsize=65536)
+def stream_key(labels):
+    """The Loki label string for a sorted ((name, value), ...) tuple.
+
+    Computed once per distinct label set; the protobuf push carries it as-is
+    and the JSON fallback rebuilds the map from the tuple, so nothing is ever
+    parsed back out of a string.
     """
-    Format log entries for Loki push API.
-    Returns dict in Loki push API format with streams grouped by labels.
+    return '{' + ', '.join(f'{k}="{_label_value(v)}"' for k, v in labels) + '}'
+
+
+def _timestamp_ns(value):
+    ts = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    # Whole seconds and microseconds separately: float nanoseconds lose the
+    # last digits and would reorder entries that share a millisecond.
+    return int(ts.replace(microsecond=0).timestamp()) * 1_000_000_000 + ts.microsecond * 1000
+
+
+def group_streams(entries):
+    """
+    Group log entries into Loki streams: {labels tuple: [(ts_ns, line), ...]}.
     Also updates Prometheus metrics for each entry.
     """
-    # Group entries by label set
     streams = {}
 
+    # Resolve the batch's distinct client IPs in parallel up front
+    hostnames = resolver.resolve(entry['clientIpAddress'] for entry in entries)
+
     for entry in entries:
-        # Get hostname for client IP
-        client_hostname = get_hostname(entry['clientIpAddress'])
-
-        # Extract metrics labels (combined to reduce variables)
-        labels = {
-            'job': 'dns_query_logs',
-            'client_ip': entry['clientIpAddress'],
-            'client_hostname': client_hostname,
-            'protocol': entry['protocol'].lower(),
-            'rcode': entry['rcode'].lower(),
-            'qtype': entry['qtype'].upper(),
-            'response_type': entry['responseType'].lower(),
-        }
+        client_ip = entry['clientIpAddress']
+        protocol = entry['protocol'].lower()
+        rcode = entry['rcode'].lower()
+        qtype = entry['qtype'].upper()
 
         # Update Prometheus counter (aggregate only -- domain/client_ip/client_hostname
         # stay in the Loki stream/log line below, NOT on the metric, to keep cardinality low)
-        dns_queries_total.labels(
-            rcode=labels['rcode'],
-            qtype=labels['qtype'],
-            protocol=labels['protocol'],
-        ).inc()
-
-        # Create label string (sorted for consistency)
-        label_str = '{' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items())) + '}'
-
-        # Convert timestamp to nanoseconds since epoch and create log line
-        timestamp = datetime.fromisoformat(entry['timestamp'].replace('Z', '+00:00'))
-        ts_ns = str(int(timestamp.timestamp() * 1_000_000_000))
+        dns_queries_total.labels(rcode=rcode, qtype=qtype, protocol=protocol).inc()
+
+        # Sorted by label name, so equal label sets are equal tuples
+        labels = (
+            ('client_hostname', hostnames[client_ip]),
+            ('client_ip', client_ip),
+            ('job', 'dns_query_logs'),
+            ('protocol', protocol),
+            ('qtype', qtype),
+            ('rcode', rcode),
+            ('response_type', entry['responseType'].lower()),
+        )
         log_line = json.dumps({
             'domain': entry['qname'],
             'answer': entry.get('answer'),
             'qclass': entry['qclass'],
         })
+        streams.setdefault(labels, []).append((_timestamp_ns(entry['timestamp']), log_line))
+    return streams
 
-        # Add to appropriate stream
-        if label_str not in streams:
-            streams[label_str] = []
-        streams[label_str].append([ts_ns, log_line])
-
-    # Convert to Loki format
-    loki_streams = []
-    for label_str, values in streams.items():
-        # Parse label string back to dict (format: {key1="val1",key2="val2"})
-        labels_dict = {
-            pair.split('=', 1)[0]: pair.split('=', 1)[1].strip('"')
-            for pair in label_str.strip('{}').split(',')
-        }
-        loki_streams.append({'stream': labels_dict, 'values': values})
 
-    return {'streams': loki_streams}
+def _varint(n):
+    out = bytearray()
+    while n > 0x7f:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
 
 
-def push_to_loki(loki_data):
-    """Push formatted data to Loki."""
-    try:
-        url = f"{LOKI_URL}/loki/api/v1/push"
-        headers = {'Content-Type': 'application/json'}
+def _pb_bytes(field, payload):
+    """A length-delimited protobuf field (wire type 2)."""
+    return _varint(field << 3 | 2) + _varint(len(payload)) + payload
 
-        response = requests.post(url, json=loki_data, headers=headers, timeout=10)
-        response.raise_for_status()
+
+def encode_protobuf(streams):
+    """Encode streams as Loki's logproto.PushRequest.
+
+    PushRequest{1: repeated StreamAdapter}, StreamAdapter{1: labels string,
+    2: repeated EntryAdapter}, EntryAdapter{1: Timestamp, 2: line string},
+    Timestamp{1: int64 seconds, 2: int32 nanos}. Hand-encoded: four messages
+    do not justify a protobuf runtime and generated code.
+    """
+    out = bytearray()
+    for labels, values in streams.items():
+        stream = bytearray(_pb_bytes(1, stream_key(labels).encode()))
+        for ts_ns, line in values:
+            seconds, nanos = divmod(ts_ns, 1_000_000_000)
+            ts = _varint(1 << 3) + _varint(seconds)
+            if nanos:
+                ts += _varint(2 << 3) + _varint(nanos)
+            stream += _pb_bytes(2, _pb_bytes(1, ts) + _pb_bytes(2, line.encode()))
+        out += _pb_bytes(1, bytes(stream))
+    return bytes(out)
+
+
+def encode_json(streams):
+    """Encode streams as Loki's JSON push body."""
+    return json.dumps({'streams': [
+        {'stream': dict(labels), 'values': [[str(ts_ns), line] for ts_ns, line in values]}
+        for labels, values in streams.items()
+    ]}, separators=(',', ':')).encode()
+
+
+# Push encodings: (content type, extra headers, spool file suffix, encoder).
+# snappy-compressed protobuf is Loki's native format; gzipped JSON is the
+# fallback when python-snappy is not installed.
+ENCODINGS = {
+    'snappy': ('application/x-protobuf', {}, '.pb.sz',
+               lambda streams: snappy.compress(encode_protobuf(streams))),
+    'gzip': ('application/json', {'Content-Encoding': 'gzip'}, '.json.gz',
+             lambda streams: gzip.compress(encode_json(streams), compresslevel=5)),
+}
+
+
+def _retryable(status):
+    """Loki rate limiting and server-side failures are worth retrying. Any
+    other 4xx (out of order, too old, line too long) fails the same way
+    forever, so those entries are counted as dropped instead."""
+    return status == 429 or status >= 500
+
+
+class LokiClient:
+    """Batching Loki push client with retries and an on-disk spool.
+
+    add() groups entries into the current batch; should_flush() reports when
+    it has reached max_bytes or max_age, and due_in() how long until the age
+    limit, so a batch can stay open across polls. flush() sends the batch over one
+    keep-alive session, retrying 429/5xx and connection errors with
+    exponential backoff. A batch that still cannot be delivered is written to
+    the spool directory -- fsynced, oldest evicted past spool_max_bytes -- and
+    replayed in order before anything newer, so a Loki outage costs nothing
+    unless it outlasts the spool. While the spool is non-empty, new batches
+    queue behind it to keep each stream's entries in order. A spooled batch
+    keeps the encoding its suffix names, so a spool left by a run with the
+    other encoding (python-snappy installed or removed since) is still
+    replayed, bounded and counted.
+    """
+
+    def __init__(self, url=LOKI_URL, encoding=None, max_bytes=LOKI_BATCH_BYTES,
+                 max_age=LOKI_BATCH_AGE, max_retries=LOKI_MAX_RETRIES, backoff=0.5,
+                 spool_dir=LOKI_SPOOL_DIR, spool_max_bytes=LOKI_SPOOL_MAX_BYTES, timeout=10):
+        self.url = f"{url}/loki/api/v1/push"
+        self.encoding = encoding or ('snappy' if snappy is not None else 'gzip')
+        self.content_type, self.headers, self.suffix, self.encode = ENCODINGS[self.encoding]
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.spool_dir = spool_dir
+        self.spool_max_bytes = spool_max_bytes
+        os.makedirs(spool_dir, exist_ok=True)
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': self.content_type, **self.headers})
+        self._batch = {}
+        self._batch_entries = 0
+        self._batch_bytes = 0
+        self._batch_started = None
+        self._spool_seq = 0
+        self._update_spool_gauges()
+
+    # ---- batching ----
+
+    def add(self, entries):
+        for labels, values in group_streams(entries).items():
+            self._batch.setdefault(labels, []).extend(values)
+            # Approximate uncompressed size: line + timestamp + per-entry framing
+            self._batch_bytes += sum(len(line) + 16 for _, line in values)
+            self._batch_entries += len(values)
+        if self._batch_started is None and self._batch:
+            self._batch_started = time.monotonic()
+
+    @property
+    def pending(self):
+        """Entries added since the last flush."""
+        return self._batch_entries
+
+    def should_flush(self):
+        return bool(self._batch) and (
+            self._batch_bytes >= self.max_bytes
+            or time.monotonic() - self._batch_started >= self.max_age)
+
+    def due_in(self):
+        """Seconds until the open batch reaches max_age; None if there is none."""
+        if not self._batch:
+            return None
+        return max(0.0, self._batch_started + self.max_age - time.monotonic())
+
+    def flush(self):
+        """Deliver or spool the current batch; True once it is durable.
+
+        The batch is cleared either way: on False the caller has not advanced
+        its cursor, so it will read the same rows again.
+        """
+        if not self._batch:
+            return self.drain_spool()
+        started = time.process_time()
+        body = self.encode(self._batch)
+        dns_loki_encode_seconds_total.inc(time.process_time() - started)
+        count = self._batch_entries
+        self._batch, self._batch_entries, self._batch_bytes = {}, 0, 0
+        self._batch_started = None
+
+        if self._spool_files():
+            # Keep order: queue behind what is already waiting.
+            if not self._spool(body, count):
+                return False
+            return self.drain_spool()
+        status = self._send(body, count, retries=self.max_retries)
+        if status in ('ok', 'rejected'):
+            return True
+        return self._spool(body, count)
+
+    # ---- sending ----
+
+    def _send(self, body, count, retries, encoding=None):
+        """POST one body; returns 'ok', 'rejected' or 'failed'.
+
+        `encoding` is the body's when it is not this client's (a spooled
+        batch); its headers replace the session's for this request.
+        """
+        encoding = encoding or self.encoding
+        headers = None
+        if encoding != self.encoding:
+            content_type, extra, _, _ = ENCODINGS[encoding]
+            # None drops a session header the other encoding does not send
+            headers = {**{k: None for k in self.headers}, 'Content-Type': content_type, **extra}
+        delay = self.backoff
+        for attempt in range(retries + 1):
+            started = time.monotonic()
+            try:
+                response = self.session.post(self.url, data=body, headers=headers,
+                                             timeout=self.timeout)
+                status = response.status_code
+                detail = response.text[:200] if status >= 300 else ''
+            except requests.exceptions.RequestException as error:
+                status, detail = None, str(error)
+            dns_loki_push_seconds.observe(time.monotonic() - started)
+
+            if status is not None and status < 300:
+                dns_loki_push_requests_total.labels(outcome='ok').inc()
+                dns_loki_push_bytes_total.labels(encoding=encoding).inc(len(body))
+                dns_loki_push_entries_total.inc(count)
+                return 'ok'
+            if status is not None and not _retryable(status):
+                print(f"Loki rejected {count} entries ({status}): {detail}", file=sys.stderr)
+                dns_loki_push_requests_total.labels(outcome='rejected').inc()
+                dns_query_log_dropped_rows_total.inc(count)
+                return 'rejected'
+            dns_loki_push_requests_total.labels(outcome='retryable').inc()
+            if attempt < retries:
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+        print(f"Failed to push to Loki: {status or ''} {detail}".rstrip(), file=sys.stderr)
+        return 'failed'
+
+    # ---- spool ----
+
+    def _spool_files(self):
+        try:
+            names = os.listdir(self.spool_dir)
+        except FileNotFoundError:
+            return []
+        # Both encodings' suffixes; the time_ns prefix keeps them in order.
+        return sorted(n for n in names if self._spooled_encoding(n))
+
+    @staticmethod
+    def _spooled_encoding(name):
+        return next((encoding for encoding, (_, _, suffix, _) in ENCODINGS.items()
+                     if name.endswith(suffix)), None)
+
+    def _update_spool_gauges(self):
+        files = self._spool_files()
+        dns_loki_spool_batches.set(len(files))
+        dns_loki_spool_bytes.set(sum(
+            os.path.getsize(os.path.join(self.spool_dir, n)) for n in files))
+
+    @staticmethod
+    def _spooled_count(name):
+        # <time_ns>-<seq>-<entries><suffix>
+        return int(name.split('-')[2].split('.')[0])
+
+    def _spool(self, body, count):
+        """Write one undelivered body to the spool; False if that failed too."""
+        self._spool_seq += 1
+        name = f"{time.time_ns():020d}-{self._spool_seq:06d}-{count}{self.suffix}"
+        path = os.path.join(self.spool_dir, name)
+        try:
+            with open(path + '.tmp', 'wb') as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+        except OSError as error:
+            print(f"Failed to spool Loki batch: {error}", file=sys.stderr)
+            return False
+
+        # Bound the spool: the oldest batches go first, and are counted.
+        files = self._spool_files()
+        sizes = {n: os.path.getsize(os.path.join(self.spool_dir, n)) for n in files}
+        total = sum(sizes.values())
+        for old in files[:-1]:
+            if total <= self.spool_max_bytes:
+                break
+            os.unlink(os.path.join(self.spool_dir, old))
+            total -= sizes[old]
+            dropped = self._spooled_count(old)
+            print(f"WARNING: Loki spool full, discarding {dropped} entries", file=sys.stderr)
+            dns_query_log_dropped_rows_total.inc(dropped)
+        self._update_spool_gauges()
         return True
-    except requests.exceptions.RequestException as error:
-        print(f"Failed to push to Loki: {error}", file=sys.stderr)
-        return False
 
+    def drain_spool(self):
+        """Replay spooled batches oldest first; stops at the first failure.
+
+        One attempt per batch and no backoff: the next poll tries again, and
+        a spool that is still draining must not stall reading new rows.
+        """
+        for name in self._spool_files():
+            path = os.path.join(self.spool_dir, name)
+            with open(path, 'rb') as f:
+                body = f.read()
+            if self._send(body, self._spooled_count(name), retries=0,
+                          encoding=self._spooled_encoding(name)) == 'failed':
+                break
+            os.unlink(path)
+        self._update_spool_gauges()
+        return True
 
-def process_new_logs():
-    """Fetch and process new logs since last run."""
-    last_row = get_last_row_number()
 
-    # Fetch first page to get total count
-    data = fetch_query_logs(page_number=1, entries_per_page=1)
-    if not data or not data.get('entries'):
-        return
+loki = None
+# Position of the last row in loki's open batch. A batch may stay open across
+# polls until it reaches LOKI_BATCH_AGE or LOKI_BATCH_BYTES; the next poll
+# reads on from here rather than from the saved cursor, which only moves once
+# the batch is durable. Lost on restart, and then those rows are read again.
+read_ahead = None
+
+
+def _parse_ts(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
 
-    latest_row = data['entries'][0]['rowNumber']
+def process_new_logs(deadline=None):
+    """Page forward from the cursor until caught up or out of time.
+
+    Pages by row number alone. Reading oldest-first, rows Technitium writes
+    meanwhile land behind the pages still to be read instead of shifting them;
+    row numbers are contiguous, so the page holding the cursor is computed
+    from the oldest retained row. Retention purging that oldest row is the
+    one thing that shifts ascending pages, and it shows up as a page that does
+    not continue from the cursor -- the oldest row is probed again and the
+    page recomputed. A time filter (`start`) is deliberately not used:
+    Technitium may number the rows of a filtered result from 1, and then its
+    row numbers cannot be compared with the cursor.
+
+    Pages go into loki's batch, which is flushed and committed to the cursor
+    whenever it is full or old enough -- mid-poll, at the end of the poll, or
+    polls later; until then the next poll continues from `read_ahead`. A
+    failed push leaves the cursor where it was and the rows are read again.
+    The only rows the cursor ever skips are ones Technitium no longer has --
+    it points before the oldest row -- and those are counted in
+    dns_query_log_dropped_rows_total.
+
+    Returns (rows_pushed, state): rows from this poll that are durable or in
+    the open batch, and one of 'caught_up', 'behind' (the time budget ran out)
+    or 'failed' (a fetch or push failed).
+    """
+    global read_ahead
+    deadline = deadline or time.monotonic() + POLL_TIME_BUDGET
+    cursor = load_cursor()
+    # Batches spooled during a Loki outage go out before anything newer
+    loki.drain_spool()
+
+    # Head probe: the newest row, for reset detection and the lag gauge
+    data = fetch_query_logs(page_number=1, entries_per_page=1)
+    if data is None:
+        return 0, 'failed'
+    if not data.get('entries'):
+        return 0, 'caught_up'
+    head = data['entries'][0]
+
+    if cursor is None:
+        # First start: export from the newest page on rather than replaying
+        # the resolver's whole retained history into Loki.
+        cursor = {'row': max(0, head['rowNumber'] - BATCH_SIZE), 'ts': None}
+
+    # Rows added to the Loki batch but not yet durable; the saved cursor only
+    # moves to `read` once loki.flush() has delivered or spooled them.
+    if read_ahead is not None and loki.pending:
+        read = dict(read_ahead)
+    else:
+        read = dict(cursor)
 
     # Check if row numbers have reset (database was cleared or rows wrapped)
-    if latest_row < last_row:
+    if head['rowNumber'] < read['row']:
         warning_msg = (
-            f"WARNING: Row numbers decreased (latest={latest_row}, "
-            f"last={last_row}). Database may have been reset."
+            f"WARNING: Row numbers decreased (latest={head['rowNumber']}, "
+            f"last={read['row']}). Database may have been reset."
         )
         print(warning_msg)
         print("Resetting state to process from row 0")
-        last_row = 0
-        save_last_row_number(0)
-
-    if latest_row <= last_row:
-        # No new logs
-        return
+        # The open batch holds rows from before the reset; send them as they are.
+        loki.flush()
+        cursor = {'row': 0, 'ts': None}
+        save_cursor(cursor)
+        read = dict(cursor)
 
-    # Calculate how many new entries we have
-    new_entries_count = latest_row - last_row
+    backlog = head['rowNumber'] - read['row']
     # Only log when processing a significant number of entries (reduces noise)
-    if new_entries_count >= 100:
-        print(f"Found {new_entries_count} new log entries (rows {last_row + 1} to {latest_row})")
-
-    # Fetch new entries in batches
-    # Note: API returns newest first, we need to fetch from page 1
-    new_entries = []
-    pages_to_fetch = min((new_entries_count // BATCH_SIZE) + 1, 10)  # Limit to 10 pages max
+    if backlog >= 1000:
+        print(f"Found {backlog} new log entries (rows {read['row'] + 1} to {head['rowNumber']})")
+
+    pushed = 0
+    batched = 0
+    state = 'behind' if backlog > 0 else 'caught_up'
+    oldest = None
+
+    def commit():
+        nonlocal cursor, read, pushed, batched
+        if not loki.pending:
+            return True
+        if not loki.flush():
+            print(f"Failed to push rows {cursor['row'] + 1}..{read['row']}", file=sys.stderr)
+            # Don't advance the cursor past an undelivered batch; the next
+            # poll reads these rows again.
+            read, batched = dict(cursor), 0
+            return False
+        cursor = dict(read)
+        save_cursor(cursor)
+        pushed += batched
+        batched = 0
+        return True
 
-    for page in range(1, pages_to_fetch + 1):
-        data = fetch_query_logs(page_number=page, entries_per_page=BATCH_SIZE)
-        if not data or not data.get('entries'):
+    while state == 'behind' and time.monotonic() < deadline:
+        probed = oldest is None
+        if probed:
+            data = fetch_query_logs(page_number=1, entries_per_page=1, descending=False)
+            if data is None:
+                state = 'failed'
+                break
+            if not data.get('entries'):
+                state = 'caught_up'
+                break
+            oldest = data['entries'][0]['rowNumber']
+
+        page = max(0, read['row'] + 1 - oldest) // BATCH_SIZE + 1
+        data = fetch_query_logs(page_number=page, entries_per_page=BATCH_SIZE, descending=False)
+        if data is None:
+            state = 'failed'
             break
-
-        for entry in data['entries']:
-            if entry['rowNumber'] > last_row:
-                new_entries.append(entry)
-            else:
-                break  # Stop when we reach old entries
-
-        if len(new_entries) >= new_entries_count:
+        entries = sorted((e for e in data.get('entries') or [] if e['rowNumber'] > read['row']),
+                         key=lambda e: e['rowNumber'])
+        if not entries or entries[0]['rowNumber'] != max(read['row'] + 1, oldest):
+            if not probed:
+                # Purged since the probe: the pages moved down. Re-probe.
+                oldest = None
+                continue
+            if not entries:
+                state = 'caught_up'
+                break
+        gap = entries[0]['rowNumber'] - read['row'] - 1
+        if gap > 0 and read['row']:
+            print(f"WARNING: rows {read['row'] + 1}..{entries[0]['rowNumber'] - 1} "
+                  "were purged before they could be exported", file=sys.stderr)
+            dns_query_log_dropped_rows_total.inc(gap)
+
+        loki.add(entries)
+        read = {'row': entries[-1]['rowNumber'], 'ts': entries[-1]['timestamp']}
+        batched += len(entries)
+        if loki.should_flush() and not commit():
+            state = 'failed'
+            break
+        if read['row'] >= head['rowNumber']:
+            state = 'caught_up'
             break
 
-    if new_entries:
-        # Sort entries oldest first for proper Loki ingestion
-        new_entries.sort(key=lambda x: x['rowNumber'])
+    # A batch that is not yet due stays open for the next poll; main() wakes
+    # up in time to flush it once it is.
+    if loki.should_flush() and not commit():
+        state = 'failed'
+    read_ahead = dict(read) if loki.pending else None
+
+    behind = max(0, head['rowNumber'] - cursor['row'])
+    dns_query_log_lag_rows.set(behind)
+    if behind and cursor['ts']:
+        dns_query_log_lag_seconds.set(
+            max(0.0, time.time() - _parse_ts(cursor['ts']).timestamp()))
+    else:
+        dns_query_log_lag_seconds.set(0)
+    return pushed + batched, state
 
-        # Push to Loki in batches of 100
-        for i in range(0, len(new_entries), 100):
-            batch = new_entries[i:i+100]
-            loki_data = format_loki_push(batch)
 
-            if not push_to_loki(loki_data):
-                print(f"Failed to push batch {i//100 + 1}", file=sys.stderr)
-                return  # Don't update state if push failed
+def next_poll_interval(interval, pushed, state):
+    """Adapt the poll interval to the backlog.
 
-        # Update state with latest row (silently to reduce log noise)
-        save_last_row_number(new_entries[-1]['rowNumber'])
+    Still behind: come straight back. Caught up after real work: halve it, the
+    resolver is busy. Nothing new: back off by half again up to the maximum.
+    A failure returns to the configured POLL_INTERVAL, so an outage is neither
+    hammered every second nor left for a minute once it clears -- and the
+    fail-fast count keeps its old pace.
+    """
+    if state == 'failed':
+        return float(POLL_INTERVAL)
+    if state == 'behind':
+        return POLL_INTERVAL_MIN
+    if pushed >= BATCH_SIZE:
+        return max(POLL_INTERVAL_MIN, interval / 2)
+    if pushed == 0:
+        return min(POLL_INTERVAL_MAX, interval * 1.5)
+    return interval
 
 
 def validate_environment():
@@ -379,13 +993,19 @@ def validate_environment():
 
 def main():
     """Main loop."""
+    global loki
+
     # Validate environment before starting
     validate_environment()
 
     print("DNS Query Log Exporter starting...")
     print(f"Technitium URL: {TECHNITIUM_URL}")
     print(f"Loki URL: {LOKI_URL}")
-    print(f"Poll interval: {POLL_INTERVAL}s")
+    loki = LokiClient()
+    print(f"Loki push: {loki.encoding}, batches up to {LOKI_BATCH_BYTES} bytes / {LOKI_BATCH_AGE}s, "
+          f"spool {LOKI_SPOOL_DIR} (max {LOKI_SPOOL_MAX_BYTES} bytes)")
+    print(f"Poll interval: {POLL_INTERVAL}s (adaptive {POLL_INTERVAL_MIN}-{POLL_INTERVAL_MAX}s, "
+          f"{POLL_TIME_BUDGET}s catch-up budget)")
     print(f"State file: {STATE_FILE}")
     print(f"Metrics port: {METRICS_PORT}")
     print(f"Fail-fast threshold: {MAX_CONSECUTIVE_FAILURES} consecutive failures")
@@ -399,18 +1019,26 @@ def main():
         sys.exit(1)
 
     # Initialize the last row gauge on startup
-    last_row = get_last_row_number()
-    dns_query_log_last_row.set(last_row)
-    print(f"Starting from row {last_row}")
+    cursor = load_cursor()
+    if cursor is None:
+        print("No saved cursor; starting from the newest rows")
+    else:
+        dns_query_log_last_row.set(cursor['row'])
+        print(f"Starting from row {cursor['row']}")
 
+    interval = float(POLL_INTERVAL)
     while True:
         try:
-            process_new_logs()
+            pushed, state = process_new_logs()
+            interval = next_poll_interval(interval, pushed, state)
         except Exception as error:
             print(f"Error processing logs: {error}", file=sys.stderr)
             traceback.print_exc()
+            interval = float(POLL_INTERVAL)
 
-        time.sleep(POLL_INTERVAL)
+        dns_query_log_poll_interval_seconds.set(interval)
+        due = loki.due_in()
+        time.sleep(interval if due is None else min(interval, due))
 
 
 if __name__ == '__main__':
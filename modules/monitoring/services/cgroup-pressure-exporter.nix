@@ -7,9 +7,10 @@
 
 let
   textfileDir = "/var/lib/prometheus-node-exporter-textfiles";
+  textfileExporter = import ../textfile-exporter-lib.nix { inherit pkgs; };
 
   exporter = pkgs.writers.writePython3Bin "cgroup-pressure-exporter" {
-    libraries = [ ];
+    libraries = [ textfileExporter ];
     flakeIgnore = [ "E501" ]; # long explanatory lines in the module docstring
   } (builtins.readFile ../../../scripts/cgroup-pressure-exporter.py);
 in
@@ -57,9 +58,17 @@ in
 
   systemd.services.cgroup-pressure-exporter = {
     description = "Export per-cgroup PSI stall totals to a node-exporter textfile";
+    wantedBy = [ "multi-user.target" ];
     after = [ "prometheus-node-exporter.service" ];
+    # PSI totals are monotonic counters, so the cadence only bounds the resolution of
+    # rate()/increase() over them. 60s matches microvm-resource-exporter.nix (the other
+    # cgroup reader) and costs ~20 small /sys reads per pass. A stall episode shorter than
+    # a minute still shows up -- the counter accumulates it either way; only the shape is
+    # smoothed. Resident (--daemon, scripts/textfile_exporter.py) rather than a timer, so
+    # the unit -> cgroup paths stay resolved and steady state makes no systemctl calls.
+    environment.INTERVAL_SECONDS = "60";
     serviceConfig = {
-      Type = "oneshot";
+      Type = "simple";
       # Runs as prometheus, NOT root and NOT DynamicUser. Root is unnecessary: every input
       # (/sys/fs/cgroup/<cg>/{memory,io,cpu}.pressure, memory.events, memory.{current,high,
       # max}) is world-readable and `systemctl show -p ControlGroup` needs no privilege --
@@ -68,8 +77,9 @@ in
       # rename(2) over a .prom file left behind by a previous run.
       User = "prometheus";
       Group = "prometheus";
-      ExecStart = "${lib.getExe exporter}";
-      TimeoutStartSec = "1m";
+      ExecStart = "${lib.getExe exporter} --daemon";
+      Restart = "always";
+      RestartSec = "30s";
 
       # Hardening: a handful of /sys reads and one file write.
       ProtectSystem = "strict";
@@ -88,19 +98,4 @@ in
     };
     path = [ pkgs.systemd ];
   };
-
-  systemd.timers.cgroup-pressure-exporter = {
-    description = "Timer for per-cgroup PSI collection";
-    wantedBy = [ "timers.target" ];
-    timerConfig = {
-      # PSI totals are monotonic counters, so the cadence only bounds the resolution of
-      # rate()/increase() over them. 60s matches microvm-resource-exporter.nix (the other
-      # cgroup reader) and costs ~20 small /sys reads per run. A stall episode shorter than
-      # a minute still shows up -- the counter accumulates it either way; only the shape is
-      # smoothed.
-      OnBootSec = "2min";
-      OnUnitActiveSec = "60s";
-      Unit = "cgroup-pressure-exporter.service";
-    };
-  };
 }
@@ -40,7 +40,10 @@ let
   # (/var/lib/prometheus-node-exporter-textfiles/, picked up by job=node), the
   # same idiom as system-age-exporter.nix / openclaw-config-drift-check.nix.
   # Alerts live in modules/monitoring/alerts/config-drift.yaml.
+  textfileExporter = import ../textfile-exporter-lib.nix { inherit pkgs; };
+
   driftScript = pkgs.writers.writePython3Bin "config-drift-exporter" {
+    libraries = [ textfileExporter ];
     flakeIgnore = [
       "E501" # long lines (HELP text + dict literals)
       "W503" # line break before binary operator
@@ -58,6 +61,7 @@ in
 
   systemd.services.config-drift-exporter = {
     description = "Crown-jewel config-drift textfile exporter";
+    wantedBy = [ "multi-user.target" ];
     # Needs system_age.prom present (the generation deploy anchor) and the
     # textfile dir created.
     after = [
@@ -67,12 +71,20 @@ in
     # git binary is needed by the script for the uncommitted-changes gauge;
     # under ProtectSystem=strict the unit PATH excludes the system profile.
     path = [ pkgs.git ];
+    # Hourly drift and git passes, as the timer this replaced ran. Resident (--daemon):
+    # baselines stay in memory and are re-read only when config-drift-rebaseline
+    # rewrites them, so an approval is never overwritten by a stale in-memory copy.
+    environment = {
+      DRIFT_INTERVAL_SECONDS = "3600";
+      GIT_INTERVAL_SECONDS = "3600";
+    };
     serviceConfig = {
-      Type = "oneshot";
+      Type = "simple";
       User = "root";
       Group = "root";
-      ExecStart = "${driftScript}/bin/config-drift-exporter";
-      TimeoutStartSec = "120s";
+      ExecStart = "${driftScript}/bin/config-drift-exporter --daemon";
+      Restart = "always";
+      RestartSec = "30s";
       # Hardening mirrors system-age-exporter.nix / openclaw-config-drift-check.
       # Runs as root: must read root-0600 /var/lib/hass/configuration.yaml and
       # the SOPS ciphertext. It can write nothing it reads back except its own
@@ -93,18 +105,6 @@ in
     };
   };
 
-  systemd.timers.config-drift-exporter = {
-    description = "Hourly crown-jewel config-drift check";
-    wantedBy = [ "timers.target" ];
-    timerConfig = {
-      OnBootSec = "8min";
-      OnUnitActiveSec = "1h";
-      Persistent = true;
-      RandomizedDelaySec = "5min";
-      Unit = "config-drift-exporter.service";
-    };
-  };
-
   # Operator approval helper: re-baseline every crown jewel to its current sha
   # (use after a deliberate hand edit that did not ride a rebuild).
   #   systemctl start config-drift-rebaseline.service
@@ -31,16 +31,28 @@ in
       User = "dns-query-exporter";
       Group = "dns-query-exporter";
 
-      # State directory for tracking last processed row
+      # State directory for the high-water cursor (last pushed row + timestamp)
       StateDirectory = "dns-query-exporter";
 
       # Environment variables
       Environment = [
         "TECHNITIUM_URL=http://10.88.0.1:5380"
         "LOKI_URL=http://localhost:3100"
+        # Starting interval; it adapts between POLL_INTERVAL_MIN and
+        # POLL_INTERVAL_MAX with the backlog (see process_new_logs).
         "POLL_INTERVAL=15"
+        "POLL_INTERVAL_MIN=1"
+        "POLL_INTERVAL_MAX=60"
+        "POLL_TIME_BUDGET=10"
         "STATE_FILE=/var/lib/dns-query-exporter/last_row.txt"
         "BATCH_SIZE=100"
+        # Pushes are protobuf+snappy batches of up to 1 MiB or 5 seconds (a
+        # batch stays open across polls until then); batches Loki can't take
+        # are spooled here and replayed in order.
+        "LOKI_BATCH_BYTES=1048576"
+        "LOKI_BATCH_AGE=5"
+        "LOKI_SPOOL_DIR=/var/lib/dns-query-exporter/spool"
+        "LOKI_SPOOL_MAX_BYTES=268435456"
         "METRICS_PORT=9275"
         "PYTHONUNBUFFERED=1"
       ];
@@ -63,6 +75,7 @@ in
         pkgs.python3.withPackages (ps: [
           ps.requests
           ps.prometheus-client
+          ps.python-snappy
         ])
       }/bin/python3 \
         ${dns-query-log-exporter}/bin/dns-query-log-exporter
@@ -6,8 +6,10 @@
 }:
 
 let
+  textfileExporter = import ../textfile-exporter-lib.nix { inherit pkgs; };
+
   exporter = pkgs.writers.writePython3Bin "gitea-push-mirror-exporter" {
-    libraries = [ ];
+    libraries = [ textfileExporter ];
     flakeIgnore = [
       "E501" # long explanatory lines in the module docstring
     ];
@@ -34,17 +36,28 @@ in
       "gitea.service"
     ];
     wants = [ "network-online.target" ];
+    wantedBy = [ "multi-user.target" ];
+
+    # Mirrors sync on an 8h Gitea interval plus a nightly 03:00 sweep; hourly
+    # sampling detects a newly-broken mirror the same morning without hammering
+    # the API (one call per repo, all to localhost). Resident (--daemon) rather
+    # than a timer, so the repo list is fetched every 6h instead of every pass.
+    environment = {
+      INTERVAL_SECONDS = "3600";
+      REPO_CACHE_SECONDS = "21600";
+    };
 
     serviceConfig = {
-      Type = "oneshot";
+      Type = "simple";
       User = "root";
       # Sanctioned secret path: the token is read from the credential directory by
       # the exporter itself and is never written to a metric, label, or log line.
       LoadCredential = "gitea-token:${config.sops.secrets."gitea-mirror-token".path}";
-      ExecStart = lib.getExe exporter;
-      # A partial pass exits non-zero on purpose, so failure is loud rather than
-      # silently publishing an incomplete set.
-      TimeoutStartSec = "5m";
+      ExecStart = "${lib.getExe exporter} --daemon";
+      # A partial pass publishes scrape_success=0 rather than an incomplete set
+      # that looks whole; GiteaPushMirrorExporterFailing keys on it.
+      Restart = "always";
+      RestartSec = "30s";
 
       # Hardening: this only needs to read one credential, talk to localhost Gitea,
       # and write one file.
@@ -60,19 +73,6 @@ in
     };
   };
 
-  systemd.timers.gitea-push-mirror-exporter = {
-    description = "Timer for Gitea push-mirror outcome metrics";
-    wantedBy = [ "timers.target" ];
-    timerConfig = {
-      # Mirrors sync on an 8h Gitea interval plus a nightly 03:00 sweep; hourly
-      # sampling detects a newly-broken mirror the same morning without hammering
-      # the API (one call per repo, all to localhost).
-      OnCalendar = "hourly";
-      RandomizedDelaySec = "5m";
-      Persistent = true;
-    };
-  };
-
   # The exporter's own liveness is covered by GiteaPushMirrorExporterStale and
   # GiteaPushMirrorExporterFailing in modules/monitoring/alerts/gitea.yaml, so this
   # monitor cannot itself become the silent failure it was written to prevent.
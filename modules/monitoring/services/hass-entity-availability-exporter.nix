@@ -7,9 +7,10 @@
 
 let
   textfileDir = "/var/lib/prometheus-node-exporter-textfiles";
+  textfileExporter = import ../textfile-exporter-lib.nix { inherit pkgs; };
 
   exporter = pkgs.writers.writePython3Bin "hass-entity-availability-exporter" {
-    libraries = [ ];
+    libraries = [ textfileExporter ];
     flakeIgnore = [ "E501" ]; # long explanatory lines in the module docstring
   } (builtins.readFile ../../../scripts/hass-entity-availability-exporter.py);
 in
@@ -28,17 +29,24 @@ in
 
   systemd.services.hass-entity-availability-exporter = {
     description = "Export Home Assistant entity availability to a node-exporter textfile";
+    wantedBy = [ "multi-user.target" ];
     after = [ "postgresql.service" ];
     wants = [ "postgresql.service" ];
+    # Entity availability changes on the order of minutes at most, and the query costs
+    # 0.21s against the live 3.8M-row states table, so 15 minutes is ample and cheap.
+    # Resident (--daemon) rather than a timer; a pass that finds postgres down publishes
+    # success=0 and the next one retries.
+    environment.INTERVAL_SECONDS = "900";
     serviceConfig = {
-      Type = "oneshot";
+      Type = "simple";
       # Runs as postgres so it can read the recorder database via local peer auth. That is
       # the reason this reads the DB rather than HA's REST API: the API would need a
       # long-lived token plumbed through SOPS for what is a read-only health count.
       User = "postgres";
       Group = "postgres";
-      ExecStart = "${lib.getExe exporter}";
-      TimeoutStartSec = "5m";
+      ExecStart = "${lib.getExe exporter} --daemon";
+      Restart = "always";
+      RestartSec = "30s";
 
       # Hardening: one database read and one file write.
       ProtectSystem = "strict";
@@ -58,16 +66,4 @@ in
     };
     path = [ config.services.postgresql.package ];
   };
-
-  systemd.timers.hass-entity-availability-exporter = {
-    description = "Timer for Home Assistant entity availability collection";
-    wantedBy = [ "timers.target" ];
-    timerConfig = {
-      # Entity availability changes on the order of minutes at most, and the query costs
-      # 0.21s against the live 3.8M-row states table, so 15 minutes is ample and cheap.
-      OnCalendar = "*:0/15";
-      RandomizedDelaySec = "2m";
-      Persistent = true;
-    };
-  };
 }
@@ -24,7 +24,10 @@
 let
   cfg = config.services.hermesFallbackCounter;
 
+  textfileExporter = import ../textfile-exporter-lib.nix { inherit pkgs; };
+
   counterScript = pkgs.writers.writePython3Bin "hermes-fallback-counter" {
+    libraries = [ textfileExporter ];
     flakeIgnore = [
       "E501"
       "W503"
@@ -41,7 +44,8 @@ in
       default = 60;
       description = ''
         Refresh cadence in seconds. Default 60 (1 min); the counter
-        only reads the log file so the cost is negligible.
+        runs resident and reads only what was appended to the log
+        since the previous pass, so the cost is negligible.
       '';
     };
 
@@ -65,21 +69,24 @@ in
 
     systemd.services.hermes-fallback-counter = {
       description = "Hermes errors.log fallback-chain counter";
+      wantedBy = [ "multi-user.target" ];
       after = [ "microvm@hermes.service" ];
 
       environment = {
         HERMES_FALLBACK_LOG_PATH = cfg.logPath;
+        HERMES_FALLBACK_INTERVAL_SECONDS = toString cfg.intervalSeconds;
       };
 
       serviceConfig = {
-        Type = "oneshot";
+        Type = "simple";
         User = "hermes-log-reader";
         Group = "hermes-log-reader";
         # Note: extraGroups = [ "hermes" ] on the user above grants
         # supplementary group access; SupplementaryGroups= here would
         # be the alternative if we didn't want a dedicated user.
-        ExecStart = "${counterScript}/bin/hermes-fallback-counter";
-        TimeoutStartSec = "30s";
+        ExecStart = "${counterScript}/bin/hermes-fallback-counter --daemon";
+        Restart = "always";
+        RestartSec = "30s";
 
         # Hardening
         ProtectSystem = "strict";
@@ -95,18 +102,5 @@ in
         LockPersonality = true;
       };
     };
-
-    systemd.timers.hermes-fallback-counter = {
-      description = "Hermes fallback-chain counter timer";
-      wantedBy = [ "timers.target" ];
-      timerConfig = {
-        OnBootSec = "1min";
-        OnUnitActiveSec = "${toString cfg.intervalSeconds}s";
-        RandomizedDelaySec = "15s";
-        AccuracySec = "5s";
-        Unit = "hermes-fallback-counter.service";
-        Persistent = true;
-      };
-    };
   };
 }
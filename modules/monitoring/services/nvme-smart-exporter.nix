@@ -7,9 +7,10 @@
 
 let
   textfileDir = "/var/lib/prometheus-node-exporter-textfiles";
+  textfileExporter = import ../textfile-exporter-lib.nix { inherit pkgs; };
 
   exporter = pkgs.writers.writePython3Bin "nvme-smart-exporter" {
-    libraries = [ ];
+    libraries = [ textfileExporter ];
     flakeIgnore = [ "E501" ]; # long explanatory lines in the module docstring
   } (builtins.readFile ../../../scripts/nvme-smart-exporter.py);
 in
@@ -30,12 +31,18 @@ in
 
   systemd.services.nvme-smart-exporter = {
     description = "Export boot-NVMe SMART health to a node-exporter textfile";
+    wantedBy = [ "multi-user.target" ];
+    # NVMe wear and media errors change slowly; 15 minutes is ample and keeps admin
+    # passthrough traffic to the controller negligible. Resident (--daemon) rather than a
+    # timer; the first read is splayed by up to 2m, as RandomizedDelaySec used to.
+    environment.INTERVAL_SECONDS = "900";
     serviceConfig = {
-      Type = "oneshot";
+      Type = "simple";
       # Root is required: smartctl needs raw device access for NVMe admin commands.
       User = "root";
-      ExecStart = "${lib.getExe exporter}";
-      TimeoutStartSec = "2m";
+      ExecStart = "${lib.getExe exporter} --daemon";
+      Restart = "always";
+      RestartSec = "30s";
 
       # Hardening: needs one device read and one file write.
       ProtectSystem = "strict";
@@ -52,16 +59,4 @@ in
     };
     path = [ pkgs.smartmontools ];
   };
-
-  systemd.timers.nvme-smart-exporter = {
-    description = "Timer for boot-NVMe SMART health collection";
-    wantedBy = [ "timers.target" ];
-    timerConfig = {
-      # NVMe wear and media errors change slowly; 15 minutes is ample and keeps admin
-      # passthrough traffic to the controller negligible.
-      OnCalendar = "*:0/15";
-      RandomizedDelaySec = "2m";
-      Persistent = true;
-    };
-  };
 }
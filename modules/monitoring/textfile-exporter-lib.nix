@@ -0,0 +1,16 @@
+# scripts/textfile_exporter.py as an importable Python module, for the node-exporter
+# textfile collectors built with writePython3Bin:
+#
+#   let textfileExporter = import ../textfile-exporter-lib.nix { inherit pkgs; };
+#   in pkgs.writers.writePython3Bin "foo-exporter" {
+#     libraries = [ textfileExporter ];
+#   } (builtins.readFile ../../../scripts/foo-exporter.py);
+#
+# Stdlib-only, so this is just the one file placed in site-packages; toPythonModule lets
+# withPackages (which writePython3Bin uses for `libraries`) accept it.
+{ pkgs }:
+pkgs.python3Packages.toPythonModule (
+  pkgs.writeTextDir "${pkgs.python3.sitePackages}/textfile_exporter.py" (
+    builtins.readFile ../../scripts/textfile_exporter.py
+  )
+)
@@ -59,6 +59,9 @@ in
       HERMES_REPORT_SSH_KEY = "%d/probe-ssh-key";
       HERMES_REPORT_SSH_TARGET = "hermes@10.99.1.2";
       HERMES_REPORT_PROMETHEUS_URL = "http://127.0.0.1:9090";
+      # Log-scan checkpoints: each run reads only what the Hermes logs
+      # gained since the last one.
+      HERMES_REPORT_STATE_DIR = "/var/lib/hermes-nightly-report";
     };
 
     serviceConfig = {
@@ -66,6 +69,7 @@ in
       User = "root";
       Group = "root";
       ExecStart = "${reportScript}/bin/agent-health-report --agent hermes";
+      StateDirectory = "hermes-nightly-report";
 
       ProtectSystem = "strict";
       ProtectHome = true;
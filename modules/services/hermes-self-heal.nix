@@ -22,6 +22,29 @@ in
       default = 9098;
       description = "Loopback port for the Alertmanager webhook.";
     };
+    historyMax = lib.mkOption {
+      type = lib.types.ints.positive;
+      default = 500;
+      description = "Archived incidents kept in state.db (newest first).";
+    };
+    historyMaxAgeDays = lib.mkOption {
+      type = lib.types.ints.positive;
+      default = 90;
+      description = "Archived incidents older than this are pruned from state.db.";
+    };
+    workers = lib.mkOption {
+      type = lib.types.ints.positive;
+      default = 4;
+      description = ''
+        Executor threads handling queued alerts. Each incident is handled by
+        at most one at a time; this bounds how many proceed in parallel.
+      '';
+    };
+    actionConcurrency = lib.mkOption {
+      type = lib.types.ints.positive;
+      default = 1;
+      description = "Remediation actions allowed to run (and settle) at once.";
+    };
   };
 
   config = lib.mkIf cfg.enable {
@@ -112,6 +135,10 @@ in
       environment = {
         PYTHONUNBUFFERED = "1";
         LLM_MODEL = models.llm.reasoning.name;
+        SELF_HEAL_HISTORY_MAX = toString cfg.historyMax;
+        SELF_HEAL_HISTORY_MAX_AGE_S = toString (cfg.historyMaxAgeDays * 86400);
+        SELF_HEAL_WORKERS = toString cfg.workers;
+        SELF_HEAL_ACTION_CONCURRENCY = toString cfg.actionConcurrency;
       };
       serviceConfig = {
         Type = "simple";
@@ -76,7 +76,15 @@ let
   # sealed one; trafilatura's closure carries certifi, urllib3 and
   # charset-normalizer, and all three are already sealed in. Same reasoning as
   # the lightPython/financialPython MCP environments below.
-  extractPython = pkgs.python3.withPackages (ps: [ ps.trafilatura ]);
+  #
+  # aiohttp is the worker's fetch stage: concurrent downloads with a per-host
+  # connection cap, and a custom resolver that pins each connection to the
+  # address the SSRF guard vetted. Safe to add for the same reason trafilatura
+  # is -- this env is the worker's alone.
+  extractPython = pkgs.python3.withPackages (ps: [
+    ps.aiohttp
+    ps.trafilatura
+  ]);
 
   localExtractWorker = pkgs.runCommand "hermes-local-extract-worker" { } ''
     mkdir -p "$out/bin"
@@ -180,11 +188,6 @@ let
     ps.simplejson
   ]);
 
-  # canonical copy in the removed OpenClaw microVM module
-  khardFixed = pkgs.khard.overrideAttrs (_: {
-    dontCheckRuntimeDeps = true;
-  });
-
   # ── MCP server wrapper scripts ─────────────────────────────────────────
   # Each wrapper sets the env the corresponding script expects, then exec's
   # the right Python interpreter on the script's absolute store path. These
@@ -217,13 +220,13 @@ let
   '';
 
   # Email + contacts MCP server: IMAP read/search + SMTP send (Dovecot /
-  # Postfix via the two-stage DNAT) and khard contact lookup. Puts khard on
-  # PATH and points XDG_CONFIG_HOME at the read-write state share so the
-  # script finds the khard.conf written by hermes-tools-setup. The IMAP
-  # password is read at command time from the staged secret file.
+  # Postfix via the two-stage DNAT) and contact lookup over the synced
+  # vCards, indexed in-process with khard's matching and output. Points
+  # XDG_CONFIG_HOME at the read-write state share so the script finds the
+  # khard.conf written by hermes-tools-setup. The IMAP password is read at
+  # command time from the staged secret file.
   emailMcpScript = ../../scripts/email-contacts-mcp.py;
   emailMcpServer = pkgs.writeShellScript "email-contacts-mcp" ''
-    export PATH="${khardFixed}/bin:$PATH"
     export XDG_CONFIG_HOME="${stateDir}/.config"
     exec ${lightPython}/bin/python3 ${emailMcpScript}
   '';
@@ -1146,9 +1149,9 @@ in
         };
       };
 
-      # Email (IMAP read/search, SMTP send) and contact lookup. khard reads
-      # the contacts synced by hermes-tools-setup; the password comes from
-      # the staged secret file.
+      # Email (IMAP read/search, SMTP send) and contact lookup. Contacts
+      # are the vCards synced by hermes-tools-setup, found through the
+      # khard.conf below; the password comes from the staged secret file.
       email-contacts = {
         command = "${emailMcpServer}";
         args = [ ];
@@ -1441,10 +1444,10 @@ in
       VDIRSYNCER_END
       chmod 600 ${stateDir}/.config/vdirsyncer/config
 
-      # ── khard: CLI contact manager for the synced vCard files ─────────
+      # ── khard.conf: address books of the synced vCard files ──────────
       # The contacts subdir is created by vdirsyncer for the "contacts"
       # collection. KHARD_CONFIG on the email-contacts MCP entry points
-      # here.
+      # here; its contact index reads the [addressbooks] paths.
       cat > ${stateDir}/.config/khard/khard.conf << KHARD_END
       [addressbooks]
       [[contacts]]
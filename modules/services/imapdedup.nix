@@ -24,6 +24,7 @@ let
                 -u johnw                                \
                 -c                                      \
                 -m                                      \
+                -i "''${CACHE_DIRECTORY:-$HOME/.cache/imapdedup}/index.sqlite3" \
                 "$@"
     }
 
@@ -78,6 +79,9 @@ in
       ProtectHome = "read-only";
       NoNewPrivileges = true;
 
+      # Message-hash index kept between runs (/var/cache/imapdedup)
+      CacheDirectory = "imapdedup";
+
       # Need access to dovecot socket and mail directories
       ReadWritePaths = [
         "/var/mail/johnw"
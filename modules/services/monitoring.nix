@@ -436,7 +436,9 @@ let
     name = "logwatch-ai-summary";
     runtimeInputs = [ analyzeLogsScript ];
     text = ''
-      analyze-logs --quiet 2>/dev/null || true
+      # --incremental: each service group resumes after the journal cursor the
+      # previous daily run checkpointed, so no window is read (or summarised) twice.
+      analyze-logs --quiet --incremental 2>/dev/null || true
     '';
   };
 in
@@ -45,6 +45,15 @@ in
         and is unaffected.
       '';
     };
+    githubGraphql = lib.mkOption {
+      type = lib.types.bool;
+      default = true;
+      description = ''
+        List GitHub issues and PRs for several repositories per GraphQL query
+        instead of one REST listing per repository. Anything GraphQL cannot
+        answer falls back to REST; disable to use REST only.
+      '';
+    };
   };
 
   config = lib.mkIf cfg.enable {
@@ -98,6 +107,7 @@ in
         # under the codebase's bool(getenv) idiom. The explicit conditional is
         # unambiguous under either parser.
         OSS_SECRETARY_HTML = if cfg.html then "1" else "0";
+        OSS_SECRETARY_GITHUB_GRAPHQL = if cfg.githubGraphql then "1" else "0";
         REQUESTS_CA_BUNDLE = "/etc/ssl/certs/ca-certificates.crt";
         SSL_CERT_FILE = "/etc/ssl/certs/ca-certificates.crt";
         NIX_SSL_CERT_FILE = "/etc/ssl/certs/ca-certificates.crt";
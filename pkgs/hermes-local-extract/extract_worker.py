@@ -12,21 +12,40 @@ runs its MCP servers (lightPython / financialPython).
 Protocol: read {"urls": [...]} as JSON on stdin, write a JSON list on stdout,
 one object per URL in the SAME order, each {url, title, content, error?}.
 Never writes anything but JSON to stdout; diagnostics go to stderr.
+
+Successful extractions are kept in an on-disk cache (see ExtractCache) so an
+agent re-reading the same documentation page a few minutes later costs neither
+a download nor a second trafilatura pass. `--stats` prints the cache's
+lifetime counters as JSON and exits without reading stdin.
+
+A batch runs as two stages: an asyncio fetch stage (aiohttp, bounded globally
+and per host) and a small thread pool that runs trafilatura on whatever the
+fetch stage hands it, so a slow server no longer holds up every URL behind it.
+The SSRF guard lives in the fetch stage -- see PinnedResolver and Fetcher.get.
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import html as html_module
 import ipaddress
 import json
+import os
 import re
 import socket
+import sqlite3
 import sys
-from typing import Any, Dict, List
-from urllib.parse import urlparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
 
+import aiohttp
 import trafilatura
+from aiohttp.abc import AbstractResolver
 from trafilatura.settings import DEFAULT_CONFIG
+from trafilatura.utils import decode_file
 
 # Bound a single extraction. The host is memory-constrained and one runaway
 # page must not stall an agent turn. Measured on this host: 0.02s for a 20KiB
@@ -39,6 +58,32 @@ MAX_FILE_SIZE = "20000000"  # 20 MB of HTML
 # the context window. Truncation is REPORTED in-band, never silent.
 MAX_CONTENT_CHARS = 200_000
 
+# Fetch-stage bounds. A batch is at most the provider's MAX_URLS, so the global
+# cap mostly matters when several URLs share nothing; the per-host cap is
+# politeness -- an agent handed ten pages of one docs site should not open ten
+# sockets to it at once. Extraction is CPU-bound and the host is small, so it
+# gets two threads rather than one per URL.
+MAX_CONCURRENCY = 8
+PER_HOST_CONNECTIONS = 2
+EXTRACT_WORKERS = 2
+
+# Extraction cache. Agents re-read the same docs page within minutes, far more
+# often than the page changes, so a fresh entry is served without touching the
+# network at all; past the TTL it is revalidated with a conditional GET and a
+# 304 costs one round trip and no re-extraction. The size bound is on stored
+# text, not on disk pages, and is deliberately small: this is a working set,
+# not an archive.
+#
+# The directory defaults under HOME because HOME is one of only two variables
+# the provider lets through to this process. Set
+# HERMES_LOCAL_EXTRACT_CACHE_DIR to "" to disable caching entirely.
+CACHE_TTL_SECONDS = 600
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_DIR = os.environ.get(
+    "HERMES_LOCAL_EXTRACT_CACHE_DIR",
+    os.path.join(os.environ.get("HOME", "/tmp"), ".cache", "hermes-local-extract"),
+)
+
 
 def _config() -> Any:
     from copy import deepcopy
@@ -52,8 +97,27 @@ def _config() -> Any:
 CONFIG = _config()
 
 
-def ssrf_reject_reason(url: str) -> str | None:
-    """Return a rejection reason, or None if the URL is safe to fetch.
+class SSRFRejected(OSError):
+    """Raised by PinnedResolver; str() is the caller-facing rejection reason.
+
+    An OSError so aiohttp treats it as the connection failure it is, for a
+    redirect target as much as for the URL the agent asked for.
+    """
+
+
+def _address_reject_reason(address: str) -> str | None:
+    addr = ipaddress.ip_address(address.split("%", 1)[0])
+    if (addr.is_private or addr.is_loopback or addr.is_link_local
+            or addr.is_reserved or addr.is_multicast or addr.is_unspecified):
+        # Deliberately does NOT echo the resolved address back to the
+        # caller -- that would turn this guard into an internal-network
+        # scanner with a helpful readout.
+        return "refusing to fetch a private, loopback or link-local address"
+    return None
+
+
+class PinnedResolver(AbstractResolver):
+    """aiohttp resolver that vets every address it hands out, once per host.
 
     Moving extraction in-house REINTRODUCES a risk the hosted service did not
     have: Jina fetched from its own infrastructure and structurally could not
@@ -63,8 +127,67 @@ def ssrf_reject_reason(url: str) -> str | None:
     service straight into a chat reply.
 
     Every resolved address is checked, not just the first: a hostname can
-    resolve to both a public and a private address, and trafilatura picks
-    whichever the resolver hands it.
+    resolve to both a public and a private address, and the connector tries
+    them in turn.
+
+    The check used to be a separate getaddrinfo before trafilatura resolved the
+    name AGAIN to connect, which left a rebinding window between the two. Here
+    the answer that was vetted is the answer that is dialled: the connector
+    gets numeric addresses from this resolver and nothing else.
+
+    aiohttp never consults a resolver for an IP-literal host, so this class
+    alone does not cover http://127.0.0.1/ -- ssrf_reject_reason checks
+    literals itself, and Fetcher.get follows redirects by hand so every hop
+    goes through it.
+
+    Lookups are memoised per (host, port) for the life of the batch, so ten
+    pages on one site cost one resolution, not ten.
+    """
+
+    def __init__(self) -> None:
+        self._lookups: Dict[Tuple[str, int], "asyncio.Task[List[Dict[str, Any]]]"] = {}
+
+    async def resolve(self, host: str, port: int = 0,
+                      family: socket.AddressFamily = socket.AF_INET) -> List[Dict[str, Any]]:
+        key = (host, port)
+        if key not in self._lookups:
+            self._lookups[key] = asyncio.ensure_future(self._lookup(host, port))
+        # Shielded: one cancelled fetch must not cancel a lookup other fetches
+        # of the same host are waiting on.
+        hosts = await asyncio.shield(self._lookups[key])
+        if family:
+            hosts = [h for h in hosts if h["family"] == family] or hosts
+        return hosts
+
+    async def _lookup(self, host: str, port: int) -> List[Dict[str, Any]]:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, port, type=socket.SOCK_STREAM, proto=socket.IPPROTO_TCP)
+        except OSError as exc:
+            raise SSRFRejected(f"could not resolve host: {exc}") from None
+
+        hosts: List[Dict[str, Any]] = []
+        for family, _, proto, _, sockaddr in infos:
+            reason = _address_reject_reason(sockaddr[0])
+            if reason:
+                raise SSRFRejected(reason)
+            hosts.append({"hostname": host, "host": sockaddr[0], "port": sockaddr[1],
+                          "family": family, "proto": proto,
+                          "flags": socket.AI_NUMERICHOST | socket.AI_NUMERICSERV})
+        if not hosts:
+            raise SSRFRejected("could not resolve host: no addresses")
+        return hosts
+
+    async def close(self) -> None:
+        for task in self._lookups.values():
+            task.cancel()
+
+
+async def ssrf_reject_reason(url: str, resolver: PinnedResolver) -> str | None:
+    """Return a rejection reason, or None if the URL is safe to fetch.
+
+    Resolves through ``resolver``, so a URL that passes here is pinned to the
+    addresses that passed: the fetch that follows cannot land anywhere else.
     """
     parsed = urlparse(url)
     if parsed.scheme not in ("http", "https"):
@@ -74,22 +197,324 @@ def ssrf_reject_reason(url: str) -> str | None:
         return "URL has no host"
 
     try:
-        infos = socket.getaddrinfo(host, parsed.port or (443 if parsed.scheme == "https" else 80),
-                                   proto=socket.IPPROTO_TCP)
-    except OSError as exc:
-        return f"could not resolve host: {exc}"
-
-    for info in infos:
-        addr = ipaddress.ip_address(info[4][0])
-        if (addr.is_private or addr.is_loopback or addr.is_link_local
-                or addr.is_reserved or addr.is_multicast or addr.is_unspecified):
-            # Deliberately does NOT echo the resolved address back to the
-            # caller -- that would turn this guard into an internal-network
-            # scanner with a helpful readout.
-            return "refusing to fetch a private, loopback or link-local address"
+        ipaddress.ip_address(host.split("%", 1)[0])
+    except ValueError:
+        pass
+    else:
+        # An IP literal never reaches the resolver (aiohttp dials it
+        # directly), so it is vetted here or not at all.
+        return _address_reject_reason(host)
+
+    try:
+        await resolver.resolve(host, parsed.port or (443 if parsed.scheme == "https" else 80))
+    except SSRFRejected as exc:
+        return str(exc)
     return None
 
 
+def normalise_url(url: str) -> str:
+    """Canonical form of a URL for use as a cache key.
+
+    Only rewrites that cannot change what the server returns: scheme and host
+    are case-insensitive, a default port is the same as no port, an empty path
+    is "/", the fragment never reaches the server, and query parameters are
+    sorted so ``?a=1&b=2`` and ``?b=2&a=1`` share an entry. The ORIGINAL URL is
+    still the one fetched and echoed back to the caller.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"  # hostname strips an IPv6 literal's brackets
+    netloc = host
+    if parsed.port and parsed.port != {"http": 80, "https": 443}.get(scheme):
+        netloc = f"{host}:{parsed.port}"
+    if parsed.username is not None:
+        userinfo = parsed.username + (f":{parsed.password}" if parsed.password else "")
+        netloc = f"{userinfo}@{netloc}"
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, query, ""))
+
+
+class CacheEntry:
+    """One cached extraction plus the validators needed to revalidate it."""
+
+    __slots__ = ("key", "title", "content", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, key: str, title: str, content: str, etag: Optional[str],
+                 last_modified: Optional[str], fetched_at: float) -> None:
+        self.key = key
+        self.title = title
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.fetched_at < CACHE_TTL_SECONDS
+
+    def result(self, url: str) -> Dict[str, Any]:
+        return {"url": url, "title": self.title, "content": self.content}
+
+
+class ExtractCache:
+    """Size-bounded LRU of extracted pages in a SQLite file.
+
+    Keyed by the SHA-256 of normalise_url(), so the key is fixed-width and the
+    stored URL is informational only. SQLite rather than one file per entry
+    because several workers can run at once (one per agent turn) and the
+    eviction pass needs a consistent view of total size and access order;
+    WAL plus a busy timeout gives that without a lock file of our own.
+
+    Every method swallows sqlite3 errors into a disabled cache: a full disk or
+    a corrupt file must cost the cache, never an extraction.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key           TEXT PRIMARY KEY,
+            url           TEXT NOT NULL,
+            title         TEXT NOT NULL,
+            content       TEXT NOT NULL,
+            etag          TEXT,
+            last_modified TEXT,
+            fetched_at    REAL NOT NULL,
+            accessed_at   REAL NOT NULL,
+            size          INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at);
+        CREATE TABLE IF NOT EXISTS counters (
+            name  TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    COUNTERS = ("hits", "revalidated", "misses", "evictions")
+
+    def __init__(self, directory: str, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        # Per-process counts, reported on stderr after the batch; the lifetime
+        # totals live in the counters table.
+        self.session: Dict[str, int] = {name: 0 for name in self.COUNTERS}
+        self._db: Optional[sqlite3.Connection] = None
+        if not directory:
+            return
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            db = sqlite3.connect(os.path.join(directory, "cache.sqlite3"), timeout=5,
+                                 isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(self._SCHEMA)
+            self._db = db
+        except (OSError, sqlite3.Error) as exc:
+            print(f"extract cache disabled: {exc}", file=sys.stderr)
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha256(normalise_url(url).encode("utf-8")).hexdigest()
+
+    def _run(self, sql: str, params: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        if self._db is None:
+            return []
+        try:
+            return self._db.execute(sql, params).fetchall()
+        except sqlite3.Error as exc:
+            print(f"extract cache disabled: {exc}", file=sys.stderr)
+            self.close()
+            return []
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        key = self.key_for(url)
+        rows = self._run(
+            "SELECT title, content, etag, last_modified, fetched_at FROM entries WHERE key = ?",
+            (key,))
+        if not rows:
+            return None
+        self._run("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(key, *rows[0])
+
+    def store(self, url: str, result: Dict[str, Any], etag: Optional[str],
+              last_modified: Optional[str]) -> None:
+        size = len(result["content"].encode("utf-8")) + len(result["title"].encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        self._run(
+            "INSERT OR REPLACE INTO entries"
+            " (key, url, title, content, etag, last_modified, fetched_at, accessed_at, size)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.key_for(url), normalise_url(url), result["title"], result["content"],
+             etag, last_modified, now, now, size))
+        self._evict()
+
+    def mark_revalidated(self, entry: CacheEntry, etag: Optional[str],
+                         last_modified: Optional[str]) -> None:
+        """A 304 restarts the TTL; validators are updated only if re-sent."""
+        self._run(
+            "UPDATE entries SET fetched_at = ?, etag = COALESCE(?, etag),"
+            " last_modified = COALESCE(?, last_modified) WHERE key = ?",
+            (time.time(), etag, last_modified, entry.key))
+
+    def drop(self, entry: CacheEntry) -> None:
+        self._run("DELETE FROM entries WHERE key = ?", (entry.key,))
+
+    def _evict(self) -> None:
+        rows = self._run("SELECT COALESCE(SUM(size), 0) FROM entries")
+        total = rows[0][0] if rows else 0
+        if total <= self.max_bytes:
+            return
+        for key, size in self._run("SELECT key, size FROM entries ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            self._run("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.count("evictions")
+
+    def count(self, name: str) -> None:
+        self.session[name] += 1
+        self._run(
+            "INSERT INTO counters (name, value) VALUES (?, 1)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Lifetime counters plus the current footprint, for --stats."""
+        totals = {name: 0 for name in self.COUNTERS}
+        totals.update({name: value for name, value in self._run("SELECT name, value FROM counters")})
+        footprint = self._run("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries")
+        entries, size = footprint[0] if footprint else (0, 0)
+        return {**totals, "hit_rate": _hit_rate(totals), "entries": entries, "bytes": size,
+                "max_bytes": self.max_bytes, "ttl_seconds": CACHE_TTL_SECONDS}
+
+    def close(self) -> None:
+        if self._db is not None:
+            try:
+                self._db.close()
+            except sqlite3.Error:
+                pass
+            self._db = None
+
+
+def _hit_rate(counts: Dict[str, int]) -> float:
+    """Share of lookups answered without a re-extraction (fresh or 304)."""
+    served = counts.get("hits", 0) + counts.get("revalidated", 0)
+    total = served + counts.get("misses", 0)
+    return round(served / total, 4) if total else 0.0
+
+
+class FetchError(Exception):
+    """A fetch that failed for a reason worth showing the agent verbatim."""
+
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class Fetcher:
+    """The batch's HTTP stage: one session, one pinned resolver, one CPU pool.
+
+    Bodies are streamed and abandoned as soon as they pass MAX_FILE_SIZE, so an
+    oversized page costs its first 20 MB of bandwidth and never more than that
+    in memory. aiohttp decompresses before the count, which also makes the cap
+    a decompression-bomb bound.
+
+    The concurrency bounds are enforced here with semaphores rather than left
+    to the connector's pool, so that DOWNLOAD_TIMEOUT starts once a request
+    actually holds a slot: ten URLs on one site queue behind
+    PER_HOST_CONNECTIONS without the queueing counting against their budget.
+    """
+
+    def __init__(self) -> None:
+        self.resolver = PinnedResolver()
+        self.cpu = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS,
+                                      thread_name_prefix="extract")
+        self._slots = asyncio.Semaphore(MAX_CONCURRENCY)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=MAX_CONCURRENCY,
+                                           limit_per_host=PER_HOST_CONNECTIONS,
+                                           resolver=self.resolver, use_dns_cache=False),
+            headers={"User-Agent": f"trafilatura/{trafilatura.__version__} "
+                                   "(+https://github.com/adbar/trafilatura)"},
+            # The per-request budget is applied in _get_once, after the slot.
+            timeout=aiohttp.ClientTimeout(total=None),
+        )
+
+    async def close(self) -> None:
+        await self.session.close()
+        self.cpu.shutdown(wait=False)
+
+    async def get(self, url: str, entry: Optional[CacheEntry] = None
+                  ) -> Tuple[int, Optional[bytes], Dict[str, str]]:
+        """GET ``url`` -> (status, body if 200, lower-cased headers).
+
+        With a cache ``entry`` the request is conditional and a 304 comes back
+        with no body. Raises FetchError for anything the agent should see.
+
+        Redirects are followed here, not by aiohttp: aiohttp skips the
+        resolver for an IP-literal Location, so a public page redirecting to
+        http://169.254.169.254/ would otherwise sail past the guard. Every hop
+        is vetted by ssrf_reject_reason before it is dialled.
+        """
+        headers: Dict[str, str] = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        max_hops = CONFIG.getint("DEFAULT", "MAX_REDIRECTS")
+        try:
+            for _ in range(max_hops + 1):
+                reason = await ssrf_reject_reason(url, self.resolver)
+                if reason:
+                    raise FetchError(reason)
+                status, body, response_headers = await self._get_once(url, headers)
+                location = response_headers.get("location")
+                if status in REDIRECT_STATUSES and location:
+                    url = urljoin(url, location)
+                    continue
+                return status, body, response_headers
+        except aiohttp.ClientConnectorError as exc:
+            # Defence in depth: a name that resolves privately is rejected
+            # inside the connector; surface the guard's own reason, not
+            # aiohttp's wrapper.
+            if isinstance(exc.os_error, SSRFRejected):
+                raise FetchError(str(exc.os_error)) from None
+            raise FetchError(f"fetch failed: {exc}") from None
+        except asyncio.TimeoutError:
+            raise FetchError(f"fetch failed: timed out after {DOWNLOAD_TIMEOUT}s") from None
+        except aiohttp.ClientError as exc:
+            raise FetchError(f"fetch failed: {exc}") from None
+        raise FetchError(f"fetch failed: more than {max_hops} redirects")
+
+    async def _get_once(self, url: str, headers: Dict[str, str]
+                        ) -> Tuple[int, Optional[bytes], Dict[str, str]]:
+        host = (urlparse(url).hostname or "").lower()
+        host_slots = self._host_slots.setdefault(
+            host, asyncio.Semaphore(PER_HOST_CONNECTIONS))
+        async with self._slots, host_slots:
+            return await asyncio.wait_for(self._request(url, headers),
+                                          timeout=float(DOWNLOAD_TIMEOUT))
+
+    async def _request(self, url: str, headers: Dict[str, str]
+                       ) -> Tuple[int, Optional[bytes], Dict[str, str]]:
+        limit = int(MAX_FILE_SIZE)
+        async with self.session.get(url, headers=headers, allow_redirects=False) as response:
+            response_headers = {k.lower(): v for k, v in response.headers.items()}
+            if response.status != 200:
+                return response.status, None, response_headers
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(2**16):
+                body += chunk
+                if len(body) > limit:
+                    raise FetchError(f"page is larger than the {limit}-byte download cap")
+            return 200, bytes(body), response_headers
+
+
 _TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
 
 
@@ -124,20 +549,71 @@ def _best_title(html: str, url: str) -> str:
     return ""
 
 
-def extract_one(url: str) -> Dict[str, Any]:
-    reason = ssrf_reject_reason(url)
+async def extract_one(url: str, fetcher: Fetcher,
+                      cache: Optional[ExtractCache] = None) -> Dict[str, Any]:
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None and entry.is_fresh(time.time()):
+        # No network at all, so nothing for the SSRF guard to protect; the
+        # entry only exists because that guard passed when it was fetched.
+        cache.count("hits")
+        return entry.result(url)
+
+    # Everything below touches the network -- revalidation included -- so the
+    # guard runs first, on every path.
+    reason = await ssrf_reject_reason(url, fetcher.resolver)
     if reason:
         return {"url": url, "title": "", "content": "", "error": reason}
 
+    if entry is not None and not (entry.etag or entry.last_modified):
+        entry = None  # nothing to revalidate with; a plain refetch
     try:
-        downloaded = trafilatura.fetch_url(url, config=CONFIG)
-    except Exception as exc:  # noqa: BLE001
-        return {"url": url, "title": "", "content": "", "error": f"fetch failed: {exc}"}
-
-    if downloaded is None:
+        status, body, headers = await fetcher.get(url, entry)
+    except FetchError as exc:
+        return {"url": url, "title": "", "content": "", "error": str(exc)}
+
+    if status == 304 and entry is not None:
+        cache.mark_revalidated(entry, headers.get("etag"), headers.get("last-modified"))
+        cache.count("revalidated")
+        return entry.result(url)
+    if cache is not None:
+        cache.count("misses")
+    if status != 200 or not body:
+        if entry is not None:
+            cache.drop(entry)
         return {"url": url, "title": "", "content": "",
                 "error": "could not fetch the page (DNS, TLS, timeout, or non-200)"}
 
+    # The CPU stage. Off the event loop so the other fetches keep streaming
+    # while this page is parsed.
+    result = await asyncio.get_running_loop().run_in_executor(
+        fetcher.cpu, _decode_and_extract, url, body)
+    if cache is not None and not result.get("error"):
+        cache.store(url, result, headers.get("etag"), headers.get("last-modified"))
+    return result
+
+
+async def extract_batch(urls: List[str], cache: Optional[ExtractCache]) -> List[Dict[str, Any]]:
+    """Extract every URL concurrently; results come back in input order."""
+    fetcher = Fetcher()
+
+    async def guarded(url: str) -> Dict[str, Any]:
+        try:
+            return await extract_one(url, fetcher, cache)
+        except Exception as exc:  # noqa: BLE001
+            # One bad URL must never lose the other results in the batch.
+            return {"url": url, "title": "", "content": "", "error": f"unexpected error: {exc}"}
+
+    try:
+        return list(await asyncio.gather(*(guarded(url) for url in urls)))
+    finally:
+        await fetcher.close()
+
+
+def _decode_and_extract(url: str, body: bytes) -> Dict[str, Any]:
+    return _extract_html(url, decode_file(body))
+
+
+def _extract_html(url: str, downloaded: str) -> Dict[str, Any]:
     try:
         content = trafilatura.extract(
             downloaded,
@@ -181,6 +657,12 @@ def extract_one(url: str) -> Dict[str, Any]:
 
 
 def main() -> int:
+    if sys.argv[1:] == ["--stats"]:
+        cache = ExtractCache(CACHE_DIR)
+        json.dump(cache.stats(), sys.stdout)
+        cache.close()
+        return 0
+
     try:
         payload = json.load(sys.stdin)
         urls = payload["urls"]
@@ -190,14 +672,17 @@ def main() -> int:
         print(json.dumps({"error": f"bad request: {exc}"}), file=sys.stdout)
         return 2
 
-    results: List[Dict[str, Any]] = []
-    for url in urls:
-        try:
-            results.append(extract_one(str(url)))
-        except Exception as exc:  # noqa: BLE001
-            # One bad URL must never lose the other results in the batch.
-            results.append({"url": str(url), "title": "", "content": "",
-                            "error": f"unexpected error: {exc}"})
+    # Not opened for an empty batch: that is hermes-health-check's liveness
+    # probe, which must stay side-effect free.
+    cache = ExtractCache(CACHE_DIR) if urls else None
+
+    results = asyncio.run(extract_batch([str(url) for url in urls], cache)) if urls else []
+
+    if cache is not None:
+        counts = cache.session
+        print("extract cache: " + " ".join(f"{k}={v}" for k, v in counts.items())
+              + f" hit_rate={_hit_rate(counts)}", file=sys.stderr)
+        cache.close()
 
     json.dump(results, sys.stdout)
     return 0
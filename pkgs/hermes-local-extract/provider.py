@@ -53,7 +53,9 @@ WORKER = os.environ.get("HERMES_LOCAL_EXTRACT_WORKER", "@worker@")
 # surfaces as a specific error rather than a killed batch.
 BATCH_TIMEOUT_SECONDS = 180
 
-# Keep a batch within the worker's sequential budget.
+# Keep a batch within the worker's budget. The worker fetches concurrently but
+# caps connections per host, so ten pages of one site still queue behind each
+# other two at a time.
 MAX_URLS = 10
 
 # Anything scheme-like is scrubbed out of a reason before it is logged.
@@ -15,6 +15,7 @@ class Config:
     sse_host: str               # e.g. 127.0.0.1
     sse_port: int               # e.g. 9081
     request_timeout_seconds: float = 600.0
+    session_ttl_seconds: float = 30 * 86400.0   # idle sessions reaped after this; 0 keeps them forever
 
     @classmethod
     def from_env(cls) -> "Config":
@@ -26,6 +27,7 @@ class Config:
             sse_host=os.environ.get("HERMES_MCP_HOST", "127.0.0.1"),
             sse_port=int(os.environ.get("HERMES_MCP_PORT", "9081")),
             request_timeout_seconds=float(os.environ.get("HERMES_MCP_TIMEOUT", "600")),
+            session_ttl_seconds=float(os.environ.get("HERMES_MCP_SESSION_TTL", str(30 * 86400))),
         )
 
 
@@ -3,13 +3,27 @@
 Auth model: Bearer token in the Authorization header (Hermes' api_server
 validates with hmac.compare_digest against API_SERVER_KEY).  Sessions are
 tracked separately via the X-Hermes-Session-Id header sent per-request.
+
+`chat()` streams when given an `on_delta` callback: the request carries
+`"stream": true`, the reply is read as OpenAI-style SSE chunks, and each
+content delta is handed to the callback as it arrives.  The full reply is
+still returned at the end, assembled from the deltas.
 """
 from __future__ import annotations
 
+import json
+from collections.abc import Awaitable, Callable
+
 import httpx
 
 from hermes_mcp.config import Config
 
+OnDelta = Callable[[str], Awaitable[None]]
+
+
+class HermesStreamError(RuntimeError):
+    """Hermes reported an error in-band, part-way through a stream."""
+
 
 class HermesClient:
     def __init__(self, config: Config, http: httpx.AsyncClient | None = None):
@@ -31,11 +45,14 @@ class HermesClient:
         hermes_session_id: str,
         prompt: str,
         model: str | None = None,
+        on_delta: OnDelta | None = None,
     ) -> str:
         payload = {
             "model": model or self._cfg.model,
             "messages": [{"role": "user", "content": prompt}],
         }
+        if on_delta is not None:
+            return await self._chat_stream(hermes_session_id, payload, on_delta)
         r = await self._http.post(
             "/v1/chat/completions",
             headers={"X-Hermes-Session-Id": hermes_session_id},
@@ -45,6 +62,47 @@ class HermesClient:
         data = r.json()
         return data["choices"][0]["message"]["content"]
 
+    async def _chat_stream(
+        self, hermes_session_id: str, payload: dict, on_delta: OnDelta
+    ) -> str:
+        """POST with `stream: true` and feed each content delta to `on_delta`.
+
+        Cancellation is the upstream abort: if the awaiting task is
+        cancelled (the MCP client went away) or `on_delta` raises, leaving
+        the `stream()` block closes the response, and Hermes sees the
+        connection drop instead of generating into the void.
+        """
+        parts: list[str] = []
+        async with self._http.stream(
+            "POST",
+            "/v1/chat/completions",
+            headers={"X-Hermes-Session-Id": hermes_session_id, "Accept": "text/event-stream"},
+            json={**payload, "stream": True},
+        ) as r:
+            r.raise_for_status()
+            if not r.headers.get("content-type", "").startswith("text/event-stream"):
+                # An upstream that ignores `stream` answers with one plain
+                # completion; treat it as a single delta.
+                data = json.loads(await r.aread())
+                content = data["choices"][0]["message"]["content"]
+                await on_delta(content)
+                return content
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue  # blank separators, `event:` lines, `:` keepalives
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise HermesStreamError(str(chunk["error"]))
+                for choice in chunk.get("choices") or []:
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        parts.append(text)
+                        await on_delta(text)
+        return "".join(parts)
+
     async def get_capabilities(self) -> dict:
         r = await self._http.get("/v1/capabilities")
         r.raise_for_status()
@@ -4,6 +4,7 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
 from typing import Any
 
 from mcp.server.lowlevel import Server
@@ -21,15 +22,22 @@ from hermes_mcp.session_store import SessionStore
 
 logger = logging.getLogger("hermes_mcp")
 
-# Tools that wrap a long upstream call to Hermes Agent and benefit from
-# heartbeats. Heartbeats reset the client-side `resetTimeoutOnProgress`
-# timer so a 15-20 minute analytical run doesn't trip the MCP client's
-# tool-call timeout. The other tools (list/get/delete metadata) are fast
-# enough that heartbeats are pointless overhead.
-_HEARTBEAT_TOOLS = frozenset(
+# Tools that wrap a long upstream call to Hermes Agent.  These stream:
+# Hermes' reply arrives as SSE deltas and each one is forwarded to the MCP
+# client as a progress notification, which both shows the answer forming
+# and resets the client-side `resetTimeoutOnProgress` timer, so a 15-20
+# minute analytical run doesn't trip the MCP client's tool-call timeout.
+# A heartbeat still fires if no token has arrived for
+# _HEARTBEAT_INTERVAL_SECONDS (a model thinking before it speaks).  The
+# other tools (list/get/delete metadata) are fast enough that none of this
+# is worth it.
+_STREAMING_TOOLS = frozenset(
     {"ask_hermes", "continue_session", "summarize_session"}
 )
 _HEARTBEAT_INTERVAL_SECONDS = 30.0
+# Deltas arrive per token; batching them into one notification per quarter
+# second keeps a fast model from flooding the SSE stream with tiny frames.
+_PROGRESS_MIN_INTERVAL_SECONDS = 0.25
 
 _TOOL_SCHEMAS: list[Tool] = [
     Tool(
@@ -105,47 +113,102 @@ _TOOL_HANDLERS = {
 }
 
 
-async def _heartbeat(
-    *,
-    session: Any,
-    progress_token: str | int,
-    related_request_id: str,
-    tool_name: str,
-) -> None:
-    """Periodic progress notifier — runs until cancelled.
-
-    Sends one notification every _HEARTBEAT_INTERVAL_SECONDS so the
-    client's `resetTimeoutOnProgress` timer keeps refreshing. The
-    progress counter is monotonic seconds-elapsed; no `total` is
-    supplied since we genuinely don't know how long Hermes will take
-    (the whole point of the heartbeat).
+class _ClientGone(Exception):
+    """The MCP client stopped accepting notifications mid-stream."""
+
+
+class _ProgressForwarder:
+    """Bridges Hermes' token stream to MCP progress notifications.
+
+    `on_delta` is handed to HermesClient.chat.  With no progress token (the
+    client did not ask for progress) it only records timing; the upstream
+    call still streams, so the Hermes connection is never idle for the
+    length of a long answer.  The progress counter is the number of
+    notifications sent, which is monotonic across deltas and heartbeats
+    alike; no `total` is supplied since the reply length is unknowable.
+    Deltas held back by the rate limit are sent by `flush`, which the tool
+    call runs once the reply is complete or has failed.
     """
-    elapsed = 0
-    try:
+
+    def __init__(
+        self,
+        *,
+        session: Any,
+        progress_token: str | int | None,
+        related_request_id: str,
+        tool_name: str,
+    ) -> None:
+        self._session = session
+        self._token = progress_token
+        self._request_id = related_request_id
+        self._tool = tool_name
+        self._started = time.monotonic()
+        self._last_sent = self._started
+        self._pending: list[str] = []
+        self._sent = 0
+        self.first_token_seconds: float | None = None
+        self.chars = 0
+
+    async def on_delta(self, text: str) -> None:
+        now = time.monotonic()
+        if self.first_token_seconds is None:
+            self.first_token_seconds = now - self._started
+            logger.info("%s: first token after %.2fs", self._tool, self.first_token_seconds)
+        self.chars += len(text)
+        if self._token is None:
+            return
+        self._pending.append(text)
+        if now - self._last_sent >= _PROGRESS_MIN_INTERVAL_SECONDS:
+            await self._send("".join(self._pending))
+            self._pending.clear()
+
+    async def flush(self) -> None:
+        """Send whatever deltas are still held back; a gone client is ignored."""
+        if self._token is None or not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending.clear()
+        try:
+            await self._send(text)
+        except _ClientGone:
+            logger.debug("final progress send failed for %s", self._tool)
+
+    async def heartbeat(self) -> None:
+        """Notify every _HEARTBEAT_INTERVAL_SECONDS of silence; runs until cancelled."""
+        if self._token is None:
+            return
         while True:
-            await asyncio.sleep(_HEARTBEAT_INTERVAL_SECONDS)
-            elapsed += int(_HEARTBEAT_INTERVAL_SECONDS)
+            await asyncio.sleep(
+                max(0.0, self._last_sent + _HEARTBEAT_INTERVAL_SECONDS - time.monotonic())
+            )
+            if time.monotonic() - self._last_sent < _HEARTBEAT_INTERVAL_SECONDS:
+                continue  # a delta went out while we slept
+            elapsed = int(time.monotonic() - self._started)
             try:
-                await session.send_progress_notification(
-                    progress_token=progress_token,
-                    progress=float(elapsed),
-                    message=f"{tool_name}: Hermes still working ({elapsed}s)",
-                    related_request_id=related_request_id,
-                )
-            except Exception:
-                # If the client has gone away the send will fail; just
-                # stop heartbeating — the main handler will discover the
-                # closed stream when it tries to write its final result.
-                logger.debug("heartbeat send failed for %s; stopping", tool_name)
+                await self._send(f"{self._tool}: Hermes still working ({elapsed}s)")
+            except _ClientGone:
+                # The delta path will hit the same wall and abort upstream;
+                # the heartbeat just stops.
+                logger.debug("heartbeat send failed for %s; stopping", self._tool)
                 return
-    except asyncio.CancelledError:
-        # Normal path: main handler completed and cancelled us.
-        raise
+
+    async def _send(self, message: str) -> None:
+        self._sent += 1
+        self._last_sent = time.monotonic()
+        try:
+            await self._session.send_progress_notification(
+                progress_token=self._token,
+                progress=float(self._sent),
+                message=message,
+                related_request_id=self._request_id,
+            )
+        except Exception as exc:
+            raise _ClientGone(str(exc)) from exc
 
 
 def build_app(cfg: Config) -> Starlette:
     server: Server = Server("hermes-mcp")
-    store = SessionStore(cfg.db_path)
+    store = SessionStore(cfg.db_path, ttl_seconds=cfg.session_ttl_seconds)
     client = HermesClient(cfg)
 
     @server.list_tools()
@@ -158,40 +221,66 @@ def build_app(cfg: Config) -> Starlette:
         if handler is None:
             return [TextContent(type="text", text=json.dumps({"error": f"unknown tool {name!r}"}))]
 
-        # If the client supplied a progress token in `_meta.progressToken`,
-        # spawn a background heartbeat that sends a `notifications/progress`
-        # every _HEARTBEAT_INTERVAL_SECONDS. Claude-code (and any MCP client
-        # honoring `resetTimeoutOnProgress: true`) resets its tool-call timer
-        # on each notification, so a 20-minute Hermes run no longer trips the
-        # client's MCP_TOOL_TIMEOUT.
-        heartbeat_task: asyncio.Task[None] | None = None
-        if name in _HEARTBEAT_TOOLS:
+        if name not in _STREAMING_TOOLS:
             try:
-                ctx = server.request_context
-            except LookupError:
-                ctx = None
-            if ctx is not None and ctx.meta is not None and ctx.meta.progressToken is not None:
-                heartbeat_task = asyncio.create_task(
-                    _heartbeat(
-                        session=ctx.session,
-                        progress_token=ctx.meta.progressToken,
-                        related_request_id=str(ctx.request_id),
-                        tool_name=name,
-                    )
-                )
+                result = await handler(store, client, **arguments)
+            except Exception as exc:
+                logger.exception("tool %s failed", name)
+                return [TextContent(type="text", text=json.dumps({"error": str(exc)}))]
+            return [TextContent(type="text", text=json.dumps(result))]
 
+        # If the client supplied a progress token in `_meta.progressToken`,
+        # deltas and heartbeats go back to it as `notifications/progress`.
+        # Claude-code (and any MCP client honoring `resetTimeoutOnProgress:
+        # true`) resets its tool-call timer on each one, so a 20-minute
+        # Hermes run no longer trips the client's MCP_TOOL_TIMEOUT.
+        try:
+            ctx = server.request_context
+        except LookupError:
+            ctx = None
+        has_token = ctx is not None and ctx.meta is not None and ctx.meta.progressToken is not None
+        forwarder = _ProgressForwarder(
+            session=ctx.session if ctx is not None else None,
+            progress_token=ctx.meta.progressToken if has_token else None,
+            related_request_id=str(ctx.request_id) if ctx is not None else "",
+            tool_name=name,
+        )
+        heartbeat_task = asyncio.create_task(forwarder.heartbeat())
+        started = time.monotonic()
+
+        # A cancelled handler (client disconnect, notifications/cancelled)
+        # unwinds through HermesClient's stream() block, which closes the
+        # upstream response; nothing extra is needed for that path.
+        # The tail of the reply can still be held back by the rate limit when
+        # the handler returns (or fails); it goes out once the heartbeat has
+        # stopped. Not after a disconnect or a cancel: nobody is listening.
+        flush = False
         try:
-            result = await handler(store, client, **arguments)
+            result = await handler(store, client, on_delta=forwarder.on_delta, **arguments)
+            flush = True
+        except _ClientGone as exc:
+            logger.info("%s: client went away mid-stream (%s); upstream cancelled", name, exc)
+            return [TextContent(type="text", text=json.dumps({"error": "client disconnected"}))]
         except Exception as exc:
+            flush = True
             logger.exception("tool %s failed", name)
             return [TextContent(type="text", text=json.dumps({"error": str(exc)}))]
         finally:
-            if heartbeat_task is not None:
-                heartbeat_task.cancel()
-                try:
-                    await heartbeat_task
-                except (asyncio.CancelledError, Exception):
-                    pass
+            heartbeat_task.cancel()
+            try:
+                await heartbeat_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            if flush:
+                await forwarder.flush()
+        logger.info(
+            "%s: %d chars in %.2fs (first token %s)",
+            name,
+            forwarder.chars,
+            time.monotonic() - started,
+            "n/a" if forwarder.first_token_seconds is None
+            else f"{forwarder.first_token_seconds:.2f}s",
+        )
         return [TextContent(type="text", text=json.dumps(result))]
 
     sse = SseServerTransport("/messages/")
@@ -202,10 +291,12 @@ def build_app(cfg: Config) -> Starlette:
 
     async def startup() -> None:
         await store.init()
+        store.start_reaper()
         logger.info("hermes-mcp ready: db=%s upstream=%s", cfg.db_path, cfg.hermes_api_url)
 
     async def shutdown() -> None:
         await client.aclose()
+        await store.close()
 
     return Starlette(
         routes=[
@@ -5,9 +5,18 @@ cached summary).  The actual conversation history lives inside Hermes
 itself and is keyed by `hermes_session_id`, which we mint locally
 (uuid4, see `create()`) and send on every request in the
 `X-Hermes-Session-Id` request header.
+
+One long-lived aiosqlite connection serves every call.  Opening a
+connection per operation cost a thread start, a file open and a schema
+read each time, and an `ask` paid that three times over; now it pays one
+hop to the connection's worker thread per statement.  The statements are
+module constants so sqlite3's per-connection statement cache hands back
+the already-prepared form on every call after the first.
 """
 from __future__ import annotations
 
+import asyncio
+import logging
 import time
 import uuid
 from dataclasses import dataclass
@@ -15,6 +24,8 @@ from pathlib import Path
 
 import aiosqlite
 
+logger = logging.getLogger(__name__)
+
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS sessions (
     id TEXT PRIMARY KEY,
@@ -29,6 +40,39 @@ CREATE INDEX IF NOT EXISTS idx_sessions_last_used ON sessions(last_used_at DESC)
 CREATE INDEX IF NOT EXISTS idx_sessions_name ON sessions(name) WHERE name IS NOT NULL;
 """
 
+# WAL lets the reaper's DELETE and a concurrent read proceed without
+# blocking each other, and makes NORMAL durable enough: a power cut can
+# lose the last few touches, never corrupt the file.  cache_size is in
+# KiB when negative -- 8 MiB comfortably holds this table and its indexes.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8192",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+_INSERT = (
+    "INSERT INTO sessions (id, name, hermes_session_id, created_at, "
+    "last_used_at, message_count, summary) VALUES (?, ?, ?, ?, ?, 0, NULL)"
+)
+_SELECT_BY_ID = "SELECT * FROM sessions WHERE id = ?"
+_SELECT_BY_NAME = (
+    "SELECT * FROM sessions WHERE name = ? ORDER BY last_used_at DESC LIMIT 1"
+)
+_SELECT_RECENT = "SELECT * FROM sessions ORDER BY last_used_at DESC LIMIT ?"
+_TOUCH_RETURNING = (
+    "UPDATE sessions SET last_used_at = ?, message_count = message_count + ? "
+    "WHERE id = ? RETURNING *"
+)
+_SET_SUMMARY = "UPDATE sessions SET summary = ? WHERE id = ?"
+_DELETE = "DELETE FROM sessions WHERE id = ?"
+_REAP = "DELETE FROM sessions WHERE last_used_at < ?"
+
+# How often the background reaper looks for expired sessions.  Expiry is
+# measured in days, so hourly is already far finer than it needs to be.
+REAP_INTERVAL_SECONDS = 3600.0
+
 
 @dataclass(frozen=True)
 class Session:
@@ -42,81 +86,113 @@ class Session:
 
 
 class SessionStore:
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, *, ttl_seconds: float = 0.0):
         self._db_path = db_path
+        self._ttl_seconds = ttl_seconds
+        self._db: aiosqlite.Connection | None = None
+        self._reaper: asyncio.Task[None] | None = None
 
     async def init(self) -> None:
-        async with aiosqlite.connect(self._db_path) as db:
-            await db.executescript(_SCHEMA)
-            await db.commit()
+        if self._db is None:
+            db = await aiosqlite.connect(self._db_path, isolation_level=None)
+            db.row_factory = aiosqlite.Row
+            for pragma in _PRAGMAS:
+                await db.execute(pragma)
+            self._db = db
+        await self._db.executescript(_SCHEMA)
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    def _conn(self) -> aiosqlite.Connection:
+        if self._db is None:
+            raise RuntimeError("SessionStore.init() has not been awaited")
+        return self._db
 
     async def create(self, name: str | None = None) -> Session:
         now = time.time()
         sid = uuid.uuid4().hex
         hid = uuid.uuid4().hex  # what we'll send as X-Hermes-Session-Id
-        async with aiosqlite.connect(self._db_path) as db:
-            await db.execute(
-                "INSERT INTO sessions (id, name, hermes_session_id, created_at, "
-                "last_used_at, message_count, summary) VALUES (?, ?, ?, ?, ?, 0, NULL)",
-                (sid, name, hid, now, now),
-            )
-            await db.commit()
+        await self._conn().execute(_INSERT, (sid, name, hid, now, now))
         return Session(sid, name, hid, now, now, 0, None)
 
     async def get(self, session_id: str) -> Session | None:
-        async with aiosqlite.connect(self._db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cur = await db.execute(
-                "SELECT * FROM sessions WHERE id = ?", (session_id,)
-            )
-            row = await cur.fetchone()
-            return _row_to_session(row) if row else None
+        return await self._fetch_one(_SELECT_BY_ID, (session_id,))
 
     async def get_by_name(self, name: str) -> Session | None:
-        async with aiosqlite.connect(self._db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cur = await db.execute(
-                "SELECT * FROM sessions WHERE name = ? ORDER BY last_used_at DESC LIMIT 1",
-                (name,),
-            )
-            row = await cur.fetchone()
-            return _row_to_session(row) if row else None
+        return await self._fetch_one(_SELECT_BY_NAME, (name,))
 
     async def list(self, limit: int = 50) -> list[Session]:
-        async with aiosqlite.connect(self._db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cur = await db.execute(
-                "SELECT * FROM sessions ORDER BY last_used_at DESC LIMIT ?", (limit,)
-            )
+        async with self._conn().execute(_SELECT_RECENT, (limit,)) as cur:
             rows = await cur.fetchall()
-            return [_row_to_session(r) for r in rows]
+        return [_row_to_session(r) for r in rows]
 
     async def touch(self, session_id: str, *, increment_messages: bool = True) -> None:
-        now = time.time()
+        await self.touch_and_get(session_id, increment_messages=increment_messages)
+
+    async def touch_and_get(
+        self, session_id: str, *, increment_messages: bool = True
+    ) -> Session | None:
+        """Bump last-used (and optionally the count); return the new row.
+
+        One `UPDATE ... RETURNING` instead of a touch followed by a get, so
+        the returned count is exactly the one this call wrote even when two
+        asks on the same session race.
+        """
         delta = 1 if increment_messages else 0
-        async with aiosqlite.connect(self._db_path) as db:
-            await db.execute(
-                "UPDATE sessions SET last_used_at = ?, message_count = message_count + ? "
-                "WHERE id = ?",
-                (now, delta, session_id),
-            )
-            await db.commit()
+        return await self._fetch_one(_TOUCH_RETURNING, (time.time(), delta, session_id))
 
     async def set_summary(self, session_id: str, summary: str) -> None:
-        async with aiosqlite.connect(self._db_path) as db:
-            await db.execute(
-                "UPDATE sessions SET summary = ? WHERE id = ?", (summary, session_id)
-            )
-            await db.commit()
+        await self._conn().execute(_SET_SUMMARY, (summary, session_id))
 
     async def delete(self, session_id: str) -> bool:
-        async with aiosqlite.connect(self._db_path) as db:
-            cur = await db.execute(
-                "DELETE FROM sessions WHERE id = ?", (session_id,)
-            )
-            await db.commit()
+        async with self._conn().execute(_DELETE, (session_id,)) as cur:
             return cur.rowcount > 0
 
+    async def reap(self, *, now: float | None = None) -> int:
+        """Delete sessions idle for longer than the TTL; return how many.
+
+        A no-op when the store was built without a TTL.  Only our
+        bookkeeping row goes: Hermes keeps its side of the conversation.
+        """
+        if self._ttl_seconds <= 0:
+            return 0
+        cutoff = (time.time() if now is None else now) - self._ttl_seconds
+        async with self._conn().execute(_REAP, (cutoff,)) as cur:
+            return cur.rowcount
+
+    def start_reaper(self, interval_seconds: float = REAP_INTERVAL_SECONDS) -> None:
+        """Run `reap()` now and then every `interval_seconds` until close()."""
+        if self._ttl_seconds <= 0 or self._reaper is not None:
+            return
+        self._reaper = asyncio.create_task(self._reap_forever(interval_seconds))
+
+    async def _reap_forever(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                reaped = await self.reap()
+                if reaped:
+                    logger.info("reaped %d session(s) idle for over %ss", reaped, self._ttl_seconds)
+            except Exception:
+                # A locked or briefly unavailable database must not kill the
+                # reaper for the life of the process; try again next round.
+                logger.exception("session reaper pass failed")
+            await asyncio.sleep(interval_seconds)
+
+    async def _fetch_one(self, sql: str, params: tuple) -> Session | None:
+        async with self._conn().execute(sql, params) as cur:
+            row = await cur.fetchone()
+        return _row_to_session(row) if row else None
+
 
 def _row_to_session(row: aiosqlite.Row) -> Session:
     return Session(
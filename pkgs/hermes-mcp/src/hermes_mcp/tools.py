@@ -5,7 +5,7 @@ them testable with stdlib mocks.
 """
 from __future__ import annotations
 
-from hermes_mcp.hermes_client import HermesClient
+from hermes_mcp.hermes_client import HermesClient, OnDelta
 from hermes_mcp.session_store import Session, SessionStore
 
 _SUMMARY_PROMPT = (
@@ -43,6 +43,7 @@ async def tool_ask_hermes(
     *,
     prompt: str,
     session_id: str | None = None,
+    on_delta: OnDelta | None = None,
 ) -> dict:
     if session_id is None:
         s = await store.create()
@@ -50,13 +51,14 @@ async def tool_ask_hermes(
         s = await store.get(session_id)
         if s is None:
             return {"error": f"session {session_id!r} not found"}
-    reply = await client.chat(hermes_session_id=s.hermes_session_id, prompt=prompt)
-    await store.touch(s.id, increment_messages=True)
-    updated = await store.get(s.id)
+    reply = await client.chat(
+        hermes_session_id=s.hermes_session_id, prompt=prompt, on_delta=on_delta
+    )
+    updated = await store.touch_and_get(s.id, increment_messages=True)
     return {
         "session_id": s.id,
         "reply": reply,
-        "message_count": updated.message_count,
+        "message_count": updated.message_count if updated else s.message_count + 1,
     }
 
 
@@ -66,17 +68,19 @@ async def tool_continue_session(
     *,
     session_id: str,
     prompt: str,
+    on_delta: OnDelta | None = None,
 ) -> dict:
     s = await store.get(session_id)
     if s is None:
         return {"error": f"session {session_id!r} not found"}
-    reply = await client.chat(hermes_session_id=s.hermes_session_id, prompt=prompt)
-    await store.touch(s.id, increment_messages=True)
-    updated = await store.get(s.id)
+    reply = await client.chat(
+        hermes_session_id=s.hermes_session_id, prompt=prompt, on_delta=on_delta
+    )
+    updated = await store.touch_and_get(s.id, increment_messages=True)
     return {
         "session_id": s.id,
         "reply": reply,
-        "message_count": updated.message_count,
+        "message_count": updated.message_count if updated else s.message_count + 1,
     }
 
 
@@ -95,12 +99,13 @@ async def tool_summarize_session(
     client: HermesClient,
     *,
     session_id: str,
+    on_delta: OnDelta | None = None,
 ) -> dict:
     s = await store.get(session_id)
     if s is None:
         return {"error": f"session {session_id!r} not found"}
     summary = await client.chat(
-        hermes_session_id=s.hermes_session_id, prompt=_SUMMARY_PROMPT
+        hermes_session_id=s.hermes_session_id, prompt=_SUMMARY_PROMPT, on_delta=on_delta
     )
     await store.set_summary(s.id, summary)
     await store.touch(s.id, increment_messages=False)
@@ -1,7 +1,17 @@
 import pytest
 from pathlib import Path
 
+from hermes_mcp.session_store import SessionStore
+
 
 @pytest.fixture
 def tmp_db_path(tmp_path: Path) -> Path:
     return tmp_path / "sessions.db"
+
+
+@pytest.fixture
+async def store(tmp_db_path: Path):
+    s = SessionStore(tmp_db_path)
+    await s.init()
+    yield s
+    await s.close()
@@ -1,3 +1,5 @@
+import asyncio
+import json
 from pathlib import Path
 
 import httpx
@@ -5,7 +7,7 @@ import pytest
 import respx
 
 from hermes_mcp.config import Config
-from hermes_mcp.hermes_client import HermesClient
+from hermes_mcp.hermes_client import HermesClient, HermesStreamError
 
 
 @pytest.fixture
@@ -96,3 +98,125 @@ async def test_get_capabilities_returns_endpoint_map(cfg):
     finally:
         await client.aclose()
     assert caps["object"] == "hermes.api_server.capabilities"
+
+
+def _sse(*chunks: str) -> bytes:
+    frames = [
+        "data: " + json.dumps({"choices": [{"index": 0, "delta": {"content": c}}]})
+        for c in chunks
+    ]
+    return ("\n\n".join(frames + ["data: [DONE]"]) + "\n\n").encode()
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_chat_streams_deltas_and_assembles_reply(cfg):
+    route = respx.post("http://hermes.test:8080/v1/chat/completions").mock(
+        return_value=httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=_sse("hel", "lo ", "back"),
+        )
+    )
+    seen: list[str] = []
+
+    async def on_delta(text: str) -> None:
+        seen.append(text)
+
+    client = HermesClient(cfg)
+    try:
+        reply = await client.chat(hermes_session_id="hsid-1", prompt="hello", on_delta=on_delta)
+    finally:
+        await client.aclose()
+
+    assert reply == "hello back"
+    assert seen == ["hel", "lo ", "back"]
+    sent = json.loads(route.calls.last.request.read())
+    assert sent["stream"] is True
+    assert route.calls.last.request.headers["X-Hermes-Session-Id"] == "hsid-1"
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_chat_stream_falls_back_to_plain_completion(cfg):
+    respx.post("http://hermes.test:8080/v1/chat/completions").mock(
+        return_value=httpx.Response(
+            200, json={"choices": [{"index": 0, "message": {"content": "whole reply"}}]}
+        )
+    )
+    seen: list[str] = []
+
+    async def on_delta(text: str) -> None:
+        seen.append(text)
+
+    client = HermesClient(cfg)
+    try:
+        reply = await client.chat(hermes_session_id="h", prompt="hi", on_delta=on_delta)
+    finally:
+        await client.aclose()
+    assert reply == "whole reply"
+    assert seen == ["whole reply"]
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_chat_stream_raises_on_in_band_error(cfg):
+    respx.post("http://hermes.test:8080/v1/chat/completions").mock(
+        return_value=httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=b'data: {"error": {"message": "model crashed"}}\n\n',
+        )
+    )
+
+    async def on_delta(text: str) -> None:
+        pass
+
+    client = HermesClient(cfg)
+    try:
+        with pytest.raises(HermesStreamError, match="model crashed"):
+            await client.chat(hermes_session_id="h", prompt="hi", on_delta=on_delta)
+    finally:
+        await client.aclose()
+
+
+class _EndlessStream(httpx.AsyncByteStream):
+    """Yields one delta, then blocks forever; records whether it was closed."""
+
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def __aiter__(self):
+        yield _sse("first")[: -len(b"data: [DONE]\n\n")]
+        await asyncio.Event().wait()
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_cancelling_a_stream_closes_the_upstream_response(cfg):
+    body = _EndlessStream()
+    respx.post("http://hermes.test:8080/v1/chat/completions").mock(
+        return_value=httpx.Response(
+            200, headers={"content-type": "text/event-stream"}, stream=body
+        )
+    )
+    first = asyncio.Event()
+
+    async def on_delta(text: str) -> None:
+        first.set()
+
+    client = HermesClient(cfg)
+    try:
+        task = asyncio.create_task(
+            client.chat(hermes_session_id="h", prompt="hi", on_delta=on_delta)
+        )
+        await asyncio.wait_for(first.wait(), timeout=5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    finally:
+        await client.aclose()
+    assert body.closed
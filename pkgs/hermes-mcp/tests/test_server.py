@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from hermes_mcp import server
+
+
+def _forwarder(session, token="tok") -> server._ProgressForwarder:
+    return server._ProgressForwarder(
+        session=session, progress_token=token, related_request_id="1", tool_name="ask_hermes"
+    )
+
+
+@pytest.mark.asyncio
+async def test_deltas_are_batched_into_monotonic_progress(monkeypatch):
+    monkeypatch.setattr(server, "_PROGRESS_MIN_INTERVAL_SECONDS", 0.0)
+    session = AsyncMock()
+    fwd = _forwarder(session)
+    await fwd.on_delta("hel")
+    await fwd.on_delta("lo")
+    progress = [c.kwargs["progress"] for c in session.send_progress_notification.await_args_list]
+    messages = [c.kwargs["message"] for c in session.send_progress_notification.await_args_list]
+    assert progress == [1.0, 2.0]
+    assert messages == ["hel", "lo"]
+    assert fwd.chars == 5
+    assert fwd.first_token_seconds is not None
+
+
+@pytest.mark.asyncio
+async def test_deltas_within_the_interval_are_held_back(monkeypatch):
+    monkeypatch.setattr(server, "_PROGRESS_MIN_INTERVAL_SECONDS", 3600.0)
+    session = AsyncMock()
+    fwd = _forwarder(session)
+    await fwd.on_delta("a")
+    await fwd.on_delta("b")
+    session.send_progress_notification.assert_not_awaited()
+    assert fwd.chars == 2
+
+
+@pytest.mark.asyncio
+async def test_without_a_token_nothing_is_sent():
+    session = AsyncMock()
+    fwd = _forwarder(session, token=None)
+    await fwd.on_delta("a")
+    await fwd.heartbeat()  # returns immediately
+    session.send_progress_notification.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_send_raises_client_gone(monkeypatch):
+    monkeypatch.setattr(server, "_PROGRESS_MIN_INTERVAL_SECONDS", 0.0)
+    session = AsyncMock()
+    session.send_progress_notification.side_effect = RuntimeError("stream closed")
+    fwd = _forwarder(session)
+    with pytest.raises(server._ClientGone):
+        await fwd.on_delta("a")
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_fires_only_after_silence(monkeypatch):
+    monkeypatch.setattr(server, "_HEARTBEAT_INTERVAL_SECONDS", 0.05)
+    session = AsyncMock()
+    fwd = _forwarder(session)
+    task = asyncio.create_task(fwd.heartbeat())
+    await asyncio.sleep(0.12)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    messages = [c.kwargs["message"] for c in session.send_progress_notification.await_args_list]
+    assert messages
+    assert all("still working" in m for m in messages)
+
+
+@pytest.mark.asyncio
+async def test_flush_sends_the_held_back_tail(monkeypatch):
+    monkeypatch.setattr(server, "_PROGRESS_MIN_INTERVAL_SECONDS", 3600.0)
+    session = AsyncMock()
+    fwd = _forwarder(session)
+    await fwd.on_delta("a")
+    await fwd.on_delta("b")
+    await fwd.flush()
+    await fwd.flush()  # nothing left: no second notification
+    messages = [c.kwargs["message"] for c in session.send_progress_notification.await_args_list]
+    assert messages == ["ab"]
+
+
+@pytest.mark.asyncio
+async def test_flush_to_a_gone_client_is_quiet(monkeypatch):
+    monkeypatch.setattr(server, "_PROGRESS_MIN_INTERVAL_SECONDS", 3600.0)
+    session = AsyncMock()
+    session.send_progress_notification.side_effect = RuntimeError("stream closed")
+    fwd = _forwarder(session)
+    await fwd.on_delta("a")
+    await fwd.flush()
@@ -7,9 +7,7 @@ from hermes_mcp.session_store import SessionStore
 
 
 @pytest.mark.asyncio
-async def test_create_assigns_uuid_and_timestamps(tmp_db_path):
-    store = SessionStore(tmp_db_path)
-    await store.init()
+async def test_create_assigns_uuid_and_timestamps(store):
     before = time.time()
     s = await store.create(name="research")
     after = time.time()
@@ -24,16 +22,12 @@ async def test_create_assigns_uuid_and_timestamps(tmp_db_path):
 
 
 @pytest.mark.asyncio
-async def test_get_returns_none_for_missing(tmp_db_path):
-    store = SessionStore(tmp_db_path)
-    await store.init()
+async def test_get_returns_none_for_missing(store):
     assert await store.get("nonexistent") is None
 
 
 @pytest.mark.asyncio
-async def test_get_by_name(tmp_db_path):
-    store = SessionStore(tmp_db_path)
-    await store.init()
+async def test_get_by_name(store):
     s = await store.create(name="planning")
     found = await store.get_by_name("planning")
     assert found is not None
@@ -41,9 +35,7 @@ async def test_get_by_name(tmp_db_path):
 
 
 @pytest.mark.asyncio
-async def test_list_returns_descending_by_last_used(tmp_db_path):
-    store = SessionStore(tmp_db_path)
-    await store.init()
+async def test_list_returns_descending_by_last_used(store):
     s1 = await store.create(name="first")
     await asyncio.sleep(0.01)
     s2 = await store.create(name="second")
@@ -52,9 +44,7 @@ async def test_list_returns_descending_by_last_used(tmp_db_path):
 
 
 @pytest.mark.asyncio
-async def test_touch_updates_last_used_and_increments_count(tmp_db_path):
-    store = SessionStore(tmp_db_path)
-    await store.init()
+async def test_touch_updates_last_used_and_increments_count(store):
     s = await store.create()
     original_last = s.last_used_at
     original_count = s.message_count
@@ -66,9 +56,7 @@ async def test_touch_updates_last_used_and_increments_count(tmp_db_path):
 
 
 @pytest.mark.asyncio
-async def test_set_summary_persists(tmp_db_path):
-    store = SessionStore(tmp_db_path)
-    await store.init()
+async def test_set_summary_persists(store):
     s = await store.create()
     await store.set_summary(s.id, "User explored MCP integration options.")
     after = await store.get(s.id)
@@ -76,9 +64,7 @@ async def test_set_summary_persists(tmp_db_path):
 
 
 @pytest.mark.asyncio
-async def test_delete_returns_true_then_false(tmp_db_path):
-    store = SessionStore(tmp_db_path)
-    await store.init()
+async def test_delete_returns_true_then_false(store):
     s = await store.create()
     assert await store.delete(s.id) is True
     assert await store.delete(s.id) is False
@@ -86,7 +72,89 @@ async def test_delete_returns_true_then_false(tmp_db_path):
 
 
 @pytest.mark.asyncio
-async def test_init_is_idempotent(tmp_db_path):
-    store = SessionStore(tmp_db_path)
-    await store.init()
+async def test_init_is_idempotent(store):
     await store.init()  # must not raise
+
+
+@pytest.mark.asyncio
+async def test_touch_and_get_returns_updated_row(store):
+    s = await store.create(name="x")
+    updated = await store.touch_and_get(s.id, increment_messages=True)
+    assert updated.id == s.id
+    assert updated.message_count == 1
+    assert updated.last_used_at >= s.last_used_at
+    quiet = await store.touch_and_get(s.id, increment_messages=False)
+    assert quiet.message_count == 1
+
+
+@pytest.mark.asyncio
+async def test_touch_and_get_missing_returns_none(store):
+    assert await store.touch_and_get("nonexistent") is None
+
+
+@pytest.mark.asyncio
+async def test_database_is_in_wal_mode(store, tmp_db_path):
+    async with store._conn().execute("PRAGMA journal_mode") as cur:
+        (mode,) = await cur.fetchone()
+    assert mode == "wal"
+
+
+@pytest.mark.asyncio
+async def test_reap_deletes_only_idle_sessions(tmp_db_path):
+    store = SessionStore(tmp_db_path, ttl_seconds=60)
+    await store.init()
+    try:
+        old = await store.create(name="old")
+        fresh = await store.create(name="fresh")
+        await store._conn().execute(
+            "UPDATE sessions SET last_used_at = ? WHERE id = ?", (time.time() - 120, old.id)
+        )
+        assert await store.reap() == 1
+        assert await store.get(old.id) is None
+        assert await store.get(fresh.id) is not None
+    finally:
+        await store.close()
+
+
+@pytest.mark.asyncio
+async def test_reap_is_noop_without_ttl(store):
+    s = await store.create()
+    assert await store.reap(now=time.time() + 10 * 365 * 86400) == 0
+    assert await store.get(s.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_reaper_task_stops_on_close(tmp_db_path):
+    store = SessionStore(tmp_db_path, ttl_seconds=60)
+    await store.init()
+    store.start_reaper(interval_seconds=0.01)
+    await asyncio.sleep(0.05)
+    await store.close()  # must cancel the reaper cleanly
+
+
+@pytest.mark.asyncio
+async def test_benchmark_100_concurrent_sessions(store):
+    """100 sessions asking at once, five turns each, over one connection.
+
+    Asserts correctness -- every count lands exactly -- and prints the
+    throughput so a regression to per-call connections shows up in -s runs.
+    """
+    sessions = await asyncio.gather(*(store.create(name=f"s{i}") for i in range(100)))
+
+    async def converse(session_id: str) -> int:
+        count = 0
+        for _ in range(5):
+            s = await store.get(session_id)
+            updated = await store.touch_and_get(s.id, increment_messages=True)
+            count = updated.message_count
+        return count
+
+    started = time.perf_counter()
+    counts = await asyncio.gather(*(converse(s.id) for s in sessions))
+    elapsed = time.perf_counter() - started
+
+    assert counts == [5] * 100
+    listed = await store.list(limit=200)
+    assert len(listed) == 100
+    assert all(s.message_count == 5 for s in listed)
+    print(f"\n100 sessions x 5 turns: {elapsed:.3f}s ({1000 / elapsed:.0f} ops/s)")
@@ -22,10 +22,11 @@ def cfg(tmp_path: Path) -> Config:
 
 
 @pytest.fixture
-async def store(cfg: Config) -> SessionStore:
+async def store(cfg: Config):
     s = SessionStore(cfg.db_path)
     await s.init()
-    return s
+    yield s
+    await s.close()
 
 
 @pytest.fixture
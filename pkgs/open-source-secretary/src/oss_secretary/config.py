@@ -44,6 +44,8 @@ class Config:
     bootstrap: bool = False
     gitea_min_interval: float = 0.34   # spacing floor for Gitea requests (anti-burst)
     html: bool = True                  # send a text/html alternative part
+    workers: int = 8                   # concurrent repo/thread fetches (report._collect)
+    github_graphql: bool = True        # batch GitHub thread listing via GraphQL (REST fallback)
 
     @staticmethod
     def from_env() -> "Config":
@@ -70,8 +72,11 @@ class Config:
             stale_days=int(g("OSS_SECRETARY_STALE_DAYS", "30")),
             bootstrap=bool(g("OSS_SECRETARY_BOOTSTRAP")),
             gitea_min_interval=float(g("OSS_SECRETARY_GITEA_MIN_INTERVAL", "0.34")),
+            workers=max(1, int(g("OSS_SECRETARY_WORKERS", "8"))),
             # NOT bool(g(...)) like the flags above: that idiom makes the
             # string "0" True, which cannot express a default-ON flag.
             html=g("OSS_SECRETARY_HTML", "1").strip().lower()
                  not in ("", "0", "false", "no", "off"),
+            github_graphql=g("OSS_SECRETARY_GITHUB_GRAPHQL", "1").strip().lower()
+                           not in ("", "0", "false", "no", "off"),
         )
@@ -40,13 +40,13 @@ def build_awaiting(t: Thread, owners: set[str], now_iso: str | None = None,
     )
 
 
-def _row(t: Thread, run_id, first_seen):
+def _row(t: Thread):
     return dict(platform=t.platform, node_id=t.node_id, repo_full_name=t.repo_full_name,
                 number=t.number, kind=t.kind, title=t.title, html_url=t.html_url,
                 state=t.state, closed_at=t.closed_at, comment_count=t.comment_count,
                 last_comment_id=t.last_comment_id, last_comment_at=t.last_comment_at,
                 last_commenter=t.last_commenter, author_association=t.author_association,
-                updated_at=t.updated_at, first_seen_run=first_seen, last_seen_run=run_id)
+                updated_at=t.updated_at)
 
 
 def _thread_from_row(row) -> Thread:
@@ -65,41 +65,22 @@ def _thread_from_row(row) -> Thread:
 def compute_deltas(state, threads, run_id, baseline, owners, now_iso):
     """Classify fetched threads into new / new_comment / reopened deltas and
     persist every thread's current state. Closed items are recorded (so a later
-    reopen is detected) but never reported. On baseline, nothing is a delta."""
-    deltas = []
-    for t in threads:
-        prior = state.get_thread(t.platform, t.node_id)
-        first_seen = prior["first_seen_run"] if prior else run_id
-        change = None
-        if t.state == "closed":
-            # Record the closed state (enables reopen detection) but do not
-            # report it — closed threads are out of the "open issues/PRs" scope.
-            state.upsert_thread(_row(t, run_id, first_seen))
-            continue
-        if baseline:
-            change = None
-        elif prior is None:
-            change = "new"
-        elif prior["state"] == "closed":
-            change = "reopened"
-        elif t.comment_count > prior["comment_count"]:
-            change = "new_comment"
-        state.upsert_thread(_row(t, run_id, first_seen))
-        if change:
-            deltas.append(ThreadDelta(t, change, build_awaiting(t, owners, now_iso)))
-    return deltas
+    reopen is detected) but never reported. On baseline, nothing is a delta.
+
+    Set-based: the whole batch is staged and classified with one join in
+    State.merge_threads rather than a SELECT + upsert round trip per thread."""
+    changes = state.merge_threads([_row(t) for t in threads], run_id, baseline)
+    return [ThreadDelta(threads[i], change, build_awaiting(threads[i], owners, now_iso))
+            for i, change in changes]
 
 
 def compute_stale(state, run_id, stale_days, owners, now_iso):
     """A separate pass over the *stored* open inventory: open threads with no
     activity in > stale_days (and not touched this run) — the "dropped balls"
-    the delta set, being since-filtered to recent activity, can never surface."""
+    the delta set, being since-filtered to recent activity, can never surface.
+    The idle filter runs in SQL against the open-thread index."""
     stale = []
-    for row in state.open_threads():
-        if row["last_seen_run"] == run_id:
-            continue  # had activity this run — fresh, not stale
-        hrs = _hours_since(row.get("updated_at"), now_iso)
-        if hrs is not None and hrs > stale_days * 24:
-            t = _thread_from_row(row)
-            stale.append(ThreadDelta(t, "stale", build_awaiting(t, owners, now_iso)))
+    for row in state.stale_threads(run_id, stale_days, now_iso):
+        t = _thread_from_row(row)
+        stale.append(ThreadDelta(t, "stale", build_awaiting(t, owners, now_iso)))
     return stale
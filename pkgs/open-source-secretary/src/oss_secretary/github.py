@@ -7,6 +7,27 @@ def _is_bot(login):
     return bool(login) and (login.endswith("[bot]") or login in {"dependabot", "github-actions"})
 
 
+_API_REPOS = "https://api.github.com/repos/"
+# notification subject.url path kind -> browser path kind
+_HTML_KIND = {"issues": "issues", "pulls": "pull", "commits": "commit"}
+
+
+def html_url_from_api(api_url):
+    """Browser URL for an issue/PR/commit API URL, derived without a request.
+
+    Notification subjects carry only the API URL; resolving each with a GET
+    cost one request per notification. These three shapes map mechanically;
+    anything else (releases, discussions) returns None and the caller falls
+    back to fetching it."""
+    if not api_url or not api_url.startswith(_API_REPOS):
+        return None
+    parts = api_url[len(_API_REPOS):].split("/")
+    if len(parts) != 4 or parts[2] not in _HTML_KIND or not parts[3]:
+        return None
+    owner, name, kind, ident = parts
+    return f"https://github.com/{owner}/{name}/{_HTML_KIND[kind]}/{ident}"
+
+
 class GitHubCollector:
     def __init__(self, client, cfg):
         self.c = client
@@ -61,7 +82,8 @@ class GitHubCollector:
                 last_commenter=login, last_commenter_is_bot=_is_bot(login),
                 author_association=it.get("author_association"),
                 updated_at=it.get("updated_at"),
-                body_excerpt=redact((it.get("body") or "")[:600])))
+                body_excerpt=redact((it.get("body") or "")[:600]),
+                labels=[lb.get("name", "") for lb in it.get("labels") or []]))
         return out
 
     def thread_signals(self, repo_full_name, number, owners):
@@ -108,6 +130,9 @@ class GitHubCollector:
     def _html_url(self, api_url):
         if not api_url:
             return None
+        derived = html_url_from_api(api_url)
+        if derived:
+            return derived
         try:
             body, _ = self.c.get(api_url, conditional=False)
             return (body or {}).get("html_url")
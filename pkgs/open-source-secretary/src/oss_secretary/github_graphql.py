@@ -0,0 +1,292 @@
+from __future__ import annotations
+import logging
+import threading
+from .github import GitHubCollector, _is_bot
+from .models import Thread
+from .redact import redact
+
+log = logging.getLogger("oss_secretary.github")
+
+# Most repos per GraphQL query. Ten repos x (50 issues + 50 PRs) x 10 comments
+# stays far under the 500k-node ceiling and costs a handful of points.
+BATCH_SIZE = 10
+PAGE_SIZE = 50
+COMMENTS_PER_THREAD = 10
+# Points one batch query should cost at most. Once a batch has reported its
+# rateLimit.cost, later batches are sized from the cost per repo so a
+# costlier query shape gets fewer repos per query rather than a bigger bill.
+BATCH_COST_TARGET = 50
+# Below this many points left in the hour, stop batching and let the REST
+# collector (its own, separate quota) finish the run.
+POINTS_RESERVE = 200
+
+_STATE = {"OPEN": "open", "CLOSED": "closed", "MERGED": "closed"}
+
+_FRAGMENTS = f"""
+fragment ThreadFields on Issue {{
+  id number title url state closedAt updatedAt authorAssociation body
+  author {{ __typename login }}
+  labels(first: 10) {{ nodes {{ name }} }}
+  comments(last: {COMMENTS_PER_THREAD}) {{
+    totalCount nodes {{ databaseId createdAt body author {{ __typename login }} }}
+  }}
+}}
+fragment PullFields on PullRequest {{
+  id number title url state closedAt updatedAt authorAssociation body reviewDecision
+  author {{ __typename login }}
+  labels(first: 10) {{ nodes {{ name }} }}
+  comments(last: {COMMENTS_PER_THREAD}) {{
+    totalCount nodes {{ databaseId createdAt body author {{ __typename login }} }}
+  }}
+}}
+"""
+
+# issues filter server-side on `since`; pullRequests has no such filter, so
+# it is read newest-first and paging stops at the first page older than since.
+_CONNECTIONS = {
+    "issues": ("issues(first: %d, after: %s, filterBy: {since: %s}, "
+               "orderBy: {field: UPDATED_AT, direction: DESC})", "ThreadFields"),
+    "pullRequests": ("pullRequests(first: %d, after: %s, "
+                     "orderBy: {field: UPDATED_AT, direction: DESC})", "PullFields"),
+}
+
+
+def _connection(name, after, since):
+    call, fragment = _CONNECTIONS[name]
+    args = (PAGE_SIZE, after, since) if name == "issues" else (PAGE_SIZE, after)
+    return (f"{call % args} {{ pageInfo {{ hasNextPage endCursor }} "
+            f"nodes {{ ...{fragment} }} }}")
+
+
+def _batch_query(n):
+    """One query for n repos, aliased r0..r{n-1}, first page of both lists.
+    Each repo has its own since cursor ($s0..)."""
+    params = ", ".join(f"$o{i}: String!, $n{i}: String!, $s{i}: DateTime" for i in range(n))
+    repos = "\n".join(
+        f"  r{i}: repository(owner: $o{i}, name: $n{i}) {{ "
+        f"{_connection('issues', 'null', f'$s{i}')} "
+        f"{_connection('pullRequests', 'null', None)} }}"
+        for i in range(n))
+    return (f"query({params}) {{\n"
+            f"  rateLimit {{ cost remaining resetAt }}\n{repos}\n}}\n{_FRAGMENTS}")
+
+
+def _page_query(name):
+    """Follow-up page of one connection of one repo. GraphQL rejects unused
+    variables, so $since is declared only where the issues filter uses it."""
+    since = ", $since: DateTime" if name == "issues" else ""
+    return (f"query($owner: String!, $name: String!, $after: String!{since}) {{\n"
+            "  rateLimit { cost remaining resetAt }\n"
+            f"  repository(owner: $owner, name: $name) "
+            f"{{ {_connection(name, '$after', '$since')} }}\n"
+            f"}}\n{_FRAGMENTS}")
+
+
+def _login(actor):
+    # REST reports a deleted account as "ghost" and an app as "name[bot]";
+    # GraphQL gives null and the bare app name. Match REST so both modes
+    # feed identical logins to the delta/awaiting layer.
+    if not actor:
+        return "ghost"
+    login = actor.get("login") or ""
+    if actor.get("__typename") == "Bot" and not login.endswith("[bot]"):
+        login += "[bot]"
+    return login
+
+
+class GitHubGraphQLCollector(GitHubCollector):
+    """GitHubCollector that lists threads for BATCH_SIZE repos per GraphQL query.
+
+    The REST collector costs at least one request per repo per run plus one
+    comments request per changed thread. Here a batch of repos comes back in
+    one round trip with each thread's newest comments attached, so
+    thread_signals() is answered from memory.
+
+    Batches are sized from what the last one reported in rateLimit: the cost
+    per repo caps a batch at BATCH_COST_TARGET points, and the points left
+    above POINTS_RESERVE cap it further, so the hour's last points go to
+    small batches instead of one that overdraws the reserve. Points a batch
+    is expected to cost are spent locally before it is sent, as the REST
+    RateLimiter does with requests, so concurrent batches don't all plan
+    against the same balance. Repo and notification
+    enumeration stay on REST (inherited), and so does anything GraphQL could
+    not answer: a failed batch is split in half and retried, and a repo that
+    still fails — or a run that is short on GraphQL points — is listed via
+    the REST path instead. Thread objects are identical in both modes."""
+
+    batch_size = BATCH_SIZE
+
+    def __init__(self, client, cfg, gql_client):
+        super().__init__(client, cfg)
+        self.gql = gql_client
+        self._exhausted = False
+        self._lock = threading.Lock()
+        self._cost_per_repo = None   # from the last batch's rateLimit.cost
+        self._points_left = None     # rateLimit.remaining, less local spending
+        self._reset_at = None
+        # (repo_full_name, number) -> (totalCount, [(login, id, created_at, body)])
+        self._comments = {}
+
+    def list_threads(self, repo, since):
+        found, err = self.list_threads_batch([repo], [since])[0]
+        if err is not None:
+            raise err
+        return found
+
+    def list_threads_batch(self, repos, sinces):
+        """[(threads, None) | (None, exception)] per repo, in input order.
+        ``sinces`` is parallel to ``repos``."""
+        out = []
+        while len(out) < len(repos):
+            n = self._next_batch_size(len(repos) - len(out))
+            i = len(out)
+            out += self._list_batch(repos[i:i + n], sinces[i:i + n])
+        return out
+
+    def _next_batch_size(self, pending):
+        """How many of ``pending`` repos the next query may carry."""
+        with self._lock:
+            per_repo = self._cost_per_repo
+            if self._exhausted or not per_repo or self._points_left is None:
+                return min(pending, self.batch_size)
+            spare = self._points_left - POINTS_RESERVE
+            if spare < per_repo:
+                log.info("graphql points low (%d left); continuing via REST",
+                         self._points_left)
+                self._exhausted = True
+                return pending
+            n = max(1, min(pending, self.batch_size, int(BATCH_COST_TARGET // per_repo),
+                           int(spare // per_repo)))
+            self._points_left -= n * per_repo
+            return n
+
+    def _list_batch(self, repos, sinces):
+        fetched = {}
+        if repos and not self._exhausted:
+            try:
+                fetched = self._fetch_batch(repos, sinces)
+            except Exception as e:
+                if len(repos) > 1:
+                    half = len(repos) // 2
+                    return (self._list_batch(repos[:half], sinces[:half])
+                            + self._list_batch(repos[half:], sinces[half:]))
+                log.warning("graphql listing failed (%s); using REST", type(e).__name__)
+        return [(fetched[r.full_name], None) if r.full_name in fetched
+                else self._rest_threads(r, since) for r, since in zip(repos, sinces)]
+
+    def _rest_threads(self, repo, since):
+        try:
+            return GitHubCollector.list_threads(self, repo, since), None
+        except Exception as e:
+            return None, e
+
+    def _fetch_batch(self, repos, sinces):
+        variables = {}
+        for i, (r, since) in enumerate(zip(repos, sinces)):
+            variables.update({f"o{i}": r.owner, f"n{i}": r.name, f"s{i}": since})
+        data = self._query(_batch_query(len(repos)), variables, repos=len(repos))
+        out = {}
+        for i, (r, since) in enumerate(zip(repos, sinces)):
+            node = data.get(f"r{i}")
+            if node is None:
+                continue   # not found / disabled / partial error: REST decides
+            threads = []
+            for name, kind in (("issues", "issue"), ("pullRequests", "pr")):
+                threads.extend(self._read_connection(r, node[name], name, kind, since))
+            threads.sort(key=lambda t: t.updated_at or "", reverse=True)
+            out[r.full_name] = threads
+        return out
+
+    def _read_connection(self, repo, conn, name, kind, since):
+        out = []
+        while True:
+            older = False
+            for n in conn.get("nodes") or []:
+                if since and (n.get("updatedAt") or "") < since:
+                    older = True
+                    continue
+                out.append(self._thread(repo, n, kind))
+            page = conn.get("pageInfo") or {}
+            if older or not page.get("hasNextPage"):
+                return out
+            variables = {"owner": repo.owner, "name": repo.name, "after": page["endCursor"]}
+            if name == "issues":
+                variables["since"] = since
+            data = self._query(_page_query(name), variables)
+            conn = (data.get("repository") or {}).get(name) or {}
+
+    def _query(self, query, variables, repos=0):
+        body = self.gql.graphql(query, variables)
+        data = body["data"]
+        self._observe(data.get("rateLimit") or {}, repos)
+        return data
+
+    def _observe(self, rl, repos):
+        """Record a response's rateLimit; ``repos`` > 0 for a batch query,
+        whose cost is what later batches are sized from."""
+        cost, remaining = rl.get("cost"), rl.get("remaining")
+        with self._lock:
+            if repos and isinstance(cost, int) and cost > 0:
+                self._cost_per_repo = cost / repos
+            if not isinstance(remaining, int):
+                return
+            # Responses to concurrent queries arrive out of order; within one
+            # window the smallest balance seen (or spent locally) is the truth.
+            if self._points_left is not None and rl.get("resetAt") == self._reset_at:
+                remaining = min(remaining, self._points_left)
+            self._points_left, self._reset_at = remaining, rl.get("resetAt")
+            if remaining < POINTS_RESERVE:
+                if not self._exhausted:
+                    log.info("graphql points low (%d left); continuing via REST", remaining)
+                self._exhausted = True
+
+    def _thread(self, repo, n, kind):
+        login = _login(n.get("author"))
+        comments = n.get("comments") or {}
+        total = int(comments.get("totalCount") or 0)
+        with self._lock:
+            self._comments[(repo.full_name, n["number"])] = (total, [
+                (_login(c.get("author")), c.get("databaseId"), c.get("createdAt"),
+                 c.get("body") or "")
+                for c in comments.get("nodes") or []])
+        return Thread(
+            platform="github", node_id=n["id"],
+            repo_full_name=repo.full_name, number=n["number"], kind=kind,
+            title=redact(n.get("title") or ""), html_url=n.get("url") or "",
+            state=_STATE.get(n.get("state"), "open"), closed_at=n.get("closedAt"),
+            comment_count=total,
+            # Same coarse opener-derived shape as REST; thread_signals()
+            # supplies the real last comment for changed threads.
+            last_comment_id=None, last_comment_at=n.get("updatedAt"),
+            last_commenter=login, last_commenter_is_bot=_is_bot(login),
+            author_association=n.get("authorAssociation"),
+            updated_at=n.get("updatedAt"),
+            body_excerpt=redact((n.get("body") or "")[:600]),
+            labels=[lb.get("name", "") for lb in (n.get("labels") or {}).get("nodes") or []],
+            review_decision=n.get("reviewDecision"))
+
+    def thread_signals(self, repo_full_name, number, owners):
+        """Answered from the comments fetched with the listing when possible.
+
+        Falls back to the REST fetch for threads not seen in this run, and for
+        long threads where no owner reply is among the newest comments we
+        hold (an older one may exist beyond them)."""
+        with self._lock:
+            seen = self._comments.get((repo_full_name, number))
+        if seen is None:
+            return super().thread_signals(repo_full_name, number, owners)
+        total, comments = seen
+        if not comments:
+            return None
+        has_owner = any(login.lower() in owners for login, _, _, _ in comments)
+        if not has_owner and total > len(comments):
+            return super().thread_signals(repo_full_name, number, owners)
+        login, cid, created_at, body = comments[-1]
+        return {
+            "last_commenter": login,
+            "last_commenter_is_bot": _is_bot(login),
+            "last_comment_id": str(cid),
+            "last_comment_at": created_at,
+            "body_excerpt": redact(body[:600]),
+            "has_owner_response": has_owner,
+        }
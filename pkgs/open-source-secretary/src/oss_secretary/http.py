@@ -1,8 +1,12 @@
 from __future__ import annotations
+import hashlib
+import json
 import logging
+import threading
 import time
 from urllib.parse import urlencode, urlparse
 import requests
+from requests.adapters import HTTPAdapter
 
 log = logging.getLogger("oss_secretary.http")
 MAX_RETRIES = 5
@@ -16,7 +20,10 @@ class NullCache:
     def cache_get(self, url):
         return (None, None)
 
-    def cache_set(self, url, etag, lm):
+    def cache_get_body(self, url):
+        return None
+
+    def cache_set(self, url, etag, lm, body=None, link=None, total=None):
         pass
 
 
@@ -38,33 +45,105 @@ class _StripAuthSession(requests.Session):
             pass
 
 
+class RateLimiter:
+    """Thread-safe per-host pacing: a token bucket plus the server's own quota.
+
+    Two independent limits, applied together in acquire():
+
+    * ``min_interval`` spacing, as a virtual-scheduling token bucket with a
+      burst of one. Each caller reserves the next free slot under the lock
+      and sleeps outside it, so N workers sharing one host are spaced out
+      rather than all sleeping the same interval and then bursting.
+    * the quota the server advertises in ``X-RateLimit-Remaining`` /
+      ``X-RateLimit-Reset``. observe() refills the bucket from every
+      response; acquire() spends a token locally so concurrent workers don't
+      all spend the same one; an empty bucket waits out the reset instead of
+      earning a 403 and a blind backoff.
+
+    A host that advertises nothing (Gitea) is governed by min_interval alone.
+    """
+
+    def __init__(self, min_interval=0.0):
+        self.min_interval = min_interval
+        self._next_slot = 0.0            # monotonic time the next request may start
+        self._remaining = None           # None = server hasn't told us yet
+        self._reset_at = None            # epoch seconds, from X-RateLimit-Reset
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            wait = 0.0
+            if self.min_interval:
+                now = time.monotonic()
+                start = max(self._next_slot, now)
+                wait = start - now
+                self._next_slot = start + self.min_interval
+            if self._remaining is not None:
+                now_wall = time.time()
+                if self._reset_at is not None and now_wall >= self._reset_at:
+                    self._remaining = None   # window rolled over; next response re-arms
+                elif self._remaining <= 0:
+                    wait = max(wait, (self._reset_at or now_wall) - now_wall + 1)
+                else:
+                    self._remaining -= 1
+        if wait > 0:
+            time.sleep(wait)
+
+    def observe(self, headers):
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        if not (remaining and remaining.isdigit() and reset and reset.isdigit()):
+            return
+        remaining, reset = int(remaining), int(reset)
+        with self._lock:
+            # Responses to concurrent requests arrive out of order; within one
+            # window the smallest count seen (or spent locally) is the truth.
+            if self._remaining is not None and reset == self._reset_at:
+                remaining = min(remaining, self._remaining)
+            self._remaining, self._reset_at = remaining, reset
+
+
 class Client:
-    def __init__(self, base_url, auth, ca_bundle, cache, source, min_interval=0.0):
+    def __init__(self, base_url, auth, ca_bundle, cache, source, min_interval=0.0,
+                 pool_size=10):
         self.base_url = base_url.rstrip("/")
         self.source = source
         self.cache = cache
         # min_interval enforces a floor on the spacing between requests so a
         # full scan can't burst a small self-hosted host (gitea.vulcan.lan) into
-        # rate-limiting. 0.0 = no throttle (GitHub, which advertises rate-limit
-        # headers and is handled by _backoff instead).
+        # rate-limiting. 0.0 = no spacing (GitHub, which advertises rate-limit
+        # headers; the limiter follows those instead).
         self.min_interval = min_interval
-        self._last_req = 0.0
+        self.limiter = RateLimiter(min_interval)
         self._s = _StripAuthSession()
+        # One pooled connection per concurrent collector worker; the default
+        # (10) would otherwise churn sockets under a wider pool.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(10, pool_size))
+        self._s.mount("https://", adapter)
+        self._s.mount("http://", adapter)
         self._s.headers.update(auth)
         self._s.headers["Accept"] = "application/json"
         self._verify = ca_bundle if ca_bundle else True
+        # Cached bodies are only valid for the credential that fetched them
+        # (a private repo's issues must not be replayed to another token), so
+        # cache keys carry a digest of the auth headers. Anonymous = bare URL.
+        self._scope = (hashlib.sha256(json.dumps(sorted(auth.items())).encode())
+                       .hexdigest()[:16] if auth else "")
 
     def _url(self, path):
         return path if path.startswith("http") else f"{self.base_url}{path}"
 
-    @staticmethod
-    def _cache_key(url, params):
-        if not params:
-            return url
-        return f"{url}?{urlencode(sorted(params.items()))}"
+    def _cache_key(self, url, params):
+        key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+        return f"{key} #{self._scope}" if self._scope else key
 
     def get(self, path, params=None, conditional=True):
-        """GET one resource. Returns (json_or_None_if_304, headers).
+        """GET one resource. Returns (json, headers).
+
+        A conditional request stores the body alongside its validators, and a
+        304 returns that stored body with its Link/X-Total-Count, so an
+        unchanged page costs a free 304 instead of a full transfer. Only a 304
+        with no stored body (a validator-only entry) returns (None, headers).
 
         conditional=False disables If-None-Match/If-Modified-Since so the
         server always returns the full body — required for enumeration
@@ -81,30 +160,52 @@ class Client:
                 headers["If-Modified-Since"] = lm
         resp = self._request(url, params, headers)
         if resp.status_code == 304:
-            return None, resp.headers
+            cached = self.cache.cache_get_body(key) if conditional else None
+            if cached is None:
+                return None, resp.headers
+            body, link, total = cached
+            replay = requests.structures.CaseInsensitiveDict(resp.headers)
+            replay.pop("Link", None)
+            replay.pop("X-Total-Count", None)
+            if link:
+                replay["Link"] = link
+            if total is not None:
+                replay["X-Total-Count"] = total
+            return json.loads(body), replay
         if conditional:
             new_etag = resp.headers.get("ETag")
             new_lm = resp.headers.get("Last-Modified")
             if new_etag or new_lm:
-                self.cache.cache_set(key, new_etag, new_lm)
+                self.cache.cache_set(key, new_etag, new_lm, body=resp.content,
+                                     link=resp.headers.get("Link"),
+                                     total=resp.headers.get("X-Total-Count"))
         return resp.json(), resp.headers
 
+    def graphql(self, query, variables=None):
+        """POST one GraphQL query to ``{base_url}/graphql``. Returns the parsed
+        envelope (``data`` plus any partial ``errors``); a response with no
+        ``data`` at all raises HttpError, metadata only."""
+        resp = self._request(self._url("/graphql"), None, {}, method="POST",
+                             json={"query": query, "variables": variables or {}})
+        body = resp.json()
+        if not isinstance(body, dict) or body.get("data") is None:
+            kinds = sorted({e.get("type", "ERROR") for e in (body or {}).get("errors", [])
+                            if isinstance(e, dict)}) if isinstance(body, dict) else []
+            raise HttpError(f"{self.source}: GraphQL query failed {kinds}")
+        return body
+
     def _throttle(self):
-        if not self.min_interval:
-            return
-        wait = self.min_interval - (time.monotonic() - self._last_req)
-        if wait > 0:
-            time.sleep(wait)
-        self._last_req = time.monotonic()
+        self.limiter.acquire()
 
-    def _request(self, url, params, headers):
+    def _request(self, url, params, headers, method="GET", json=None):
         attempt = 0
         while True:
             attempt += 1
             self._throttle()
             try:
-                resp = self._s.get(url, params=params, headers=headers,
-                                   timeout=30, allow_redirects=True, verify=self._verify)
+                resp = self._s.request(method, url, params=params, headers=headers,
+                                       json=json, timeout=30, allow_redirects=True,
+                                       verify=self._verify)
             except requests.RequestException as e:
                 # Connection/timeout/DNS blips: retry then surface as HttpError
                 # so per-repo isolation can skip cleanly (never leak the URL).
@@ -112,6 +213,7 @@ class Client:
                     raise HttpError(f"{self.source}: transport error {type(e).__name__}")
                 time.sleep(min(60, 2 ** attempt))
                 continue
+            self.limiter.observe(resp.headers)
             if resp.status_code == 429 or 500 <= resp.status_code < 600:
                 if attempt > MAX_RETRIES:
                     raise HttpError(f"{self.source}: {resp.status_code} after {attempt} tries")
@@ -143,9 +245,10 @@ class Client:
 
     def paginate(self, path, params=None, conditional=True):
         """Fetch all pages. Follows GitHub ``Link rel=next``; for Gitea uses
-        ``X-Total-Count`` with an explicit page counter. A 304 on page 1
-        (conditional only) yields ``[]`` — correct for since-filtered lists,
-        which is why enumeration callers pass conditional=False."""
+        ``X-Total-Count`` with an explicit page counter. A 304 replays the
+        stored page (and its paging headers), so an unchanged listing walks
+        the cache; a 304 with nothing stored yields ``[]``, which is why
+        enumeration callers pass conditional=False."""
         items = []
         params = dict(params or {})
         page = int(params.get("page", 1))
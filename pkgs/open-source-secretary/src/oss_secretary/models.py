@@ -34,6 +34,8 @@ class Thread:
     author_association: str | None
     updated_at: str | None
     body_excerpt: str = ""   # transient, redacted; NEVER persisted
+    labels: list[str] = field(default_factory=list)   # transient, not persisted
+    review_decision: str | None = None   # PRs via GraphQL only: APPROVED | CHANGES_REQUESTED | REVIEW_REQUIRED
 
 
 @dataclass
@@ -2,11 +2,13 @@ from __future__ import annotations
 import logging
 import sys
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from .config import Config
 from .state import State
 from .http import Client, HttpError
 from .github import GitHubCollector
+from .github_graphql import GitHubGraphQLCollector
 from .gitea import GiteaCollector
 from .delta import compute_deltas, compute_stale, build_awaiting, owner_logins
 from . import triage as _triage_mod
@@ -40,59 +42,139 @@ def _since_with_overlap(watermark_iso):
 
 
 def _make_collectors(cfg, state):
-    gh = GitHubCollector(
-        Client("https://api.github.com", {"Authorization": f"Bearer {cfg.github_token}"},
-               CA, state, "github"), cfg)
+    auth = {"Authorization": f"Bearer {cfg.github_token}"}
+    rest = Client("https://api.github.com", auth, CA, state, "github", pool_size=cfg.workers)
+    if cfg.github_graphql:
+        # A second Client so the GraphQL points quota gets its own RateLimiter
+        # rather than being mistaken for the REST request quota.
+        gh = GitHubGraphQLCollector(rest, cfg, Client(
+            "https://api.github.com", auth, CA, state, "github", pool_size=cfg.workers))
+    else:
+        gh = GitHubCollector(rest, cfg)
     gt = GiteaCollector(
         Client(cfg.gitea_url, {"Authorization": f"token {cfg.gitea_token}"},
-               CA, state, "gitea", min_interval=cfg.gitea_min_interval), cfg)
+               CA, state, "gitea", min_interval=cfg.gitea_min_interval,
+               pool_size=cfg.workers), cfg)
     return gh, gt
 
 
+def _results(futures):
+    """(result, exception) per future, in SUBMISSION order — never completion
+    order — so a concurrent run merges exactly as the old sequential loop did."""
+    out = []
+    for f in futures:
+        try:
+            out.append((f.result(), None))
+        except Exception as e:
+            out.append((None, e))
+    return out
+
+
+def _submit_scans(pool, collector, repos, sinces):
+    """One future per repo, in repo order; ``sinces`` is parallel to repos.
+    A collector offering
+    list_threads_batch (GitHub via GraphQL) is called once per batch_size
+    repos and its per-repo outcomes fan out to the per-repo futures, so the
+    merge in _collect is the same either way."""
+    batch = getattr(collector, "list_threads_batch", None)
+    if batch is None:
+        return [pool.submit(collector.list_threads, r, s) for r, s in zip(repos, sinces)]
+    futs = []
+    for i in range(0, len(repos), collector.batch_size):
+        group = repos[i:i + collector.batch_size]
+        outs = [Future() for _ in group]
+        pool.submit(batch, group, sinces[i:i + collector.batch_size]).add_done_callback(
+            lambda f, outs=outs: _fan_out(f, outs))
+        futs.extend(outs)
+    return futs
+
+
+def _fan_out(batch_future, outs):
+    try:
+        results = batch_future.result()
+    except Exception as e:
+        results = [(None, e)] * len(outs)
+    for out, (found, err) in zip(outs, results):
+        if err is None:
+            out.set_result(found)
+        else:
+            out.set_exception(err)
+
+
 def _collect(cfg, state, cov, gh, gt):
     """Return (threads, notifications). Per-repo isolated: one bad repo (HTTP,
     transport, or malformed JSON) is logged (redacted, metadata-only), counted,
-    and skipped — never aborts the run."""
+    and skipped — never aborts the run.
+
+    Fetches run on a pool of cfg.workers threads: both hosts' repo lists and
+    notifications first, then every repo's thread listing at once. Pacing is
+    each Client's RateLimiter (quota headers / min_interval), so wall time is
+    bounded by API quota rather than by per-request latency. Results are merged
+    on this thread in enumeration order, so output is deterministic.
+
+    Each repo is listed from its own cursor (the newest updated_at it returned
+    before, minus OVERLAP) rather than the run watermark, so an idle repo asks
+    the same since-URL every run and the conditional GET comes back a free
+    304 replayed from the body cache. Repos with no cursor yet use the
+    per-host watermark. Cursors advance only for repos that scanned cleanly
+    and, like everything else, are committed only if the report is sent."""
     threads, notifs = [], []
     gh_since = _since_with_overlap(state.get_meta("github_last_poll_utc"))
     gt_since = _since_with_overlap(state.get_meta("gitea_last_poll_utc"))
-    for collector, since in ((gh, gh_since), (gt, gt_since)):
-        name = collector.__class__.__name__
-        try:
-            repos = collector.list_repos()
-        except Exception as e:
-            log.warning("repo enumeration failed for %s: %s", name, type(e).__name__)
-            cov.repos_errored += 1
-            continue
-        for r in repos:
-            try:
-                threads.extend(collector.list_threads(r, since))
-                cov.repos_scanned += 1
-            except Exception as e:
-                log.warning("repo scan failed (%s): %s", name, type(e).__name__)
+    cursors, newest = state.repo_cursors(), {}
+    plan = ((gh, gh_since), (gt, gt_since))
+    with ThreadPoolExecutor(max_workers=cfg.workers, thread_name_prefix="collect") as pool:
+        repo_futs = [pool.submit(c.list_repos) for c, _ in plan]
+        notif_futs = [pool.submit(c.list_notifications, since) for c, since in plan]
+        scans = []
+        for (collector, since), (repos, err) in zip(plan, _results(repo_futs)):
+            name = collector.__class__.__name__
+            if err is not None:
+                log.warning("repo enumeration failed for %s: %s", name, type(err).__name__)
+                cov.repos_errored += 1
+                continue
+            sinces = [_since_with_overlap(cursors.get((r.platform, r.full_name))) or since
+                      for r in repos]
+            scans.append((name, repos, _submit_scans(pool, collector, repos, sinces)))
+        for name, repos, futs in scans:
+            for r, (found, err) in zip(repos, _results(futs)):
+                if err is None:
+                    threads.extend(found)
+                    cov.repos_scanned += 1
+                    stamps = [t.updated_at for t in found if t.updated_at]
+                    if stamps:
+                        newest[(r.platform, r.full_name)] = max(stamps)
+                    continue
+                log.warning("repo scan failed (%s): %s", name, type(err).__name__)
                 cov.repos_errored += 1
                 cov.errored_repos.append(r.full_name)
                 # `r` IS a Repo here and carries the authoritative html_url;
                 # the render layer cannot derive one because a bare
                 # `owner/name` is ambiguous between GitHub and Gitea.
                 cov.errored_repo_urls[r.full_name] = r.html_url
-        try:
-            notifs.extend(collector.list_notifications(since))
-        except Exception as e:
-            log.warning("notifications fetch failed for %s: %s", name, type(e).__name__)
+        for (collector, _), (found, err) in zip(plan, _results(notif_futs)):
+            if err is None:
+                notifs.extend(found)
+            else:
+                log.warning("notifications fetch failed for %s: %s",
+                            collector.__class__.__name__, type(err).__name__)
+    for (platform, repo), stamp in newest.items():
+        state.set_repo_cursor(platform, repo, stamp)
     return threads, notifs
 
 
-def _enrich(deltas, gh, gt, owners, now_iso):
+def _enrich(deltas, gh, gt, owners, now_iso, workers=1):
     """Replace opener-derived coarse signals with the REAL last comment for each
     changed thread (bounded to the small delta set). Rebuilds the awaiting bundle
-    with the true last commenter + has_owner_response from comment history."""
-    for d in deltas:
+    with the true last commenter + has_owner_response from comment history.
+    The per-thread comment fetches run concurrently; results apply in order."""
+    def signals(d):
         collector = gh if d.thread.platform == "github" else gt
-        try:
-            sig = collector.thread_signals(d.thread.repo_full_name, d.thread.number, owners)
-        except Exception:
-            sig = None
+        return collector.thread_signals(d.thread.repo_full_name, d.thread.number, owners)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="enrich") as pool:
+        fetched = _results([pool.submit(signals, d) for d in deltas])
+    for d, (sig, _err) in zip(deltas, fetched):
         if not sig:
             continue
         t = d.thread
@@ -149,7 +231,7 @@ def main() -> int:
             subject, body, html_body = render_baseline(cfg, gh_n, gt_n, date_str)
         else:
             if len(deltas) <= ENRICH_CAP:
-                _enrich(deltas, gh, gt, owners, now_iso)
+                _enrich(deltas, gh, gt, owners, now_iso, workers=cfg.workers)
             else:
                 log.info("skipping per-thread enrichment for %d items (large/initial run)",
                          len(deltas))
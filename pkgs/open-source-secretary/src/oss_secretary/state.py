@@ -1,15 +1,57 @@
 from __future__ import annotations
 import fcntl
+import hashlib
 import os
 import sqlite3
+import threading
+import zlib
 
-SCHEMA_VERSION = 1
+SCHEMA_VERSION = 2
 _THREAD_COLS = [
     "platform", "node_id", "repo_full_name", "number", "kind", "title",
     "html_url", "state", "closed_at", "comment_count", "last_comment_id",
     "last_comment_at", "last_commenter", "author_association", "updated_at",
     "first_seen_run", "last_seen_run",
 ]
+# What a collector reports; first/last_seen_run are derived in merge_threads.
+_INCOMING_COLS = _THREAD_COLS[:-2]
+
+# Classify every staged thread against its stored prior in one join. Mirrors
+# the old per-thread rules: closed is recorded, never reported; baseline
+# reports nothing; otherwise new / reopened / new_comment.
+_CLASSIFY = """
+SELECT i.ord, CASE
+  WHEN i.state = 'closed' OR :baseline THEN NULL
+  WHEN p.node_id IS NULL THEN 'new'
+  WHEN p.state = 'closed' THEN 'reopened'
+  WHEN i.comment_count > p.comment_count THEN 'new_comment'
+END AS change
+FROM incoming i LEFT JOIN threads p USING (platform, node_id)
+ORDER BY i.ord"""
+
+# Write the staged batch back. An unchanged replay (the per-repo cursor's
+# OVERLAP re-lists a repo's newest threads every run) keeps its
+# last_seen_run so compute_stale still sees it as idle.
+_MERGE = f"""
+INSERT INTO threads ({",".join(_THREAD_COLS)})
+SELECT {",".join(f"i.{c}" for c in _INCOMING_COLS)},
+  COALESCE(p.first_seen_run, :run),
+  CASE WHEN p.node_id IS NOT NULL AND p.updated_at IS i.updated_at
+        AND p.state = i.state AND p.comment_count = i.comment_count
+       THEN p.last_seen_run ELSE :run END
+FROM incoming i LEFT JOIN threads p USING (platform, node_id)
+WHERE true
+ON CONFLICT(platform, node_id) DO UPDATE SET
+  {",".join(f"{c}=excluded.{c}" for c in _THREAD_COLS
+            if c not in ("platform", "node_id", "first_seen_run"))}"""
+
+# julianday() reads the stored ISO-8601 'Z' timestamps directly; an
+# unparseable one yields NULL and is never stale (as before).
+_STALE = """
+SELECT * FROM threads
+WHERE state = 'open' AND last_seen_run != :run
+  AND julianday(:now) - julianday(updated_at) > :days
+ORDER BY rowid"""
 
 
 class State:
@@ -17,6 +59,11 @@ class State:
         self.db_path = db_path
         self._db: sqlite3.Connection | None = None
         self._lock_fd = None
+        # The HTTP cache methods are called from report._collect's worker
+        # threads (each http.Client holds this State as its cache); everything
+        # else runs on the main thread. One lock serialises the shared
+        # connection for those callers.
+        self._cache_lock = threading.Lock()
 
     @property
     def _conn(self) -> sqlite3.Connection:
@@ -29,7 +76,7 @@ class State:
         if d:
             os.makedirs(d, exist_ok=True)
         os.umask(0o077)
-        self._db = sqlite3.connect(self.db_path)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
         self._db.row_factory = sqlite3.Row
         self._db.executescript(f"""
         CREATE TABLE IF NOT EXISTS threads (
@@ -41,16 +88,40 @@ class State:
           author_association TEXT, updated_at TEXT,
           first_seen_run INTEGER NOT NULL, last_seen_run INTEGER NOT NULL,
           PRIMARY KEY (platform, node_id));
+        CREATE INDEX IF NOT EXISTS idx_threads_open_updated
+          ON threads(updated_at) WHERE state = 'open';
         CREATE TABLE IF NOT EXISTS http_cache (
-          url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fetched_at TEXT);
+          url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fetched_at TEXT,
+          body_digest TEXT, link TEXT, total_count TEXT);
+        CREATE TABLE IF NOT EXISTS http_bodies (
+          digest TEXT PRIMARY KEY, body BLOB NOT NULL);
+        CREATE TABLE IF NOT EXISTS repo_cursors (
+          platform TEXT NOT NULL, repo_full_name TEXT NOT NULL, updated_at TEXT NOT NULL,
+          PRIMARY KEY (platform, repo_full_name));
         CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
         CREATE TABLE IF NOT EXISTS run_summaries (
           run_id INTEGER PRIMARY KEY, created_at TEXT, summary TEXT);
         """)
-        if self.get_meta("schema_version") is None:
-            self.set_meta("schema_version", str(SCHEMA_VERSION))
+        self._migrate()
+        # Bodies are shared by digest (every empty `[]` page is one row);
+        # drop the ones no cache entry points at any more.
+        self._db.execute(
+            "DELETE FROM http_bodies WHERE digest NOT IN "
+            "(SELECT body_digest FROM http_cache WHERE body_digest IS NOT NULL)")
         self.commit()
 
+    def _migrate(self):
+        version = self.get_meta("schema_version")
+        if version is not None and int(version) < 2:
+            # v1 http_cache held validators only; its rows stay usable and
+            # gain a body the next time their URL returns 200.
+            have = {r["name"] for r in self._db.execute("PRAGMA table_info(http_cache)")}
+            for col in ("body_digest", "link", "total_count"):
+                if col not in have:
+                    self._db.execute(f"ALTER TABLE http_cache ADD COLUMN {col} TEXT")
+        if version is None or int(version) < SCHEMA_VERSION:
+            self.set_meta("schema_version", str(SCHEMA_VERSION))
+
     def acquire_lock(self):
         # Ensure the state dir exists so the lock can be taken BEFORE any
         # schema DDL (open()), i.e. before touching the DB.
@@ -86,21 +157,84 @@ class State:
             f"ON CONFLICT(platform,node_id) DO UPDATE SET {upd}",
             [row[c] for c in _THREAD_COLS])
 
+    def merge_threads(self, rows, run_id, baseline):
+        """Stage ``rows`` (_INCOMING_COLS dicts, in order) in a temp table,
+        classify them against ``threads`` and upsert them, all as statements
+        on the open transaction (commit() makes it durable with the run).
+
+        Returns [(index into rows, change)] for rows that are a delta. A
+        node listed twice (a repo renamed mid-run) is staged once, last
+        listing wins."""
+        db = self._conn
+        db.execute(f"CREATE TEMP TABLE IF NOT EXISTS incoming ("
+                   f"{','.join(_INCOMING_COLS)}, ord INTEGER NOT NULL, "
+                   f"PRIMARY KEY (platform, node_id))")
+        db.execute("DELETE FROM incoming")
+        db.executemany(
+            f"INSERT OR REPLACE INTO incoming ({','.join(_INCOMING_COLS)}, ord) "
+            f"VALUES ({','.join('?' for _ in _INCOMING_COLS)}, ?)",
+            ([r[c] for c in _INCOMING_COLS] + [i] for i, r in enumerate(rows)))
+        changes = [(r["ord"], r["change"])
+                   for r in db.execute(_CLASSIFY, {"baseline": bool(baseline)})
+                   if r["change"]]
+        db.execute(_MERGE, {"run": run_id})
+        db.execute("DELETE FROM incoming")
+        return changes
+
+    def stale_threads(self, run_id, stale_days, now_iso):
+        """Open threads not listed this run and idle for over stale_days."""
+        return [dict(r) for r in self._conn.execute(
+            _STALE, {"run": run_id, "now": now_iso, "days": stale_days})]
+
     def open_threads(self):
         return [dict(r) for r in self._conn.execute(
             "SELECT * FROM threads WHERE state='open'")]
 
     def cache_get(self, url):
-        r = self._conn.execute(
-            "SELECT etag,last_modified FROM http_cache WHERE url=?", (url,)).fetchone()
+        with self._cache_lock:
+            r = self._conn.execute(
+                "SELECT etag,last_modified FROM http_cache WHERE url=?", (url,)).fetchone()
         return (r["etag"], r["last_modified"]) if r else (None, None)
 
-    def cache_set(self, url, etag, lm):
+    def cache_get_body(self, url):
+        """(raw JSON bytes, Link, X-Total-Count) stored with the validators
+        for ``url``, or None when only validators (or nothing) are stored."""
+        with self._cache_lock:
+            r = self._conn.execute(
+                "SELECT b.body, c.link, c.total_count FROM http_cache c "
+                "JOIN http_bodies b ON b.digest = c.body_digest WHERE c.url=?",
+                (url,)).fetchone()
+        return (zlib.decompress(r["body"]), r["link"], r["total_count"]) if r else None
+
+    def cache_set(self, url, etag, lm, body=None, link=None, total=None):
+        digest = hashlib.sha256(body).hexdigest() if body is not None else None
+        with self._cache_lock:
+            if digest:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO http_bodies(digest,body) VALUES(?,?)",
+                    (digest, zlib.compress(body)))
+            self._conn.execute(
+                "INSERT INTO http_cache(url,etag,last_modified,fetched_at,body_digest,"
+                "link,total_count) VALUES(?,?,?,datetime('now'),?,?,?) "
+                "ON CONFLICT(url) DO UPDATE SET "
+                "etag=excluded.etag,last_modified=excluded.last_modified,"
+                "fetched_at=excluded.fetched_at,body_digest=excluded.body_digest,"
+                "link=excluded.link,total_count=excluded.total_count",
+                (url, etag, lm, digest, link, total))
+
+    def repo_cursors(self):
+        """{(platform, repo_full_name): newest thread updated_at seen there}.
+        Server-clock timestamps, so local clock skew can't open a gap."""
+        return {(r["platform"], r["repo_full_name"]): r["updated_at"]
+                for r in self._conn.execute("SELECT * FROM repo_cursors")}
+
+    def set_repo_cursor(self, platform, repo_full_name, updated_at):
+        # Only ever moves forward: a replayed overlap window can't rewind it.
         self._conn.execute(
-            "INSERT INTO http_cache(url,etag,last_modified,fetched_at) "
-            "VALUES(?,?,?,datetime('now')) ON CONFLICT(url) DO UPDATE SET "
-            "etag=excluded.etag,last_modified=excluded.last_modified,"
-            "fetched_at=excluded.fetched_at", (url, etag, lm))
+            "INSERT INTO repo_cursors(platform,repo_full_name,updated_at) VALUES(?,?,?) "
+            "ON CONFLICT(platform,repo_full_name) DO UPDATE SET "
+            "updated_at=max(updated_at, excluded.updated_at)",
+            (platform, repo_full_name, updated_at))
 
     def get_meta(self, key):
         r = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
@@ -20,7 +20,12 @@ def build_prompt(deltas, notifications, budget):
         awaiting = (not d.awaiting.is_last_commenter_owner
                     and not d.awaiting.last_actor_is_bot
                     and not d.awaiting.has_owner_response)
-        block = (f"[{iid}] ({d.thread.kind}, {d.change}) {redact(d.thread.title)}\n"
+        extra = ""
+        if d.thread.labels:
+            extra += f" labels={','.join(redact(lb) for lb in d.thread.labels[:8])}"
+        if d.thread.review_decision:
+            extra += f" review={d.thread.review_decision}"
+        block = (f"[{iid}] ({d.thread.kind}, {d.change}) {redact(d.thread.title)}{extra}\n"
                  f"  awaiting_owner={awaiting} last_bot={d.awaiting.last_actor_is_bot}"
                  f" last_commenter={d.thread.last_commenter}\n"
                  f"  excerpt: {redact(d.thread.body_excerpt)[:600]}\n")
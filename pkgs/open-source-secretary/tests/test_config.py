@@ -28,3 +28,11 @@ def test_include_private_toggle(tmp_path, monkeypatch):
     monkeypatch.setenv("OSS_SECRETARY_INCLUDE_PRIVATE", "1")
     monkeypatch.setenv("OSS_SECRETARY_STATE_DB", str(tmp_path / "s.db"))
     assert Config.from_env().include_private is True
+
+
+def test_github_graphql_default_on_and_zero_disables(tmp_path, monkeypatch):
+    from oss_secretary.config import Config
+    monkeypatch.delenv("OSS_SECRETARY_GITHUB_GRAPHQL", raising=False)
+    assert Config.from_env().github_graphql is True
+    monkeypatch.setenv("OSS_SECRETARY_GITHUB_GRAPHQL", "0")
+    assert Config.from_env().github_graphql is False
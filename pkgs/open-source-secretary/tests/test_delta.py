@@ -71,6 +71,20 @@ def test_compute_stale_flags_quiet_open_threads(tmp_path):
     assert "gh:jwiegley/foo#6" not in [item_id(d.thread) for d in stale2]
 
 
+def test_unchanged_replay_stays_stale(tmp_path):
+    # A dormant repo's newest thread is re-listed every run (cursor overlap);
+    # coming back unchanged is not activity, so it can still go stale.
+    st = State(str(tmp_path / "s.db")); st.open()
+    old = _t(node="I_5", n=5, upd="2026-01-01T00:00:00Z")
+    compute_deltas(st, [old], 1, baseline=True, owners=OWNERS,
+                   now_iso="2026-01-01T00:00:00Z")
+    assert compute_deltas(st, [old], 2, baseline=False, owners=OWNERS,
+                          now_iso="2026-07-22T00:00:00Z") == []
+    stale = compute_stale(st, run_id=2, stale_days=30, owners=OWNERS,
+                          now_iso="2026-07-22T00:00:00Z")
+    assert [item_id(d.thread) for d in stale] == ["gh:jwiegley/foo#5"]
+
+
 def test_awaiting_bundle_bot_and_owner():
     a = build_awaiting(_t(last="dependabot[bot]", bot=True), OWNERS)
     assert a.last_actor_is_bot and not a.is_last_commenter_owner
@@ -79,3 +93,29 @@ def test_awaiting_bundle_bot_and_owner():
     # has_owner_response overrides the coarse proxy when supplied.
     c = build_awaiting(_t(last="alice"), OWNERS, has_owner_response=True)
     assert c.has_owner_response is True
+
+
+def test_compute_deltas_10k_threads_benchmark(tmp_path):
+    import time
+    st = State(str(tmp_path / "s.db")); st.open()
+    batch = [_t(node=f"I_{i}", n=i, cc=1) for i in range(10_000)]
+    t0 = time.perf_counter()
+    assert compute_deltas(st, batch, 1, baseline=True, owners=OWNERS,
+                          now_iso="2026-07-22T00:00:00Z") == []
+    st.commit()
+    seed = time.perf_counter() - t0
+    # run 2: every 10th thread gained a comment, 100 are brand new
+    batch = [_t(node=f"I_{i}", n=i, cc=2 if i % 10 == 0 else 1) for i in range(10_100)]
+    t0 = time.perf_counter()
+    out = compute_deltas(st, batch, 2, baseline=False, owners=OWNERS,
+                         now_iso="2026-07-23T00:00:00Z")
+    stale = compute_stale(st, 2, 30, OWNERS, "2026-07-23T00:00:00Z")
+    st.commit()
+    delta = time.perf_counter() - t0
+    changes = [d.change for d in out]
+    assert changes.count("new_comment") == 1000 and changes.count("new") == 100
+    assert [d.thread.node_id for d in out[:2]] == ["I_0", "I_10"]   # input order kept
+    assert stale == []
+    print(f"\n10k threads: seed {seed * 1000:.0f} ms, delta+stale {delta * 1000:.0f} ms")
+    assert seed < 5 and delta < 5
+    st.close()
@@ -63,3 +63,15 @@ def test_repo_enumeration_public_default_uses_user_public_endpoint():
     repos = gh.list_repos()
     assert any(r.full_name == "jwiegley/foo" for r in repos)
     assert ("/users/jwiegley/repos", {"per_page": 100}) in fc.calls
+
+
+def test_notification_html_url_derived_without_request():
+    fc = FakeClient({"/notifications": [
+        {"repository": {"full_name": "jwiegley/foo"}, "reason": "mention",
+         "updated_at": "2026-07-20T00:00:00Z", "unread": True,
+         "subject": {"type": "PullRequest", "title": "fix",
+                     "url": "https://api.github.com/repos/jwiegley/foo/pulls/4"}}]})
+    gh = GitHubCollector(fc, _cfg())
+    fc.get = lambda *a, **kw: (_ for _ in ()).throw(AssertionError("no GET expected"))
+    [n] = gh.list_notifications(since=None)
+    assert n.html_url == "https://github.com/jwiegley/foo/pull/4"
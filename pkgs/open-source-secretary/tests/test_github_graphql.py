@@ -0,0 +1,131 @@
+import dataclasses
+import json
+from pathlib import Path
+
+from oss_secretary.github import GitHubCollector
+from oss_secretary.github_graphql import GitHubGraphQLCollector
+from oss_secretary.http import HttpError
+from oss_secretary.models import Repo
+from tests.test_github import FakeClient, _cfg
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+REST = json.loads((FIXTURES / "github_rest.json").read_text())
+GRAPHQL = json.loads((FIXTURES / "github_graphql.json").read_text())
+FOO = Repo("github", "jwiegley/foo", "jwiegley", "foo", "R_1", False, "h")
+BAR = Repo("github", "jwiegley/bar", "jwiegley", "bar", "R_2", False, "h")
+OWNERS = {"jwiegley", "johnw"}
+
+
+class FakeGql:
+    def __init__(self, responses):
+        self.responses = list(responses); self.calls = []
+    def graphql(self, query, variables=None):
+        self.calls.append((query, variables))
+        r = self.responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+
+def _fields(threads):
+    return sorted((dataclasses.replace(t, review_decision=None) for t in threads),
+                  key=lambda t: t.node_id)
+
+
+def test_graphql_threads_match_rest_threads():
+    rest = GitHubCollector(FakeClient(REST), _cfg())
+    gql = GitHubGraphQLCollector(FakeClient(REST), _cfg(), FakeGql([GRAPHQL]))
+    expected = rest.list_threads(FOO, since=None)
+    got = gql.list_threads(FOO, since=None)
+    assert _fields(got) == _fields(expected)
+    assert {t.number: t.review_decision for t in got} == {3: None, 4: "APPROVED", 5: None}
+    assert next(t for t in got if t.number == 4).last_commenter == "dependabot[bot]"
+
+
+def test_signals_come_from_the_listing_without_rest_requests():
+    rest = GitHubCollector(FakeClient(REST), _cfg())
+    fc = FakeClient(REST)
+    gql = GitHubGraphQLCollector(fc, _cfg(), FakeGql([GRAPHQL]))
+    gql.list_threads(FOO, since=None)
+    for number in (3, 4, 5):
+        assert (gql.thread_signals("jwiegley/foo", number, OWNERS)
+                == rest.thread_signals("jwiegley/foo", number, OWNERS))
+    assert fc.calls == []                     # no per-thread comment fetch
+
+
+def test_one_query_per_batch_and_missing_repo_falls_back_to_rest():
+    fc = FakeClient(REST)
+    gq = FakeGql([GRAPHQL])
+    gql = GitHubGraphQLCollector(fc, _cfg(), gq)
+    (foo, foo_err), (bar, bar_err) = gql.list_threads_batch([FOO, BAR], [None, None])
+    assert len(gq.calls) == 1
+    assert gq.calls[0][1]["o1"] == "jwiegley" and gq.calls[0][1]["n1"] == "bar"
+    assert foo_err is None and bar_err is None
+    assert len(foo) == 3 and [t.node_id for t in bar] == ["I_kwDO7"]
+    assert [path for path, _ in fc.calls] == ["/repos/jwiegley/bar/issues"]
+
+
+def test_failed_batch_is_split_then_served_by_rest():
+    fc = FakeClient(REST)
+    boom = HttpError("github: GraphQL query failed ['RESOURCE_LIMITS_EXCEEDED']")
+    gq = FakeGql([boom, boom, boom])
+    gql = GitHubGraphQLCollector(fc, _cfg(), gq)
+    out = gql.list_threads_batch([FOO, BAR], [None, None])
+    assert len(gq.calls) == 3                 # the pair, then each half alone
+    assert [len(found) for found, _ in out] == [3, 1]
+    # no comments were fetched with the listing: signals use the REST path
+    assert gql.thread_signals("jwiegley/foo", 3, OWNERS)["last_comment_id"] == "12"
+
+
+def test_pull_request_paging_stops_at_since():
+    since = "2026-07-20T00:00:00Z"
+    page = json.loads(json.dumps(GRAPHQL))
+    prs = page["data"]["r0"]["pullRequests"]
+    prs["pageInfo"]["hasNextPage"] = True
+    prs["nodes"].append({**prs["nodes"][0], "id": "PR_old", "number": 1,
+                         "updatedAt": "2026-01-01T00:00:00Z"})
+    gq = FakeGql([page])
+    gql = GitHubGraphQLCollector(FakeClient(REST), _cfg(), gq)
+    threads = gql.list_threads(FOO, since=since)
+    assert len(gq.calls) == 1                 # older node seen: no follow-up page
+    assert "PR_old" not in {t.node_id for t in threads}
+
+
+class PricedGql:
+    """Answers every batch query with `per_repo` points per repo, counting
+    the balance down from `remaining`. Each repo gets foo's listing."""
+    def __init__(self, per_repo, remaining):
+        self.per_repo, self.remaining = per_repo, remaining
+        self.batches = []
+    def graphql(self, query, variables=None):
+        n = sum(1 for k in variables if k.startswith("o"))
+        self.batches.append(n)
+        self.remaining -= self.per_repo * n
+        data = {f"r{i}": GRAPHQL["data"]["r0"] for i in range(n)}
+        data["rateLimit"] = {"cost": self.per_repo * n, "remaining": self.remaining,
+                             "resetAt": "2026-07-23T01:00:00Z"}
+        return {"data": data}
+
+
+def test_batches_are_sized_from_the_reported_cost():
+    gq = PricedGql(per_repo=20, remaining=5000)
+    gql = GitHubGraphQLCollector(FakeClient(REST), _cfg(), gq)
+    gql.list_threads_batch([FOO] * 3, [None] * 3)
+    out = gql.list_threads_batch([FOO] * 6, [None] * 6)
+    # First batch: cost unknown, so the configured size. After it, 20 points
+    # a repo against a 50-point target: two repos per query.
+    assert gq.batches == [3, 2, 2, 2]
+    assert all(err is None and len(found) == 3 for found, err in out)
+
+
+def test_low_balance_shrinks_batches_then_falls_back_to_rest():
+    fc = FakeClient(REST)
+    gq = PricedGql(per_repo=2, remaining=290)
+    gql = GitHubGraphQLCollector(fc, _cfg(), gq)
+    gql.list_threads_batch([FOO] * 3, [None] * 3)   # 284 left, 84 above reserve
+    out = gql.list_threads_batch([FOO, BAR] * 30, [None] * 60)
+    # 84 spare points at 2 a repo: ten-repo batches until the spare runs out,
+    # one short batch for what is left of it, then REST for the rest.
+    assert gq.batches == [3, 10, 10, 10, 10, 2]
+    assert len([path for path, _ in fc.calls if path.endswith("/issues")]) == 60 - 42
+    assert all(err is None for _, err in out)
@@ -10,10 +10,13 @@ class _MemCache:
         self._d = {}
 
     def cache_get(self, url):
-        return self._d.get(url, (None, None))
+        return self._d.get(url, (None, None, None))[:2]
 
-    def cache_set(self, url, etag, lm):
-        self._d[url] = (etag, lm)
+    def cache_get_body(self, url):
+        return self._d.get(url, (None, None, None))[2]
+
+    def cache_set(self, url, etag, lm, body=None, link=None, total=None):
+        self._d[url] = (etag, lm, None if body is None else (body, link, total))
 
 
 @responses.activate
@@ -134,3 +137,91 @@ def test_strip_auth_on_scheme_downgrade():
     pr.headers["Authorization"] = "Bearer t"
     s.rebuild_auth(pr, resp)
     assert "Authorization" not in pr.headers
+
+
+def test_limiter_spends_quota_then_waits_for_reset(monkeypatch):
+    from oss_secretary.http import RateLimiter
+    slept = []
+    monkeypatch.setattr("oss_secretary.http.time.sleep", lambda s: slept.append(s))
+    monkeypatch.setattr("oss_secretary.http.time.time", lambda: 1000.0)
+    lim = RateLimiter()
+    lim.observe({"x-ratelimit-remaining": "2", "x-ratelimit-reset": "1030"})
+    lim.acquire(); lim.acquire()
+    assert slept == []                      # two tokens, two free requests
+    lim.acquire()
+    assert slept == [31.0]                  # bucket empty: wait out the reset (+1s)
+
+
+def test_limiter_keeps_lowest_count_within_a_window():
+    from oss_secretary.http import RateLimiter
+    lim = RateLimiter()
+    lim.observe({"x-ratelimit-remaining": "10", "x-ratelimit-reset": "2000"})
+    lim.observe({"x-ratelimit-remaining": "40", "x-ratelimit-reset": "2000"})  # stale, out of order
+    assert lim._remaining == 10
+    lim.observe({"x-ratelimit-remaining": "4999", "x-ratelimit-reset": "5600"})  # new window
+    assert lim._remaining == 4999
+
+
+def test_limiter_rearms_after_window_rolls_over(monkeypatch):
+    from oss_secretary.http import RateLimiter
+    slept = []
+    monkeypatch.setattr("oss_secretary.http.time.sleep", lambda s: slept.append(s))
+    monkeypatch.setattr("oss_secretary.http.time.time", lambda: 3000.0)
+    lim = RateLimiter()
+    lim.observe({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "2999"})
+    lim.acquire()
+    assert slept == [] and lim._remaining is None
+
+
+def test_limiter_spaces_concurrent_callers(monkeypatch):
+    import threading
+    from oss_secretary.http import RateLimiter
+    slept = []
+    monkeypatch.setattr("oss_secretary.http.time.sleep", lambda s: slept.append(s))
+    monkeypatch.setattr("oss_secretary.http.time.monotonic", lambda: 0.0)
+    lim = RateLimiter(min_interval=0.5)
+    workers = [threading.Thread(target=lim.acquire) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    # each caller reserved its own slot: 0, 0.5, 1.0, 1.5 — no shared burst
+    assert sorted(slept) == [0.5, 1.0, 1.5]
+
+
+@responses.activate
+def test_client_feeds_rate_limit_headers_to_limiter():
+    responses.add(responses.GET, "https://api.test/q", json=[], status=200,
+                  headers={"X-RateLimit-Remaining": "17", "X-RateLimit-Reset": "99999999999"})
+    c = Client("https://api.test", {}, None, NullCache(), "github")
+    c.get("/q")
+    assert c.limiter._remaining == 17
+
+
+@responses.activate
+def test_304_replays_cached_pages_including_paging_headers():
+    hits = []
+
+    def cb(request):
+        page = parse_qs(urlparse(request.url).query).get("page", ["1"])[0]
+        hits.append((page, request.headers.get("If-None-Match")))
+        if request.headers.get("If-None-Match"):
+            return (304, {}, "")
+        link = {"Link": '<https://api.test/items?page=2>; rel="next"'} if page == "1" else {}
+        return (200, {"ETag": f'"p{page}"', **link}, json.dumps([{"id": int(page)}]))
+
+    responses.add_callback(responses.GET, "https://api.test/items", callback=cb)
+    c = Client("https://api.test", {"Authorization": "Bearer x"}, None, _MemCache(), "github")
+    assert [i["id"] for i in c.paginate("/items", {"since": "s"})] == [1, 2]
+    assert [i["id"] for i in c.paginate("/items", {"since": "s"})] == [1, 2]
+    assert [inm for _, inm in hits] == [None, None, '"p1"', '"p2"']   # 2nd walk: all 304
+
+
+def test_cache_key_is_scoped_by_credentials():
+    a = Client("https://api.test", {"Authorization": "Bearer a"}, None, NullCache(), "github")
+    b = Client("https://api.test", {"Authorization": "Bearer b"}, None, NullCache(), "github")
+    anon = Client("https://api.test", {}, None, NullCache(), "github")
+    keys = {c._cache_key("https://api.test/x", {"p": 1}) for c in (a, b, anon)}
+    assert len(keys) == 3
+    assert anon._cache_key("https://api.test/x", None) == "https://api.test/x"
+    assert "Bearer" not in a._cache_key("https://api.test/x", None)
@@ -20,7 +20,7 @@ def _patch(monkeypatch, tmp_path, sendmail_rc=0, threads=None, dry_run=False,
     monkeypatch.setattr(report, "_collect",
                         lambda cfg, state, cov, gh, gt: (threads or [], []))
     monkeypatch.setattr(report, "_enrich",
-                        lambda deltas, gh, gt, owners, now_iso: None)
+                        lambda deltas, gh, gt, owners, now_iso, **kw: None)
     monkeypatch.setattr(report, "call_hermes",
                         lambda cfg, p: '{"attention":[],"notes":""}')
     if not dry_run:
@@ -102,3 +102,121 @@ def test_enrich_overwrites_opener_derived_awaiting():
     assert d.thread.last_comment_id == "99"
     assert d.awaiting.is_last_commenter_owner is True
     assert d.awaiting.has_owner_response is True
+
+
+def test_collect_runs_concurrently_but_merges_in_enumeration_order(monkeypatch, tmp_path):
+    import random
+    import threading
+    import time as _time
+    from oss_secretary.config import Config
+    from oss_secretary.models import Coverage, Repo
+    from oss_secretary.state import State
+
+    _env(monkeypatch, tmp_path)
+    monkeypatch.setenv("OSS_SECRETARY_WORKERS", "6")
+    cfg = Config.from_env()
+    st = State(str(tmp_path / "s.db")); st.open()
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    class FakeColl:
+        def __init__(self, platform, names, broken=()):
+            self.platform, self.names, self.broken = platform, names, set(broken)
+
+        def list_repos(self):
+            return [Repo(self.platform, n, "o", n, n, False, f"https://x/{n}")
+                    for n in self.names]
+
+        def list_threads(self, repo, since):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            _time.sleep(random.uniform(0.0, 0.02))
+            with lock:
+                active[0] -= 1
+            if repo.full_name in self.broken:
+                raise report.HttpError("boom")
+            return [_t(node=f"{repo.full_name}-1", repo=repo.full_name)]
+
+        def list_notifications(self, since):
+            return []
+
+    gh = FakeColl("github", [f"gh/r{i}" for i in range(12)], broken={"gh/r5"})
+    gt = FakeColl("gitea", [f"gt/r{i}" for i in range(6)])
+    cov = Coverage()
+    threads, notifs = report._collect(cfg, st, cov, gh, gt)
+    expected = [f"gh/r{i}" for i in range(12) if i != 5] + [f"gt/r{i}" for i in range(6)]
+    assert [t.repo_full_name for t in threads] == expected
+    assert cov.repos_scanned == 17 and cov.repos_errored == 1
+    assert cov.errored_repos == ["gh/r5"]
+    assert peak[0] > 1                         # actually ran in parallel
+    st.close()
+
+
+def test_collect_fans_batched_listing_out_per_repo(monkeypatch, tmp_path):
+    from oss_secretary.config import Config
+    from oss_secretary.models import Coverage, Repo
+    from oss_secretary.state import State
+
+    _env(monkeypatch, tmp_path)
+    cfg = Config.from_env()
+    st = State(str(tmp_path / "s.db")); st.open()
+    batches = []
+
+    class BatchColl:
+        batch_size = 4
+
+        def list_repos(self):
+            return [Repo("github", f"gh/r{i}", "o", f"r{i}", f"r{i}", False, "h")
+                    for i in range(10)]
+
+        def list_threads_batch(self, repos, since):
+            batches.append([r.full_name for r in repos])
+            return [(None, report.HttpError("boom")) if r.full_name == "gh/r6"
+                    else ([_t(node=r.full_name, repo=r.full_name)], None) for r in repos]
+
+        def list_notifications(self, since):
+            return []
+
+    class Empty(BatchColl):
+        def list_repos(self):
+            return []
+
+    cov = Coverage()
+    threads, _ = report._collect(cfg, st, cov, BatchColl(), Empty())
+    assert sorted(len(b) for b in batches) == [2, 4, 4]
+    assert [t.repo_full_name for t in threads] == [f"gh/r{i}" for i in range(10) if i != 6]
+    assert cov.errored_repos == ["gh/r6"]
+    st.close()
+
+
+def test_collect_lists_each_repo_from_its_own_cursor(monkeypatch, tmp_path):
+    from oss_secretary.config import Config
+    from oss_secretary.models import Coverage, Repo
+    from oss_secretary.state import State
+
+    _env(monkeypatch, tmp_path)
+    cfg = Config.from_env()
+    st = State(str(tmp_path / "s.db")); st.open()
+    st.set_meta("github_last_poll_utc", "2026-07-22T00:00:00Z")
+    st.set_repo_cursor("github", "gh/a", "2026-03-01T00:10:00Z")
+    asked = {}
+
+    class Coll:
+        def __init__(self, names): self.names = names
+        def list_repos(self):
+            return [Repo("github", n, "o", n, n, False, "h") for n in self.names]
+        def list_threads(self, repo, since):
+            asked[repo.full_name] = since
+            if repo.full_name == "gh/bad":
+                raise report.HttpError("boom")
+            return [_t(node=repo.full_name, repo=repo.full_name, upd="2026-07-21T00:00:00Z")]
+        def list_notifications(self, since): return []
+
+    report._collect(cfg, st, Coverage(), Coll(["gh/a", "gh/b", "gh/bad"]), Coll([]))
+    assert asked == {"gh/a": "2026-03-01T00:00:00Z",        # cursor minus OVERLAP
+                     "gh/b": "2026-07-21T23:50:00Z",        # no cursor: watermark
+                     "gh/bad": "2026-07-21T23:50:00Z"}
+    assert st.repo_cursors() == {("github", "gh/a"): "2026-07-21T00:00:00Z",
+                                 ("github", "gh/b"): "2026-07-21T00:00:00Z"}
+    st.close()
@@ -31,6 +31,49 @@ def test_http_cache_and_meta(tmp_path):
     st.close()
 
 
+def test_http_body_cache_is_content_addressed_and_pruned(tmp_path):
+    p = str(tmp_path / "s.db")
+    st = State(p); st.open()
+    assert st.cache_get_body("http://x") is None
+    st.cache_set("http://x", '"e"', None, body=b"[]", link=None, total="0")
+    st.cache_set("http://y", '"f"', None, body=b"[]")
+    assert st.cache_get_body("http://x") == (b"[]", None, "0")
+    assert st._conn.execute("SELECT COUNT(*) FROM http_bodies").fetchone()[0] == 1
+    st.cache_set("http://x", '"g"', None, body=b'[{"id": 1}]')
+    st.cache_set("http://y", '"h"', None)             # validators only
+    st.commit(); st.close()
+    st = State(p); st.open()                           # open() drops orphans
+    assert st._conn.execute("SELECT COUNT(*) FROM http_bodies").fetchone()[0] == 1
+    assert st.cache_get_body("http://y") is None
+    st.close()
+
+
+def test_v1_http_cache_migrates_in_place(tmp_path):
+    import sqlite3
+    p = str(tmp_path / "s.db")
+    db = sqlite3.connect(p)
+    db.executescript("""
+      CREATE TABLE http_cache (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,
+                               fetched_at TEXT);
+      CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+      INSERT INTO http_cache VALUES ('http://x', '"e"', NULL, NULL);
+      INSERT INTO meta VALUES ('schema_version', '1');""")
+    db.commit(); db.close()
+    st = State(p); st.open()
+    assert st.get_meta("schema_version") == "2"
+    assert st.cache_get("http://x") == ('"e"', None)   # validators survive
+    assert st.cache_get_body("http://x") is None
+    st.close()
+
+
+def test_repo_cursor_only_moves_forward(tmp_path):
+    st = State(str(tmp_path / "s.db")); st.open()
+    st.set_repo_cursor("github", "jwiegley/foo", "2026-07-20T00:00:00Z")
+    st.set_repo_cursor("github", "jwiegley/foo", "2026-07-19T00:00:00Z")
+    assert st.repo_cursors() == {("github", "jwiegley/foo"): "2026-07-20T00:00:00Z"}
+    st.close()
+
+
 def test_flock_prevents_second_run(tmp_path):
     p = str(tmp_path / "s.db")
     a = State(p); a.open(); assert a.acquire_lock() is True
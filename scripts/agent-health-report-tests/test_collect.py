@@ -0,0 +1,135 @@
+import datetime as dt
+import threading
+
+from conftest import load_report_module
+
+m = load_report_module()
+
+SHOW_OUT = """Id=microvm@hermes.service
+ActiveState=active
+ActiveEnterTimestamp=Sat 2026-05-31 04:00:00 PDT
+NRestarts=0
+
+Id=hermes-mcp.service
+ActiveState=failed
+ActiveEnterTimestamp=
+NRestarts=7
+"""
+
+
+def test_systemd_uptime_is_one_batched_call(monkeypatch):
+    calls = []
+
+    def fake_check_output(cmd, **kw):
+        calls.append(cmd)
+        return SHOW_OUT
+
+    monkeypatch.setattr(m.subprocess, "check_output", fake_check_output)
+    got = m.systemd_uptime(["microvm@hermes.service", "hermes-mcp.service"])
+    assert len(calls) == 1
+    assert calls[0][-2:] == ["microvm@hermes.service", "hermes-mcp.service"]
+    assert got["microvm@hermes.service"] == {
+        "active": "active", "since": "Sat 2026-05-31 04:00:00 PDT", "n_restarts": 0}
+    assert got["hermes-mcp.service"] == {"active": "failed", "since": None, "n_restarts": 7}
+
+
+def test_systemd_uptime_unparseable_output_is_unknown(monkeypatch):
+    monkeypatch.setattr(m.subprocess, "check_output", lambda cmd, **kw: "ActiveState=active\n")
+    got = m.systemd_uptime(["a.service", "b.service"])
+    assert got == {u: {"active": "unknown", "since": None, "n_restarts": None}
+                   for u in ("a.service", "b.service")}
+
+
+def test_run_sections_degrades_slow_and_failing_sections():
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "late"
+
+    def boom():
+        raise RuntimeError("collector bug")
+
+    try:
+        results, timings = m.run_sections(
+            {"fast": (lambda: "ok", None),
+             "slow": (slow, "fallback"),
+             "boom": (boom, {"total": 0})},
+            {"fast": 1.0, "slow": 0.2, "boom": 1.0})
+    finally:
+        release.set()
+    assert results == {"fast": "ok", "slow": "fallback", "boom": {"total": 0}}
+    assert [timings[n]["status"] for n in ("fast", "slow", "boom")] == \
+        ["ok", "timeout", "error"]
+    assert timings["slow"]["seconds"] == 0.2
+    assert timings["fast"]["seconds"] < 0.2
+
+
+def test_render_marks_timed_out_section_stale_and_lists_timings():
+    p = m.PROFILES["hermes"]
+    data = {
+        "host": "vulcan", "now": dt.datetime(2026, 6, 1, 6, 0, 0),
+        "live": {}, "live_selfheal": {}, "servers": {}, "mcp_log": {},
+        "uptime": {u: {"active": "active", "since": "Sat", "n_restarts": 0}
+                   for u in p["units"]},
+        "probes": [],
+        "discord": {},
+        "errors": {"total": 0, "patterns": []},
+        "incidents": {"active": 0, "resolved_24h": 0, "stuck_alerts": []},
+        "invm": {"skipped": True, "reason": "probe did not finish", "results": {}},
+        "sections": {"errors": {"seconds": 20.0, "status": "timeout"},
+                     "uptime": {"seconds": 0.03, "status": "ok"}},
+    }
+    subject, body = m.render(p, data)
+    err_idx = body.index("Errors digest")
+    assert "stale/unknown — errors collector timed out after 20s" in body[err_idx:err_idx + 200]
+    assert "err log not found" not in body
+    assert "FAIL" not in subject
+    timings = body[body.index("Collector timings"):]
+    assert "errors" in timings and "TIMEOUT" in timings
+    assert "uptime            0.03s" in timings
+
+
+def test_report_that_read_nothing_is_not_healthy():
+    p = m.PROFILES["hermes"]
+    sections = ("live", "live_selfheal", "mcp_log", "uptime", "probes",
+                "discord", "errors", "incidents", "invm")
+    data = {
+        "host": "vulcan", "now": dt.datetime(2026, 6, 1, 6, 0, 0),
+        # The fallbacks collect() substitutes for collectors that time out
+        "live": {}, "live_selfheal": {}, "servers": {}, "mcp_log": {},
+        "uptime": {u: dict(m._UNKNOWN_UPTIME) for u in p["units"]},
+        "probes": [],
+        "discord": {},
+        "errors": {"total": 0, "patterns": []},
+        "incidents": {"active": 0, "resolved_24h": 0, "stuck_alerts": []},
+        "invm": {"skipped": True, "reason": "probe did not finish", "results": {}},
+        "sections": {n: {"seconds": 20.0, "status": "timeout"} for n in sections},
+    }
+    subject, body = m.render(p, data)
+    assert "all healthy" not in subject
+    assert "9 sections stale/timed out: live, " in subject
+    assert "Headline: UNKNOWN" in body
+    assert "Errors digest (last 24h, unavailable (timed out))" in body
+    assert "total=0" not in body
+
+
+def test_stale_section_does_not_mask_a_real_failure():
+    p = m.PROFILES["hermes"]
+    data = {
+        "host": "vulcan", "now": dt.datetime(2026, 6, 1, 6, 0, 0),
+        "live": {}, "live_selfheal": {}, "servers": {}, "mcp_log": {},
+        "uptime": {u: {"active": "failed", "since": "", "n_restarts": 3}
+                   for u in p["units"]},
+        "probes": [],
+        "discord": {},
+        "errors": {"total": 0, "patterns": []},
+        "incidents": {"active": 0, "resolved_24h": 0, "stuck_alerts": []},
+        "invm": {"skipped": True, "reason": "probe did not finish", "results": {}},
+        "sections": {"errors": {"seconds": 1.0, "status": "error"},
+                     "uptime": {"seconds": 0.03, "status": "ok"}},
+    }
+    subject, body = m.render(p, data)
+    assert "Headline: FAIL — microvm@hermes.service state: failed" in body
+    assert "  - 1 section stale/timed out: errors" in body
+    assert "Errors digest (last 24h, unavailable (failed))" in body
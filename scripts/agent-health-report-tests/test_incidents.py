@@ -23,3 +23,44 @@ def test_incidents_lists_stuck_alerts():
 def test_incidents_missing_returns_empty():
     result = m.parse_incidents(Path("/nonexistent.json"))
     assert result == {"active": 0, "resolved_24h": 0, "stuck_alerts": []}
+
+
+def _store(path, rows):
+    """A state.db shaped like hermes-self-heal's incidents table."""
+    import json
+    import sqlite3
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("CREATE TABLE incidents (id INTEGER PRIMARY KEY, correlation_key TEXT, "
+               "status TEXT, first_seen_ts INTEGER, resolved_ts INTEGER, "
+               "archived_ts INTEGER, doc TEXT)")
+    for status, first_seen, archived, alerts in rows:
+        db.execute("INSERT INTO incidents (correlation_key, status, first_seen_ts, "
+                   "archived_ts, doc) VALUES ('k', ?, ?, ?, ?)",
+                   (status, first_seen, archived, json.dumps({"alerts": alerts})))
+    db.commit()
+    return db
+
+
+def test_incidents_read_from_sqlite_store(tmp_path):
+    recent = int(TEST_NOW.timestamp()) - 3600
+    old = int(TEST_NOW.timestamp()) - 3 * 86400
+    db = _store(tmp_path / "state.db", [
+        ("in_progress", recent, None, ["HermesApiServerDown"]),
+        ("stuck", recent, None, ["HermesMcpBridgeDown"]),
+        ("resolved", recent, recent + 60, ["HermesApiServerDown"]),
+        ("resolved", old, old + 60, ["HermesApiServerDown"]),
+        ("in_progress", recent, recent, ["HermesApiServerDown"]),
+    ])
+    try:
+        result = m.parse_incidents(tmp_path / "state.db", now=TEST_NOW)
+    finally:
+        db.close()
+    assert result == {"active": 1, "resolved_24h": 1,
+                      "stuck_alerts": ["HermesMcpBridgeDown"]}
+
+
+def test_incidents_unreadable_store_returns_empty(tmp_path):
+    (tmp_path / "state.db").write_text("not a database")
+    result = m.parse_incidents(tmp_path / "state.db", now=TEST_NOW)
+    assert result == {"active": 0, "resolved_24h": 0, "stuck_alerts": []}
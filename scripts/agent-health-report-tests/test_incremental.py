@@ -0,0 +1,94 @@
+import datetime as dt
+import os
+from pathlib import Path
+
+from conftest import load_report_module
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+m = load_report_module()
+
+NOW = dt.datetime(2026, 5, 21, 0, 0)
+
+
+def _err(ts, msg):
+    return f"{ts} ERROR {msg}\n"
+
+
+def test_incremental_scan_matches_full_scan(tmp_path):
+    log = tmp_path / "gateway.log"
+    lines = (FIXTURE_DIR / "gateway_log_sample.txt").read_text().splitlines(keepends=True)
+    half = len(lines) // 2
+    log.write_text("".join(lines[:half]))
+    cps = m.LogCheckpoints(tmp_path / "cp.json")
+    m.scan_gateway_log(log, 24, NOW, cps)
+    cps.save()
+
+    with log.open("a") as f:
+        f.write("".join(lines[half:]))
+    cps = m.LogCheckpoints(tmp_path / "cp.json")
+    got = m.scan_gateway_log(log, 24, NOW, cps)
+    assert got == m.scan_gateway_log(log, 24, NOW)
+    assert got["counts"] == m.parse_gateway_log(FIXTURE_DIR / "gateway_log_sample.txt", 24, NOW)
+
+
+def test_only_appended_complete_lines_are_read(tmp_path):
+    log = tmp_path / "errors.log"
+    log.write_text(_err("2026-05-20T10:00:00", "boom"))
+    cps = m.LogCheckpoints(tmp_path / "cp.json")
+    assert m.parse_errors_log(log, now=NOW, checkpoints=cps)["total"] == 1
+    size = log.stat().st_size
+
+    # A line still being written is left for the next run.
+    with log.open("a") as f:
+        f.write("2026-05-20T11:00:00 ERROR half")
+    assert m.parse_errors_log(log, now=NOW, checkpoints=cps)["total"] == 1
+    assert cps.get(f"errors:{log}")["offset"] == size
+
+    with log.open("a") as f:
+        f.write(" written\n")
+    out = m.parse_errors_log(log, now=NOW, checkpoints=cps)
+    assert out["total"] == 2
+    assert {p["pattern"] for p in out["patterns"]} == {"boom", "half written"}
+
+
+def test_window_state_is_pruned(tmp_path):
+    log = tmp_path / "errors.log"
+    log.write_text(_err("2026-05-18T10:00:00", "old") + _err("2026-05-20T10:00:00", "new"))
+    cps = m.LogCheckpoints(tmp_path / "cp.json")
+    assert m.parse_errors_log(log, now=NOW, checkpoints=cps)["total"] == 1
+    assert list(cps.get(f"errors:{log}")["state"]["events"]) == ["2026-05-20T10:00:00"]
+
+
+def test_truncation_restarts_at_zero_and_keeps_folded_events(tmp_path):
+    log = tmp_path / "errors.log"
+    log.write_text(_err("2026-05-20T10:00:00", "a") * 3)
+    cps = m.LogCheckpoints(tmp_path / "cp.json")
+    m.parse_errors_log(log, now=NOW, checkpoints=cps)
+    log.write_text(_err("2026-05-20T12:00:00", "b"))    # copytruncate
+    out = m.parse_errors_log(log, now=NOW, checkpoints=cps)
+    assert out["total"] == 4
+
+
+def test_rotation_reads_tail_of_rotated_file_first(tmp_path):
+    log = tmp_path / "agent.log"
+    log.write_text("2026-05-20 10:00:00 tools.mcp_tool: MCP server 'vane' (stdio): "
+                   "registered 5 tool(s): a\n")
+    cps = m.LogCheckpoints(tmp_path / "cp.json")
+    m.parse_hermes_mcp_log(log, now=NOW, checkpoints=cps)
+    with log.open("a") as f:
+        f.write("2026-05-20 11:00:00 WARNING MCP server 'vane' keepalive failed\n")
+    os.rename(log, f"{log}.1")
+    log.write_text("2026-05-20 12:00:00 tools.mcp_tool: MCP server 'org-db' (stdio): "
+                   "registered 6 tool(s): b\n")
+    out = m.parse_hermes_mcp_log(log, now=NOW, checkpoints=cps)
+    assert out["servers"] == {"vane": 5, "org-db": 6}
+    assert out["reconnects_24h"] == 1 and out["reconnect_servers"] == ["vane"]
+
+
+def test_checkpoints_round_trip(tmp_path):
+    cps = m.LogCheckpoints(tmp_path / "state" / "cp.json")
+    cps.set("errors:/x", {"inode": 1, "offset": 10, "state": {"events": {}}})
+    cps.save()
+    assert m.LogCheckpoints(tmp_path / "state" / "cp.json").get("errors:/x")["offset"] == 10
+    (tmp_path / "bad.json").write_text("{not json")
+    assert m.LogCheckpoints(tmp_path / "bad.json").get("errors:/x") is None
@@ -8,7 +8,7 @@ REQUIRED = {
     "agent", "display_name", "env_prefix", "report_header", "default_from",
     "live_textfiles", "expected_servers", "mcp_servers_mode", "units",
     "probe_families", "discord", "ha_mcp", "errors_log", "errors_grammar",
-    "incidents_json", "selfheal_textfile", "selfheal_metric_prefix",
+    "incidents_store", "selfheal_textfile", "selfheal_metric_prefix",
     "invm_checks", "verdict_fail_if_zero", "errors_fail_threshold",
 }
 
@@ -20,16 +20,22 @@ Sections (fixed order):
   3. Gateway + plugins       — agent.log platform/MCP-readiness analog (loaded
                                servers, tool total, reconnects, discord
                                heartbeat)
-  4. microVM + sidecars      — systemctl show over the profile's units
+  4. microVM + sidecars      — one batched systemctl show over the profile's units
   5. 24h probe summary       — Prometheus success ratio + p50/p95 per family
   6. Discord activity        — gateway-log events
   7. Home Assistant MCP      — derived from the home-assistant server's tool
                                registration in agent.log
   8. Errors digest           — redacted
-  9. Self-heal incidents     — incidents.json + *_self_heal_* metrics
+  9. Self-heal incidents     — state.db + *_self_heal_* metrics
  10. In-VM corroboration     — one SSH round-trip (trader curl + requests-TLS,
                                plus api/gateway reachability)
 
+collect() runs the section collectors concurrently, each against its own
+deadline (SECTION_DEADLINES). A collector that overruns or raises is replaced
+by its fallback value, its section renders as stale/unknown, and the report
+still goes out -- as UNKNOWN rather than PASS, since a section it could not
+read is not a healthy one; per-section latency is listed at the end of the email.
+
 Environment overrides (read under the profile's <PREFIX>, e.g. HERMES_REPORT):
   <PREFIX>_TO              recipient (default: johnw@vulcan.lan)
   <PREFIX>_FROM            sender    (default: <agent>-health@vulcan.lan)
@@ -38,11 +44,14 @@ Environment overrides (read under the profile's <PREFIX>, e.g. HERMES_REPORT):
   <PREFIX>_PROMETHEUS_URL  default http://127.0.0.1:9090
   <PREFIX>_SSH_KEY         path to ssh key for the in-VM probe
   <PREFIX>_SSH_TARGET      e.g. hermes@10.99.1.2
+  <PREFIX>_STATE_DIR       where log-scan checkpoints persist; unset = every
+                           run re-reads the logs from the start
 """
 from __future__ import annotations
 
 import argparse
 import collections
+import copy
 import datetime as dt
 import json
 import math
@@ -51,9 +60,12 @@ import pathlib
 import re
 import shlex
 import shutil
+import sqlite3
 import subprocess
 import sys
 import tempfile
+import threading
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -189,29 +201,45 @@ def probe_summary_24h(ok_metric: str, dur_metric: str) -> dict:
 # systemd unit uptime
 # ---------------------------------------------------------------------------
 
-def systemd_uptime(unit: str) -> dict[str, Any]:
-    """Return {active, since, n_restarts} via `systemctl show`."""
+_UNKNOWN_UPTIME = {"active": "unknown", "since": None, "n_restarts": None}
+
+
+def systemd_uptime(units: list[str]) -> dict[str, dict[str, Any]]:
+    """Return {unit: {active, since, n_restarts}} from ONE `systemctl show`.
+
+    systemctl prints one property block per unit, blank-line separated, in
+    argument order; a unit it cannot show degrades to "unknown" on its own.
+    """
+    units = list(units)
+    if not units:
+        return {}
     try:
         out = subprocess.check_output(
             ["systemctl", "show", "-p",
-             "ActiveState,ActiveEnterTimestamp,NRestarts", unit],
+             "Id,ActiveState,ActiveEnterTimestamp,NRestarts", *units],
             text=True, timeout=10,
         )
     except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
-        return {"active": "unknown", "since": None, "n_restarts": None}
-    fields = dict(
-        line.split("=", 1) for line in out.strip().splitlines() if "=" in line
-    )
-    enter_ts = fields.get("ActiveEnterTimestamp", "").strip()
-    try:
-        nrestarts = int(fields.get("NRestarts", "0").strip())
-    except ValueError:
-        nrestarts = 0
-    return {
-        "active": fields.get("ActiveState", "unknown").strip(),
-        "since": enter_ts or None,
-        "n_restarts": nrestarts,
-    }
+        return {u: dict(_UNKNOWN_UPTIME) for u in units}
+    blocks = [b for b in re.split(r"\n\s*\n", out.strip()) if b.strip()]
+    if len(blocks) != len(units):
+        return {u: dict(_UNKNOWN_UPTIME) for u in units}
+    result: dict[str, dict[str, Any]] = {}
+    for unit, block in zip(units, blocks):
+        fields = dict(
+            line.split("=", 1) for line in block.splitlines() if "=" in line
+        )
+        enter_ts = fields.get("ActiveEnterTimestamp", "").strip()
+        try:
+            nrestarts = int(fields.get("NRestarts", "0").strip())
+        except ValueError:
+            nrestarts = 0
+        result[unit] = {
+            "active": fields.get("ActiveState", "unknown").strip(),
+            "since": enter_ts or None,
+            "n_restarts": nrestarts,
+        }
+    return result
 
 
 # ---------------------------------------------------------------------------
@@ -219,18 +247,29 @@ def systemd_uptime(unit: str) -> dict[str, Any]:
 # ---------------------------------------------------------------------------
 
 def parse_incidents(path, now=None) -> dict:
-    """Summarize self-heal incidents.json."""
+    """Summarize the self-heal incident store.
+
+    The daemon keeps its state in SQLite (state.db); a path ending in .json is
+    read as the legacy {active, history} document instead.
+    """
+    empty = {"active": 0, "resolved_24h": 0, "stuck_alerts": []}
     p = pathlib.Path(path)
     if not p.is_file():
-        return {"active": 0, "resolved_24h": 0, "stuck_alerts": []}
-    try:
-        data = json.loads(p.read_text())
-    except (json.JSONDecodeError, OSError):
-        return {"active": 0, "resolved_24h": 0, "stuck_alerts": []}
+        return empty
 
     now = now or dt.datetime.now()
     cutoff_ts = int((now - dt.timedelta(hours=24)).timestamp())
 
+    if p.suffix != ".json":
+        try:
+            return _incidents_from_store(p, cutoff_ts)
+        except sqlite3.Error:
+            return empty
+    try:
+        data = json.loads(p.read_text())
+    except (json.JSONDecodeError, OSError):
+        return empty
+
     active = sum(
         1 for v in data.get("active", {}).values()
         if v.get("status") == "in_progress"
@@ -248,6 +287,153 @@ def parse_incidents(path, now=None) -> dict:
     return {"active": active, "resolved_24h": resolved_24h, "stuck_alerts": stuck_alerts}
 
 
+def _incidents_from_store(p, cutoff_ts) -> dict:
+    """parse_incidents over the daemon's SQLite store, opened read-only.
+
+    mode=ro still needs to map the WAL index; when the report user cannot write
+    the -shm file, fall back to immutable, which skips the (small) unmerged WAL
+    tail rather than failing the section.
+    """
+    try:
+        db = sqlite3.connect(f"file:{p}?mode=ro", uri=True)
+        db.execute("SELECT 1 FROM incidents LIMIT 1")
+    except sqlite3.OperationalError:
+        db = sqlite3.connect(f"file:{p}?immutable=1", uri=True)
+    try:
+        active = db.execute(
+            "SELECT COUNT(*) FROM incidents "
+            "WHERE archived_ts IS NULL AND status = 'in_progress'").fetchone()[0]
+        stuck_alerts = [
+            row[0] for row in db.execute(
+                "SELECT json_extract(doc, '$.alerts[0]') FROM incidents "
+                "WHERE archived_ts IS NULL AND status = 'stuck' ORDER BY id")
+            if row[0] is not None
+        ]
+        resolved_24h = db.execute(
+            "SELECT COUNT(*) FROM incidents WHERE archived_ts IS NOT NULL "
+            "AND status = 'resolved' AND first_seen_ts >= ?", (cutoff_ts,)).fetchone()[0]
+    finally:
+        db.close()
+    return {"active": active, "resolved_24h": resolved_24h, "stuck_alerts": stuck_alerts}
+
+
+# ---------------------------------------------------------------------------
+# Incremental log scanning. Each log parser is a fold over lines into a small
+# JSON state holding its windowed aggregates; a checkpoint keeps that state
+# with the file's inode and the byte offset read up to, so the next run folds
+# only what was appended since. Windowed state is pruned to the window on
+# every run, so it stays the size of 24h of events however long the log gets.
+# ---------------------------------------------------------------------------
+
+class LogCheckpoints:
+    """{key: {inode, offset, state}} persisted as one JSON file.
+
+    Thread-safe: collect() runs the log parsers concurrently. A parser's
+    checkpoint is replaced only once its scan has finished, so saving while
+    a timed-out scan is still running never records half a fold.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self._lock = threading.Lock()
+        self._data: dict[str, dict] = {}
+        try:
+            data = json.loads(self.path.read_text())
+            if isinstance(data, dict):
+                self._data = {k: v for k, v in data.items() if isinstance(v, dict)}
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            cp = self._data.get(key)
+            return copy.deepcopy(cp) if cp is not None else None
+
+    def set(self, key: str, checkpoint: dict) -> None:
+        with self._lock:
+            self._data[key] = checkpoint
+
+    def save(self) -> None:
+        """Write atomically; a failed save only costs the next run a re-read."""
+        with self._lock:
+            payload = json.dumps(self._data)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(payload)
+            os.replace(tmp, self.path)
+        except OSError as exc:
+            sys.stderr.write(f"log checkpoints not saved: {exc}\n")
+
+
+def _fold_from(path, offset: int, fold, state: dict) -> tuple[int, int]:
+    """Fold complete lines of `path` from `offset`; return (inode, new offset).
+
+    A trailing line without its newline is still being written: it is left
+    for the next scan rather than parsed half-way. (-1, offset) if the file
+    can't be read.
+    """
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            ino = st.st_ino
+            if offset > st.st_size:
+                offset = 0          # truncated in place (copytruncate)
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                offset += len(raw)
+                fold(state, raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+    except OSError:
+        return -1, offset
+    return ino, offset
+
+
+def scan_log(path, key: str, fresh, fold, checkpoints: Optional[LogCheckpoints] = None):
+    """Return the fold state for `path`, resuming from its checkpoint.
+
+    `fresh()` builds an empty state and `fold(state, line)` adds one line.
+    Without `checkpoints` (or on first sight) the whole file is read.
+    On rotation (new inode) the rest of the old file is first read from
+    `<path>.1`, where size-based rotators leave it; after rotation or
+    truncation the new file is read from byte 0. Events already folded
+    stay in the state either way — they happened, whichever file held them.
+    """
+    cp = checkpoints.get(f"{key}:{path}") if checkpoints is not None else None
+    state, offset, inode = fresh(), 0, None
+    if cp and isinstance(cp.get("state"), dict):
+        state, offset, inode = cp["state"], int(cp.get("offset", 0)), cp.get("inode")
+    try:
+        current = os.stat(path).st_ino
+    except OSError:
+        current = None
+    if inode is not None and current != inode:
+        rotated = pathlib.Path(f"{path}.1")
+        try:
+            if rotated.stat().st_ino == inode:
+                _fold_from(rotated, offset, fold, state)
+        except OSError:
+            pass
+        offset = 0
+    ino, offset = _fold_from(path, offset, fold, state)
+    if checkpoints is not None and ino != -1:
+        checkpoints.set(f"{key}:{path}", {"inode": ino, "offset": offset, "state": state})
+    return state
+
+
+def _window_add(events: dict, ts: dt.datetime, key: str) -> None:
+    """Count `key` at `ts` in a {iso_ts: {key: n}} windowed counter."""
+    bucket = events.setdefault(ts.isoformat(), {})
+    bucket[key] = bucket.get(key, 0) + 1
+
+
+def _window_prune(events: dict, cutoff: dt.datetime) -> None:
+    """Drop windowed-counter entries older than `cutoff`, in place."""
+    for ts in [t for t in events if dt.datetime.fromisoformat(t) < cutoff]:
+        del events[ts]
+
+
 # ---------------------------------------------------------------------------
 # Errors digest — always redacted. `grammar` is retained as a profile field so a
 # future agent with a different log format plugs in without forking the parser.
@@ -259,15 +445,28 @@ _HERMES_TS_RE = re.compile(
 )
 
 
+def _fold_hermes_error(state: dict, line: str) -> None:
+    m = _HERMES_TS_RE.match(line)
+    if not m:
+        return
+    try:
+        ts = dt.datetime.fromisoformat(m.group("ts"))
+    except ValueError:
+        return
+    _window_add(state["events"], ts, redact(m.group("msg").strip()))
+
+
 def parse_errors_log(path, grammar: str = "hermes",
-                     window_hours: int = 24, now=None) -> dict:
+                     window_hours: int = 24, now=None,
+                     checkpoints: Optional[LogCheckpoints] = None) -> dict:
     """Count + bucket error-log lines in the window, redacting every line.
 
     Returns a dict usable by the renderer:
       {available, total, errors_total, warnings_total,
        patterns:[{pattern,count}], warnings:[{pattern,count}], window_hours}
     `patterns` are the real (non-benign) error buckets; `warnings` are the
-    `total` counts in-window lines.
+    `total` counts in-window lines. With `checkpoints`, only lines appended
+    since the last run are read.
     """
     p = pathlib.Path(path)
     if not p.is_file():
@@ -282,20 +481,13 @@ def parse_errors_log(path, grammar: str = "hermes",
     if grammar == "hermes":
         now = now or dt.datetime.now()
         cutoff = now - dt.timedelta(hours=window_hours)
+        state = scan_log(p, "errors", lambda: {"events": {}}, _fold_hermes_error,
+                         checkpoints)
+        _window_prune(state["events"], cutoff)
         errors: collections.Counter = collections.Counter()
-        total = 0
-        for line in _safe_read_lines(p):
-            m = _HERMES_TS_RE.match(line)
-            if not m:
-                continue
-            try:
-                ts = dt.datetime.fromisoformat(m.group("ts"))
-            except ValueError:
-                continue
-            if ts < cutoff:
-                continue
-            total += 1
-            errors[redact(m.group("msg").strip())] += 1
+        for bucket in state["events"].values():
+            errors.update(bucket)
+        total = sum(errors.values())
         out["total"] = total
         out["errors_total"] = total
         out["patterns"] = [{"pattern": k, "count": c} for k, c in errors.most_common(10)]
@@ -315,43 +507,47 @@ EVENT_KEYWORDS = {
 }
 
 
-def _iter_gateway_events(path, now, window_hours=24):
-    p = pathlib.Path(path)
-    if not p.is_file():
+def _fold_gateway_event(state: dict, line: str) -> None:
+    m = GATEWAY_TS_RE.match(line)
+    if not m:
         return
-    cutoff = now - dt.timedelta(hours=window_hours)
-    for line in _safe_read_lines(p):
-        m = GATEWAY_TS_RE.match(line)
-        if not m:
-            continue
-        try:
-            ts = dt.datetime.fromisoformat(m.group("ts"))
-        except ValueError:
-            continue
-        if ts < cutoff:
-            continue
-        rest = m.group("rest")
-        for event_type, regex in EVENT_KEYWORDS.items():
-            if regex.search(rest):
-                yield ts, event_type
-                break
+    try:
+        ts = dt.datetime.fromisoformat(m.group("ts"))
+    except ValueError:
+        return
+    rest = m.group("rest")
+    for event_type, regex in EVENT_KEYWORDS.items():
+        if regex.search(rest):
+            _window_add(state["events"], ts, event_type)
+            break
 
 
-def parse_gateway_log(path, window_hours: int = 24, now=None) -> dict[str, int]:
+def scan_gateway_log(path, window_hours: int = 24, now=None,
+                     checkpoints: Optional[LogCheckpoints] = None) -> dict:
+    """{counts: {type: n}, latest: {type: datetime}} over the window, in one pass."""
     now = now or dt.datetime.now()
     counts = {t: 0 for t in EVENT_KEYWORDS}
-    for _ts, etype in _iter_gateway_events(path, now, window_hours):
-        counts[etype] += 1
-    return counts
+    latest: dict[str, dt.datetime] = {}
+    if not pathlib.Path(path).is_file():
+        return {"counts": counts, "latest": latest}
+    state = scan_log(path, "gateway", lambda: {"events": {}}, _fold_gateway_event,
+                     checkpoints)
+    _window_prune(state["events"], now - dt.timedelta(hours=window_hours))
+    for iso, bucket in state["events"].items():
+        ts = dt.datetime.fromisoformat(iso)
+        for etype, n in bucket.items():
+            counts[etype] += n
+            if etype not in latest or ts > latest[etype]:
+                latest[etype] = ts
+    return {"counts": counts, "latest": latest}
+
+
+def parse_gateway_log(path, window_hours: int = 24, now=None) -> dict[str, int]:
+    return scan_gateway_log(path, window_hours, now)["counts"]
 
 
 def most_recent_per_type(path, now=None) -> dict[str, dt.datetime]:
-    now = now or dt.datetime.now()
-    out: dict[str, dt.datetime] = {}
-    for ts, etype in _iter_gateway_events(path, now):
-        if etype not in out or ts > out[etype]:
-            out[etype] = ts
-    return out
+    return scan_gateway_log(path, 24, now)["latest"]
 
 
 # ---------------------------------------------------------------------------
@@ -375,7 +571,32 @@ _HMCP_RECONNECT_RE = re.compile(
 )
 
 
-def parse_hermes_mcp_log(path, window_hours: int = 24, now=None) -> dict:
+def _fresh_mcp_state() -> dict:
+    return {"servers": {}, "total_tools": None, "total_servers": None,
+            "reconnects": {}}
+
+
+def _fold_mcp_line(state: dict, line: str) -> None:
+    m = _HMCP_REG_RE.match(line)
+    if m:
+        state["servers"][m.group("name")] = int(m.group("n"))
+        return
+    a = _HMCP_AGG_RE.search(line)
+    if a:
+        state["total_tools"] = int(a.group("n"))
+        state["total_servers"] = int(a.group("k"))
+        return
+    r = _HMCP_RECONNECT_RE.match(line)
+    if r:
+        try:
+            ts = dt.datetime.fromisoformat(r.group("ts"))
+        except ValueError:
+            return
+        _window_add(state["reconnects"], ts, r.group("name"))
+
+
+def parse_hermes_mcp_log(path, window_hours: int = 24, now=None,
+                         checkpoints: Optional[LogCheckpoints] = None) -> dict:
     """Parse the Hermes agent.log for per-server MCP tool counts + reconnects.
 
     Returns {servers:{name:count}, total_tools, total_servers,
@@ -385,34 +606,22 @@ def parse_hermes_mcp_log(path, window_hours: int = 24, now=None) -> dict:
     """
     now = now or dt.datetime.now()
     cutoff = now - dt.timedelta(hours=window_hours)
-    servers: dict[str, int] = {}
-    total_tools: Optional[int] = None
-    total_servers: Optional[int] = None
-    reconnects: list[str] = []
-    for line in _safe_read_lines(path):
-        m = _HMCP_REG_RE.match(line)
-        if m:
-            servers[m.group("name")] = int(m.group("n"))
-            continue
-        a = _HMCP_AGG_RE.search(line)
-        if a:
-            total_tools = int(a.group("n"))
-            total_servers = int(a.group("k"))
-            continue
-        r = _HMCP_RECONNECT_RE.match(line)
-        if r:
-            try:
-                ts = dt.datetime.fromisoformat(r.group("ts"))
-            except ValueError:
-                continue
-            if ts >= cutoff:
-                reconnects.append(r.group("name"))
+    if pathlib.Path(path).is_file():
+        state = scan_log(path, "agent_mcp", _fresh_mcp_state, _fold_mcp_line, checkpoints)
+    else:
+        state = _fresh_mcp_state()
+    _window_prune(state["reconnects"], cutoff)
+    servers: dict[str, int] = state["servers"]
+    total_tools, total_servers = state["total_tools"], state["total_servers"]
+    reconnects = collections.Counter()
+    for bucket in state["reconnects"].values():
+        reconnects.update(bucket)
     return {
         "servers": servers,
         "total_tools": total_tools if total_tools is not None else sum(servers.values()),
         "total_servers": total_servers if total_servers is not None else len(servers),
-        "reconnects_24h": len(reconnects),
-        "reconnect_servers": sorted(set(reconnects)),
+        "reconnects_24h": sum(reconnects.values()),
+        "reconnect_servers": sorted(reconnects),
     }
 
 
@@ -629,7 +838,7 @@ PROFILES: dict[str, dict] = {
         "ha_mcp": {"mode": "agent_log_derive", "server": "home-assistant"},
         "errors_log": "/var/lib/hermes/.hermes/logs/errors.log",
         "errors_grammar": "hermes",
-        "incidents_json": "/var/lib/hermes-self-heal/incidents.json",
+        "incidents_store": "/var/lib/hermes-self-heal/state.db",
         "selfheal_textfile": f"{TF}/hermes_self_heal.prom",
         "selfheal_metric_prefix": "hermes_self_heal",
         "invm_checks": [
@@ -659,6 +868,66 @@ def get_profile(name: str) -> dict:
 # Collect — gather every section's raw data into one dict
 # ---------------------------------------------------------------------------
 
+# Seconds each collector may run before its section is rendered stale. Sized
+# to the collector's own internal timeouts (ssh: 45s, systemctl/urllib: 10s)
+# plus headroom; a profile may override any of them via "section_deadlines".
+SECTION_DEADLINES = {
+    "live": 5.0,
+    "live_selfheal": 5.0,
+    "mcp_log": 20.0,
+    "uptime": 15.0,
+    "probes": 40.0,
+    "discord": 20.0,
+    "errors": 20.0,
+    "incidents": 5.0,
+    "invm": 50.0,
+}
+DEFAULT_SECTION_DEADLINE = 30.0
+
+
+def run_sections(sections: dict, deadlines: dict[str, float]) -> tuple[dict, dict]:
+    """Run {name: (fn, fallback)} concurrently, each against its own deadline.
+
+    Returns (results, timings). timings[name] is {seconds, status} with status
+    "ok", "timeout" or "error"; a timed-out or failed section's result is its
+    fallback. Deadlines count from the common start, so the whole call takes
+    at most the longest deadline. Workers are daemon threads: one stuck past
+    its deadline is abandoned rather than holding the report (or exit) up.
+    """
+    start = time.monotonic()
+    results: dict[str, Any] = {}
+    timings: dict[str, dict] = {}
+    finished: dict[str, tuple[str, Any, float]] = {}
+    threads: dict[str, threading.Thread] = {}
+
+    def _run(name, fn):
+        try:
+            value, status = fn(), "ok"
+        except Exception:
+            # A collector bug must degrade its section, never the report.
+            value, status = None, "error"
+        finished[name] = (status, value, time.monotonic() - start)
+
+    for name, (fn, _fallback) in sections.items():
+        t = threading.Thread(target=_run, args=(name, fn), daemon=True,
+                             name=f"collect-{name}")
+        threads[name] = t
+        t.start()
+
+    for name, (_fn, fallback) in sections.items():
+        deadline = deadlines.get(name, DEFAULT_SECTION_DEADLINE)
+        threads[name].join(max(0.0, start + deadline - time.monotonic()))
+        done = finished.get(name)
+        if done is None:
+            results[name] = fallback
+            timings[name] = {"seconds": deadline, "status": "timeout"}
+            continue
+        status, value, seconds = done
+        results[name] = value if status == "ok" else fallback
+        timings[name] = {"seconds": seconds, "status": status}
+    return results, timings
+
+
 def collect(profile: dict) -> dict:
     """Gather all section data; any single failure degrades to None/empty."""
     global PROMETHEUS_URL
@@ -666,59 +935,67 @@ def collect(profile: dict) -> dict:
     PROMETHEUS_URL = os.getenv(f"{prefix}_PROMETHEUS_URL", PROMETHEUS_URL)
     ssh_key = os.getenv(f"{prefix}_SSH_KEY")
     ssh_target = os.getenv(f"{prefix}_SSH_TARGET")
+    state_dir = os.getenv(f"{prefix}_STATE_DIR")
+    checkpoints = (LogCheckpoints(pathlib.Path(state_dir) / "log-checkpoints.json")
+                   if state_dir else None)
     now = dt.datetime.now()
 
-    live = parse_prom_textfiles(profile["live_textfiles"])
-    live_selfheal = parse_prom_textfile(profile["selfheal_textfile"])
-
-    # Section 2 — MCP servers
-    servers: dict[str, dict] = {}
-    mcp_log: dict = {}
-    if profile.get("mcp_servers_mode") == "agent_log":
-        # Real per-server tool counts from the agent's startup log.
-        mcp_log = parse_hermes_mcp_log(profile["agent_log"], 24, now)
-
-    # Section 4 — uptime
-    uptime = {u: systemd_uptime(u) for u in profile["units"]}
-
-    # Section 5 — probe families
-    probes = []
-    for fam in profile["probe_families"]:
-        summ = probe_summary_24h(fam["ok"], fam["dur"])
-        summ["label"] = fam["label"]
-        probes.append(summ)
-
-    # Section 6 — discord
-    discord: dict = {}
-    dprof = profile["discord"]
-    if dprof["mode"] == "log":
-        discord = {
-            "counts": parse_gateway_log(dprof["log"], 24, now),
-            "latest": most_recent_per_type(dprof["log"], now),
-        }
-
-    # Section 8 — errors
-    errors = parse_errors_log(profile["errors_log"], profile["errors_grammar"], 24, now)
-
-    # Section 9 — incidents
-    incidents = parse_incidents(profile["incidents_json"], now)
+    def mcp_log() -> dict:
+        # Section 2 — real per-server tool counts from the agent's startup log.
+        if profile.get("mcp_servers_mode") == "agent_log":
+            return parse_hermes_mcp_log(profile["agent_log"], 24, now, checkpoints)
+        return {}
+
+    def probes() -> list:
+        # Section 5 — probe families
+        out = []
+        for fam in profile["probe_families"]:
+            summ = probe_summary_24h(fam["ok"], fam["dur"])
+            summ["label"] = fam["label"]
+            out.append(summ)
+        return out
 
-    # Section 10 — in-VM corroboration
-    invm = ssh_probe(ssh_key, ssh_target, profile["invm_checks"])
+    def discord() -> dict:
+        # Section 6 — discord
+        dprof = profile["discord"]
+        if dprof["mode"] != "log":
+            return {}
+        return scan_gateway_log(dprof["log"], 24, now, checkpoints)
+
+    sections = {
+        "live": (lambda: parse_prom_textfiles(profile["live_textfiles"]), {}),
+        "live_selfheal": (lambda: parse_prom_textfile(profile["selfheal_textfile"]), {}),
+        "mcp_log": (mcp_log, {}),
+        # Section 4 — uptime, every unit in one systemctl call
+        "uptime": (lambda: systemd_uptime(profile["units"]),
+                   {u: dict(_UNKNOWN_UPTIME) for u in profile["units"]}),
+        "probes": (probes, [{**fam, "success_ratio": None, "p50_seconds": None,
+                             "p95_seconds": None, "available": False}
+                            for fam in profile["probe_families"]]),
+        "discord": (discord, {}),
+        # Section 8 — errors
+        "errors": (lambda: parse_errors_log(profile["errors_log"],
+                                            profile["errors_grammar"], 24, now,
+                                            checkpoints),
+                   {"total": 0, "patterns": []}),
+        # Section 9 — incidents
+        "incidents": (lambda: parse_incidents(profile["incidents_store"], now),
+                      {"active": 0, "resolved_24h": 0, "stuck_alerts": []}),
+        # Section 10 — in-VM corroboration
+        "invm": (lambda: ssh_probe(ssh_key, ssh_target, profile["invm_checks"]),
+                 {"skipped": True, "reason": "probe did not finish", "results": {}}),
+    }
+    deadlines = {**SECTION_DEADLINES, **profile.get("section_deadlines", {})}
+    results, timings = run_sections(sections, deadlines)
+    if checkpoints is not None:
+        checkpoints.save()
 
     return {
         "host": os.uname().nodename,
         "now": now,
-        "live": live,
-        "live_selfheal": live_selfheal,
-        "servers": servers,
-        "mcp_log": mcp_log,
-        "uptime": uptime,
-        "probes": probes,
-        "discord": discord,
-        "errors": errors,
-        "incidents": incidents,
-        "invm": invm,
+        **results,
+        "servers": {},
+        "sections": timings,
     }
 
 
@@ -744,7 +1021,13 @@ def _trader_state(invm: dict) -> tuple[bool, bool]:
     return (probed, failed)
 
 
+def _stale_sections(data: dict) -> list[str]:
+    """Collectors that timed out or failed; their data is fallback, not readings."""
+    return [n for n, t in data.get("sections", {}).items() if t["status"] != "ok"]
+
+
 def _compute_issues(profile: dict, data: dict) -> list[str]:
+    """Verdict issues; stale sections, if any, are listed last."""
     issues: list[str] = []
     live = data["live"]
     for metric, label in profile["verdict_fail_if_zero"]:
@@ -770,6 +1053,12 @@ def _compute_issues(profile: dict, data: dict) -> list[str]:
     # stuck self-heal incidents
     if data["incidents"]["stuck_alerts"]:
         issues.append(f"{len(data['incidents']['stuck_alerts'])} stuck incidents")
+    # Fallback values read as healthy (live=1, state unknown, 0 errors), so a
+    # section that was never read must keep the report from saying so.
+    stale = _stale_sections(data)
+    if stale:
+        issues.append(f"{len(stale)} section{'s' if len(stale) != 1 else ''} "
+                      f"stale/timed out: {', '.join(stale)}")
     return issues
 
 
@@ -958,6 +1247,10 @@ def render_ha_mcp(profile, data) -> list[str]:
 
 def render_errors(profile, data) -> list[str]:
     errors = data["errors"]
+    if "errors" in _stale_sections(data):
+        # The total would be the fallback's zero, not a count.
+        why = "timed out" if data["sections"]["errors"]["status"] == "timeout" else "failed"
+        return _section(f"Errors digest (last 24h, unavailable ({why}))")
     lines = _section(f"Errors digest (last 24h, total={errors.get('total', 0)})")
     if not errors.get("available"):
         lines.append("  err log not found")
@@ -1029,6 +1322,39 @@ def render_invm(profile, data) -> list[str]:
     return lines
 
 
+# Which collected keys each renderer draws on; a section whose collector
+# timed out or failed renders a stale/unknown marker instead of fallback data.
+RENDERER_SOURCES = {
+    "render_live_metrics": ("live",),
+    "render_mcp_servers": ("mcp_log", "live"),
+    "render_gateway": ("mcp_log", "live"),
+    "render_uptime": ("uptime",),
+    "render_probe_summary": ("probes",),
+    "render_discord": ("discord",),
+    "render_ha_mcp": ("mcp_log",),
+    "render_errors": ("errors",),
+    "render_selfheal": ("incidents", "live_selfheal"),
+    "render_invm": ("invm",),
+}
+
+
+def _stale_marker(timings: dict, names: list[str]) -> str:
+    why = ", ".join(
+        f"{n} collector {'timed out after' if timings[n]['status'] == 'timeout' else 'failed in'} "
+        f"{timings[n]['seconds']:.0f}s"
+        for n in names)
+    return f"  stale/unknown — {why}"
+
+
+def render_timings(profile, data) -> list[str]:
+    lines = _section("Collector timings")
+    for name, t in sorted(data.get("sections", {}).items(),
+                          key=lambda kv: -kv[1]["seconds"]):
+        status = "" if t["status"] == "ok" else f"  {t['status'].upper()} (stale/unknown)"
+        lines.append(f"  {name:<14} {t['seconds']:7.2f}s{status}")
+    return lines
+
+
 SECTION_RENDERERS = [
     render_live_metrics,
     render_mcp_servers,
@@ -1046,7 +1372,9 @@ SECTION_RENDERERS = [
 def render(profile: dict, data: dict) -> tuple[str, str]:
     """Return (subject, body) for the email."""
     issues = _compute_issues(profile, data)
-    verdict = "FAIL" if issues else "PASS"
+    # Only stale sections: nothing failed that was read, but not everything was.
+    failing = issues[:-1] if _stale_sections(data) else issues
+    verdict = "FAIL" if failing else "UNKNOWN" if issues else "PASS"
     if issues:
         summary = issues[0]
     elif data["incidents"]["active"]:
@@ -1073,8 +1401,17 @@ def render(profile: dict, data: dict) -> tuple[str, str]:
         lines.append(f"  - {i}")
     lines.append("")
 
+    timings = data.get("sections", {})
     for renderer in SECTION_RENDERERS:
-        lines.extend(renderer(profile, data))
+        section = renderer(profile, data)
+        stale = [n for n in RENDERER_SOURCES.get(renderer.__name__, ())
+                 if timings.get(n, {}).get("status", "ok") != "ok"]
+        if stale:
+            section = section[:2] + [_stale_marker(timings, stale)]
+        lines.extend(section)
+        lines.append("")
+    if timings:
+        lines.extend(render_timings(profile, data))
         lines.append("")
 
     lines.append("--")
@@ -84,6 +84,10 @@ Metrics emitted:
   cgroup_pressure_unit_present{unit}                         1 if the cgroup was readable
   cgroup_pressure_exporter_success                           0 if the run failed outright
   cgroup_pressure_exporter_timestamp_seconds                 staleness anchor
+
+Runs as a daemon (`--daemon`, see scripts/textfile_exporter.py) that keeps the resolved
+unit -> cgroup paths between passes, so steady state is ~20 /sys reads a minute and no
+`systemctl` calls at all; without the flag it does one pass and exits.
 """
 
 import os
@@ -91,10 +95,17 @@ import subprocess
 import sys
 import time
 
+from textfile_exporter import Exporter, Registry
+
 OUT = os.environ.get(
     "TEXTFILE_PATH",
     "/var/lib/prometheus-node-exporter-textfiles/cgroup_pressure.prom",
 )
+INTERVAL = float(os.environ.get("INTERVAL_SECONDS", "60"))
+# ControlGroup paths are stable for the life of a unit; in daemon mode they are resolved
+# once and re-resolved on this cadence, or immediately when a read under them fails
+# (the unit stopped, restarted into a new cgroup, or was reparented).
+CGROUP_CACHE_SECONDS = float(os.environ.get("CGROUP_CACHE_SECONDS", "900"))
 
 # HARDCODED ON PURPOSE -- see "WHY THE UNIT LIST IS HARDCODED" above. These are the six
 # units with an explicit memory ceiling in modules/core/memory-limits.nix. Adding a unit
@@ -120,31 +131,27 @@ SCOPES = ["some", "full"]
 # them is meaningful while a raw value is not.
 MEMORY_EVENTS = ["low", "high", "max", "oom", "oom_kill"]
 
-HELP = [
-    ("cgroup_pressure_stall_seconds_total",
-     "Cumulative PSI stall time for this cgroup (total= from <resource>.pressure, "
-     "microseconds converted to seconds). scope=some: at least one task stalled; "
-     "scope=full: all tasks stalled",
-     "counter"),
-    ("cgroup_memory_events_total",
-     "cgroup memory.events counters. high/low count RECLAIM events, which a low "
-     "memory.pressure does NOT reflect because evicting clean page cache is not a stall",
-     "counter"),
-    ("cgroup_memory_current_bytes",
-     "cgroup memory.current (includes reclaimable page cache, so a high value is not "
-     "itself evidence of memory shortage)", "gauge"),
-    ("cgroup_memory_high_bytes",
-     "cgroup memory.high soft ceiling; +Inf when unset", "gauge"),
-    ("cgroup_memory_max_bytes",
-     "cgroup memory.max hard ceiling; +Inf when unset", "gauge"),
-    ("cgroup_pressure_unit_present",
-     "1 if the unit's cgroup was resolved and its PSI files were readable, else 0. An "
-     "absent unit label would be indistinguishable from a healthy one", "gauge"),
-    ("cgroup_pressure_exporter_success",
-     "1 if this collector completed its run", "gauge"),
-    ("cgroup_pressure_exporter_timestamp_seconds",
-     "Unix time of the last collector run", "gauge"),
-]
+HELP = {
+    "cgroup_pressure_stall_seconds_total": (
+        "Cumulative PSI stall time for this cgroup (total= from <resource>.pressure, "
+        "microseconds converted to seconds). scope=some: at least one task stalled; "
+        "scope=full: all tasks stalled",
+        "counter"),
+    "cgroup_memory_events_total": (
+        "cgroup memory.events counters. high/low count RECLAIM events, which a low "
+        "memory.pressure does NOT reflect because evicting clean page cache is not a stall",
+        "counter"),
+    "cgroup_memory_current_bytes": (
+        "cgroup memory.current (includes reclaimable page cache, so a high value is not "
+        "itself evidence of memory shortage)", "gauge"),
+    "cgroup_memory_high_bytes": ("cgroup memory.high soft ceiling; +Inf when unset", "gauge"),
+    "cgroup_memory_max_bytes": ("cgroup memory.max hard ceiling; +Inf when unset", "gauge"),
+    "cgroup_pressure_unit_present": (
+        "1 if the unit's cgroup was resolved and its PSI files were readable, else 0. An "
+        "absent unit label would be indistinguishable from a healthy one", "gauge"),
+}
+SUCCESS = ("cgroup_pressure_exporter_success", "1 if this collector completed its run")
+TIMESTAMP = ("cgroup_pressure_exporter_timestamp_seconds", "Unix time of the last collector run")
 
 
 def _control_group(unit: str) -> str:
@@ -156,6 +163,40 @@ def _control_group(unit: str) -> str:
     return proc.stdout.strip()
 
 
+class ControlGroups:
+    """unit -> cgroup path, resolved lazily and kept between daemon passes.
+
+    Only non-empty answers are cached: a stopped unit has no cgroup yet and must be asked
+    again next pass, not remembered as absent for the whole cache window.
+    """
+
+    def __init__(self, ttl: float = CGROUP_CACHE_SECONDS, resolve=_control_group):
+        self.ttl = ttl
+        self.resolve = resolve
+        self._paths: dict = {}
+
+    def get(self, unit: str) -> str:
+        if self.cached(unit):
+            return self._paths[unit][0]
+        path = self.resolve(unit)
+        if path:
+            self._paths[unit] = (path, time.monotonic())
+        else:
+            self._paths.pop(unit, None)
+        return path
+
+    def cached(self, unit: str) -> bool:
+        cached = self._paths.get(unit)
+        return bool(cached) and time.monotonic() - cached[1] < self.ttl
+
+    def forget(self, unit: str) -> None:
+        self._paths.pop(unit, None)
+
+
+def _family(reg: Registry, name: str):
+    return reg.family(name, *HELP[name])
+
+
 def _read(path: str):
     try:
         with open(path, encoding="utf-8") as fh:
@@ -191,29 +232,37 @@ def _limit(text) -> str | None:
     return value if value.isdigit() else None
 
 
-def collect(unit: str, out: list) -> None:
-    cgroup = _control_group(unit)
-    base = f"/sys/fs/cgroup{cgroup}" if cgroup else None
-
-    # PSI is the presence test: a stopped unit has no cgroup, and a cgroup without
-    # accounting has no pressure file. Either way present=0 and the unit still appears in
-    # the output, so "unit vanished" never reads as "unit healthy".
+def _pressure(base: str | None) -> dict:
     psi = {}
     for resource in RESOURCES:
         text = _read(f"{base}/{resource}.pressure") if base else None
         if text is not None:
             psi[resource] = _psi_totals(text)
+    return psi
+
 
-    out.append(f'cgroup_pressure_unit_present{{unit="{unit}"}} {1 if psi else 0}')
+def collect(unit: str, reg: Registry, cgroups: ControlGroups) -> None:
+    from_cache = cgroups.cached(unit)
+    cgroup = cgroups.get(unit)
+    # PSI is the presence test: a stopped unit has no cgroup, and a cgroup without
+    # accounting has no pressure file. Either way present=0 and the unit still appears in
+    # the output, so "unit vanished" never reads as "unit healthy".
+    psi = _pressure(f"/sys/fs/cgroup{cgroup}" if cgroup else None)
+    if from_cache and not psi:
+        # The cached path may be stale (unit restarted elsewhere); ask systemd once more.
+        cgroups.forget(unit)
+        cgroup = cgroups.get(unit)
+        psi = _pressure(f"/sys/fs/cgroup{cgroup}" if cgroup else None)
+    base = f"/sys/fs/cgroup{cgroup}"
+
+    _family(reg, "cgroup_pressure_unit_present").add(1 if psi else 0, unit=unit)
     if not psi:
         return
 
+    stall = _family(reg, "cgroup_pressure_stall_seconds_total")
     for resource, totals in psi.items():
         for scope, micros in sorted(totals.items()):
-            out.append(
-                f'cgroup_pressure_stall_seconds_total{{unit="{unit}",'
-                f'resource="{resource}",scope="{scope}"}} {micros / 1e6:.6f}'
-            )
+            stall.add(f"{micros / 1e6:.6f}", unit=unit, resource=resource, scope=scope)
 
     events_text = _read(f"{base}/memory.events")
     if events_text is not None:
@@ -224,11 +273,9 @@ def collect(unit: str, out: list) -> None:
                 seen[fields[0]] = fields[1]
         # Emit every key explicitly, including zeros: a series that disappears at zero is
         # indistinguishable from a collector that stopped reporting it.
+        events = _family(reg, "cgroup_memory_events_total")
         for key in MEMORY_EVENTS:
-            out.append(
-                f'cgroup_memory_events_total{{unit="{unit}",event="{key}"}} '
-                f'{seen.get(key, "0")}'
-            )
+            events.add(seen.get(key, "0"), unit=unit, event=key)
 
     for metric, filename in (
         ("cgroup_memory_current_bytes", "memory.current"),
@@ -237,39 +284,25 @@ def collect(unit: str, out: list) -> None:
     ):
         value = _limit(_read(f"{base}/{filename}"))
         if value is not None:
-            out.append(f'{metric}{{unit="{unit}"}} {value}')
+            _family(reg, metric).add(value, unit=unit)
 
 
-def _emit(lines: list) -> None:
-    tmp = f"{OUT}.tmp"
-    with open(tmp, "w", encoding="utf-8") as fh:
-        fh.write("\n".join(lines) + "\n")
-    os.replace(tmp, OUT)  # same directory, so rename(2): never a torn read
-    os.chmod(OUT, 0o644)  # counts only, no names, no secrets
+def collect_all(cgroups: ControlGroups):
+    def run(reg: Registry) -> None:
+        # Declared up front so the file keeps a stable HELP/TYPE layout even when every
+        # unit is stopped.
+        for name in HELP:
+            _family(reg, name)
+        for unit in UNITS:
+            collect(unit, reg, cgroups)
+    return run
 
 
 def main() -> int:
-    out = []
-    for name, help_text, kind in HELP:
-        out.append(f"# HELP {name} {help_text}")
-        out.append(f"# TYPE {name} {kind}")
-
-    try:
-        for unit in UNITS:
-            collect(unit, out)
-    except Exception as exc:  # noqa: BLE001
-        # Emit success=0 rather than nothing: an ABSENT metric set is indistinguishable
-        # from a healthy system, which is the failure mode this effort exists to remove.
-        print(f"cgroup-pressure-exporter: {type(exc).__name__}", file=sys.stderr)
-        out.append("cgroup_pressure_exporter_success 0")
-        out.append(f"cgroup_pressure_exporter_timestamp_seconds {time.time():.0f}")
-        _emit(out)
-        return 1
-
-    out.append("cgroup_pressure_exporter_success 1")
-    out.append(f"cgroup_pressure_exporter_timestamp_seconds {time.time():.0f}")
-    _emit(out)
-    return 0
+    exporter = Exporter(OUT, splay=INTERVAL / 4)
+    exporter.collector("cgroup_pressure", collect_all(ControlGroups()), INTERVAL,
+                       success=SUCCESS, timestamp=TIMESTAMP)
+    return exporter.main()
 
 
 if __name__ == "__main__":
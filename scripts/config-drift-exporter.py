@@ -33,16 +33,21 @@ sha-normalized by dropping the injected "  db_url:" line (mirrors
 home-assistant.nix:1137) so per-rebuild db_url churn is invisible.
 secrets.yaml is hashed in its ENCRYPTED form — sops is never invoked.
 
-Stdlib-only, modeled on scripts/openclaw-config-drift-check.py.
+Stdlib-only, modeled on scripts/openclaw-config-drift-check.py. Runs resident with
+`--daemon` (scripts/textfile_exporter.py), keeping the baselines in memory between
+passes; `--rebaseline` is always a single pass.
 """
 from __future__ import annotations
 
 import hashlib
 import json
 import os
+import subprocess
 import sys
 import time
 
+from textfile_exporter import Exporter, Registry
+
 TEXTFILE_DIR = "/var/lib/prometheus-node-exporter-textfiles"
 METRIC_PATH = os.path.join(TEXTFILE_DIR, "config_drift.prom")
 BASELINE_DIR = "/var/lib/config-drift"
@@ -57,6 +62,11 @@ SYSTEM_AGE_PROM = os.path.join(TEXTFILE_DIR, "system_age.prom")
 # update delay plus the activation-ordering slop noted in the spec.
 DEPLOY_GRACE_SECONDS = 900  # 15 min
 
+# Daemon-mode cadences (see scripts/textfile_exporter.py). Hashing seven files is cheap;
+# these match the hourly timer this replaced so the staleness alert's margin is unchanged.
+DRIFT_INTERVAL = float(os.environ.get("DRIFT_INTERVAL_SECONDS", "3600"))
+GIT_INTERVAL = float(os.environ.get("GIT_INTERVAL_SECONDS", "3600"))
+
 # Node-RED writes this backup in lockstep with flows.json on every deploy.
 NR_BACKUP_ANCHOR = "/var/lib/node-red/.flows.json.backup"
 
@@ -199,87 +209,48 @@ def _save_baselines(baselines: dict) -> None:
     os.rename(tmp, BASELINE_PATH)
 
 
-def write_metrics(rows: list[dict], run_ts: float, git_dirty: int) -> None:
-    lines = [
-        "# HELP config_file_present 1 if the watched config file exists",
-        "# TYPE config_file_present gauge",
-    ]
-    for r in rows:
-        lines.append(
-            f'config_file_present{{file="{r["file"]}"}} {r["present"]}'
-        )
-    lines += [
-        "# HELP config_file_mtime_seconds Unix mtime of the watched config file",
-        "# TYPE config_file_mtime_seconds gauge",
-    ]
-    for r in rows:
-        lines.append(
-            f'config_file_mtime_seconds{{file="{r["file"]}"}} {r["mtime"]}'
-        )
-    lines += [
-        "# HELP config_file_drift 1 if sha changed AND the change is outside the deploy window",
-        "# TYPE config_file_drift gauge",
-    ]
-    for r in rows:
-        lines.append(
-            f'config_file_drift{{file="{r["file"]}"}} {r["drift"]}'
-        )
-    lines += [
-        "# HELP nixos_config_uncommitted_changes Count of uncommitted/untracked files in /etc/nixos (excluding the build lock)",
-        "# TYPE nixos_config_uncommitted_changes gauge",
-        f"nixos_config_uncommitted_changes {git_dirty}",
-        "# HELP config_drift_last_run_timestamp_seconds When the config-drift exporter last ran",
-        "# TYPE config_drift_last_run_timestamp_seconds gauge",
-        f"config_drift_last_run_timestamp_seconds {run_ts}",
-        "",
-    ]
-    os.makedirs(TEXTFILE_DIR, exist_ok=True)
-    tmp = METRIC_PATH + ".tmp"
-    with open(tmp, "w") as f:
-        f.write("\n".join(lines))
-    os.chmod(tmp, 0o644)
-    os.rename(tmp, METRIC_PATH)
+class BaselineStore:
+    """baselines.json, kept in memory across daemon passes.
 
+    Re-read whenever the file on disk changes identity, because the
+    config-drift-rebaseline oneshot rewrites it underneath a running daemon and an
+    in-memory copy must never overwrite an operator's approval. Written only when a
+    pass actually changed something.
+    """
 
-def _git_dirty_count() -> int:
-    """Count uncommitted/untracked files in /etc/nixos, ignoring the gitignored
-    .nixos-build lock. Uses subprocess git; returns 0 on any error (the
-    exporter-stale alert covers a dead collector)."""
-    import subprocess
+    def __init__(self):
+        self._data = None
+        self._stamp = None
 
-    try:
-        out = subprocess.run(
-            [
-                "git",
-                "-C",
-                "/etc/nixos",
-                "status",
-                "--porcelain",
-            ],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            check=True,
-        ).stdout
-    except (OSError, subprocess.SubprocessError):
-        return 0
-    count = 0
-    for line in out.splitlines():
-        if not line.strip():
-            continue
-        if ".nixos-build" in line:
-            continue
-        count += 1
-    return count
+    def _disk_stamp(self):
+        try:
+            st = os.stat(BASELINE_PATH)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
 
+    def load(self) -> dict:
+        stamp = self._disk_stamp()
+        if self._data is None or stamp != self._stamp:
+            self._data = _load_baselines()
+            self._stamp = stamp
+        return self._data
+
+    def save(self, baselines: dict) -> None:
+        if baselines == self._data and self._stamp is not None:
+            return
+        _save_baselines(baselines)
+        self._data = baselines
+        self._stamp = self._disk_stamp()
 
-def main() -> int:
-    rebaseline = "--rebaseline" in sys.argv[1:]
 
-    baselines = _load_baselines()
+def check_files(baselines: dict, rebaseline: bool, now: float):
+    """Compare every watched file against its baseline.
+
+    Returns (rows, new_baselines); rows carry file/present/mtime/drift.
+    """
     first_run = len(baselines) == 0
     generation_ts = _generation_anchor()
-    now = time.time()
 
     rows = []
     new_baselines = dict(baselines)
@@ -355,10 +326,82 @@ def main() -> int:
             }
         )
 
-    _save_baselines(new_baselines)
-    git_dirty = _git_dirty_count()
-    write_metrics(rows, now, git_dirty)
-    return 0
+    return rows, new_baselines
+
+
+def drift_collector(store: BaselineStore, rebaseline: bool = False):
+    def run(reg: Registry) -> None:
+        rows, new_baselines = check_files(store.load(), rebaseline, time.time())
+        store.save(new_baselines)
+        present = reg.gauge(
+            "config_file_present", "1 if the watched config file exists")
+        mtime = reg.gauge(
+            "config_file_mtime_seconds", "Unix mtime of the watched config file")
+        drift = reg.gauge(
+            "config_file_drift",
+            "1 if sha changed AND the change is outside the deploy window")
+        for r in rows:
+            present.add(r["present"], file=r["file"])
+        for r in rows:
+            mtime.add(r["mtime"], file=r["file"])
+        for r in rows:
+            drift.add(r["drift"], file=r["file"])
+    return run
+
+
+def _git_dirty_count() -> int | None:
+    """Count uncommitted/untracked files in /etc/nixos, ignoring the gitignored
+    .nixos-build lock. Uses subprocess git; returns None on any error."""
+    try:
+        out = subprocess.run(
+            [
+                "git",
+                "-C",
+                "/etc/nixos",
+                "status",
+                "--porcelain",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=30,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    count = 0
+    for line in out.splitlines():
+        if not line.strip():
+            continue
+        if ".nixos-build" in line:
+            continue
+        count += 1
+    return count
+
+
+def git_collector(reg: Registry) -> bool:
+    count = _git_dirty_count()
+    # A failed `git status` still publishes 0 (as it always has) so the series does not
+    # vanish; the failure shows as textfile_collector_success{collector="nixos_config_git"}.
+    reg.gauge(
+        "nixos_config_uncommitted_changes",
+        "Count of uncommitted/untracked files in /etc/nixos (excluding the build lock)",
+    ).add(count or 0)
+    return count is not None
+
+
+def main() -> int:
+    rebaseline = "--rebaseline" in sys.argv[1:]
+
+    exporter = Exporter(METRIC_PATH, splay=300)
+    exporter.collector(
+        "config_drift", drift_collector(BaselineStore(), rebaseline), DRIFT_INTERVAL,
+        timestamp=("config_drift_last_run_timestamp_seconds",
+                   "When the config-drift exporter last ran"),
+        hold_on_failure=True,
+    )
+    exporter.collector("nixos_config_git", git_collector, GIT_INTERVAL)
+    # An approval is one pass by definition, whatever else was asked for.
+    return exporter.main([] if rebaseline else None)
 
 
 if __name__ == "__main__":
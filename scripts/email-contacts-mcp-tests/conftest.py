@@ -0,0 +1,15 @@
+"""Test fixtures for email-contacts-mcp."""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "email-contacts-mcp.py"
+
+
+def load_mcp_module():
+    """The script's filename has dashes, so it is loaded from its path."""
+    spec = importlib.util.spec_from_file_location("email_contacts_mcp", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
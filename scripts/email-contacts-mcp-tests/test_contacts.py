@@ -0,0 +1,125 @@
+import json
+import locale
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from conftest import load_mcp_module
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+# Captured from khard 0.22 under LC_ALL=C over fixtures/contacts: stdout of
+# `khard list --search-in-source-files -p Q` and of `khard show
+# --search-in-source-files Q` (up to its selection prompt), stripped.
+KHARD = json.loads((FIXTURE_DIR / "khard_output.json").read_text())
+m = load_mcp_module()
+
+
+@pytest.fixture(autouse=True)
+def c_locale():
+    saved = locale.setlocale(locale.LC_ALL)
+    locale.setlocale(locale.LC_ALL, "C")
+    yield
+    locale.setlocale(locale.LC_ALL, saved)
+
+
+def _config(tmp_path, contacts):
+    conf = tmp_path / "khard.conf"
+    conf.write_text("[addressbooks]\n[[contacts]]\n"
+                    f"path = {contacts}/\n\n[general]\ndefault_action = show\n")
+    return conf
+
+
+@pytest.fixture
+def index(tmp_path):
+    return m._ContactIndex(str(_config(tmp_path, FIXTURE_DIR / "contacts")))
+
+
+@pytest.mark.parametrize("query", sorted(KHARD["list"]))
+def test_list_matches_khard(index, query):
+    assert index.list_parsable(query) == KHARD["list"][query]
+
+
+@pytest.mark.parametrize("query", sorted(KHARD["show"]))
+def test_show_matches_khard(index, query):
+    assert index.show(query).strip() == KHARD["show"][query]
+
+
+def test_tools_keep_their_messages(index, monkeypatch):
+    monkeypatch.setattr(m, "_contacts", index)
+    assert m.search_contacts("xyz") == "No contacts found matching 'xyz'."
+    assert m.get_contact_details("xyz") == "No contact found matching 'xyz'."
+    assert m.search_contacts("acme") == KHARD["list"]["acme"]
+
+
+def test_refresh_follows_added_changed_and_removed_cards(tmp_path):
+    contacts = tmp_path / "contacts"
+    shutil.copytree(FIXTURE_DIR / "contacts", contacts)
+    index = m._ContactIndex(str(_config(tmp_path, contacts)), rescan=3600)
+    assert index.list_parsable("acme") == KHARD["list"]["acme"]
+
+    # vdirsyncer writes a temp file and renames it over the card.
+    card = (contacts / "acme.vcf").read_text().replace("Acme Plumbing", "Apex Plumbing")
+    (contacts / "acme.vcf.tmp").write_text(card)
+    os.replace(contacts / "acme.vcf.tmp", contacts / "acme.vcf")
+    (contacts / "alex.vcf").unlink()
+    (contacts / "nouid.vcf").write_text(
+        (contacts / "nouid.vcf").read_text().replace("END:VCARD", "UID:nora-1\nEND:VCARD"))
+    assert index.list_parsable("acme") == "acme-plumbing-1\tApex Plumbing\tcontacts"
+    assert index.list_parsable("smith") == "alex-smith-0006\tMorgan Smith\tcontacts"
+    assert index.list_parsable("nora") == "nora-1\tNora Nouid\tcontacts"
+
+    # An in-place edit leaves the directory mtime alone; the periodic
+    # rescan picks it up.
+    jane = contacts / "jane.vcf"
+    jane.write_text(jane.read_text().replace("Researcher", "Director"))
+    st = jane.stat()
+    os.utime(jane, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    index.rescan = 0
+    assert "Role: Director" in index.show("jane")
+
+
+def test_duplicate_uid_keeps_first_card_whose_source_matched(tmp_path):
+    contacts = tmp_path / "contacts"
+    contacts.mkdir()
+    for name, fn in (("a.vcf", "First Copy"), ("b.vcf", "Second Copy")):
+        (contacts / name).write_text(
+            f"BEGIN:VCARD\nVERSION:3.0\nFN:{fn}\nUID:dup-1\nEND:VCARD\n")
+    index = m._ContactIndex(str(_config(tmp_path, contacts)))
+    index.refresh()
+    # khard loads in directory order, not name order.
+    first, second = ("First Copy", "Second Copy") \
+        if Path(index._order[0]).name == "a.vcf" else ("Second Copy", "First Copy")
+    assert index.list_parsable("copy") == f"dup-1\t{first}\tcontacts"
+    assert index.list_parsable(second.split()[0]) == f"dup-1\t{second}\tcontacts"
+
+
+def test_lookups_use_the_trigram_postings(index, monkeypatch):
+    index.refresh()
+    expected = [p for p in index._order if Path(p).name in ("jane.vcf", "john.vcf")]
+    assert len(index._order) > len(expected)
+    assert index._candidates(m._parse_query("wiegley")) == expected
+
+    # Only the postings' candidates are matched card by card: the rest of the
+    # book is never examined, and never read from disk.
+    examined, read = [], []
+    match, source = m._TermQuery.match, index._source
+    monkeypatch.setattr(m._TermQuery, "match",
+                        lambda self, card: examined.append(card) or match(self, card))
+    monkeypatch.setattr(index, "_source", lambda path: read.append(path) or source(path))
+    found = index.search("wiegley")
+    assert {c.first_last for c in found} == {index._files[p][1].first_last for p in expected}
+    assert len(examined) == len(expected)
+    assert set(read) <= set(expected)
+
+
+@pytest.mark.skipif(shutil.which("khard") is None, reason="khard not installed")
+@pytest.mark.parametrize("query", ["wiegley", "555", "name:smith", "phone_numbers:0101"])
+def test_list_matches_installed_khard(index, tmp_path, query):
+    env = dict(os.environ, KHARD_CONFIG=index.config_path, LC_ALL="C")
+    out = subprocess.run(["khard", "list", "--search-in-source-files", "-p", query],
+                         env=env, capture_output=True, text=True,
+                         stdin=subprocess.DEVNULL, timeout=30).stdout
+    assert index.list_parsable(query) == out.strip()
@@ -0,0 +1,313 @@
+"""The IMAP side: the connection pool, FETCH parsing and listing summaries.
+
+FETCH responses are written out the way imaplib hands Dovecot 2.3's replies
+back: one bytes item per response line, and a (text, literal) tuple wherever
+the server sent a {n} literal -- the text before it ends in {n} and the rest
+of the line follows as the next item.
+"""
+import imaplib
+import threading
+import time
+
+import pytest
+
+from conftest import load_mcp_module
+
+m = load_mcp_module()
+
+ENVELOPE = (b'("Mon, 19 Oct 2026 09:12:00 +0000" "=?utf-8?q?Caf=C3=A9_menu?=" '
+            b'(("Ana Diaz" NIL "ana" "example.org")) (("Ana Diaz" NIL "ana" "example.org")) '
+            b'(("Ana Diaz" NIL "ana" "example.org")) ((NIL NIL "johnw" "vulcan.lan")) '
+            b'NIL NIL NIL "<1@example.org>")')
+PLAIN = b'("text" "plain" ("charset" "utf-8") NIL NIL "quoted-printable" 64 3 NIL NIL NIL NIL)'
+ALTERNATIVE = (b'(("text" "plain" ("charset" "iso-8859-1") NIL NIL "base64" 120 2 NIL NIL NIL NIL)'
+               b'("text" "html" ("charset" "utf-8") NIL NIL "7bit" 300 8 NIL NIL NIL NIL) '
+               b'"alternative" ("boundary" "=_alt") NIL NIL NIL)')
+HTML_ONLY = b'("text" "html" ("charset" "utf-8") NIL NIL "7bit" 300 8 NIL NIL NIL NIL)'
+# A forward: an HTML note with the original message attached inline.
+FORWARD_MULTIPART = (
+    b'(("text" "html" ("charset" "utf-8") NIL NIL "7bit" 80 2 NIL NIL NIL NIL)'
+    b'("message" "rfc822" NIL NIL NIL "7bit" 900 ' + ENVELOPE + b' ' + ALTERNATIVE
+    + b' 20 NIL ("inline" NIL) NIL NIL) "mixed" ("boundary" "=_mix") NIL NIL NIL)')
+FORWARD_SINGLE = (
+    b'(("text" "html" ("charset" "utf-8") NIL NIL "7bit" 80 2 NIL NIL NIL NIL)'
+    b'("message" "rfc822" NIL NIL NIL "7bit" 400 ' + ENVELOPE + b' '
+    + b'("text" "plain" ("charset" "us-ascii") NIL NIL "7bit" 20 1 NIL NIL NIL NIL)'
+    + b' 6 NIL NIL NIL NIL) "mixed" ("boundary" "=_mix") NIL NIL NIL)')
+ATTACHMENT_ONLY = (b'(("application" "pdf" ("name" "a.pdf") NIL NIL "base64" 9000 NIL '
+                   b'("attachment" ("filename" "a.pdf")) NIL NIL)'
+                   b'("image" "png" NIL NIL NIL "base64" 500 NIL NIL NIL NIL) '
+                   b'"mixed" ("boundary" "=_m") NIL NIL NIL)')
+
+
+def parse(raw):
+    return m._parse_fetch([raw])[0]
+
+
+# ---------------------------------------------------------------------------
+# _parse_fetch
+# ---------------------------------------------------------------------------
+
+def test_parse_fetch_envelope_and_bodystructure():
+    [item] = m._parse_fetch([b'1 (UID 42 ENVELOPE ' + ENVELOPE + b' BODYSTRUCTURE '
+                             + ALTERNATIVE + b')'])
+    assert item[b"UID"] == b"42"
+    env = item[b"ENVELOPE"]
+    assert env[0] == b"Mon, 19 Oct 2026 09:12:00 +0000"
+    assert env[2] == [[b"Ana Diaz", None, b"ana", b"example.org"]]
+    assert env[5] == [[None, None, b"johnw", b"vulcan.lan"]]
+    assert env[6:9] == [None, None, None]
+    body = item[b"BODYSTRUCTURE"]
+    assert body[0][:2] == [b"text", b"plain"] and body[2] == b"alternative"
+
+
+def test_parse_fetch_splices_literals_and_unescapes_quoted():
+    data = [(b'1 (UID 7 ENVELOPE ("Mon, 19 Oct 2026 09:12:00 +0000" {13}',
+             b'Re: "quoted"\xe9'),
+            b' (("Bob \\"B\\"" NIL "bob" "example.org")) NIL NIL NIL NIL NIL NIL "<2@x>"))',
+            (b'2 (UID 8 BODY[1]<0> {11}', b'hello\r\n(x)'),
+            b')']
+    first, second = m._parse_fetch(data)
+    assert first[b"ENVELOPE"][1] == b'Re: "quoted"\xe9'
+    assert first[b"ENVELOPE"][2] == [[b'Bob "B"', None, b"bob", b"example.org"]]
+    # Parentheses inside a literal are data, not structure.
+    assert second == {b"UID": b"8", b"BODY[1]<0>": b"hello\r\n(x)"}
+
+
+def test_parse_fetch_skips_none_and_keeps_unsolicited_responses_apart():
+    items = m._parse_fetch([None, b'3 (FLAGS (\\Seen))', b'4 (UID 9 FLAGS ())'])
+    assert items == [{b"FLAGS": [b"\\Seen"]}, {b"UID": b"9", b"FLAGS": []}]
+
+
+# ---------------------------------------------------------------------------
+# _text_section
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("structure, expected", [
+    (PLAIN, ("TEXT", "quoted-printable", "utf-8")),
+    (HTML_ONLY, ("TEXT", "7bit", "utf-8")),             # single part: shown whatever it is
+    (ALTERNATIVE, ("1", "base64", "iso-8859-1")),
+    (FORWARD_MULTIPART, ("2.1", "base64", "iso-8859-1")),
+    (FORWARD_SINGLE, ("2.1", "7bit", "us-ascii")),
+    (ATTACHMENT_ONLY, None),
+])
+def test_text_section(structure, expected):
+    assert m._text_section(parse(b'1 (BODYSTRUCTURE ' + structure + b')')[b"BODYSTRUCTURE"]) \
+        == expected
+
+
+def test_text_section_matches_body_text_for_an_attached_message():
+    # The same forward, built as a message: _body_text finds the attached
+    # message's text/plain, so the listing snippet must come from there too.
+    from email.mime.message import MIMEMessage
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    inner = MIMEText("original text", "plain", "us-ascii")
+    outer = MIMEMultipart("mixed")
+    outer.attach(MIMEText("<p>fwd</p>", "html"))
+    outer.attach(MIMEMessage(inner))
+    assert m._body_text(outer) == "original text"
+    structure = parse(b'1 (BODYSTRUCTURE ' + FORWARD_SINGLE + b')')[b"BODYSTRUCTURE"]
+    assert m._text_section(structure)[0] == "2.1"
+
+
+def test_text_section_ignores_garbage():
+    assert m._text_section(None) is None
+    assert m._text_section([]) is None
+
+
+# ---------------------------------------------------------------------------
+# _fetch_summaries
+# ---------------------------------------------------------------------------
+
+class FakeMail:
+    """imaplib.IMAP4 stand-in answering UID FETCH from canned responses."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.commands = []
+
+    def uid(self, command, uid_set, items):
+        self.commands.append((command, uid_set, items))
+        return "OK", self.responses[items](uid_set.split(","))
+
+
+class FakeConn:
+    def __init__(self, mail):
+        self.mail = mail
+
+
+def summaries(structures, bodies):
+    """structures: uid -> BODYSTRUCTURE; bodies: (section, uid) -> raw snippet"""
+    def overview(uids):
+        return [b'%d (UID %s ENVELOPE %s BODYSTRUCTURE %s)'
+                % (n, uid.encode(), ENVELOPE, structures[int(uid)])
+                for n, uid in enumerate(uids, 1)]
+
+    def snippets(section):
+        def fetch(uids):
+            out = []
+            for n, uid in enumerate(uids, 1):
+                body = bodies[section, int(uid)]
+                head = b'%d (UID %s BODY[%s]<0> {%d}' % (
+                    n, uid.encode(), section.encode(), len(body))
+                out += [(head, body), b')']
+            return out
+        return fetch
+
+    responses = {"(UID ENVELOPE BODYSTRUCTURE)": overview}
+    for section in {s for s, _ in bodies}:
+        responses[f"(UID BODY.PEEK[{section}]<0.{m.SNIPPET_BYTES}>)"] = snippets(section)
+    return FakeMail(responses)
+
+
+def test_fetch_summaries_one_fetch_per_distinct_section():
+    mail = summaries(
+        {1: PLAIN, 2: ALTERNATIVE, 3: ALTERNATIVE, 4: FORWARD_SINGLE, 5: ATTACHMENT_ONLY},
+        {("TEXT", 1): b"Caf=C3=A9 at noon=\r\n, see you",
+         ("1", 2): b"T2zpIGF0IG5vb24=\r\n",                   # "Olé at noon", latin-1
+         ("1", 3): b"SGk=",
+         ("2.1", 4): b"original text"})
+    out = m._fetch_summaries(FakeConn(mail), [1, 2, 3, 4, 5])
+    assert out[1] == {"from": "Ana Diaz <ana@example.org>",
+                      "date": "Mon, 19 Oct 2026 09:12:00 +0000",
+                      "subject": "Café menu", "body": "Café at noon, see you"}
+    assert out[2]["body"] == "Olé at noon"
+    assert out[3]["body"] == "Hi"
+    assert out[4]["body"] == "original text"
+    assert out[5]["body"] == ""
+    fetched = sorted(items for _, _, items in mail.commands[1:])
+    assert fetched == [f"(UID BODY.PEEK[{s}]<0.{m.SNIPPET_BYTES}>)" for s in ("1", "2.1", "TEXT")]
+    assert next(uids for _, uids, items in mail.commands if "[1]" in items) == "2,3"
+
+
+def test_fetch_summaries_truncated_base64_snippet_still_decodes():
+    mail = summaries({1: ALTERNATIVE}, {("1", 1): b"T2zpIGF0IG5v\r\nb24gYW5kIG1vcmUgdGV4"})
+    assert m._fetch_summaries(FakeConn(mail), [1])[1]["body"] == "Olé at noon and more tex"
+
+
+# ---------------------------------------------------------------------------
+# _ImapPool
+# ---------------------------------------------------------------------------
+
+class FakeConnection:
+    """_Connection stand-in: counts how many were opened and closed."""
+    opened = []
+
+    def __init__(self):
+        self.closed = False
+        self.noops = 0
+        self.fail_noop = False
+        self.last_used = time.monotonic()
+        self.mail = self
+        FakeConnection.opened.append(self)
+
+    def noop(self):
+        self.noops += 1
+        if self.fail_noop:
+            raise imaplib.IMAP4.abort("autologout")
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeConnection.opened = []
+    monkeypatch.setattr(m, "_Connection", FakeConnection)
+    return m._ImapPool(size=2, keepalive=3600)
+
+
+def test_pool_reuses_an_idle_connection(pool):
+    first = pool.run(lambda conn: conn)
+    second = pool.run(lambda conn: conn)
+    assert first is second and len(FakeConnection.opened) == 1
+
+
+def test_pool_never_opens_more_than_its_size(pool):
+    inside = threading.Barrier(3, timeout=5)
+    release = threading.Event()
+    peak = []
+
+    def hold(conn):
+        inside.wait()
+        release.wait(5)
+        return conn
+
+    threads = [threading.Thread(target=pool.run, args=(hold,)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    inside.wait()                          # both connections are now lent out
+    waiter = threading.Thread(target=lambda: peak.append(pool.run(lambda conn: conn)))
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()               # the third caller waits for one back
+    release.set()
+    for t in threads + [waiter]:
+        t.join(5)
+    assert peak and len(FakeConnection.opened) == 2
+
+
+def test_dropped_connection_is_retried_once_on_a_fresh_one(pool):
+    calls = []
+
+    def flaky(conn):
+        calls.append(conn)
+        if len(calls) == 1:
+            raise imaplib.IMAP4.abort("socket error: EOF")
+        return "ok"
+
+    assert pool.run(flaky) == "ok"
+    assert calls[0] is not calls[1] and calls[0].closed
+    assert pool._open == 1
+
+
+def test_second_drop_is_raised_and_frees_both_slots(pool):
+    def dead(conn):
+        raise OSError("connection reset")
+
+    with pytest.raises(OSError):
+        pool.run(dead)
+    assert pool._open == 0 and all(c.closed for c in FakeConnection.opened)
+
+
+def test_other_errors_return_the_connection_to_the_pool(pool):
+    def bad(conn):
+        raise imaplib.IMAP4.error("Cannot select folder 'Nope'")
+
+    with pytest.raises(imaplib.IMAP4.error):
+        pool.run(bad)
+    assert pool._idle == FakeConnection.opened and not FakeConnection.opened[0].closed
+
+
+def test_failed_connect_frees_its_slot(pool, monkeypatch):
+    def refuse():
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(m, "_Connection", refuse)
+    for _ in range(3):                     # more attempts than the pool has slots
+        with pytest.raises(OSError):
+            pool.run(lambda conn: conn)
+    assert pool._open == 0
+
+
+def test_keepalive_noops_idle_connections_and_drops_dead_ones(monkeypatch):
+    FakeConnection.opened = []
+    monkeypatch.setattr(m, "_Connection", FakeConnection)
+    pool = m._ImapPool(size=2, keepalive=0.2)
+    lent = threading.Barrier(2, timeout=5)
+    threads = [threading.Thread(target=pool.run, args=(lambda conn: lent.wait(),))
+               for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    alive, dead = FakeConnection.opened
+    dead.fail_noop = True
+    deadline = time.monotonic() + 5
+    while (alive.noops == 0 or pool._open == 2) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert alive.noops >= 1 and not alive.closed
+    assert dead.closed and pool._open == 1
+    assert pool._idle == [alive]
@@ -1,11 +1,12 @@
-"""MCP server exposing email (IMAP/SMTP) and contact (khard) tools.
+"""MCP server exposing email (IMAP/SMTP) and contact (vCard) tools.
 
 Designed to run inside the agent microVMs — it is wired into BOTH the
 OpenClaw VM (the removed OpenClaw VM config, via mcporter) and the Hermes VM
 (hermes-vm.nix, via services.hermes-agent.mcpServers) — where:
   - Dovecot IMAPS is reachable at imap.vulcan.lan:993 via DNAT
   - Postfix plain SMTP is reachable at smtp.vulcan.lan:2525 via DNAT
-  - khard is in PATH with pre-synced vCard contacts
+  - vdirsyncer keeps the vCard contacts synced into the address books
+    listed in khard.conf
 
 Environment variables (all optional, sensible defaults for the VM):
   IMAP_HOST          default: imap.vulcan.lan
@@ -15,15 +16,34 @@ Environment variables (all optional, sensible defaults for the VM):
   EMAIL_ADDRESS      default: johnw@vulcan.lan
   EMAIL_USERNAME     default: johnw
   EMAIL_PASSWORD_FILE  path to file containing the password
-  KHARD_CMD          default: khard
+  KHARD_CONFIG       default: $XDG_CONFIG_HOME/khard/khard.conf
+
+IMAP connections are pooled and kept alive between tool calls, listings
+fetch only ENVELOPE, BODYSTRUCTURE and the first 2 KiB of the text part,
+and parsed messages are cached by (folder, UIDVALIDITY, UID).  Message IDs
+in tool output are IMAP UIDs, so they stay valid across expunges.
+
+Contacts are parsed once into an in-process index that follows the vdir
+by mtime; the contact tools print exactly what `khard list -p` and
+`khard show` did, without starting khard per call.
 """
 
+import base64
+import binascii
+import datetime
 import imaplib
+import itertools
+import locale
+import quopri
+import re
 import smtplib
 import email as email_mod
-import subprocess
 import os
 import ssl
+import sys
+import threading
+import time
+from collections import OrderedDict
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.header import decode_header
@@ -39,7 +59,25 @@ SMTP_HOST = os.getenv("SMTP_HOST", "smtp.vulcan.lan")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "2525"))
 EMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS", "johnw@vulcan.lan")
 EMAIL_USERNAME = os.getenv("EMAIL_USERNAME", "johnw")
-KHARD_CMD = os.getenv("KHARD_CMD", "khard")
+KHARD_CONFIG = os.getenv("KHARD_CONFIG", os.path.join(
+    os.getenv("XDG_CONFIG_HOME", os.path.expanduser("~/.config")), "khard", "khard.conf"))
+
+# At most this many IMAP connections are held open; idle ones get a NOOP
+# every KEEPALIVE_SECONDS so Dovecot's autologout never drops them.
+POOL_SIZE = 2
+KEEPALIVE_SECONDS = 240
+# Listings read only this much of each message's text part.
+SNIPPET_BYTES = 2048
+SNIPPET_CHARS = 800
+# Parsed listing entries are small; whole messages (read_email) may carry
+# attachments, so far fewer of them are kept.
+SUMMARY_CACHE_SIZE = 2048
+MESSAGE_CACHE_SIZE = 32
+# Contact books are re-listed at least this often; a sync that adds,
+# removes or replaces a card triggers it sooner. Card sources up to
+# CONTACT_SOURCE_BYTES stay in memory, bigger ones (photos) are re-read.
+CONTACTS_RESCAN_SECONDS = 60
+CONTACT_SOURCE_BYTES = 16384
 
 _password_cache: str | None = None
 
@@ -67,13 +105,149 @@ def _imap_connect() -> imaplib.IMAP4_SSL:
     return mail
 
 
-def _select_folder(mail: imaplib.IMAP4_SSL, folder: str) -> None:
-    """SELECT a folder, raising on failure."""
+def _select_folder(mail: imaplib.IMAP4_SSL, folder: str) -> int:
+    """SELECT a folder read-only, raising on failure; return its UIDVALIDITY."""
     status, data = mail.select(folder, readonly=True)
     if status != "OK":
         raise imaplib.IMAP4.error(
             f"Cannot select folder '{folder}': {data}"
         )
+    _, validity = mail.response("UIDVALIDITY")
+    return int(validity[0]) if validity and validity[0] else 0
+
+
+class _Connection:
+    """One logged-in IMAP connection and the folder it has selected."""
+
+    def __init__(self):
+        self.mail = _imap_connect()
+        self.folder: str | None = None
+        self.uidvalidity = 0
+        self.last_used = time.monotonic()
+
+    def select(self, folder: str) -> int:
+        """Select folder unless it already is; return its UIDVALIDITY.
+
+        A selected folder stays current on its own: the server reports new
+        messages with the next command, so re-selecting buys nothing."""
+        if folder != self.folder:
+            self.folder = None
+            self.uidvalidity = _select_folder(self.mail, folder)
+            self.folder = folder
+        return self.uidvalidity
+
+    def close(self) -> None:
+        try:
+            self.mail.logout()
+        except Exception:
+            pass
+
+
+class _ImapPool:
+    """Up to POOL_SIZE long-lived IMAP connections shared by the tools.
+
+    `run(fn)` lends a connection to fn. A connection that drops mid-call
+    (server restart, autologout, network blip) is discarded and fn is
+    retried once on a fresh one, which then reselects its folder. A daemon
+    thread NOOPs connections that sat idle for KEEPALIVE_SECONDS."""
+
+    def __init__(self, size: int = POOL_SIZE, keepalive: float = KEEPALIVE_SECONDS):
+        self.size = size
+        self.keepalive = keepalive
+        self._idle: list[_Connection] = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self._pinger: threading.Thread | None = None
+
+    def _take(self) -> _Connection:
+        with self._cond:
+            while not self._idle and self._open >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+            if self._pinger is None:
+                self._pinger = threading.Thread(target=self._ping_forever, daemon=True)
+                self._pinger.start()
+        try:
+            return _Connection()
+        except Exception:
+            self._drop(None)
+            raise
+
+    def _give(self, conn: _Connection) -> None:
+        conn.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def _drop(self, conn: _Connection | None) -> None:
+        if conn is not None:
+            conn.close()
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def run(self, fn):
+        for attempt in range(2):
+            conn = self._take()
+            try:
+                result = fn(conn)
+            except (imaplib.IMAP4.abort, OSError):
+                self._drop(conn)
+                if attempt:
+                    raise
+                continue
+            except BaseException:
+                self._give(conn)
+                raise
+            self._give(conn)
+            return result
+
+    def _ping_forever(self) -> None:
+        while True:
+            time.sleep(self.keepalive / 4)
+            now = time.monotonic()
+            with self._cond:
+                stale = [c for c in self._idle if now - c.last_used >= self.keepalive]
+                for c in stale:
+                    self._idle.remove(c)
+            for c in stale:
+                try:
+                    c.mail.noop()
+                except Exception:
+                    self._drop(c)
+                else:
+                    self._give(c)
+
+
+class _LRU:
+    """A small thread-safe least-recently-used map."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+
+_pool = _ImapPool()
+# (folder, uidvalidity, uid) -> listing dict / parsed email.message.Message
+_summaries = _LRU(SUMMARY_CACHE_SIZE)
+_messages = _LRU(MESSAGE_CACHE_SIZE)
 
 
 def _list_folders(mail: imaplib.IMAP4_SSL) -> list[str]:
@@ -131,6 +305,1057 @@ def _body_text(msg: email_mod.message.Message) -> str:
     return ""
 
 
+_TOKEN = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|\{(\d+)\}$|([^\s()"]+))')
+
+
+def _parse_fetch(data: list) -> list[dict[bytes, object]]:
+    """Parse imaplib FETCH response data into one {ITEM: value} per message.
+
+    Lists become Python lists, NIL becomes None, quoted strings, atoms and
+    literals become bytes. imaplib hands a literal back as a (text, literal)
+    tuple whose text ends in {n}; the literal is spliced in at that point."""
+    tokens: list = []
+    for item in data:
+        if item is None:
+            continue
+        text, literal = item if isinstance(item, tuple) else (item, None)
+        pos = 0
+        while pos < len(text):
+            m = _TOKEN.match(text, pos)
+            if not m or m.end() == pos:
+                break
+            pos = m.end()
+            opened, closed, quoted, _, atom = m.groups()
+            if opened:
+                tokens.append("(")
+            elif closed:
+                tokens.append(")")
+            elif quoted is not None:
+                tokens.append(re.sub(rb"\\(.)", rb"\1", quoted))
+            elif atom is not None:
+                tokens.append(None if atom.upper() == b"NIL" else atom)
+        if literal is not None:
+            tokens.append(literal)
+
+    out: list[dict[bytes, object]] = []
+    stack: list[list] = []
+    for tok in tokens:
+        if tok == "(":
+            stack.append([])
+        elif tok == ")":
+            done = stack.pop()
+            if stack:
+                stack[-1].append(done)
+            else:
+                # Top level: "seq FETCH (k v k v ...)" -> {k: v}
+                out.append({k.upper(): v for k, v in zip(done[::2], done[1::2])})
+        elif stack:
+            stack[-1].append(tok)
+    return out
+
+
+def _str(value) -> str:
+    return value.decode(errors="replace") if isinstance(value, bytes) else ""
+
+
+def _addresses(value) -> str:
+    """Render an ENVELOPE address list the way a decoded From: header reads."""
+    out = []
+    for addr in value or []:
+        name, _, mailbox, host = (addr + [None] * 4)[:4]
+        email_addr = f"{_str(mailbox)}@{_str(host)}" if host else _str(mailbox)
+        out.append(f"{_decode_header(_str(name))} <{email_addr}>" if name else email_addr)
+    return ", ".join(out)
+
+
+def _text_section(structure, section: str = "") -> tuple[str, str, str] | None:
+    """(section, transfer-encoding, charset) of the text to show for a message.
+
+    Mirrors _body_text: the first text/plain part of a multipart message,
+    or the whole body of a single-part one. Like msg.walk() it descends into
+    attached messages (message/rfc822), whose BODYSTRUCTURE carries the
+    encapsulated body at index 8: a multipart one is numbered from the
+    attachment's own section (2 -> 2.1, 2.2, ...), a single-part one is 2.1."""
+    if not isinstance(structure, list) or not structure:
+        return None
+    if isinstance(structure[0], list):
+        parts = itertools.takewhile(lambda p: isinstance(p, list), structure)
+        for n, part in enumerate(parts, 1):
+            found = _text_section(part, f"{section}.{n}" if section else str(n))
+            if found:
+                return found
+        return None
+    mtype = _str(structure[0]).lower(), _str(structure[1]).lower()
+    if mtype == ("message", "rfc822"):
+        inner = structure[8] if len(structure) > 8 else None
+        nested = section or "1"
+        if isinstance(inner, list) and inner and isinstance(inner[0], list):
+            return _text_section(inner, nested)
+        return _text_section(inner, f"{nested}.1")
+    if section and mtype != ("text", "plain"):
+        return None
+    params = structure[2] if isinstance(structure[2], list) else []
+    charset = next((_str(v) for k, v in zip(params[::2], params[1::2])
+                    if _str(k).lower() == "charset"), "utf-8")
+    return section or "TEXT", _str(structure[5]).lower(), charset
+
+
+def _decode_snippet(raw: bytes, encoding: str, charset: str) -> str:
+    if encoding == "base64":
+        raw = re.sub(rb"[^A-Za-z0-9+/=]", b"", raw)
+        raw = raw[:len(raw) // 4 * 4]
+        try:
+            raw = base64.b64decode(raw)
+        except (binascii.Error, ValueError):
+            return ""
+    elif encoding == "quoted-printable":
+        raw = quopri.decodestring(raw)
+    try:
+        return raw.decode(charset, errors="replace")
+    except LookupError:
+        return raw.decode("utf-8", errors="replace")
+
+
+def _fetch_summaries(conn: _Connection, uids: list[int]) -> dict[int, dict]:
+    """Listing entries for uids: envelope fields plus a text snippet.
+
+    One FETCH reads ENVELOPE and BODYSTRUCTURE; then one more per distinct
+    text-part section (usually just one or two) reads its first
+    SNIPPET_BYTES. Attachments are never transferred."""
+    uid_set = ",".join(map(str, uids))
+    _, data = conn.mail.uid("FETCH", uid_set, "(UID ENVELOPE BODYSTRUCTURE)")
+    out: dict[int, dict] = {}
+    sections: dict[str, list[int]] = {}
+    for item in _parse_fetch(data):
+        if item.get(b"UID") is None or not isinstance(item.get(b"ENVELOPE"), list):
+            continue
+        uid = int(item[b"UID"])
+        env = item[b"ENVELOPE"]
+        text = _text_section(item.get(b"BODYSTRUCTURE"))
+        out[uid] = {"from": _addresses(env[2]), "date": _str(env[0]),
+                    "subject": _decode_header(_str(env[1]) or None), "body": "",
+                    "text": text}
+        if text:
+            sections.setdefault(text[0], []).append(uid)
+
+    for section, members in sections.items():
+        _, data = conn.mail.uid(
+            "FETCH", ",".join(map(str, members)),
+            f"(UID BODY.PEEK[{section}]<0.{SNIPPET_BYTES}>)")
+        key = f"BODY[{section}]<0>".encode()
+        for item in _parse_fetch(data):
+            uid = int(item.get(b"UID") or 0)
+            raw = item.get(key)
+            if uid in out and isinstance(raw, bytes):
+                _, encoding, charset = out[uid]["text"]
+                out[uid]["body"] = _decode_snippet(raw, encoding, charset)
+    for entry in out.values():
+        del entry["text"]
+    return out
+
+
+def _list_folder(conn: _Connection, folder: str, criteria: str, limit: int) -> list[str]:
+    """Render the newest `limit` messages in folder matching criteria."""
+    uidvalidity = conn.select(folder)
+    _, data = conn.mail.uid("SEARCH", criteria)
+    uids = [int(u) for u in (data[0] or b"").split()][-limit:][::-1]
+    if not uids:
+        return []
+    missing = [u for u in uids if _summaries.get((folder, uidvalidity, u)) is None]
+    if missing:
+        for uid, entry in _fetch_summaries(conn, missing).items():
+            _summaries.put((folder, uidvalidity, uid), entry)
+    results = []
+    for uid in uids:
+        entry = _summaries.get((folder, uidvalidity, uid))
+        if entry is None:
+            continue
+        results.append(
+            f"Folder: {folder}\n"
+            f"ID: {uid}\n"
+            f"From: {entry['from']}\n"
+            f"Date: {entry['date']}\n"
+            f"Subject: {entry['subject']}\n"
+            f"Body: {entry['body'][:SNIPPET_CHARS]}\n"
+            f"{'=' * 60}"
+        )
+    return results
+
+
+def _list_messages(folder: str, criteria: str, limit: int) -> list[str]:
+    """Listing across one folder, or every folder when folder is "ALL"."""
+    def listing(conn: _Connection) -> list[str]:
+        folders = _list_folders(conn.mail) if folder.upper() == "ALL" else [folder]
+        results: list[str] = []
+        for f in folders:
+            if len(results) >= limit:
+                break
+            try:
+                results.extend(_list_folder(conn, f, criteria, limit - len(results)))
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error:
+                continue
+        return results
+    return _pool.run(listing)
+
+
+# ---------------------------------------------------------------------------
+# Contacts
+# ---------------------------------------------------------------------------
+#
+# The contact tools used to run `khard list` / `khard show` per call. What
+# follows reads the same khard.conf and vdir, keeps every card parsed in
+# memory and reproduces khard's matching, ordering and formatting, so the
+# tool output is what khard printed. Names mirror khard's own where the
+# logic is a port (contacts.py, query.py, helpers/__init__.py), which keeps
+# the two easy to compare when khard changes.
+
+# vobject's vCard line grammar: group.NAME;PARAM=v,"v":value
+_VC_NAME = r"[a-zA-Z0-9_-]+"
+_VC_PVALUE = r'"[^"]*"|[^";:,]*'
+_VC_PARAM = rf";{_VC_NAME}(?:(?:=(?:{_VC_PVALUE}))?(?:,(?:{_VC_PVALUE}))*)*"
+_VC_LINE = re.compile(
+    rf"(?:(?P<group>{_VC_NAME})\.)?(?P<name>{_VC_NAME})"
+    rf"(?P<params>;?(?:{_VC_PARAM})*):(?P<value>.*)", re.S)
+_VC_PARAMS = re.compile(rf";({_VC_NAME})(?:=((?:{_VC_PVALUE})?(?:,(?:{_VC_PVALUE}))*))?")
+_VC_PARAM_VALUE = re.compile(r'"([^"]*)"|([^";:,]+)')
+_VC_ESCAPABLE = '\\;,Nn"'
+_NAME_ORDER = ("family", "given", "additional", "prefix", "suffix")
+_ADDRESS_ORDER = ("box", "extended", "street", "city", "region", "code", "country")
+_DEFAULT_KIND = "individual"
+_SUPPORTED_KINDS = ("individual", "group", "org", "location", "application", "device")
+# Contact properties a `field:term` query may name (khard's get_properties()).
+_CONTACT_FIELDS = (
+    "anniversary", "birthday", "categories", "emails", "first_name",
+    "formatted_name", "impp", "kind", "last_name", "nicknames", "notes",
+    "organisations", "phone_numbers", "post_addresses", "roles", "titles",
+    "uid", "version", "webpages",
+)
+_DEFAULT_YEAR = 1900
+
+
+def _text_values(s: str, sep: str = ",", escapable: str = _VC_ESCAPABLE) -> list[str]:
+    """Split s at unescaped sep and unescape it (vobject's stringToTextValues)."""
+    results: list[str] = []
+    current: list[str] = []
+    chars = iter(s)
+    for ch in chars:
+        if ch == "\\":
+            nxt = next(chars, "")
+            if nxt and nxt in escapable:
+                current.append("\n" if nxt in "nN" else nxt)
+            else:
+                current.append("\\" + nxt)
+        elif ch == sep:
+            results.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    if current or not results:
+        results.append("".join(current))
+    return results
+
+
+def _list_or_string(s: str) -> str | list[str]:
+    values = _text_values(s)
+    return values[0] if len(values) == 1 else values
+
+
+def _split_fields(s: str) -> list:
+    return [_list_or_string(f) for f in _text_values(s, ";", ";")]
+
+
+def _list_to_string(value, delimiter: str) -> str:
+    if isinstance(value, list):
+        return delimiter.join(_list_to_string(v, delimiter) for v in value)
+    return value
+
+
+class _Prop:
+    """One vCard content line, decoded the way vobject decodes it."""
+
+    __slots__ = ("group", "name", "params", "value")
+
+    def __init__(self, group: str | None, name: str, params: dict[str, list[str]], value):
+        self.group = group
+        self.name = name
+        self.params = params
+        self.value = value
+
+
+def _logical_lines(text: str):
+    line: list[str] = []
+    for raw in text.split("\n"):
+        raw = raw.rstrip("\r")
+        if not raw.strip():
+            if line:
+                yield "".join(line)
+            line = []
+        elif raw[0] in " \t":
+            line.append(raw[1:])
+        else:
+            if line:
+                yield "".join(line)
+            line = [raw]
+    if line:
+        yield "".join(line)
+
+
+def _parse_vcard(text: str) -> list[_Prop]:
+    """Content lines of the first VCARD in text; ValueError if unparsable."""
+    props: list[_Prop] = []
+    depth = 0
+    for line in _logical_lines(text):
+        m = _VC_LINE.fullmatch(line)
+        if m is None:
+            raise ValueError(f"Failed to parse line: {line}")
+        name = m["name"].replace("_", "-").upper()
+        value = m["value"]
+        if name in ("BEGIN", "END"):
+            depth += 1 if name == "BEGIN" else -1
+            if depth == 0:
+                return props
+            continue
+        if depth != 1:
+            continue
+        params: dict[str, list[str]] = {}
+        singletons: list[str] = []
+        for pname, pvalues in _VC_PARAMS.findall(m["params"]):
+            values = [q or v for q, v in _VC_PARAM_VALUE.findall(pvalues)]
+            if values:
+                params.setdefault(pname.upper(), []).extend(values)
+            else:
+                singletons.append(pname)
+        if name in ("N", "ADR"):
+            fields = _split_fields(value)
+            order = _NAME_ORDER if name == "N" else _ADDRESS_ORDER
+            value = {k: fields[i] if i < len(fields) else "" for i, k in enumerate(order)}
+        elif name == "ORG":
+            value = _split_fields(value)
+        elif name == "CATEGORIES":
+            value = _text_values(value)
+        elif "ENCODING" not in params and "BASE64" not in singletons:
+            value = _text_values(value)[0]
+        props.append(_Prop(m["group"], name, params, value))
+    if depth == 0:
+        raise ValueError("no VCARD component")
+    return props
+
+
+def _multi_property_key(item) -> tuple:
+    if isinstance(item, dict):
+        return (1, next(iter(item)))
+    return (0, item)
+
+
+def _string_to_date(string: str) -> datetime.datetime:
+    """khard's string_to_date: the vCard date forms, year-less ones in 1900."""
+    try:
+        if string.startswith("--"):
+            tmp = str(_DEFAULT_YEAR) + string[2:]
+            if "-" in string[2:]:
+                return datetime.datetime.strptime(tmp, "%Y%m-%d")
+            return datetime.datetime.strptime(tmp, "%Y%m%d")
+    except ValueError:
+        pass
+    for fmt in ("%Y%m%d", "%Y-%m-%d", "%Y%m%dT%H%M%S", "%Y-%m-%dT%H:%M:%S",
+                "%Y%m%dT%H%M%SZ", "%Y-%m-%dT%H:%M:%SZ"):
+        try:
+            return datetime.datetime.strptime(string, fmt)
+        except ValueError:
+            continue
+    for fmt in ("%Y%m%dT%H%M%S%z", "%Y-%m-%dT%H:%M:%S%z"):
+        try:
+            return datetime.datetime.strptime("".join(string.rsplit(":", 1)), fmt)
+        except ValueError:
+            continue
+    raise ValueError(string)
+
+
+def _format_date(date) -> str:
+    if not date:
+        return ""
+    if isinstance(date, str):
+        return date
+    if (date.year == _DEFAULT_YEAR and date.month != 0 and date.day != 0
+            and date.hour == 0 and date.minute == 0 and date.second == 0):
+        return date.strftime("--%m-%d")
+    tz = date.tzname()
+    if (tz and tz[3:]) or date.hour or date.minute or date.second:
+        return date.strftime(locale.nl_langinfo(locale.D_T_FMT))
+    return date.strftime(locale.nl_langinfo(locale.D_FMT))
+
+
+def _indent_multiline(value, indentation: int) -> str:
+    if isinstance(value, list):
+        value = _list_to_string(value, "")
+    if "\n" in value or ": " in value:
+        return "\n".join([""] + [" " * indentation + line.strip()
+                                 for line in value.split("\n")])
+    return value.strip()
+
+
+def _yaml_lines(name: str, value, indentation: int) -> list[str]:
+    """khard's convert_to_yaml as pretty() calls it (no colon alignment)."""
+    pad = " " * indentation
+    if isinstance(value, list) and len(value) == 1:
+        if isinstance(value[0], str):
+            value = value[0]
+        elif (isinstance(value[0], list) and len(value[0]) == 1
+              and isinstance(value[0][0], str)):
+            value = value[0][0]
+    if isinstance(value, str):
+        return [f"{pad}{name}: {_indent_multiline(value, indentation + 4)}"]
+    lines = [f"{pad}{name}: "]
+    for outer in value:
+        if isinstance(outer, list) and len(outer) == 1 and isinstance(outer[0], str):
+            outer = outer[0]
+        if isinstance(outer, str):
+            lines.append(f"{pad}    - {_indent_multiline(outer, indentation + 8)}")
+        elif isinstance(outer, list):
+            lines.append(f"{pad}    - ")
+            lines += [f"{pad}        - {_indent_multiline(inner, indentation + 12)}"
+                      for inner in outer if isinstance(inner, str)]
+        elif isinstance(outer, dict):
+            for label, labelled in outer.items():
+                lines += _yaml_lines("- " + label, labelled, indentation + 4)
+    return lines
+
+
+class _Card:
+    """One parsed vCard with the khard Contact views the tools use.
+
+    The properties named in _CONTACT_FIELDS return what khard's do, since
+    `field:term` queries match against them."""
+
+    def __init__(self, path: str, book: str, props: list[_Prop]):
+        self.path = path
+        self.book = book
+        self._props = props
+        self._by_name: dict[str, list[_Prop]] = {}
+        for p in props:
+            self._by_name.setdefault(p.name, []).append(p)
+        if not self.get_first("FN") and (self._names("given") or self._names("family")):
+            # khard fills an empty FN from N on first access.
+            names = [self._names(part) for part in ("prefix", "given", "family", "suffix")]
+            props.append(_Prop(None, "FN", {}, _list_to_string([n for n in names if n], " ")))
+            self._by_name["FN"] = [props[-1]]
+        self.pretty = self._pretty()
+        self.text = self.pretty.lower()
+        self.first_last = self.get_first_name_last_name()
+
+    def get_first(self, name: str):
+        props = self._by_name.get(name)
+        return props[0].value if props else None
+
+    def _names(self, part: str) -> list[str]:
+        n = self.get_first("N")
+        if n is None:
+            return []
+        value = n[part]
+        if not "".join(value):
+            return []
+        return value if isinstance(value, list) else [value]
+
+    def _ablabel(self, prop: _Prop) -> str:
+        label = ""
+        if prop.group:
+            count = 0
+            for other in self._props:
+                if other.group and other.group == prop.group:
+                    count += 1
+                    if other.name == "X-ABLABEL":
+                        if label:
+                            return ""
+                        label = other.value
+            if count != 2:
+                label = ""
+        return label
+
+    def _get_all(self, name: str) -> list:
+        values = [{label: p.value} if (label := self._ablabel(p)) else p.value
+                  for p in self._by_name.get(name, [])]
+        return sorted(values, key=_multi_property_key)
+
+    def _types(self, prop: _Prop, default: str) -> str:
+        types = []
+        if prop.group:
+            for label in self._by_name.get("X-ABLABEL", []):
+                if label.group == prop.group and label.value.strip():
+                    types.append(label.value.strip())
+        for t in prop.params.get("TYPE", []):
+            t = t.strip()
+            if t and t.lower() != "pref":
+                if not t.lower().startswith("x-"):
+                    types.append(t)
+                elif t[2:].lower() not in [x.lower() for x in types]:
+                    types.append(t[2:])
+        try:
+            types.append(f"pref={int(prop.params.get('PREF')[0])}")
+        except (IndexError, TypeError, ValueError):
+            for t in prop.params.get("TYPE", []):
+                if t.lower() == "pref" and "pref" not in types:
+                    types.append("pref")
+        return ", ".join(types or [default])
+
+    def _date(self, name: str):
+        props = self._by_name.get(name)
+        if not props:
+            raise AttributeError(name)
+        if (props[0].params.get("VALUE") or [None])[0] == "text":
+            return props[0].value
+        return _string_to_date(props[0].value)
+
+    # -- khard Contact properties ------------------------------------------
+
+    @property
+    def version(self) -> str:
+        return self.get_first("VERSION") or "3.0"
+
+    @property
+    def uid(self) -> str | None:
+        return self.get_first("UID")
+
+    @property
+    def kind(self) -> str:
+        name = "KIND" if self.version == "4.0" else "X-KIND"
+        return self.get_first(name) or _DEFAULT_KIND
+
+    @property
+    def formatted_name(self) -> str:
+        return self.get_first("FN") or ""
+
+    @property
+    def first_name(self) -> str | None:
+        return _list_to_string(self._names("given"), " ") or None
+
+    @property
+    def last_name(self) -> str | None:
+        return _list_to_string(self._names("family"), " ") or None
+
+    @property
+    def birthday(self):
+        try:
+            return self._date("BDAY")
+        except (AttributeError, ValueError):
+            return None
+
+    @property
+    def anniversary(self):
+        try:
+            return self._date("ANNIVERSARY")
+        except (AttributeError, ValueError):
+            try:
+                return _string_to_date(self._by_name["X-ANNIVERSARY"][0].value)
+            except (KeyError, ValueError):
+                return None
+
+    @property
+    def organisations(self) -> list:
+        return self._get_all("ORG")
+
+    @property
+    def titles(self) -> list:
+        return self._get_all("TITLE")
+
+    @property
+    def roles(self) -> list:
+        return self._get_all("ROLE")
+
+    @property
+    def nicknames(self) -> list:
+        return self._get_all("NICKNAME")
+
+    @property
+    def notes(self) -> list:
+        return self._get_all("NOTE")
+
+    @property
+    def webpages(self) -> list:
+        return self._get_all("URL")
+
+    @property
+    def categories(self) -> list:
+        categories = [v if isinstance(v, list) else [v] for v in self._get_all("CATEGORIES")]
+        if len(categories) == 1:
+            return categories[0]
+        return sorted(categories)
+
+    @property
+    def phone_numbers(self) -> dict[str, list[str]]:
+        numbers: dict[str, list[str]] = {}
+        for p in self._by_name.get("TEL", []):
+            value = p.value[4:] if p.value.lower().startswith("tel:") else p.value
+            numbers.setdefault(self._types(p, "voice"), []).append(value)
+        return {t: sorted(v) for t, v in numbers.items()}
+
+    @property
+    def emails(self) -> dict[str, list[str]]:
+        emails: dict[str, list[str]] = {}
+        for p in self._by_name.get("EMAIL", []):
+            emails.setdefault(self._types(p, "internet"), []).append(p.value)
+        return {t: sorted(v) for t, v in emails.items()}
+
+    @property
+    def impp(self) -> dict[str, list[str]]:
+        handles: dict[str, list[str]] = {}
+        for p in self._by_name.get("IMPP", []):
+            if ":" not in p.value:
+                continue
+            kind, value = p.value.split(":", 1)
+            try:
+                kind += f", pref={int(p.params.get('PREF')[0])}"
+            except (IndexError, TypeError, ValueError):
+                pass
+            handles.setdefault(kind, []).append(value)
+        return {t: sorted(v) for t, v in handles.items()}
+
+    @property
+    def post_addresses(self) -> dict[str, list[dict]]:
+        addresses: dict[str, list[dict]] = {}
+        for p in self._by_name.get("ADR", []):
+            addresses.setdefault(self._types(p, "home"), []).append(dict(p.value))
+        for adrs in addresses.values():
+            adrs.sort(key=lambda a: (_list_to_string(a["city"], " ").lower(),
+                                     _list_to_string(a["street"], " ").lower()))
+        return addresses
+
+    # -- rendering -----------------------------------------------------------
+
+    def get_first_name_last_name(self) -> str:
+        names = self._names("given") + self._names("additional") + self._names("family")
+        return _list_to_string(names, " ") if names else self.formatted_name
+
+    def get_last_name_first_name(self) -> str:
+        last = self._names("family")
+        first = self._names("given") + self._names("additional")
+        if last and first:
+            return f"{_list_to_string(last, ' ')}, {_list_to_string(first, ' ')}"
+        if last or first:
+            return _list_to_string(last or first, " ")
+        return self.formatted_name
+
+    def _formatted_post_addresses(self) -> dict[str, list[str]]:
+        formatted: dict[str, list[str]] = {}
+        for kind, adrs in self.post_addresses.items():
+            formatted[kind] = []
+            for adr in adrs:
+                adr = {k: v for k, v in adr.items() if v != ""}
+                get = lambda k: _list_to_string(adr[k], " ")  # noqa: E731
+                lines = []
+                if "street" in adr:
+                    lines.append(_list_to_string(adr["street"], "\n"))
+                for a, b, fmt in (("box", "extended", "{} {}"), ("code", "city", "{} {}"),
+                                  ("region", "country", "{}, {}")):
+                    if a in adr and b in adr:
+                        lines.append(fmt.format(get(a), get(b)))
+                    elif a in adr or b in adr:
+                        lines.append(get(a if a in adr else b))
+                formatted[kind].append("\n".join(lines))
+        return formatted
+
+    def _pretty(self) -> str:
+        """khard's Contact.pretty(): the text `khard show` prints."""
+        out = [f"Name: {self.formatted_name}"]
+        if self._names("given") or self._names("family"):
+            names = (self._names("prefix") + self._names("given") + self._names("additional")
+                     + self._names("family") + self._names("suffix"))
+            out.append(f"Full name: {_list_to_string(names, ' ')}")
+        # khard prints the kind both before and after the address book.
+        out.append(f"Kind: {self.kind}")
+        if self.organisations:
+            out += _yaml_lines("Organisation", self.organisations, 0)
+        out.append(f"Address book: {self.book}")
+        out.append(f"Kind: {self.kind}")
+        birthday, anniversary = self.birthday, self.anniversary
+        if (birthday is not None or anniversary is not None
+                or self.nicknames or self.roles or self.titles):
+            out.append("General:")
+            if anniversary:
+                out.append(f"    Anniversary: {_format_date(anniversary)}")
+            if birthday:
+                out.append(f"    Birthday: {_format_date(birthday)}")
+            for label, values in (("Nickname", self.nicknames), ("Role", self.roles),
+                                  ("Title", self.titles)):
+                if values:
+                    out += _yaml_lines(label, values, 4)
+        for heading, entries in (("Phone", self.phone_numbers), ("E-Mail", self.emails),
+                                 ("IMPP", self.impp),
+                                 ("Address", self._formatted_post_addresses())):
+            if entries:
+                out.append(heading)
+                for kind, values in sorted(entries.items(), key=lambda kv: kv[0].lower()):
+                    out += _yaml_lines(kind, values, 4)
+        if self.categories or self.webpages or self.notes or self.uid:
+            out.append("Miscellaneous")
+            if self.uid:
+                out.append(f"    UID: {self.uid}")
+            for label, values in (("Categories", self.categories),
+                                  ("Webpage", self.webpages), ("Note", self.notes)):
+                if values:
+                    out += _yaml_lines(label, values, 4)
+        return "\n".join(out) + "\n"
+
+
+# -- queries (khard's query.parse) ----------------------------------------------
+
+class _TermQuery:
+    """Plain search term: a substring of the card's `show` text."""
+
+    def __init__(self, term: str):
+        self.term = term.lower()
+
+    def match_source(self, source: str) -> bool:
+        return self.term in source
+
+    def match(self, card: _Card) -> bool:
+        return self.term in card.text
+
+
+class _FieldQuery(_TermQuery):
+    """`field:term`: a substring of one contact property."""
+
+    def __init__(self, field: str, term: str):
+        super().__init__(term)
+        self.field = field
+
+    def match(self, card: _Card) -> bool:
+        return self._match_union(getattr(card, self.field))
+
+    def _match_union(self, value) -> bool:
+        if isinstance(value, str):
+            return self.term in value.lower()
+        if isinstance(value, list):
+            return any(self._match_union(v) for v in value)
+        if isinstance(value, dict):
+            return any(self.term in k.lower() or self._match_union(v)
+                       for k, v in value.items())
+        if isinstance(value, datetime.datetime):
+            return value == datetime.datetime.strptime(self.term, "%Y-%m-%d")
+        return False
+
+
+class _NameQuery(_TermQuery):
+    """`name:term`: any form of the name, or a nickname."""
+
+    def __init__(self, term: str):
+        super().__init__(term)
+        self._props = (_FieldQuery("formatted_name", term), _FieldQuery("nicknames", term))
+
+    def match(self, card: _Card) -> bool:
+        return (self.term in card.first_last.lower()
+                or self.term in card.get_last_name_first_name().lower()
+                or any(q.match(card) for q in self._props))
+
+
+class _PhoneQuery(_FieldQuery):
+    """`phone_numbers:term`: also matches on the digits alone."""
+
+    def __init__(self, term: str):
+        super().__init__("phone_numbers", term)
+        self._digits = re.sub(r"[^0-9+]", "", term)
+
+    def match_source(self, source: str) -> bool:
+        return self._match_union(source)
+
+    def _match_union(self, value) -> bool:
+        if isinstance(value, str):
+            return (self.term in value.lower()
+                    or self._match_number(re.sub(r"[^0-9+]", "", value)))
+        if isinstance(value, dict):
+            for key, numbers in value.items():
+                if self.term in str(key).lower():
+                    return True
+                numbers = [numbers] if isinstance(numbers, str) else numbers
+                if any(self._match_number(re.sub(r"[^0-9+]", "", n)) for n in numbers):
+                    return True
+        return False
+
+    def _match_number(self, number: str) -> bool:
+        digits = self._digits
+        if digits.startswith("+") and number.startswith("+"):
+            return digits in number
+        if digits.startswith("+") and number.startswith("0"):
+            return number[1:] in digits
+        if digits.startswith("0") and number.startswith("+") and len(digits) >= 5:
+            return digits[1:] in number
+        return bool(digits) and digits in number
+
+
+def _parse_query(string: str) -> _TermQuery:
+    if ":" in string:
+        field, term = string.split(":", 1)
+        if field == "name":
+            return _NameQuery(term)
+        if field == "phone_numbers":
+            return _PhoneQuery(term)
+        if field == "kind":
+            for kind in _SUPPORTED_KINDS:
+                if kind.startswith(term.lower()):
+                    return _FieldQuery(field, kind)
+            return _TermQuery(string)
+        if field in _CONTACT_FIELDS:
+            return _FieldQuery(field, term)
+    return _TermQuery(string)
+
+
+# -- table output (khard's list_contacts) -------------------------------------
+
+def _pretty_print(table: list[list[str]]) -> str:
+    rows = []
+    for row in table:
+        height = max(str(col).count("\n") for col in row) + 1
+        split = [str(col).split("\n") for col in row]
+        rows += [[col[i] if i < len(col) else "" for col in split] for i in range(height)]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(" ".join(col.ljust(w + 3) for col, w in zip(row, widths))
+                     for row in rows)
+
+
+def _labeled_field(field: dict[str, list[str]], preferred: list[str]) -> str:
+    keys: list[str] = []
+    for pref in preferred:
+        keys = [k for k in field if pref.lower() in k.lower()]
+        if keys:
+            break
+    keys = keys or [k for k in field if "pref" in k.lower()] or list(field)
+    first = sorted(keys, key=str.lower)[0]
+    return f"{first}: {sorted(field[first])[0]}"
+
+
+def _short_uids(uids) -> set[str]:
+    """The shortest unique UID prefixes khard shows in its tables."""
+    uids = sorted(uids)
+    if len(uids) < 2:
+        return {u[:1] for u in uids}
+    common = [len(os.path.commonprefix(pair)) for pair in zip(uids, uids[1:])]
+    lengths = [common[0]] + [max(a, b) for a, b in zip(common, common[1:])] + [common[-1]]
+    return {uid[:n + 1] for uid, n in zip(uids, lengths)}
+
+
+def _contact_table(cards: list[_Card], short: set[str]) -> str:
+    books = list(dict.fromkeys(c.book for c in cards))
+    kinds = {c.kind for c in cards}
+    header = ["index", "name", "phone", "email"]
+    if len(kinds) > 1 or _DEFAULT_KIND not in kinds:
+        header.append("kind")
+    if len(books) > 1:
+        header.append("address_book")
+    header.append("uid")
+    table = [[h.title().replace("_", " ") for h in header]]
+    for index, card in enumerate(cards, 1):
+        values = {
+            "index": str(index),
+            "name": card.first_last,
+            "phone": _labeled_field(card.phone_numbers, ["pref"]) if card.phone_numbers else "",
+            "email": _labeled_field(card.emails, ["pref"]) if card.emails else "",
+            "kind": card.kind,
+            "address_book": card.book,
+            "uid": next((card.uid[:n] for n in range(len(card.uid), 0, -1)
+                         if card.uid[:n] in short), ""),
+        }
+        table.append([values[h] for h in header])
+    plural = "s" if len(books) > 1 else ""
+    return f"Address book{plural}: {', '.join(books)}\n{_pretty_print(table)}"
+
+
+# -- the index ------------------------------------------------------------------
+
+def _address_books(config_path: str) -> list[tuple[str, str]]:
+    """(name, path) of each [[book]] under [addressbooks] in khard.conf."""
+    books: list[tuple[str, str]] = []
+    section = name = None
+    with open(config_path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line.startswith("[[") and line.endswith("]]"):
+                name = line[2:-2].strip()
+            elif line.startswith("["):
+                section, name = line.strip("[] "), None
+            elif section == "addressbooks" and name and line.startswith("path"):
+                key, _, value = line.partition("=")
+                if key.strip() == "path":
+                    path = os.path.expanduser(os.path.expandvars(value.strip().strip("\"'")))
+                    books.append((name, path))
+    return books
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _ContactIndex:
+    """Every card of the khard address books, parsed once and kept current.
+
+    Lookups follow `khard --search-in-source-files`: a card matches when the
+    term is in its vCard source and the query matches the parsed card.
+    Plain terms (the common case) are answered from trigram postings over
+    each card's `show` text, which is exactly the text khard matches them
+    against; field queries and terms under three characters check every
+    card, which is still a scan over memory.
+
+    `refresh()` runs before each lookup. It re-lists a book when the book
+    directory's mtime moved (vdirsyncer replaces files by rename, so every
+    sync moves it) or CONTACTS_RESCAN_SECONDS passed, and re-parses only
+    files whose (mtime, size, inode) changed."""
+
+    def __init__(self, config_path: str = KHARD_CONFIG, rescan: float = CONTACTS_RESCAN_SECONDS):
+        self.config_path = config_path
+        self.rescan = rescan
+        self._books: list[tuple[str, str]] | None = None
+        self._dir_mtime: dict[str, int] = {}
+        self._scanned = 0.0
+        # path -> ((mtime_ns, size, ino), card or None if unparsable, source)
+        self._files: dict[str, tuple[tuple, _Card | None, str | None]] = {}
+        self._order: list[str] = []
+        self._postings: dict[str, set[str]] = {}
+        self._by_uid: dict[str, list[str]] = {}
+        self._lock = threading.Lock()
+
+    # -- maintenance ---------------------------------------------------------
+
+    def refresh(self) -> None:
+        if self._books is None:
+            self._books = _address_books(self.config_path)
+        now = time.monotonic()
+        stale = now - self._scanned >= self.rescan
+        for name, path in self._books:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != self._dir_mtime.get(path):
+                stale = True
+            self._dir_mtime[path] = mtime
+        if stale:
+            self._scan()
+            self._scanned = now
+
+    def _scan(self) -> None:
+        order: list[str] = []
+        seen: set[str] = set()
+        for book, path in self._books:
+            try:
+                entries = list(os.scandir(path))
+            except OSError as e:
+                raise FileNotFoundError(f"address book {book}: {e}") from e
+            for entry in entries:
+                # glob("*.vcf") order, which skips dotfiles.
+                if not entry.name.endswith(".vcf") or entry.name.startswith("."):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+                known = self._files.get(entry.path)
+                if known is None or known[0] != stamp:
+                    self._load(entry.path, book, stamp)
+                order.append(entry.path)
+                seen.add(entry.path)
+        for gone in set(self._files) - seen:
+            self._forget(gone)
+            del self._files[gone]
+        self._order = order
+        self._by_uid = {}
+        for path in order:
+            card = self._files[path][1]
+            if card is not None and card.uid:
+                self._by_uid.setdefault(card.uid, []).append(path)
+
+    def _load(self, path: str, book: str, stamp: tuple) -> None:
+        self._forget(path)
+        try:
+            with open(path) as f:
+                text = f.read()
+            card = _Card(path, book, _parse_vcard(text))
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            print(f"email-contacts-mcp: skipping {path}: {e}", file=sys.stderr)
+            self._files[path] = (stamp, None, None)
+            return
+        source = text.lower() if len(text) <= CONTACT_SOURCE_BYTES else None
+        self._files[path] = (stamp, card, source)
+        for gram in _trigrams(card.text):
+            self._postings.setdefault(gram, set()).add(path)
+
+    def _forget(self, path: str) -> None:
+        known = self._files.get(path)
+        if known is None or known[1] is None:
+            return
+        for gram in _trigrams(known[1].text):
+            paths = self._postings.get(gram)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self._postings[gram]
+
+    # -- lookups -------------------------------------------------------------
+
+    def _source(self, path: str) -> str:
+        source = self._files[path][2]
+        if source is None:
+            # Large cards (embedded photos) are not kept; read them again.
+            with open(path) as f:
+                source = f.read().lower()
+        return source
+
+    def _candidates(self, query: _TermQuery) -> list[str]:
+        if type(query) is _TermQuery and len(query.term) >= 3:
+            postings = sorted((self._postings.get(g, set()) for g in _trigrams(query.term)),
+                              key=len)
+            hits = set.intersection(*postings)
+            return [p for p in self._order if p in hits]
+        return self._order
+
+    def _search(self, query: _TermQuery) -> list[_Card]:
+        found = []
+        for path in self._candidates(query):
+            card = self._files[path][1]
+            if card is None or not card.uid or not query.match(card):
+                continue
+            if not query.match_source(self._source(path)):
+                continue
+            # Of cards sharing a UID khard keeps the first that it loaded,
+            # i.e. the first whose source matched.
+            first = next(p for p in self._by_uid[card.uid]
+                         if p == path or query.match_source(self._source(p)))
+            if first == path:
+                found.append(card)
+        return sorted(found, key=lambda c: locale.strxfrm(c.first_last.lower()))
+
+    def search(self, query: str) -> list[_Card]:
+        with self._lock:
+            self.refresh()
+            return self._search(_parse_query(query))
+
+    def list_parsable(self, query: str) -> str:
+        """`khard list --search-in-source-files -p QUERY`."""
+        return "\n".join(f"{c.uid}\t{c.first_last}\t{c.book}" for c in self.search(query))
+
+    def show(self, query: str) -> str:
+        """`khard show --search-in-source-files QUERY`, minus the prompt.
+
+        With several matches khard prints a selection table and then waits
+        for an index on stdin; the table is returned instead."""
+        with self._lock:
+            self.refresh()
+            q = _parse_query(query)
+            cards = self._search(q)
+            if len(cards) < 2:
+                return cards[0].pretty if cards else ""
+            books = {c.book for c in cards}
+            loaded = {self._files[p][1].uid for p in self._order
+                      if self._files[p][1] is not None and self._files[p][1].uid
+                      and self._files[p][1].book in books
+                      and q.match_source(self._source(p))}
+        return "Select contact for Show action\n" + _contact_table(cards, _short_uids(loaded))
+
+
+
+_contacts = _ContactIndex()
+
+
 # ---------------------------------------------------------------------------
 # MCP server
 # ---------------------------------------------------------------------------
@@ -142,9 +1367,7 @@ mcp = FastMCP("email-contacts")
 def list_folders() -> str:
     """List all available IMAP mail folders."""
     try:
-        mail = _imap_connect()
-        folders = _list_folders(mail)
-        mail.logout()
+        folders = _pool.run(lambda conn: _list_folders(conn.mail))
         if not folders:
             return "No folders found."
         return "Available folders:\n" + "\n".join(f"  {f}" for f in folders)
@@ -162,41 +1385,7 @@ def check_email(num_emails: int = 10, folder: str = "INBOX") -> str:
     """
     num_emails = min(num_emails, 50)
     try:
-        mail = _imap_connect()
-        if folder.upper() == "ALL":
-            folders = _list_folders(mail)
-        else:
-            folders = [folder]
-
-        results: list[str] = []
-        remaining = num_emails
-        for f in folders:
-            if remaining <= 0:
-                break
-            try:
-                _select_folder(mail, f)
-            except imaplib.IMAP4.error:
-                continue
-            _, data = mail.search(None, "ALL")
-            ids = data[0].split()
-            if not ids:
-                continue
-            for eid in reversed(ids[-remaining:]):
-                _, msg_data = mail.fetch(eid, "(RFC822)")
-                msg = email_mod.message_from_bytes(msg_data[0][1])
-                body = _body_text(msg)
-                results.append(
-                    f"Folder: {f}\n"
-                    f"ID: {eid.decode()}\n"
-                    f"From: {_decode_header(msg['From'])}\n"
-                    f"Date: {msg['Date']}\n"
-                    f"Subject: {_decode_header(msg['Subject'])}\n"
-                    f"Body: {body[:800]}\n"
-                    f"{'=' * 60}"
-                )
-            remaining = num_emails - len(results)
-
-        mail.logout()
+        results = _list_messages(folder, "ALL", num_emails)
         return "\n".join(results) if results else "No emails found."
     except Exception as e:
         return f"Error checking email: {e}"
@@ -238,72 +1427,46 @@ def search_email(
 
     search_str = " ".join(criteria) if criteria else "ALL"
     try:
-        mail = _imap_connect()
-        if folder.upper() == "ALL":
-            folders = _list_folders(mail)
-        else:
-            folders = [folder]
-
-        results: list[str] = []
-        remaining = max_results
-        for f in folders:
-            if remaining <= 0:
-                break
-            try:
-                _select_folder(mail, f)
-            except imaplib.IMAP4.error:
-                continue
-            _, data = mail.search(None, search_str)
-            ids = data[0].split()
-            if not ids:
-                continue
-            for eid in reversed(ids[-remaining:]):
-                _, msg_data = mail.fetch(eid, "(RFC822)")
-                msg = email_mod.message_from_bytes(msg_data[0][1])
-                body_text = _body_text(msg)
-                results.append(
-                    f"Folder: {f}\n"
-                    f"ID: {eid.decode()}\n"
-                    f"From: {_decode_header(msg['From'])}\n"
-                    f"Date: {msg['Date']}\n"
-                    f"Subject: {_decode_header(msg['Subject'])}\n"
-                    f"Body: {body_text[:800]}\n"
-                    f"{'=' * 60}"
-                )
-            remaining = max_results - len(results)
-
-        mail.logout()
+        results = _list_messages(folder, search_str, max_results)
         return "\n".join(results) if results else "No emails found matching the criteria."
     except Exception as e:
         return f"Error searching email: {e}"
 
 
+def _read_message(conn: _Connection, folder: str, uid: int) -> email_mod.message.Message | None:
+    uidvalidity = conn.select(folder)
+    key = (folder, uidvalidity, uid)
+    msg = _messages.get(key)
+    if msg is None:
+        _, data = conn.mail.uid("FETCH", str(uid), "(BODY.PEEK[])")
+        raw = next((item[1] for item in data if isinstance(item, tuple)), None)
+        if raw is None:
+            return None
+        msg = email_mod.message_from_bytes(raw)
+        _messages.put(key, msg)
+    return msg
+
+
 @mcp.tool()
 def read_email(message_id: str, folder: str = "INBOX") -> str:
-    """Read a single email by its IMAP sequence ID.
+    """Read a single email by its IMAP UID.
 
     Args:
         message_id: The numeric ID of the message (from check_email / search_email output).
         folder: IMAP folder (default INBOX).
     """
     try:
-        mail = _imap_connect()
-        _select_folder(mail, folder)
-        _, msg_data = mail.fetch(message_id.encode(), "(RFC822)")
-        if not msg_data or not msg_data[0]:
-            mail.logout()
+        msg = _pool.run(lambda conn: _read_message(conn, folder, int(message_id)))
+        if msg is None:
             return f"Message {message_id} not found."
-        msg = email_mod.message_from_bytes(msg_data[0][1])
         body = _body_text(msg)
-        result = (
+        return (
             f"From: {_decode_header(msg['From'])}\n"
             f"To: {_decode_header(msg['To'])}\n"
             f"Date: {msg['Date']}\n"
             f"Subject: {_decode_header(msg['Subject'])}\n"
             f"\n{body}"
         )
-        mail.logout()
-        return result
     except Exception as e:
         return f"Error reading email: {e}"
 
@@ -340,11 +1503,7 @@ def search_contacts(query: str) -> str:
         query: Name or email to search for.
     """
     try:
-        result = subprocess.run(
-            [KHARD_CMD, "list", "--search-in-source-files", "-p", query],
-            capture_output=True, text=True, timeout=10,
-        )
-        output = result.stdout.strip()
+        output = _contacts.list_parsable(query).strip()
         if not output:
             return f"No contacts found matching '{query}'."
         return output
@@ -360,11 +1519,7 @@ def get_contact_details(name: str) -> str:
         name: Contact name to look up (partial match).
     """
     try:
-        result = subprocess.run(
-            [KHARD_CMD, "show", "--search-in-source-files", name],
-            capture_output=True, text=True, timeout=10,
-        )
-        output = result.stdout.strip()
+        output = _contacts.show(name).strip()
         if not output:
             return f"No contact found matching '{name}'."
         return output
@@ -373,6 +1528,8 @@ def get_contact_details(name: str) -> str:
 
 
 def main():
+    # khard formats dates and sorts names in the user's locale.
+    locale.setlocale(locale.LC_ALL, "")
     mcp.run(transport="stdio")
 
 
@@ -10,6 +10,14 @@ Tests the complete email delivery pipeline using IMAP (like a real email client)
 - IMAPSieve retraining (Retrain folder: rescan through rspamd + redeliver)
 - GPT/LLM spam classification via the host LLM gateway
 
+Each worker thread keeps one authenticated IMAP session and waits for
+deliveries with IMAP IDLE (NOOP polling when the server lacks IDLE), so a
+check returns as soon as the message lands instead of after a fixed sleep.
+Tests that share no rspamd state run concurrently (--jobs), and every wait
+records how long the message took to arrive; the summary reports p50/p90/p99
+per test, which with --repeat makes the tester a mail-pipeline latency
+benchmark.
+
 SAFETY: All test messages use unique Message-IDs for safe cleanup.
 """
 
@@ -17,6 +25,8 @@ import subprocess
 import sys
 import time
 import logging
+import socket
+import threading
 import uuid
 import re
 import imaplib
@@ -26,21 +36,29 @@ import argparse
 import json
 import urllib.request
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from email.message import EmailMessage
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional
 
 # Configuration
 USER = "johnw"
 TEST_MESSAGE_ID_PREFIX = "test-EMAIL-TESTER"
-WAIT_AFTER_DELIVERY = 3  # seconds to wait after mail delivery
-WAIT_AFTER_IMAP_OPERATION = 6  # seconds to wait after IMAP copy operations
+DELIVERY_TIMEOUT = 15  # seconds to wait for Postfix -> rspamd -> Sieve delivery
+GPT_DELIVERY_TIMEOUT = 30  # delivery plus an LLM round trip in rspamd
+IMAPSIEVE_TIMEOUT = 20  # seconds to wait for IMAPSieve to act on a COPY
+LEARN_SETTLE_TIMEOUT = 6  # seconds to wait for rspamd learn counts to move
 GTUBE_SPAM_STRING = "XJS*C4JDBQADN1.NSBN3*2IDNEN*GTUBE-STANDARD-ANTI-UBE-TEST-EMAIL*C.34X"
 
 # IMAP configuration
 IMAP_HOST = "localhost"
 IMAP_PORT = 143  # STARTTLS
 IMAP_PASSWORD_FILE = "/run/secrets/email-tester-imap-password"
+# Dovecot ends IDLE after 30 minutes; re-issuing it this often also bounds
+# how long a lost EXISTS notification could delay a wait.
+IDLE_RESTART = 30
+# Poll interval when the server does not advertise IDLE.
+NOOP_INTERVAL = 0.5
 
 # Host LLM gateway configuration (nginx -> llama-swap on hera)
 GATEWAY_HOST = "localhost"
@@ -49,13 +67,45 @@ GATEWAY_PORT = 4000
 # Track all test Message-IDs for cleanup
 test_message_ids: List[str] = []
 
+# Per-thread state: the running test's key and output buffer, and the
+# worker's IMAP session.
+_local = threading.local()
+
+
+class TestOutputHandler(logging.StreamHandler):
+    """StreamHandler that holds a concurrent test's lines until it finishes,
+    so parallel tests print as whole blocks instead of interleaving."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        lines = getattr(_local, 'lines', None)
+        if lines is None:
+            super().emit(record)
+        else:
+            lines.append(self.format(record))
+
+    def write_block(self, lines: List[str]) -> None:
+        self.acquire()
+        try:
+            for line in lines:
+                self.stream.write(line + self.terminator)
+            self.flush()
+        finally:
+            self.release()
+
+
 # Setup logging
+_output_handler = TestOutputHandler()
 logging.basicConfig(
     level=logging.INFO,
-    format='%(message)s'
+    format='%(message)s',
+    handlers=[_output_handler]
 )
 logger = logging.getLogger(__name__)
 
+# Delivery latencies: (test key, stage) -> seconds, one entry per wait
+_latencies: Dict[Tuple[str, str], List[float]] = {}
+_latencies_lock = threading.Lock()
+
 # Cache the IMAP password after the first load (see get_imap_password)
 _imap_password: Optional[str] = None
 
@@ -111,11 +161,16 @@ def create_test_message(subject: str, body: str, scenario: str) -> EmailMessage:
     return msg
 
 
-def send_via_postfix(msg: EmailMessage) -> None:
-    """Send message via Postfix sendmail"""
+def send_via_postfix(msg: EmailMessage) -> float:
+    """Send message via Postfix sendmail.
+
+    Returns the time.monotonic() stamp taken just before handing the message
+    to sendmail, the start of its delivery latency."""
     cmd = ['/run/current-system/sw/bin/sendmail', '-t', '-i']
+    started = time.monotonic()
     run_command(cmd, input_data=msg.as_string())
     logger.info(f"  → Sent via Postfix")
+    return started
 
 
 def get_imap_password() -> str:
@@ -156,62 +211,220 @@ def imap_connect() -> imaplib.IMAP4:
     return mail
 
 
-def imap_search_message(mail: imaplib.IMAP4, folder: str, message_id: str) -> Optional[bytes]:
-    """Search for message by Message-ID in folder. Returns message number or None."""
-    mail.select(folder, readonly=True)
+class ImapSession:
+    """One authenticated IMAP session, reused for every step a worker runs.
 
-    # IMAP search requires Message-ID without angle brackets
-    search_id = message_id.strip('<>')
-    typ, data = mail.search(None, f'HEADER Message-ID "{search_id}"')
+    Logging in per check made a full run mostly TLS handshakes. The session
+    remembers which folder it has selected (and whether read-write), and a
+    dropped connection is replaced and the step retried once."""
+
+    def __init__(self):
+        self.mail: Optional[imaplib.IMAP4] = None
+        self.folder: Optional[str] = None
+        self.readonly = True
+        self.can_idle = False
+
+    def connect(self) -> None:
+        self.close()
+        self.mail = imap_connect()
+        self.folder = None
+        # Capabilities can change at login, so ask again rather than use
+        # the pre-STARTTLS list imaplib cached.
+        typ, data = self.mail.capability()
+        caps = data[0].decode('ascii', errors='ignore').upper().split() if typ == 'OK' else []
+        self.can_idle = 'IDLE' in caps
+
+    def close(self) -> None:
+        if self.mail is not None:
+            try:
+                self.mail.logout()
+            except Exception:
+                pass
+        self.mail = None
+        self.folder = None
+
+    def run(self, fn: Callable[['ImapSession'], object]) -> object:
+        """Call fn(self) on a live connection, reconnecting once if it drops."""
+        for attempt in range(2):
+            if self.mail is None:
+                self.connect()
+            try:
+                return fn(self)
+            except (imaplib.IMAP4.abort, OSError):
+                self.close()
+                if attempt:
+                    raise
+
+    def select(self, folder: str, readonly: bool = True) -> None:
+        """Select folder unless it already is (read-write satisfies both)."""
+        if folder == self.folder and (readonly or not self.readonly):
+            return
+        self.folder = None
+        typ, data = self.mail.select(folder, readonly=readonly)
+        if typ != 'OK':
+            raise TestError(f"Cannot select {folder}: {data}")
+        self.folder, self.readonly = folder, readonly
+
+    def search(self, folder: str, message_id: str) -> Optional[bytes]:
+        """Message number of message_id in folder, or None."""
+        self.select(folder)
+        # IMAP search requires Message-ID without angle brackets
+        search_id = message_id.strip('<>')
+        typ, data = self.mail.search(None, f'HEADER Message-ID "{search_id}"')
+        if typ != 'OK' or not data[0]:
+            return None
+        msg_nums = data[0].split()
+        return msg_nums[0] if msg_nums else None
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Block until the selected folder changes or timeout elapses.
+
+        Returns True when the server reported new, expunged or changed
+        messages. Uses IDLE when advertised, otherwise NOOP polling."""
+        if self.can_idle:
+            return self._idle(min(timeout, IDLE_RESTART))
+        time.sleep(min(timeout, NOOP_INTERVAL))
+        self.mail.noop()
+        return any(self.mail.untagged_responses.pop(k, None)
+                   for k in ('EXISTS', 'EXPUNGE', 'RECENT', 'FETCH'))
+
+    def _idle(self, timeout: float) -> bool:
+        # imaplib (before 3.14) has no IDLE, so drive it on the socket. The
+        # server sends nothing between commands, so imaplib's read buffer is
+        # empty here and everything up to IDLE's tagged reply is read raw.
+        mail = self.mail
+        tag = mail._new_tag()
+        mail.tagged_commands.pop(tag, None)
+        mail.send(tag + b' IDLE\r\n')
+        sock = mail.sock
+        saved = sock.gettimeout()
+        deadline = time.monotonic() + timeout
+        buf = b''
+        changed = done_sent = False
+        try:
+            while True:
+                while b'\r\n' not in buf:
+                    wait = deadline - time.monotonic()
+                    if wait <= 0:
+                        if done_sent:
+                            raise imaplib.IMAP4.abort("no reply to IDLE DONE")
+                        mail.send(b'DONE\r\n')
+                        done_sent = True
+                        deadline = time.monotonic() + 10
+                        continue
+                    sock.settimeout(wait)
+                    try:
+                        chunk = sock.recv(4096)
+                    except socket.timeout:
+                        continue
+                    if not chunk:
+                        raise imaplib.IMAP4.abort("connection closed during IDLE")
+                    buf += chunk
+                line, buf = buf.split(b'\r\n', 1)
+                if line.startswith(tag + b' '):
+                    if not line[len(tag) + 1:].upper().startswith(b'OK'):
+                        self.can_idle = False
+                    return changed
+                if line.startswith(b'* ') and line.split()[-1].upper() in (
+                        b'EXISTS', b'EXPUNGE', b'RECENT', b'FETCH'):
+                    changed = True
+                    if not done_sent:
+                        mail.send(b'DONE\r\n')
+                        done_sent = True
+        finally:
+            sock.settimeout(saved)
+
+
+_sessions: List[ImapSession] = []
+_sessions_lock = threading.Lock()
+
+
+def imap_session() -> ImapSession:
+    """The calling thread's IMAP session, created on first use."""
+    sess = getattr(_local, 'session', None)
+    if sess is None:
+        sess = _local.session = ImapSession()
+        with _sessions_lock:
+            _sessions.append(sess)
+    return sess
 
-    if typ != 'OK' or not data[0]:
-        return None
 
-    msg_nums = data[0].split()
-    return msg_nums[0] if msg_nums else None
+def close_imap_sessions() -> None:
+    """Log out every worker's session."""
+    with _sessions_lock:
+        sessions = list(_sessions)
+        _sessions.clear()
+    for sess in sessions:
+        sess.close()
+
+
+def record_latency(stage: str, seconds: float) -> None:
+    """Attribute a delivery latency to the running test."""
+    key = (getattr(_local, 'test', None) or '-', stage)
+    with _latencies_lock:
+        _latencies.setdefault(key, []).append(seconds)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linearly interpolated q-th percentile of values (non-empty)."""
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
 
 
 def check_message_in_folder(message_id: str, folder: str, should_exist: bool = True) -> bool:
     """Check if message exists in folder via IMAP."""
-    mail = imap_connect()
-    try:
-        msg_num = imap_search_message(mail, folder, message_id)
-        exists = msg_num is not None
+    msg_num = imap_session().run(lambda sess: sess.search(folder, message_id))
+    exists = msg_num is not None
 
-        if should_exist and not exists:
-            logger.error(f"  ✗ Message NOT in {folder}")
-            return False
-        elif not should_exist and exists:
-            logger.error(f"  ✗ Message UNEXPECTEDLY in {folder}")
-            return False
+    if should_exist and not exists:
+        logger.error(f"  ✗ Message NOT in {folder}")
+        return False
+    elif not should_exist and exists:
+        logger.error(f"  ✗ Message UNEXPECTEDLY in {folder}")
+        return False
 
-        status = "in" if exists else "not in"
-        logger.info(f"  ✓ Message {status} {folder}")
-        return True
-    finally:
-        mail.logout()
+    status = "in" if exists else "not in"
+    logger.info(f"  ✓ Message {status} {folder}")
+    return True
 
 
 def wait_for_message_in_folder(message_id: str, folder: str,
                                should_exist: bool = True,
-                               timeout: int = 15,
-                               poll_interval: float = 1.0) -> bool:
-    """Poll IMAP for a message in folder until existence matches should_exist,
+                               timeout: float = DELIVERY_TIMEOUT,
+                               since: Optional[float] = None,
+                               stage: str = 'delivery') -> bool:
+    """Wait until the message's existence in folder matches should_exist,
     or timeout elapses. Sieve fileinto can lag delivery by 5-10s on slow paths
     (default.sieve -> personal active.sieve -> fileinto into list/*).
+
+    The folder stays selected between searches and the session IDLEs on it,
+    so the search reruns as soon as the server reports a change. When since
+    (a time.monotonic() stamp) is given, the time from then until the message
+    showed up is recorded under stage for the latency summary.
     """
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        mail = imap_connect()
-        try:
-            exists = imap_search_message(mail, folder, message_id) is not None
-        finally:
-            mail.logout()
-        if exists == should_exist:
-            status = "in" if exists else "not in"
-            logger.info(f"  ✓ Message {status} {folder}")
-            return True
-        time.sleep(poll_interval)
+    deadline = time.monotonic() + timeout
+
+    def wait(sess: ImapSession) -> bool:
+        while True:
+            exists = sess.search(folder, message_id) is not None
+            if exists == should_exist:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            sess.wait_for_change(remaining)
+
+    if imap_session().run(wait):
+        if since is not None:
+            elapsed = time.monotonic() - since
+            record_latency(f"{stage} → {folder}", elapsed)
+            logger.info(f"  ✓ Message {'in' if should_exist else 'not in'} {folder} ({elapsed:.2f}s)")
+        else:
+            logger.info(f"  ✓ Message {'in' if should_exist else 'not in'} {folder}")
+        return True
     if should_exist:
         logger.error(f"  ✗ Message NOT in {folder} (waited {timeout}s)")
     else:
@@ -221,15 +434,13 @@ def wait_for_message_in_folder(message_id: str, folder: str,
 
 def get_message_headers(message_id: str, folder: str) -> Optional[str]:
     """Fetch message headers via IMAP."""
-    mail = imap_connect()
-    try:
-        msg_num = imap_search_message(mail, folder, message_id)
+    def fetch(sess: ImapSession) -> Optional[str]:
+        msg_num = sess.search(folder, message_id)
 
         if not msg_num:
             return None
 
-        mail.select(folder, readonly=True)
-        typ, data = mail.fetch(msg_num, '(BODY[HEADER])')
+        typ, data = sess.mail.fetch(msg_num, '(BODY.PEEK[HEADER])')
 
         if typ != 'OK' or not data[0]:
             return None
@@ -237,8 +448,8 @@ def get_message_headers(message_id: str, folder: str) -> Optional[str]:
         # Parse response - data[0] is a tuple (b'...', b'headers...')
         header_data = data[0][1] if isinstance(data[0], tuple) else data[0]
         return header_data.decode('utf-8', errors='ignore')
-    finally:
-        mail.logout()
+
+    return imap_session().run(fetch)
 
 
 def check_spam_header(message_id: str, folder: str, should_be_spam: bool) -> bool:
@@ -319,48 +530,45 @@ def check_rspamd_headers(message_id: str, folder: str) -> bool:
     return True
 
 
-def imap_copy_message(message_id: str, source_folder: str, dest_folder: str) -> None:
-    """Copy message via IMAP COPY command (triggers IMAPSieve)."""
-    mail = imap_connect()
-    try:
-        # Select source folder (read-write to enable COPY)
-        mail.select(source_folder)
+def imap_copy_message(message_id: str, source_folder: str, dest_folder: str) -> float:
+    """Copy message via IMAP COPY command (triggers IMAPSieve).
 
+    Returns the time.monotonic() stamp at which the COPY was issued."""
+    def copy(sess: ImapSession) -> float:
         # Search for message
-        msg_num = imap_search_message(mail, source_folder, message_id)
+        msg_num = sess.search(source_folder, message_id)
         if not msg_num:
             raise TestError(f"Message not found in {source_folder}")
 
         # Copy to destination folder (this triggers IMAPSieve)
-        typ, data = mail.copy(msg_num, dest_folder)
+        started = time.monotonic()
+        typ, data = sess.mail.copy(msg_num, dest_folder)
 
         if typ != 'OK':
             raise TestError(f"IMAP COPY failed: {data}")
+        return started
 
-        logger.info(f"  → Copied {source_folder} → {dest_folder} (via IMAP)")
-    finally:
-        mail.logout()
+    started = imap_session().run(copy)
+    logger.info(f"  → Copied {source_folder} → {dest_folder} (via IMAP)")
+    return started
 
 
 def imap_append_message(msg: EmailMessage, folder: str) -> None:
     """Append message to folder via IMAP."""
-    mail = imap_connect()
-    try:
-        # Append message to folder
-        typ, data = mail.append(folder, '', imaplib.Time2Internaldate(time.time()), msg.as_bytes())
+    def append(sess: ImapSession) -> None:
+        typ, data = sess.mail.append(folder, '', imaplib.Time2Internaldate(time.time()), msg.as_bytes())
 
         if typ != 'OK':
             raise TestError(f"IMAP APPEND failed: {data}")
 
-        logger.info(f"  → Created message in {folder} (via IMAP)")
-    finally:
-        mail.logout()
+    imap_session().run(append)
+    logger.info(f"  → Created message in {folder} (via IMAP)")
 
 
 def ensure_folder_exists(folder: str) -> None:
     """Ensure a mailbox folder exists via IMAP."""
-    mail = imap_connect()
-    try:
+    def ensure(sess: ImapSession) -> None:
+        mail = sess.mail
         # List mailboxes
         typ, folders = mail.list()
         if typ != 'OK':
@@ -376,14 +584,14 @@ def ensure_folder_exists(folder: str) -> None:
                 # Check if error is because it already exists
                 error_str = str(data)
                 if 'ALREADYEXISTS' in error_str or 'already exists' in error_str.lower():
-                    # Folder exists, this is fine
+                    # Folder exists, this is fine (possibly a concurrent test)
                     pass
                 else:
                     raise TestError(f"Could not create folder {folder}: {data}")
             else:
                 logger.info(f"  → Created folder: {folder}")
-    finally:
-        mail.logout()
+
+    imap_session().run(ensure)
 
 
 def get_rspamd_learn_count(learn_type: str) -> Optional[int]:
@@ -410,6 +618,21 @@ def get_rspamd_learn_count(learn_type: str) -> Optional[int]:
     return None
 
 
+def wait_for_learn_count(learn_type: str, before: int,
+                         timeout: float = LEARN_SETTLE_TIMEOUT) -> Optional[int]:
+    """Poll rspamd until its learn count for learn_type exceeds before.
+
+    Returns the last count read (unchanged after timeout when rspamd skipped
+    the message, e.g. as a fuzzy duplicate), or None if it cannot be read.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        count = get_rspamd_learn_count(learn_type)
+        if count is None or count > before or time.monotonic() >= deadline:
+            return count
+        time.sleep(0.5)
+
+
 def check_rspamd_learning(since_time: datetime, learn_type: str) -> bool:
     """Check rspamd statistics to verify learning occurred.
 
@@ -438,10 +661,15 @@ def check_for_forwarding_loops(since_time: datetime, message_id: str) -> bool:
     This is critical for Retrain folder functionality - if the local_transport
     is misconfigured, sendmail will create forwarding loops.
 
+    Only this message's log lines count: Postfix's cleanup logs the
+    Message-ID against each queue ID the message is given (the original
+    delivery and every Retrain redelivery), and a loop is reported against
+    one of those queue IDs. A loop hit by another test running meanwhile is
+    that test's failure, not this one's.
+
     Args:
         since_time: Start time to check logs from
-        message_id: Message ID under test. Currently unused - the Postfix log
-            scan is time-window based, not per-message; kept for caller clarity.
+        message_id: Message ID under test
 
     Returns:
         True if no forwarding loops detected, False otherwise
@@ -456,12 +684,21 @@ def check_for_forwarding_loops(since_time: datetime, message_id: str) -> bool:
         '-o', 'cat'  # Just message content, no timestamps
     ]
     result = run_command(cmd, check=False)
+    lines = result.stdout.split('\n')
+
+    # "<QUEUEID>: message-id=<...>" from cleanup, once per queued copy
+    queue_ids = set()
+    for line in lines:
+        match = re.search(r'\b([0-9A-Za-z]+): message-id=(<[^>]*>)', line)
+        if match and match.group(2) == message_id:
+            queue_ids.add(match.group(1))
 
     # Check for mail forwarding loop errors
     loop_errors = [
-        line for line in result.stdout.split('\n')
+        line for line in lines
         if 'mail forwarding loop' in line.lower()
         and 'johnw@localhost' in line
+        and any(f'{queue_id}:' in line for queue_id in queue_ids)
     ]
 
     if loop_errors:
@@ -651,7 +888,10 @@ def cleanup_test_messages() -> None:
 
     logger.info(f"\nCleaning up {len(test_message_ids)} test messages...")
 
-    mail = imap_connect()
+    sess = imap_session()
+    if sess.mail is None:
+        sess.connect()
+    mail = sess.mail
     try:
         # List all folders
         typ, folders = mail.list()
@@ -671,7 +911,7 @@ def cleanup_test_messages() -> None:
         deleted_count = 0
         for folder in folder_names:
             try:
-                mail.select(folder)
+                sess.select(folder, readonly=False)
 
                 for message_id in test_message_ids:
                     search_id = message_id.strip('<>')
@@ -696,7 +936,7 @@ def cleanup_test_messages() -> None:
             logger.info(f"  → All test messages already removed")
 
     finally:
-        mail.logout()
+        close_imap_sessions()
 
 
 def test_normal_delivery() -> bool:
@@ -713,11 +953,10 @@ def test_normal_delivery() -> bool:
         )
         message_id = msg['Message-ID']
 
-        send_via_postfix(msg)
-        time.sleep(WAIT_AFTER_DELIVERY)
+        sent = send_via_postfix(msg)
 
         # Check delivery location
-        if not check_message_in_folder(message_id, 'INBOX', should_exist=True):
+        if not wait_for_message_in_folder(message_id, 'INBOX', since=sent):
             raise TestError("Not in INBOX")
 
         if not check_message_in_folder(message_id, 'Spam', should_exist=False):
@@ -838,11 +1077,10 @@ Sent from my iPhone (definitely not a mass mailer)
 
         message_id = msg['Message-ID']
 
-        send_via_postfix(msg)
-        time.sleep(WAIT_AFTER_DELIVERY)
+        sent = send_via_postfix(msg)
 
         # Check if message was delivered to Spam folder
-        in_spam = check_message_in_folder(message_id, 'Spam', should_exist=True)
+        in_spam = wait_for_message_in_folder(message_id, 'Spam', since=sent)
         not_in_inbox = check_message_in_folder(message_id, 'INBOX', should_exist=False)
 
         if in_spam and not_in_inbox:
@@ -905,11 +1143,10 @@ def test_train_good() -> bool:
         message_id = msg['Message-ID']
 
         # Send via Postfix (will be filtered by Sieve)
-        send_via_postfix(msg)
-        time.sleep(WAIT_AFTER_DELIVERY)
+        sent = send_via_postfix(msg)
 
         # Verify message in list/misc (not INBOX)
-        if not wait_for_message_in_folder(message_id, 'list/misc', should_exist=True):
+        if not wait_for_message_in_folder(message_id, 'list/misc', since=sent):
             raise TestError("Message not in list/misc (Sieve not working)")
 
         logger.info("  ✓ Sieve filtered to list/misc")
@@ -923,14 +1160,13 @@ def test_train_good() -> bool:
         imap_copy_message(message_id, 'list/misc', 'TrainGood')
 
         # Wait for IMAPSieve processing
-        logger.info(f"  → Waiting {WAIT_AFTER_IMAP_OPERATION}s for IMAPSieve...")
-        time.sleep(WAIT_AFTER_IMAP_OPERATION)
+        logger.info(f"  → Waiting up to {LEARN_SETTLE_TIMEOUT}s for IMAPSieve...")
 
         # Check rspamd statistics to verify ham learning occurred
         # Note: Rspamd uses fuzzy hashing for duplicate detection, so the count
         # may not increase if the message is similar to previously learned messages.
         # The important thing is that IMAPSieve triggered and the message was processed.
-        ham_count_after = get_rspamd_learn_count('ham')
+        ham_count_after = wait_for_learn_count('ham', ham_count_before)
         if ham_count_after is None:
             raise TestError("Unable to get rspamd ham statistics after training")
 
@@ -983,8 +1219,8 @@ def test_train_spam() -> bool:
         )
         message_id = msg['Message-ID']
 
+        # APPEND completes synchronously, so the message is already there
         imap_append_message(msg, 'INBOX')
-        time.sleep(1)  # Brief wait for message to appear
 
         # Get baseline spam count before training
         spam_count_before = get_rspamd_learn_count('spam')
@@ -992,17 +1228,18 @@ def test_train_spam() -> bool:
             raise TestError("Unable to get rspamd spam statistics")
 
         # Copy to TrainSpam via IMAP (triggers IMAPSieve)
-        imap_copy_message(message_id, 'INBOX', 'TrainSpam')
+        copied = imap_copy_message(message_id, 'INBOX', 'TrainSpam')
 
-        # Wait for IMAPSieve processing
-        logger.info(f"  → Waiting {WAIT_AFTER_IMAP_OPERATION}s for IMAPSieve...")
-        time.sleep(WAIT_AFTER_IMAP_OPERATION)
+        # Wait for IMAPSieve processing: move-to-spam.sieve files it into Spam
+        logger.info(f"  → Waiting up to {IMAPSIEVE_TIMEOUT}s for IMAPSieve...")
+        moved = wait_for_message_in_folder(message_id, 'Spam', timeout=IMAPSIEVE_TIMEOUT,
+                                           since=copied, stage='train')
 
         # Check rspamd statistics to verify spam learning occurred
         # Note: Rspamd uses fuzzy hashing for duplicate detection, so the count
         # may not increase if the message is similar to previously learned messages.
         # The important thing is that IMAPSieve triggered and the message was processed.
-        spam_count_after = get_rspamd_learn_count('spam')
+        spam_count_after = wait_for_learn_count('spam', spam_count_before)
         if spam_count_after is None:
             raise TestError("Unable to get rspamd spam statistics after training")
 
@@ -1013,7 +1250,7 @@ def test_train_spam() -> bool:
 
         # Verify message in Spam (move-to-spam.sieve moves it)
         # This confirms IMAPSieve triggered successfully
-        if not check_message_in_folder(message_id, 'Spam', should_exist=True):
+        if not moved:
             raise TestError("Message not in Spam after training (IMAPSieve may not have triggered)")
 
         logger.info("  ✓ Message moved to Spam (IMAPSieve triggered successfully)")
@@ -1092,7 +1329,6 @@ Sent from my iPhone (definitely not a mass mailer)
 
         # Append directly to INBOX (simulate misdelivery or user moving it there)
         imap_append_message(msg, 'INBOX')
-        time.sleep(1)
 
         logger.info("  ✓ Created test message in INBOX")
 
@@ -1101,11 +1337,12 @@ Sent from my iPhone (definitely not a mass mailer)
 
         # Copy to Retrain via IMAP (triggers IMAPSieve)
         # This will rescan through rspamd and redeliver
-        imap_copy_message(message_id, 'INBOX', 'Retrain')
+        copied = imap_copy_message(message_id, 'INBOX', 'Retrain')
 
         # Wait for IMAPSieve processing
-        logger.info(f"  → Waiting {WAIT_AFTER_IMAP_OPERATION}s for IMAPSieve redelivery...")
-        time.sleep(WAIT_AFTER_IMAP_OPERATION)
+        logger.info(f"  → Waiting up to {IMAPSIEVE_TIMEOUT}s for IMAPSieve redelivery...")
+        redelivered = wait_for_message_in_folder(message_id, 'Spam', timeout=IMAPSIEVE_TIMEOUT,
+                                                 since=copied, stage='retrain')
 
         # Check for mail forwarding loops in Postfix logs
         # This is critical - if local_transport is misconfigured, redelivery will fail
@@ -1113,7 +1350,7 @@ Sent from my iPhone (definitely not a mass mailer)
             raise TestError("Mail forwarding loop detected during redelivery")
 
         # Verify message ended up in Spam folder
-        if not check_message_in_folder(message_id, 'Spam', should_exist=True):
+        if not redelivered:
             raise TestError("Message not in Spam after retraining")
 
         logger.info("  ✓ Message correctly filtered to Spam")
@@ -1163,7 +1400,6 @@ def test_retrain_ham() -> bool:
 
         # Append directly to INBOX (simulate misdelivery)
         imap_append_message(msg, 'INBOX')
-        time.sleep(1)
 
         logger.info("  ✓ Created test message in INBOX")
 
@@ -1173,11 +1409,12 @@ def test_retrain_ham() -> bool:
         # Copy to Retrain via IMAP (triggers IMAPSieve)
         # This will rescan through rspamd and redeliver via LDA
         # LDA will run default.sieve (spam check) then active.sieve (filter to list/misc)
-        imap_copy_message(message_id, 'INBOX', 'Retrain')
+        copied = imap_copy_message(message_id, 'INBOX', 'Retrain')
 
         # Wait for IMAPSieve processing
-        logger.info(f"  → Waiting {WAIT_AFTER_IMAP_OPERATION}s for IMAPSieve redelivery...")
-        time.sleep(WAIT_AFTER_IMAP_OPERATION)
+        logger.info(f"  → Waiting up to {IMAPSIEVE_TIMEOUT}s for IMAPSieve redelivery...")
+        redelivered = wait_for_message_in_folder(message_id, 'list/misc', timeout=IMAPSIEVE_TIMEOUT,
+                                                 since=copied, stage='retrain')
 
         # Check for mail forwarding loops in Postfix logs
         # This is critical - if local_transport is misconfigured, redelivery will fail
@@ -1185,7 +1422,7 @@ def test_retrain_ham() -> bool:
             raise TestError("Mail forwarding loop detected during redelivery")
 
         # Verify message ended up in list/misc folder (filtered by Sieve)
-        if not check_message_in_folder(message_id, 'list/misc', should_exist=True):
+        if not redelivered:
             raise TestError("Message not in list/misc after retraining")
 
         logger.info("  ✓ Message correctly filtered to list/misc")
@@ -1300,14 +1537,14 @@ Unsubscribe: Send your bank credentials to remove@scam.net
         message_id = msg['Message-ID']
 
         # Send via Postfix (rspamd will scan with GPT)
-        send_via_postfix(msg)
+        sent = send_via_postfix(msg)
 
         # Wait longer for GPT analysis (LLM calls take time)
-        logger.info(f"  → Waiting {WAIT_AFTER_DELIVERY + 2}s for GPT analysis...")
-        time.sleep(WAIT_AFTER_DELIVERY + 2)
+        logger.info(f"  → Waiting up to {GPT_DELIVERY_TIMEOUT}s for GPT analysis...")
 
         # Check where message was delivered
-        in_spam = check_message_in_folder(message_id, 'Spam', should_exist=True)
+        in_spam = wait_for_message_in_folder(message_id, 'Spam', timeout=GPT_DELIVERY_TIMEOUT,
+                                             since=sent)
         not_in_inbox = check_message_in_folder(message_id, 'INBOX', should_exist=False)
 
         if not (in_spam and not_in_inbox):
@@ -1371,14 +1608,15 @@ talk soon
         message_id = msg['Message-ID']
 
         # Send via Postfix (rspamd will scan with GPT)
-        send_via_postfix(msg)
+        sent = send_via_postfix(msg)
 
         # Wait longer for GPT analysis (LLM calls take time)
-        logger.info(f"  → Waiting up to 20s for GPT analysis and delivery...")
+        logger.info(f"  → Waiting up to {GPT_DELIVERY_TIMEOUT}s for GPT analysis and delivery...")
 
-        # Poll for delivery (GPT analysis can take 4-6s plus sieve filing).
-        in_inbox = wait_for_message_in_folder(message_id, 'INBOX', should_exist=True, timeout=20)
-        not_in_spam = wait_for_message_in_folder(message_id, 'Spam', should_exist=False, timeout=5)
+        # Wait for delivery (GPT analysis can take 4-6s plus sieve filing).
+        in_inbox = wait_for_message_in_folder(message_id, 'INBOX', timeout=GPT_DELIVERY_TIMEOUT,
+                                              since=sent)
+        not_in_spam = check_message_in_folder(message_id, 'Spam', should_exist=False)
 
         if not (in_inbox and not_in_spam):
             raise TestError("Message not delivered to INBOX")
@@ -1403,32 +1641,118 @@ talk soon
         return False
 
 
+# Test registry: key -> (name, function, serial group). Tests sharing a
+# group run one after another; every other test may run concurrently. The
+# training tests compare rspamd's global learn counts before and after, and
+# every message delivered through rspamd can move those counts too (Bayes
+# autolearn), so every test that sends mail through rspamd is in one group.
+# Only tests that never touch rspamd -- an IMAP APPEND, a gateway health
+# probe -- run alongside them. Log checks are tagged with the test's own
+# Message-ID (check_for_forwarding_loops); the run-wide journal check in
+# main() runs after every test has finished.
+AVAILABLE_TESTS: Dict[str, Tuple[str, Callable[[], bool], Optional[str]]] = {
+    'normal': ('Normal Delivery', test_normal_delivery, 'rspamd'),
+    'spam-folder': ('Spam Folder Access', test_spam_folder_accessibility, None),
+    'spam-detection': ('Spam Detection', test_spam_detection_and_delivery, 'rspamd'),
+    'train-good': ('Train Good (Ham)', test_train_good, 'rspamd'),
+    'train-spam': ('Train Spam', test_train_spam, 'rspamd'),
+    'retrain-spam': ('Retrain Spam', test_retrain_spam, 'rspamd'),
+    'retrain-ham': ('Retrain Ham', test_retrain_ham, 'rspamd'),
+    'gateway': ('LLM gateway Connectivity', test_gateway_connectivity, None),
+    'gpt-spam': ('GPT Spam Detection', test_gpt_spam_detection, 'rspamd'),
+    'gpt-ham': ('GPT Ham Detection', test_gpt_ham_detection, 'rspamd'),
+}
+
+
+def run_one(test_key: str, test_func: Callable[[], bool], buffered: bool) -> bool:
+    """Run one test on this thread, tagging its latencies with test_key.
+
+    When buffered, the test's log lines are printed as one block at the end."""
+    _local.test = test_key
+    _local.lines = [] if buffered else None
+    try:
+        return test_func()
+    except Exception as e:
+        logger.error(f"✗ FAILED: {e}")
+        return False
+    finally:
+        lines, _local.lines, _local.test = _local.lines, None, None
+        if lines:
+            _output_handler.write_block(lines)
+
+
+def run_tests(tests_to_run: List[Tuple[str, Tuple[str, Callable[[], bool], Optional[str]]]],
+              jobs: int, repeat: int) -> Dict[str, bool]:
+    """Run each test repeat times on up to jobs worker threads.
+
+    Tests in the same serial group form one chain that a single worker runs
+    in order; every other run is a chain of its own. A test passes only if
+    every repetition passed."""
+    chains: List[List[Tuple[str, Callable[[], bool]]]] = []
+    groups: Dict[str, List[Tuple[str, Callable[[], bool]]]] = {}
+    for _ in range(repeat):
+        for test_key, (_, test_func, group) in tests_to_run:
+            if group is None:
+                chains.append([(test_key, test_func)])
+            else:
+                if group not in groups:
+                    groups[group] = []
+                    chains.append(groups[group])
+                groups[group].append((test_key, test_func))
+
+    outcomes: Dict[str, List[bool]] = {key: [] for key, _ in tests_to_run}
+
+    def run_chain(chain: List[Tuple[str, Callable[[], bool]]]) -> None:
+        for test_key, test_func in chain:
+            outcomes[test_key].append(run_one(test_key, test_func, jobs > 1))
+
+    if jobs <= 1:
+        for chain in chains:
+            run_chain(chain)
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            for future in [pool.submit(run_chain, chain) for chain in chains]:
+                future.result()
+
+    return {name: all(outcomes[key]) for key, (name, _, _) in tests_to_run}
+
+
+def latency_summary() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Recorded delivery latencies as {test: {stage: {n, p50, p90, p99, max}}}."""
+    with _latencies_lock:
+        samples = {key: list(values) for key, values in _latencies.items()}
+    summary: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (test_key, stage), values in samples.items():
+        summary.setdefault(test_key, {})[stage] = {
+            'n': len(values),
+            'p50': percentile(values, 50),
+            'p90': percentile(values, 90),
+            'p99': percentile(values, 99),
+            'max': max(values),
+        }
+    return summary
+
+
 def main():
     """Main test runner"""
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Email pipeline tester')
     parser.add_argument('tests', nargs='*', help='Specific tests to run (default: all)')
     parser.add_argument('--list', action='store_true', help='List available tests')
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+                        help='Run up to this many independent tests at once (default: 4)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Run every selected test this many times (default: 1)')
+    parser.add_argument('--json', metavar='FILE',
+                        help='Also write results and latency percentiles to FILE as JSON')
     args = parser.parse_args()
 
-    # Test registry
-    available_tests = {
-        'normal': ('Normal Delivery', test_normal_delivery),
-        'spam-folder': ('Spam Folder Access', test_spam_folder_accessibility),
-        'spam-detection': ('Spam Detection', test_spam_detection_and_delivery),
-        'train-good': ('Train Good (Ham)', test_train_good),
-        'train-spam': ('Train Spam', test_train_spam),
-        'retrain-spam': ('Retrain Spam', test_retrain_spam),
-        'retrain-ham': ('Retrain Ham', test_retrain_ham),
-        'gateway': ('LLM gateway Connectivity', test_gateway_connectivity),
-        'gpt-spam': ('GPT Spam Detection', test_gpt_spam_detection),
-        'gpt-ham': ('GPT Ham Detection', test_gpt_ham_detection),
-    }
+    available_tests = AVAILABLE_TESTS
 
     # List tests if requested
     if args.list:
         print("Available tests:")
-        for key, (name, _) in available_tests.items():
+        for key, (name, _, _) in available_tests.items():
             print(f"  {key:20} - {name}")
         return 0
 
@@ -1465,8 +1789,7 @@ def main():
             tests_to_run = list(available_tests.items())
 
         # Run selected tests
-        for test_key, (test_name, test_func) in tests_to_run:
-            results[test_name] = test_func()
+        results.update(run_tests(tests_to_run, max(1, args.jobs), max(1, args.repeat)))
 
         # Check logs for errors
         logger.info("\n" + "=" * 70)
@@ -1510,6 +1833,21 @@ def main():
         status = "✓ PASSED" if result else "✗ FAILED"
         print(f"  {test_name}: {status}")
 
+    latency = latency_summary()
+    if latency:
+        print("\n" + "=" * 70)
+        print("DELIVERY LATENCY (seconds)")
+        print("=" * 70)
+        print(f"  {'test':16} {'stage':22} {'n':>4} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7}")
+        for test_key, stages in latency.items():
+            for stage, st in stages.items():
+                print(f"  {test_key:16} {stage:22} {st['n']:>4} {st['p50']:>7.2f} "
+                      f"{st['p90']:>7.2f} {st['p99']:>7.2f} {st['max']:>7.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'results': results, 'latency': latency}, f, indent=2)
+
     print("\n" + f"Overall: {passed}/{total} tests passed")
     print(f"Ended: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
@@ -39,6 +39,9 @@ quotes that same URL back in git's error text. Neither field is ever emitted her
 not as a label, not as a log line. We export a boolean for failure and a timestamp
 for freshness, and nothing else. `repo` and `remote_name` are safe identifiers.
 Cardinality is bounded by the number of repos that actually have mirrors.
+
+With `--daemon` (scripts/textfile_exporter.py) it stays resident, reads the credential
+once and reuses the repo list between hourly passes; without it, one pass and exit.
 """
 
 import json
@@ -49,6 +52,8 @@ import urllib.error
 import urllib.parse
 import urllib.request
 
+from textfile_exporter import Exporter, Registry
+
 GITEA_URL = os.environ.get("GITEA_URL", "https://gitea.vulcan.lan")
 GITEA_USER = os.environ.get("GITEA_USER", "johnw")
 OUT = os.environ.get(
@@ -56,6 +61,14 @@ OUT = os.environ.get(
     "/var/lib/prometheus-node-exporter-textfiles/gitea_push_mirror.prom",
 )
 TIMEOUT = int(os.environ.get("HTTP_TIMEOUT", "20"))
+INTERVAL = float(os.environ.get("INTERVAL_SECONDS", "3600"))
+# In daemon mode the repo list is reused for this long. A brand-new repo's mirror is
+# picked up at most this late; every known repo's mirrors are still read every pass.
+REPO_CACHE_SECONDS = float(os.environ.get("REPO_CACHE_SECONDS", "21600"))
+
+SUCCESS = ("gitea_push_mirror_scrape_success", "Whether this exporter completed a full pass.")
+TIMESTAMP = ("gitea_push_mirror_scrape_timestamp_seconds",
+             "Epoch when this exporter last completed.")
 
 
 def _token() -> str:
@@ -99,72 +112,83 @@ def _parse_ts(value) -> float:
         return 0.0
 
 
-def main() -> int:
-    lines = [
-        "# HELP gitea_push_mirror_failed Whether the last push to this mirror's remote failed (1) or not (0).",
-        "# TYPE gitea_push_mirror_failed gauge",
-        "# HELP gitea_push_mirror_last_update_timestamp_seconds Epoch of the last push ATTEMPT (NOT success) for this mirror; 0 if never.",
-        "# TYPE gitea_push_mirror_last_update_timestamp_seconds gauge",
-        "# HELP gitea_push_mirror_scrape_success Whether this exporter completed a full pass.",
-        "# TYPE gitea_push_mirror_scrape_success gauge",
-        "# HELP gitea_push_mirror_scrape_timestamp_seconds Epoch when this exporter last completed.",
-        "# TYPE gitea_push_mirror_scrape_timestamp_seconds gauge",
-        "# HELP gitea_push_mirror_count Number of configured push mirrors discovered.",
-        "# TYPE gitea_push_mirror_count gauge",
-        "# HELP gitea_push_mirror_failed_count Number of push mirrors whose last push failed.",
-        "# TYPE gitea_push_mirror_failed_count gauge",
-    ]
-
-    total = 0
-    failed = 0
-    ok = 1
-    try:
-        token = _token()
-        for repo in _repos(token):
-            try:
-                mirrors = _get(
-                    f"/api/v1/repos/{GITEA_USER}/{urllib.parse.quote(repo)}/push_mirrors",
-                    token,
-                )
-            except urllib.error.HTTPError as exc:
-                # 404 simply means "no push mirrors on this repo" -- not a failure.
-                if exc.code == 404:
+class MirrorCollector:
+    """Reads every push mirror's outcome; the token and repo list persist between runs."""
+
+    def __init__(self, repo_ttl: float = REPO_CACHE_SECONDS):
+        self.repo_ttl = repo_ttl
+        self._token = None
+        self._repos = None
+        self._repos_at = 0.0
+
+    def _repo_names(self) -> list:
+        if self._repos is None or time.monotonic() - self._repos_at > self.repo_ttl:
+            self._repos = list(_repos(self._token))
+            self._repos_at = time.monotonic()
+        return self._repos
+
+    def __call__(self, reg: Registry) -> bool:
+        failed_g = reg.gauge(
+            "gitea_push_mirror_failed",
+            "Whether the last push to this mirror's remote failed (1) or not (0).")
+        update_g = reg.gauge(
+            "gitea_push_mirror_last_update_timestamp_seconds",
+            "Epoch of the last push ATTEMPT (NOT success) for this mirror; 0 if never.")
+
+        total = 0
+        failed = 0
+        ok = True
+        try:
+            if self._token is None:
+                self._token = _token()
+            for repo in self._repo_names():
+                try:
+                    mirrors = _get(
+                        f"/api/v1/repos/{GITEA_USER}/{urllib.parse.quote(repo)}/push_mirrors",
+                        self._token,
+                    )
+                except urllib.error.HTTPError as exc:
+                    # 404 simply means "no push mirrors on this repo" -- not a failure.
+                    # (A repo deleted since the list was cached also lands here.)
+                    if exc.code == 404:
+                        continue
+                    if exc.code == 401:
+                        # Token rotated under a long-running daemon: re-read it next pass.
+                        self._token = None
+                    ok = False
                     continue
-                ok = 0
-                continue
-            for mirror in mirrors or []:
-                total += 1
-                # NEVER emit remote_address or last_error text: both can embed the
-                # remote's auth token. A boolean is all the alert needs.
-                is_failed = 1 if (mirror.get("last_error") or "").strip() else 0
-                failed += is_failed
-                remote = (mirror.get("remote_name") or "unknown").replace('"', "")
-                safe_repo = repo.replace('"', "")
-                labels = f'repo="{safe_repo}",remote_name="{remote}"'
-                lines.append(f"gitea_push_mirror_failed{{{labels}}} {is_failed}")
-                lines.append(
-                    "gitea_push_mirror_last_update_timestamp_seconds"
-                    f"{{{labels}}} {_parse_ts(mirror.get('last_update')):.0f}"
-                )
-    except Exception as exc:  # noqa: BLE001 - exporter must always emit something
-        ok = 0
-        print(f"gitea-push-mirror-exporter: {type(exc).__name__}", file=sys.stderr)
-
-    lines.append(f"gitea_push_mirror_count {total}")
-    lines.append(f"gitea_push_mirror_failed_count {failed}")
-    lines.append(f"gitea_push_mirror_scrape_success {ok}")
-    lines.append(f"gitea_push_mirror_scrape_timestamp_seconds {time.time():.0f}")
-
-    tmp = f"{OUT}.{os.getpid()}"
-    with open(tmp, "w", encoding="utf-8") as fh:
-        fh.write("\n".join(lines) + "\n")
-    os.replace(tmp, OUT)  # atomic; avoids the half-written .prom files seen elsewhere
-    os.chmod(OUT, 0o644)  # metrics only, no secrets -- node-exporter must read it
-
-    # Exit non-zero on a partial pass so the unit fails loudly rather than
-    # publishing a confidently-wrong zero. This is the exact failure mode being
-    # fixed: a job that exits 0 having done nothing.
-    return 0 if ok else 1
+                for mirror in mirrors or []:
+                    total += 1
+                    # NEVER emit remote_address or last_error text: both can embed the
+                    # remote's auth token. A boolean is all the alert needs.
+                    is_failed = 1 if (mirror.get("last_error") or "").strip() else 0
+                    failed += is_failed
+                    remote = mirror.get("remote_name") or "unknown"
+                    failed_g.add(is_failed, repo=repo, remote_name=remote)
+                    update_g.add(f"{_parse_ts(mirror.get('last_update')):.0f}",
+                                 repo=repo, remote_name=remote)
+        except Exception as exc:  # noqa: BLE001 - exporter must always emit something
+            ok = False
+            self._repos = None
+            print(f"gitea-push-mirror-exporter: {type(exc).__name__}", file=sys.stderr)
+
+        # Published even on a partial pass, alongside scrape_success=0, so
+        # GiteaPushMirrorMetricsAbsent keys on the exporter dying, not on a bad pass.
+        reg.gauge("gitea_push_mirror_count",
+                  "Number of configured push mirrors discovered.").add(total)
+        reg.gauge("gitea_push_mirror_failed_count",
+                  "Number of push mirrors whose last push failed.").add(failed)
+        # A partial pass exits non-zero as a oneshot, so the unit fails loudly rather than
+        # publishing a confidently-wrong zero. This is the exact failure mode being fixed:
+        # a job that exits 0 having done nothing.
+        return ok
+
+
+def main() -> int:
+    exporter = Exporter(OUT, splay=300)
+    exporter.collector("gitea_push_mirror", MirrorCollector(), INTERVAL,
+                       success=SUCCESS, timestamp=TIMESTAMP)
+    return exporter.main()
 
 
 if __name__ == "__main__":
@@ -45,6 +45,9 @@ Metrics emitted:
   hass_entity_tracked_total              all entities the recorder knows about
   hass_entity_exporter_success           0 if this collector could not read the database
   hass_entity_exporter_timestamp_seconds
+
+`--daemon` keeps it resident and re-queries every INTERVAL_SECONDS (see
+scripts/textfile_exporter.py); without it, one query pass and exit.
 """
 
 import collections
@@ -52,13 +55,15 @@ import os
 import re
 import subprocess
 import sys
-import time
+
+from textfile_exporter import Exporter, Registry
 
 OUT = os.environ.get(
     "TEXTFILE_PATH",
     "/var/lib/prometheus-node-exporter-textfiles/hass_entity_availability.prom",
 )
 DB = os.environ.get("HASS_DB", "hass")
+INTERVAL = float(os.environ.get("INTERVAL_SECONDS", "900"))
 
 # Latest state per entity. See the module docstring for why this shape and not DISTINCT ON.
 QUERY_UNAVAILABLE = """
@@ -81,20 +86,19 @@ TWIN = re.compile(r"_\d+$")
 # owns an entity, only the entity_id.
 MAIL_PKG = "imap_vulcan_lan"
 
-HELP = [
-    ("hass_entity_unavailable_total",
-     "Entities whose latest recorded state is unavailable or unknown", "gauge"),
-    ("hass_entity_unavailable",
-     "Unavailable entities split by cause category", "gauge"),
-    ("hass_entity_unavailable_by_domain",
-     "Unavailable entities per Home Assistant domain", "gauge"),
-    ("hass_entity_tracked_total",
-     "Entities the recorder database knows about", "gauge"),
-    ("hass_entity_exporter_success",
-     "1 if this collector read the recorder database successfully", "gauge"),
-    ("hass_entity_exporter_timestamp_seconds",
-     "Unix time of the last collector run", "gauge"),
-]
+HELP = {
+    "hass_entity_unavailable_total":
+        ("Entities whose latest recorded state is unavailable or unknown", "gauge"),
+    "hass_entity_unavailable":
+        ("Unavailable entities split by cause category", "gauge"),
+    "hass_entity_unavailable_by_domain":
+        ("Unavailable entities per Home Assistant domain", "gauge"),
+    "hass_entity_tracked_total":
+        ("Entities the recorder database knows about", "gauge"),
+}
+SUCCESS = ("hass_entity_exporter_success",
+           "1 if this collector read the recorder database successfully")
+TIMESTAMP = ("hass_entity_exporter_timestamp_seconds", "Unix time of the last collector run")
 
 
 def _psql(sql: str) -> list:
@@ -105,31 +109,16 @@ def _psql(sql: str) -> list:
     return [line.strip() for line in proc.stdout.splitlines() if line.strip()]
 
 
-def _emit(lines: list) -> None:
-    tmp = f"{OUT}.tmp"
-    with open(tmp, "w", encoding="utf-8") as fh:
-        fh.write("\n".join(lines) + "\n")
-    os.replace(tmp, OUT)  # same directory, so rename(2): never a torn read
-    os.chmod(OUT, 0o644)  # counts only, no entity names, no secrets
+def _family(reg: Registry, name: str):
+    return reg.family(name, *HELP[name])
 
 
-def main() -> int:
-    out = []
-    for name, help_text, kind in HELP:
-        out.append(f"# HELP {name} {help_text}")
-        out.append(f"# TYPE {name} {kind}")
-
-    try:
-        entities = _psql(QUERY_UNAVAILABLE)
-        tracked = int(_psql(QUERY_TRACKED)[0])
-    except Exception as exc:  # noqa: BLE001
-        # Emit success=0 rather than nothing: an ABSENT metric set is indistinguishable from
-        # a healthy system, which is the failure mode this whole effort exists to remove.
-        print(f"hass-entity-availability-exporter: {type(exc).__name__}", file=sys.stderr)
-        out.append("hass_entity_exporter_success 0")
-        out.append(f"hass_entity_exporter_timestamp_seconds {time.time():.0f}")
-        _emit(out)
-        return 1
+def collect(reg: Registry) -> None:
+    # A raise publishes success=0 rather than nothing: an ABSENT metric set is
+    # indistinguishable from a healthy system, which is the failure mode this whole effort
+    # exists to remove.
+    entities = _psql(QUERY_UNAVAILABLE)
+    tracked = int(_psql(QUERY_TRACKED)[0])
 
     cats = collections.Counter()
     domains = collections.Counter()
@@ -142,18 +131,23 @@ def main() -> int:
         else:
             cats["other"] += 1
 
-    out.append(f"hass_entity_unavailable_total {len(entities)}")
+    _family(reg, "hass_entity_unavailable_total").add(len(entities))
     # Emit all three categories explicitly, including zeros. A category that vanishes when it
     # reaches zero looks identical to a collector that stopped reporting it.
+    unavailable = _family(reg, "hass_entity_unavailable")
     for cat in ("duplicate_twin", "mail_and_packages", "other"):
-        out.append(f'hass_entity_unavailable{{category="{cat}"}} {cats[cat]}')
+        unavailable.add(cats[cat], category=cat)
+    by_domain = _family(reg, "hass_entity_unavailable_by_domain")
     for domain, n in sorted(domains.items()):
-        out.append(f'hass_entity_unavailable_by_domain{{domain="{domain}"}} {n}')
-    out.append(f"hass_entity_tracked_total {tracked}")
-    out.append("hass_entity_exporter_success 1")
-    out.append(f"hass_entity_exporter_timestamp_seconds {time.time():.0f}")
-    _emit(out)
-    return 0
+        by_domain.add(n, domain=domain)
+    _family(reg, "hass_entity_tracked_total").add(tracked)
+
+
+def main() -> int:
+    exporter = Exporter(OUT, splay=120)
+    exporter.collector("hass_entity_availability", collect, INTERVAL,
+                       success=SUCCESS, timestamp=TIMESTAMP)
+    return exporter.main()
 
 
 if __name__ == "__main__":
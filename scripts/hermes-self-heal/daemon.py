@@ -5,17 +5,23 @@ See docs/superpowers/specs/2026-05-20-hermes-self-heal-and-nightly-report-design
 Ported from scripts/openclaw-self-heal/daemon.py with Hermes-specific
 action set, alert mapping, metric prefix, and the explicit-ignore behavior
 on unknown alerts (NO default fallback; OpenClaw's daemon matches this since 2026-07-30).
+
+Incident state lives in SQLite (WAL) at STATE_DB: one row per incident,
+one per remediation attempt, and named cooldowns. Every mutation touches only
+its own rows; the pre-2026-10 incidents.json is imported once at startup.
 """
-__version__ = "0.1.0"
+__version__ = "0.2.0"
 
 import time
 import json
 import contextlib
-import fcntl
+import functools
 import os
 import pathlib
 import re
+import sqlite3
 import subprocess
+import threading
 import urllib.request
 
 ACTION_ALLOWLIST = (
@@ -102,7 +108,12 @@ CIRCUIT_WINDOW_S = 3600
 CIRCUIT_MAX_ATTEMPTS = 3
 
 
-def recent_action_count(state, now=None, window_s=CIRCUIT_WINDOW_S) -> int:
+def _counts_toward_breaker(attempt) -> bool:
+    """Whether an attempt was a real remediation (see recent_action_count)."""
+    return attempt.get("action") not in (None, "none") and not attempt.get("skipped")
+
+
+def recent_action_count(store, now=None, window_s=CIRCUIT_WINDOW_S) -> int:
     """Count real remediation actions taken across active+history within window_s.
 
     Excludes attempts whose action is None/"none" — the placeholder recorded
@@ -119,56 +130,60 @@ def recent_action_count(state, now=None, window_s=CIRCUIT_WINDOW_S) -> int:
     daemon CORRECTLY refusing to act. Observed live 2026-08-04 01:03: the
     preflight skipped a futile restart and the incident still counted toward the
     breaker. `action` alone is not evidence that anything was done.
+
+    Both exclusions are decided once, when the attempt is recorded, so this is
+    an index range count rather than a walk over every incident.
     """
     now = int(time.time()) if now is None else int(now)
-    count = 0
-    for inc in list(state["active"].values()) + state["history"]:
-        for att in inc.get("attempts", []):
-            if att.get("action") in (None, "none"):
-                continue
-            if att.get("skipped"):
-                continue
-            if now - int(att.get("ts") or 0) < window_s:
-                count += 1
-    return count
+    return store.count_attempts_since(now - window_s)
 
 
-@contextlib.contextmanager
-def state_lock(path):
-    """Hold an exclusive lock across a whole load -> mutate -> save sequence.
-
-    The locks that used to live inside load_state/save_state could not serialize
-    anything: the read took LOCK_SH on the real file while the write took LOCK_EX
-    on a DIFFERENT inode (the .tmp), so the two never excluded each other, and
-    os.replace then swapped the inode out from under any shared holder. The tmp
-    file was also truncated by open("w") BEFORE its lock was acquired.
-
-    That mattered because this daemon is genuinely concurrent -- a
-    ThreadingHTTPServer runs one thread per Alertmanager POST and a heartbeat
-    thread does its own load/mutate/save every 60s -- so two overlapping updates
-    silently lost whichever landed first. Losing an attempt record undercounts
-    the rolling remediation budget, which is the guard added after a 72-restart
-    storm, so a lost write could re-enable exactly the storm the breaker exists
-    to stop. reconcile_orphans' docstring already conceded the race.
-
-    A SIDECAR lockfile, not the state file itself: the state file is replaced by
-    rename on every save, so its inode is not stable enough to lock against.
+def circuit_open(store, now=None, pending=0) -> bool:
+    """True while the rolling remediation budget is spent.
+
+    pending counts actions already cleared to run but not yet recorded; they
+    are spent budget too. A trip is remembered in the cooldowns table until the
+    oldest of the recorded attempts that spent the budget ages out of the
+    window; until then the count stays at or above the limit whatever else
+    happens, so a storm of webhooks checks one row instead of recounting.
     """
-    lock_path = pathlib.Path(str(path) + ".lock")
-    lock_path.parent.mkdir(parents=True, exist_ok=True)
-    fd = os.open(str(lock_path), os.O_CREAT | os.O_RDWR, 0o600)
-    try:
-        fcntl.flock(fd, fcntl.LOCK_EX)
+    now = int(time.time()) if now is None else int(now)
+    if store.cooldown_until("circuit_breaker") > now:
+        return True
+    recorded = recent_action_count(store, now=now)
+    if recorded + pending < CIRCUIT_MAX_ATTEMPTS:
+        return False
+    if recorded >= CIRCUIT_MAX_ATTEMPTS:
+        oldest = store.nth_latest_attempt_ts(CIRCUIT_MAX_ATTEMPTS)
+        store.set_cooldown("circuit_breaker", oldest + CIRCUIT_WINDOW_S, "circuit_breaker")
+    return True
+
+
+# Serializes every read -> decide -> write sequence (handle_alert's decision
+# points, heartbeat ticks) against the others.
+#
+# This daemon is genuinely concurrent -- executor workers handle different
+# incidents in parallel and a heartbeat thread does its own maintenance every
+# 60s -- and the circuit breaker can only be trusted if no two workers can read
+# the same budget and both act on it. Losing an attempt record undercounts the
+# rolling remediation budget, which is the guard added after a 72-restart
+# storm. The store keeps each write atomic; this lock keeps each decision whole.
+# It is never held across run_action, the AI call or the post-action settle.
+_STATE_LOCK = threading.Lock()
+
+
+@contextlib.contextmanager
+def state_lock():
+    """Hold the handler lock across a whole read -> decide -> write sequence."""
+    with _STATE_LOCK:
         yield
-    finally:
-        try:
-            fcntl.flock(fd, fcntl.LOCK_UN)
-        finally:
-            os.close(fd)
 
 
 def load_state(path):
-    """Read the state file. Callers MUST hold state_lock() around load+save."""
+    """Read a legacy incidents.json document ({active, history}).
+
+    Only migrate_json_state uses this now; the daemon's state is in STATE_DB.
+    """
     p = pathlib.Path(path)
     if not p.exists():
         return {"active": {}, "history": []}
@@ -183,18 +198,6 @@ def load_state(path):
         return {"active": {}, "history": []}
 
 
-def save_state(path, state):
-    """Atomically replace the state file. Caller holds state_lock()."""
-    p = pathlib.Path(path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    tmp = p.with_suffix(p.suffix + ".tmp")
-    with tmp.open("w") as f:
-        json.dump(state, f, indent=2)
-        f.flush()
-        os.fsync(f.fileno())
-    os.replace(tmp, p)
-
-
 # Resolved incidents are retained in the active map for this long so that
 # repeat alertmanager sends of the same firing episode (the correlation key
 # is stable for the entire time an alert fires) are de-duped instead of
@@ -202,37 +205,343 @@ def save_state(path, state):
 # Previously resolved incidents were never removed from active and
 # accumulated without bound (20 stale entries observed 2026-05-28).
 RESOLVED_RETENTION_S = 3600
-HISTORY_MAX = 500
+# Archived incidents (and their attempts) are kept up to this many, and for
+# at most this long. Both are set by the NixOS module.
+HISTORY_MAX = int(os.environ.get("SELF_HEAL_HISTORY_MAX", "500"))
+HISTORY_MAX_AGE_S = int(os.environ.get("SELF_HEAL_HISTORY_MAX_AGE_S", str(90 * 86400)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incidents (
+    id              INTEGER PRIMARY KEY,
+    correlation_key TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    first_seen_ts   INTEGER NOT NULL,
+    resolved_ts     INTEGER,
+    archived_ts     INTEGER,
+    doc             TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS incidents_active_key
+    ON incidents (correlation_key) WHERE archived_ts IS NULL;
+CREATE INDEX IF NOT EXISTS incidents_archived
+    ON incidents (archived_ts, id) WHERE archived_ts IS NOT NULL;
+CREATE TABLE IF NOT EXISTS attempts (
+    id          INTEGER PRIMARY KEY,
+    incident_id INTEGER NOT NULL REFERENCES incidents (id) ON DELETE CASCADE,
+    ts          INTEGER NOT NULL,
+    action      TEXT,
+    counted     INTEGER NOT NULL,
+    doc         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_incident ON attempts (incident_id);
+CREATE INDEX IF NOT EXISTS attempts_counted_ts ON attempts (ts) WHERE counted;
+CREATE TABLE IF NOT EXISTS cooldowns (
+    name     TEXT PRIMARY KEY,
+    until_ts INTEGER NOT NULL,
+    reason   TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class StateStore:
+    """Incident state in one SQLite database in WAL mode.
+
+    incidents holds one row per incident: active ones (archived_ts NULL) are
+    unique by correlation_key, archived ones are the history. The row's doc
+    column is the incident dict minus its attempts; status and timestamps are
+    copied into columns for the sweep and the report. attempts holds one row
+    per remediation attempt, with the breaker's "was this a real action"
+    decision precomputed in `counted`. cooldowns maps a name to the unix time
+    it lifts.
+
+    Incidents come back as the same dicts the daemon always used (attempts
+    included), so the decision logic is unchanged; writes go row by row.
+
+    Durability is split by what a lost write costs. Incident rows commit with
+    synchronous=NORMAL: under WAL a crash can only lose the newest commits,
+    never corrupt the database, and a lost status update is re-derived from
+    the next webhook. That is what lets a storm of webhooks through without
+    one fsync each. Attempts and cooldowns are the circuit breaker's memory
+    -- losing one after a power cut would let the daemon restart a service
+    it had already given up on -- so they commit in durable transactions
+    (synchronous=FULL). They are written once per remediation, not per
+    webhook, so the extra fsync is off the hot path.
+    """
+
+    def __init__(self, path, history_max=None, history_max_age_s=None):
+        self.path = str(path)
+        self.history_max = HISTORY_MAX if history_max is None else history_max
+        self.history_max_age_s = (HISTORY_MAX_AGE_S if history_max_age_s is None
+                                  else history_max_age_s)
+        pathlib.Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._durable = False
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @contextlib.contextmanager
+    def transaction(self, durable=False):
+        """One write transaction; nested use joins the outer one.
+
+        durable=True commits with synchronous=FULL. SQLite only changes the
+        level between transactions, so a durable write nested in a plain
+        transaction is an error rather than silently not durable.
+        """
+        with self._lock:
+            if self._db.in_transaction:
+                if durable and not self._durable:
+                    raise RuntimeError("durable write inside a non-durable transaction")
+                yield self._db
+                return
+            if durable:
+                self._db.execute("PRAGMA synchronous=FULL")
+            self._durable = durable
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    yield self._db
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+                self._db.execute("COMMIT")
+            finally:
+                self._durable = False
+                if durable:
+                    self._db.execute("PRAGMA synchronous=NORMAL")
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    # ---- incidents ----
+
+    def _attempts(self, incident_ids):
+        out = {i: [] for i in incident_ids}
+        if not out:
+            return out
+        marks = ",".join("?" * len(out))
+        for incident_id, doc in self._query(
+                f"SELECT incident_id, doc FROM attempts WHERE incident_id IN ({marks}) "
+                "ORDER BY id", tuple(out)):
+            out[incident_id].append(json.loads(doc))
+        return out
+
+    def _incidents(self, rows):
+        attempts = self._attempts([r[0] for r in rows])
+        out = []
+        for incident_id, key, doc in rows:
+            inc = json.loads(doc)
+            inc["attempts"] = attempts[incident_id]
+            out.append((key, inc))
+        return out
+
+    def get_active(self, key):
+        """The active incident for correlation key, or None."""
+        rows = self._query("SELECT id, correlation_key, doc FROM incidents "
+                           "WHERE correlation_key = ? AND archived_ts IS NULL", (key,))
+        return self._incidents(rows)[0][1] if rows else None
+
+    def active(self):
+        """All active incidents as {correlation_key: incident}."""
+        rows = self._query("SELECT id, correlation_key, doc FROM incidents "
+                           "WHERE archived_ts IS NULL ORDER BY id")
+        return dict(self._incidents(rows))
+
+    def history(self):
+        """Archived incidents, oldest first."""
+        rows = self._query("SELECT id, correlation_key, doc FROM incidents "
+                           "WHERE archived_ts IS NOT NULL ORDER BY archived_ts, id")
+        return [inc for _, inc in self._incidents(rows)]
+
+    def status_counts(self):
+        """{status: count} over active incidents."""
+        return dict(self._query("SELECT status, COUNT(*) FROM incidents "
+                                "WHERE archived_ts IS NULL GROUP BY status"))
+
+    def put(self, key, incident):
+        """Insert or update the active incident for key (not its attempts)."""
+        doc = {k: v for k, v in incident.items() if k != "attempts"}
+        cols = (incident.get("status") or "", int(incident.get("first_seen_ts") or 0),
+                incident.get("resolved_ts"), json.dumps(doc))
+        with self.transaction() as db:
+            cur = db.execute("UPDATE incidents SET status = ?, first_seen_ts = ?, "
+                             "resolved_ts = ?, doc = ? "
+                             "WHERE correlation_key = ? AND archived_ts IS NULL",
+                             cols + (key,))
+            if cur.rowcount == 0:
+                db.execute("INSERT INTO incidents (status, first_seen_ts, resolved_ts, doc, "
+                           "correlation_key) VALUES (?, ?, ?, ?, ?)", cols + (key,))
+
+    def add_attempt(self, key, attempt):
+        """Record one attempt against the active incident for key."""
+        with self.transaction(durable=True) as db:
+            row = db.execute("SELECT id FROM incidents "
+                             "WHERE correlation_key = ? AND archived_ts IS NULL",
+                             (key,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+            self._insert_attempt(db, row[0], attempt)
+
+    @staticmethod
+    def _insert_attempt(db, incident_id, attempt):
+        db.execute("INSERT INTO attempts (incident_id, ts, action, counted, doc) "
+                   "VALUES (?, ?, ?, ?, ?)",
+                   (incident_id, int(attempt.get("ts") or 0), attempt.get("action"),
+                    int(_counts_toward_breaker(attempt)), json.dumps(attempt)))
+
+    def sweep_resolved(self, now):
+        """Archive resolved incidents older than RESOLVED_RETENTION_S, then
+        prune history to the retention limits. Returns the number archived."""
+        with self.transaction() as db:
+            archived = db.execute(
+                "UPDATE incidents SET archived_ts = ? WHERE archived_ts IS NULL "
+                "AND status = 'resolved' AND COALESCE(NULLIF(resolved_ts, 0), "
+                "first_seen_ts) <= ?",
+                (now, now - RESOLVED_RETENTION_S)).rowcount
+            if archived:
+                self._prune_history(db, now)
+        return archived
+
+    def prune_history(self, now):
+        """Drop archived incidents beyond the retention limits."""
+        with self.transaction() as db:
+            self._prune_history(db, now)
+
+    def _prune_history(self, db, now):
+        db.execute("DELETE FROM incidents WHERE archived_ts IS NOT NULL AND "
+                   "(archived_ts < ? OR id IN (SELECT id FROM incidents "
+                   "WHERE archived_ts IS NOT NULL ORDER BY archived_ts DESC, id DESC "
+                   "LIMIT -1 OFFSET ?))",
+                   (now - self.history_max_age_s, self.history_max))
+
+    # ---- attempts ----
+
+    def count_attempts_since(self, since_ts):
+        """Counted attempts with ts > since_ts."""
+        return self._query("SELECT COUNT(*) FROM attempts WHERE counted AND ts > ?",
+                           (since_ts,))[0][0]
+
+    def nth_latest_attempt_ts(self, n):
+        """ts of the n-th most recent counted attempt (0 if there are fewer)."""
+        rows = self._query("SELECT ts FROM attempts WHERE counted "
+                           "ORDER BY ts DESC LIMIT 1 OFFSET ?", (n - 1,))
+        return rows[0][0] if rows else 0
+
+    def attempt_totals(self):
+        """({action: attempts}, gateway_unreachable attempts) over active+history."""
+        counts = dict(self._query("SELECT action, COUNT(*) FROM attempts GROUP BY action"))
+        unreachable = self._query(
+            "SELECT COUNT(*) FROM attempts "
+            "WHERE json_extract(doc, '$.notes') = 'gateway_unreachable'")[0][0]
+        return counts, unreachable
+
+    # ---- cooldowns ----
+
+    def cooldown_until(self, name):
+        rows = self._query("SELECT until_ts FROM cooldowns WHERE name = ?", (name,))
+        return rows[0][0] if rows else 0
+
+    def set_cooldown(self, name, until_ts, reason=None):
+        with self.transaction(durable=True) as db:
+            db.execute("INSERT INTO cooldowns (name, until_ts, reason) VALUES (?, ?, ?) "
+                       "ON CONFLICT (name) DO UPDATE SET until_ts = excluded.until_ts, "
+                       "reason = excluded.reason", (name, int(until_ts), reason))
+
+    # ---- migration ----
+
+    def import_state(self, state, now=None):
+        """Load a legacy {active, history} document into empty tables."""
+        now = int(time.time()) if now is None else int(now)
+        with self.transaction() as db:
+            def insert(key, inc, archived_ts):
+                doc = {k: v for k, v in inc.items() if k != "attempts"}
+                cur = db.execute(
+                    "INSERT INTO incidents (correlation_key, status, first_seen_ts, "
+                    "resolved_ts, archived_ts, doc) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, inc.get("status") or "", int(inc.get("first_seen_ts") or 0),
+                     inc.get("resolved_ts"), archived_ts, json.dumps(doc)))
+                for att in inc.get("attempts", []):
+                    self._insert_attempt(db, cur.lastrowid, att)
+
+            # History keeps its order: archived_ts is unknown, so stamp them
+            # with the import time and let the row id break the tie.
+            for inc in state.get("history", []):
+                insert("", inc, now)
+            for key, inc in state.get("active", {}).items():
+                insert(key, inc, None)
+
+    def get_meta(self, key):
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set_meta(self, key, value):
+        with self.transaction() as db:
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def migrate_json_state(store, json_path):
+    """One-shot import of a legacy incidents.json into store.
+
+    Runs only while the store has never been migrated and the file exists;
+    afterwards the file is renamed to *.migrated so a later start (or a
+    downgrade) cannot import it twice. Returns True if it imported.
+    """
+    p = pathlib.Path(json_path)
+    if store.get_meta("json_migrated") or not p.exists():
+        return False
+    state = load_state(p)
+    with store.transaction():
+        store.import_state(state)
+        store.set_meta("json_migrated", f"{p} at {int(time.time())}")
+    os.replace(p, p.with_name(p.name + ".migrated"))
+    print(f"migrated {len(state.get('active', {}))} active and "
+          f"{len(state.get('history', []))} archived incidents from {p}", flush=True)
+    return True
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def state_store(path=None):
+    """The process-wide StateStore for path (default STATE_DB)."""
+    path = str(path or STATE_DB)
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = StateStore(path)
+        return store
 
 
-def sweep_resolved(state, now=None):
+def sweep_resolved(store, now=None):
     """Archive aged-out resolved incidents from active -> history.
 
     Keeps the active working set bounded while preserving same-episode
     de-duplication for RESOLVED_RETENTION_S after an incident resolves.
-    history is capped at HISTORY_MAX (most-recent kept). The cumulative
-    hermes_self_heal_attempts_total counter is unaffected: heartbeat_loop
-    sums attempts across active + history, so moving an incident between
-    the two does not change the total. Returns the number archived.
+    History is pruned to HISTORY_MAX incidents and HISTORY_MAX_AGE_S. The
+    hermes_self_heal_attempts_total counter is unaffected by archiving:
+    heartbeat_tick counts attempts across active + history, so moving an
+    incident between the two does not change the total. Returns the number
+    archived.
     """
     now = int(time.time()) if now is None else int(now)
-    aged = [
-        k
-        for k, v in state["active"].items()
-        if v.get("status") == "resolved"
-        and now - int(v.get("resolved_ts") or v.get("first_seen_ts") or 0)
-        >= RESOLVED_RETENTION_S
-    ]
-    for k in aged:
-        state["history"].append(state["active"].pop(k))
-    if len(state["history"]) > HISTORY_MAX:
-        del state["history"][:-HISTORY_MAX]
-    return len(aged)
+    return store.sweep_resolved(now)
 
 
 # An incident interrupted mid-remediation is stranded forever otherwise:
 # resolution only happens via the post-action re-probe in
-# handle_alertmanager_payload (resolved webhooks are skipped), no future
+# handle_alert (resolved webhooks are skipped), no future
 # webhook matches its correlation key once vm_active_enter_ts changes, and
 # sweep_resolved only archives resolved incidents. Mirror of the openclaw
 # fix for the 2026-07-03 orphan (host reboot 14 s after a restart_microvm
@@ -247,7 +556,7 @@ def _last_activity_ts(incident) -> int:
     )
 
 
-def reconcile_orphans(state, now=None, vm_ts=None, probe=None):
+def reconcile_orphans(store, now=None, vm_ts=None, probe=None):
     """Resolve in_progress/stuck incidents the VM has provably restarted past.
 
     Conditions (all required):
@@ -256,9 +565,7 @@ def reconcile_orphans(state, now=None, vm_ts=None, probe=None):
       - the probe is clear — the same oracle the normal post-action
         resolution path uses, so this never fabricates health;
       - no incident activity within ORPHAN_MIN_QUIET_S, so an in-flight
-        remediation in the webhook thread is left alone. (A concurrent
-        webhook save can still overwrite a reconciliation; both
-        interleavings converge to resolved within the next tick.)
+        remediation in the webhook thread is left alone.
 
     A residual class stays open by design: an orphan whose VM never
     restarted afterwards (non-VM action interrupted, alert self-cleared)
@@ -272,7 +579,7 @@ def reconcile_orphans(state, now=None, vm_ts=None, probe=None):
     if vm_ts <= 0:
         return 0
     n = 0
-    for key, inc in state["active"].items():
+    for key, inc in store.active().items():
         if inc.get("status") not in ("in_progress", "stuck"):
             continue
         if int(inc.get("vm_active_enter_ts") or 0) == vm_ts:
@@ -292,6 +599,7 @@ def reconcile_orphans(state, now=None, vm_ts=None, probe=None):
         inc["status"] = "resolved"
         inc["resolved_ts"] = now
         inc["resolved_by"] = "orphan_reconcile"
+        store.put(key, inc)
         print(f"reconciled orphaned incident {key} "
               f"(was {inc['resolved_from_status']}, alerts={inc.get('alerts')}): "
               f"vm restarted past it and probe is clear", flush=True)
@@ -345,11 +653,49 @@ def redact(s: str) -> str:
 
 
 ACTIONS_DIR = "/etc/nixos/scripts/hermes-self-heal/actions"
-STATE_PATH = "/var/lib/hermes-self-heal/incidents.json"
+STATE_DB = "/var/lib/hermes-self-heal/state.db"
+# Pre-SQLite state file, imported into STATE_DB once by main().
+LEGACY_STATE_PATH = "/var/lib/hermes-self-heal/incidents.json"
 AUX_DIR = "/etc/nixos/scripts/hermes-self-heal/aux"
 HERMES_HEALTH_PROM = "/var/lib/prometheus-node-exporter-textfiles/hermes_health.prom"
 
+# How long a probe result is shared. A webhook burst (and the heartbeat's
+# reconcile landing in the middle of it) then reads the textfile and forks
+# systemctl once rather than once per alert. Well under the 15 s post-action
+# settle, so a remediation's own verification always sees a fresh read.
+PROBE_CACHE_S = 5.0
+_PROBE_CACHES = []
+
+
+def _probe_cached(fn):
+    """Memoize fn(*args) for PROBE_CACHE_S; concurrent callers share one call.
+
+    Results are shared between callers and must be treated as read-only.
+    """
+    lock = threading.Lock()
+    memo = {}
+
+    @functools.wraps(fn)
+    def cached(*args):
+        with lock:
+            hit = memo.get(args)
+            now = time.monotonic()
+            if hit is not None and now - hit[0] < PROBE_CACHE_S:
+                return hit[1]
+            value = fn(*args)
+            memo[args] = (now, value)
+            return value
+
+    _PROBE_CACHES.append(memo)
+    return cached
 
+
+def clear_probe_cache():
+    for memo in _PROBE_CACHES:
+        memo.clear()
+
+
+@_probe_cached
 def current_metrics():
     """Read freshest values from prom textfile collector."""
     out = {}
@@ -457,10 +803,11 @@ def probe_clear(incident, not_before: float = 0.0) -> bool:
     return True
 
 
+@_probe_cached
 def microvm_active_enter_ts(unit: str = "microvm@hermes.service") -> int:
     """Return the unix timestamp of the unit's last ActiveEnter, or 0 on error.
 
-    Used by handle_alertmanager_payload() to stamp each incident's
+    Used by handle_alert() to stamp each incident's
     vm_active_enter_ts, and by reconcile_orphans() to tell that the VM has
     restarted past a stranded incident. correlation_key() deliberately does
     NOT key on it any more — see its docstring. The Hermes-side equivalent of
@@ -636,99 +983,164 @@ def render_prompt(incident, metrics, err_log_tail, out_log_tail):
     ]
 
 
-def handle_alertmanager_payload(payload):
-    """Serialize the whole load -> mutate -> save under one lock.
-
-    The lock is held for the entire handler, including run_action and its
-    post-action settle, so two overlapping Alertmanager POSTs queue instead of
-    interleaving. That is the intended semantics rather than a cost: the circuit
-    breaker counts attempts across incidents, and it can only be trusted if no
-    two handlers can read the same budget and both act on it. A long remediation
-    therefore also delays heartbeat_tick's orphan reconcile until it finishes,
-    which is acceptable -- that pass is idempotent and runs every 60s.
-    """
-    with state_lock(STATE_PATH):
-        return _handle_alertmanager_payload_locked(payload)
+def _alert_meta(a) -> dict:
+    from datetime import datetime
+    return {
+        "alert_name": a["labels"]["alertname"],
+        "starts_at":  int(datetime.fromisoformat(a["startsAt"].replace("Z", "+00:00")).timestamp()),
+    }
 
 
-def _handle_alertmanager_payload_locked(payload):
-    from datetime import datetime
-    state = load_state(STATE_PATH)
-    if sweep_resolved(state):
-        save_state(STATE_PATH, state)
-    metrics = current_metrics()
-    vm_ts = microvm_active_enter_ts()  # NOT from metrics — Hermes has no canary producer
+def _known_firing(payload):
+    """The firing alerts of a webhook that have a remediation, in order.
+
+    Explicit ignore on unknown alerts -- no default remediation exists.
+    """
     for a in payload.get("alerts", []):
         if a.get("status") != "firing":
             continue
         alert_name = a["labels"]["alertname"]
-
-        # Explicit ignore on unknown alerts — no default remediation exists.
         if alert_name not in ACTION_MAP:
             _bump_unknown_counter()
             print(f"ignoring unknown alert: {alert_name}", flush=True)
             continue
+        yield a
 
-        alert_meta = {
-            "alert_name":         alert_name,
-            "vm_active_enter_ts": vm_ts,
-            "starts_at":          int(datetime.fromisoformat(a["startsAt"].replace("Z", "+00:00")).timestamp()),
-        }
-        key = correlation_key(alert_meta)
-        inc = state["active"].get(key) or new_incident(alert_meta)
-        state["active"][key] = inc
-        if inc["status"] != "in_progress":
-            continue
-        # Circuit breaker: refuse to act once the rolling-window remediation
-        # budget is spent, regardless of how incidents correlate. This is the
-        # bound the per-incident attempt counter cannot provide when the
-        # remediation resolves the alert before the next attempt arrives
-        # (see recent_action_count).
-        if recent_action_count(state) >= CIRCUIT_MAX_ATTEMPTS:
-            inc["status"] = "stuck"
-            inc["stuck_ts"] = int(time.time())
-            inc["stuck_reason"] = "circuit_breaker"
-            save_state(STATE_PATH, state)
-            continue
+
+def handle_alertmanager_payload(payload):
+    """Run every firing alert of one webhook to completion, in this thread.
+
+    The HTTP path does not call this -- it hands alerts to the executor and
+    acknowledges at once -- but it is the same per-alert work, and the tests
+    drive it directly.
+    """
+    for a in _known_firing(payload):
+        handle_alert(a)
+
+
+# Remediations that have passed the breaker but are not recorded yet. They
+# count against the budget (see circuit_open) so that deciding can happen
+# under the state lock while the action itself runs outside it.
+_ACTIONS_PENDING = 0
+
+# Global limit on remediations in flight. Held through the post-action settle
+# and probe as well, so one action's verification is never muddied by another
+# restart starting underneath it.
+ACTION_CONCURRENCY = int(os.environ.get("SELF_HEAL_ACTION_CONCURRENCY", "1"))
+_ACTION_SLOTS = threading.BoundedSemaphore(ACTION_CONCURRENCY)
+
+
+def _still_in_progress(store, key):
+    """Re-read an incident after the lock was dropped; None once it moved on.
+
+    heartbeat_tick's reconcile may have resolved it in the meantime.
+    """
+    inc = store.get_active(key)
+    return inc if inc is not None and inc["status"] == "in_progress" else None
+
+
+def _breaker_allows(store, key, inc) -> bool:
+    """Circuit breaker: refuse to act once the rolling-window remediation
+    budget is spent, regardless of how incidents correlate. This is the
+    bound the per-incident attempt counter cannot provide when the
+    remediation resolves the alert before the next attempt arrives
+    (see recent_action_count). Call with the state lock held."""
+    if not circuit_open(store, pending=_ACTIONS_PENDING):
+        return True
+    inc["status"] = "stuck"
+    inc["stuck_ts"] = int(time.time())
+    inc["stuck_reason"] = "circuit_breaker"
+    store.put(key, inc)
+    return False
+
+
+def handle_alert(a):
+    """decide -> (ask the AI) -> act -> verify for one firing, known alert.
+
+    Only the decisions take the state lock; the AI call, run_action and the
+    post-action settle run outside it, so a long remediation no longer holds up
+    other incidents' bookkeeping or heartbeat_tick. The breaker stays exact
+    because passing it reserves a slot in _ACTIONS_PENDING, under the lock,
+    before the lock is released. Calls for one correlation key must not
+    overlap -- the executor guarantees that.
+    """
+    global _ACTIONS_PENDING
+    alert_meta = _alert_meta(a)
+    key = correlation_key(alert_meta)
+    with state_lock():
+        store = state_store()
+        sweep_resolved(store)
+        inc = store.get_active(key)
+        if inc is None:
+            # NOT from metrics -- Hermes has no canary producer.
+            alert_meta["vm_active_enter_ts"] = microvm_active_enter_ts()
+            inc = new_incident(alert_meta)
+            store.put(key, inc)
+        if inc["status"] != "in_progress" or not _breaker_allows(store, key, inc):
+            return
         n = next_attempt_n(inc)
-        ai_reason = None
-        if n == 1:
-            action = ACTION_MAP[alert_name]  # membership validated above; satisfies type checker
-            by = "deterministic"
-        elif n in (2, 3):
-            try:
-                ai_resp = call_litellm(render_prompt(inc, metrics, _err_tail(), _out_tail()))
-            except GatewayUnreachable as e:
-                inc["attempts"].append({"action": "none", "by": "ai", "ok": False,
-                                        "notes": "gateway_unreachable", "stderr": str(e)})
-                emit_synthetic_alert(
-                    "HermesSelfHealGatewayUnreachable",
-                    {"alert": alert_meta["alert_name"], "err": str(e)[:200]},
-                    severity="warning", duration_s=3600,
-                )
-                inc["status"] = "stuck"
-                save_state(STATE_PATH, state)
-                continue
-            if ai_resp.get("action") == "escalate":
-                inc["status"] = "stuck"
-                save_state(STATE_PATH, state)
-                continue
-            try:
-                action = validate_action(ai_resp["action"])
-            except (ActionRejectedError, KeyError):
-                inc["status"] = "stuck"
-                save_state(STATE_PATH, state)
-                continue
-            by = "ai"
-            ai_reason = ai_resp.get("reason")
-        else:
+        if n > 3:
             inc["status"] = "stuck"
-            save_state(STATE_PATH, state)
-            continue
-        result = run_action(action)
-        inc["attempts"].append({"ts": int(time.time()), "action": action, "by": by,
-                                "ai_reason": ai_reason, **result})
-        save_state(STATE_PATH, state)
+            store.put(key, inc)
+            return
+
+    ai_reason = None
+    if n == 1:
+        action = ACTION_MAP[alert_meta["alert_name"]]  # membership validated by _known_firing
+        by = "deterministic"
+    else:
+        try:
+            ai_resp = call_litellm(render_prompt(inc, current_metrics(), _err_tail(), _out_tail()))
+        except GatewayUnreachable as e:
+            attempt = {"action": "none", "by": "ai", "ok": False,
+                       "notes": "gateway_unreachable", "stderr": str(e)}
+            emit_synthetic_alert(
+                "HermesSelfHealGatewayUnreachable",
+                {"alert": alert_meta["alert_name"], "err": str(e)[:200]},
+                severity="warning", duration_s=3600,
+            )
+            with state_lock():
+                inc = _still_in_progress(store, key)
+                if inc is not None:
+                    inc["attempts"].append(attempt)
+                    inc["status"] = "stuck"
+                    with store.transaction(durable=True):
+                        store.add_attempt(key, attempt)
+                        store.put(key, inc)
+            return
+        try:
+            action = None if ai_resp.get("action") == "escalate" else validate_action(ai_resp["action"])
+        except (ActionRejectedError, KeyError):
+            action = None
+        if action is None:
+            with state_lock():
+                inc = _still_in_progress(store, key)
+                if inc is not None:
+                    inc["status"] = "stuck"
+                    store.put(key, inc)
+            return
+        by = "ai"
+        ai_reason = ai_resp.get("reason")
+
+    with state_lock():
+        inc = _still_in_progress(store, key)
+        if inc is None or not _breaker_allows(store, key, inc):
+            return
+        _ACTIONS_PENDING += 1
+    with _ACTION_SLOTS:
+        result = None
+        try:
+            result = run_action(action)
+        finally:
+            # Record and release the reservation in one step, so the breaker
+            # never sees the action as neither pending nor recorded.
+            with state_lock():
+                _ACTIONS_PENDING -= 1
+                if result is not None:
+                    attempt = {"ts": int(time.time()), "action": action, "by": by,
+                               "ai_reason": ai_reason, **result}
+                    inc["attempts"].append(attempt)
+                    store.add_attempt(key, attempt)
         emit_synthetic_alert("HermesSelfHealActed",
             {"action": action, "alert": alert_meta["alert_name"], "by": by,
              "ok": result.get("ok")})
@@ -739,10 +1151,104 @@ def _handle_alertmanager_payload_locked(payload):
         acted_ts = time.time()
         _kick_health_check()
         time.sleep(15)
-        if probe_clear(inc, not_before=acted_ts):
-            inc["status"] = "resolved"
-            inc["resolved_ts"] = int(time.time())
-        save_state(STATE_PATH, state)
+        clear = probe_clear(inc, not_before=acted_ts)
+    if clear:
+        with state_lock():
+            inc = _still_in_progress(store, key)
+            if inc is not None:
+                inc["status"] = "resolved"
+                inc["resolved_ts"] = int(time.time())
+                store.put(key, inc)
+
+
+class AlertExecutor:
+    """Bounded intake queue plus worker pool for handle_alert.
+
+    submit() only parses and enqueues, so Alertmanager gets its 200 at once
+    however long remediation takes. Work is keyed by correlation_key: a key
+    holds at most one queued alert (a repeat while queued is coalesced into it)
+    and at most one worker, so an incident's attempts stay strictly ordered
+    while different incidents proceed in parallel up to `workers`. A repeat
+    that arrives while its key is running waits behind it, which is exactly the
+    "next attempt" the serial handler used to make. When `queue_max` distinct
+    keys are already waiting, new ones are dropped and counted.
+    """
+
+    def __init__(self, handle=None, workers=4, queue_max=256):
+        self._handle = handle or handle_alert
+        self.workers = workers
+        self.queue_max = queue_max
+        self._cv = threading.Condition()
+        self._queued = {}        # key -> newest alert, in arrival order
+        self._running = set()
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"self-heal-worker-{i}",
+                             daemon=True).start()
+        return self
+
+    def submit(self, payload) -> int:
+        """Enqueue a webhook's alerts; returns how many were accepted."""
+        accepted = 0
+        for a in _known_firing(payload):
+            key = correlation_key(_alert_meta(a))
+            with self._cv:
+                self.received += 1
+                if key in self._queued:
+                    self._queued[key] = a
+                    self.coalesced += 1
+                elif len(self._queued) >= self.queue_max:
+                    self.dropped += 1
+                    print(f"intake queue full, dropping {a['labels']['alertname']}", flush=True)
+                    continue
+                else:
+                    self._queued[key] = a
+                    self._cv.notify()
+            accepted += 1
+        return accepted
+
+    def _next(self):
+        with self._cv:
+            while True:
+                key = next((k for k in self._queued if k not in self._running), None)
+                if key is not None:
+                    self._running.add(key)
+                    return key, self._queued.pop(key)
+                self._cv.wait()
+
+    def _work(self):
+        while True:
+            key, alert = self._next()
+            try:
+                self._handle(alert)
+            except Exception as e:
+                with self._cv:
+                    self.failed += 1
+                print(f"alert handler error: {e!r}", flush=True)
+            finally:
+                with self._cv:
+                    self._running.discard(key)
+                    self._cv.notify_all()
+
+    def join(self, timeout=None) -> bool:
+        """Wait until nothing is queued or running; False on timeout."""
+        with self._cv:
+            return self._cv.wait_for(lambda: not self._queued and not self._running,
+                                     timeout)
+
+    def stats(self) -> dict:
+        with self._cv:
+            return {"queued": len(self._queued), "running": len(self._running),
+                    "received": self.received, "coalesced": self.coalesced,
+                    "dropped": self.dropped, "failed": self.failed}
+
+
+EXECUTOR = None
 
 
 _UNKNOWN_ALERTS_TOTAL = 0
@@ -758,8 +1264,9 @@ HEARTBEAT_PATH = pathlib.Path(TEXTFILE_DIR) / "hermes_self_heal.prom"
 
 
 def write_heartbeat(out_path=HEARTBEAT_PATH, active_count=0, stuck_count=0, action_counts=None,
-                    gateway_unreachable=0, unknown_alerts=0):
+                    gateway_unreachable=0, unknown_alerts=0, intake=None, actions_in_flight=0):
     action_counts = action_counts or {}
+    intake = intake or {}
     tmp = pathlib.Path(str(out_path) + ".tmp")
     tmp.parent.mkdir(parents=True, exist_ok=True)
     with tmp.open("w") as f:
@@ -785,45 +1292,63 @@ def write_heartbeat(out_path=HEARTBEAT_PATH, active_count=0, stuck_count=0, acti
             "# HELP hermes_self_heal_unknown_alerts_total Cumulative unknown-alert ignore events\n"
             "# TYPE hermes_self_heal_unknown_alerts_total counter\n"
             f"hermes_self_heal_unknown_alerts_total {unknown_alerts}\n"
+            "# HELP hermes_self_heal_queue_depth Alerts waiting for an executor worker (one per incident)\n"
+            "# TYPE hermes_self_heal_queue_depth gauge\n"
+            f"hermes_self_heal_queue_depth {intake.get('queued', 0)}\n"
+            "# HELP hermes_self_heal_workers_busy Executor workers currently handling an alert\n"
+            "# TYPE hermes_self_heal_workers_busy gauge\n"
+            f"hermes_self_heal_workers_busy {intake.get('running', 0)}\n"
+            "# HELP hermes_self_heal_actions_in_flight Remediations cleared by the breaker and not yet recorded\n"
+            "# TYPE hermes_self_heal_actions_in_flight gauge\n"
+            f"hermes_self_heal_actions_in_flight {actions_in_flight}\n"
+            "# HELP hermes_self_heal_intake_alerts_total Cumulative firing alerts received, by outcome\n"
+            "# TYPE hermes_self_heal_intake_alerts_total counter\n"
+        )
+        received = intake.get("received", 0)
+        coalesced = intake.get("coalesced", 0)
+        dropped = intake.get("dropped", 0)
+        for outcome, v in (("queued", received - coalesced - dropped),
+                           ("coalesced", coalesced), ("dropped", dropped)):
+            f.write(f'hermes_self_heal_intake_alerts_total{{outcome="{outcome}"}} {v}\n')
+        f.write(
+            "# HELP hermes_self_heal_handler_errors_total Cumulative alert handler exceptions\n"
+            "# TYPE hermes_self_heal_handler_errors_total counter\n"
+            f"hermes_self_heal_handler_errors_total {intake.get('failed', 0)}\n"
         )
     os.replace(tmp, out_path)
 
 
-import threading
-
-
 def heartbeat_tick():
-    """Locked wrapper -- see handle_alertmanager_payload."""
-    with state_lock(STATE_PATH):
+    """Locked wrapper -- see the comment on _STATE_LOCK."""
+    with state_lock():
         return _heartbeat_tick_locked()
 
 
 def _heartbeat_tick_locked():
-    state = load_state(STATE_PATH)
-    # State maintenance must run here, not only in handle_alertmanager_payload:
+    store = state_store()
+    now = int(time.time())
+    # State maintenance must run here, not only in handle_alert:
     # with no incoming hermes alerts nothing else ever reconciles orphans or
-    # archives aged resolved incidents.
-    if reconcile_orphans(state) + sweep_resolved(state):
-        save_state(STATE_PATH, state)
-    active = sum(1 for v in state["active"].values() if v["status"] == "in_progress")
+    # archives aged resolved incidents, and history only ages out here.
+    reconcile_orphans(store, now=now)
+    sweep_resolved(store, now=now)
+    store.prune_history(now)
+    statuses = store.status_counts()
+    active = statuses.get("in_progress", 0)
     # Counted separately from `active` because they are different conditions and
     # used to share one alertname. `active` is "remediation still running";
     # `stuck` is "the daemon gave up". The old synthetic push was the ONLY
     # producer for the stuck case -- the gauge below never covered it, since a
     # stuck incident is no longer in_progress -- so emitting it is what lets the
     # Prometheus rule become the single producer without losing the signal.
-    stuck = sum(1 for v in state["active"].values() if v["status"] == "stuck")
-    counts = {a: 0 for a in ACTION_ALLOWLIST}
-    gateway_unreachable = 0
-    for inc in list(state["active"].values()) + state["history"]:
-        for att in inc.get("attempts", []):
-            if att.get("action") in counts:
-                counts[att["action"]] += 1
-            if att.get("notes") == "gateway_unreachable":
-                gateway_unreachable += 1
+    stuck = statuses.get("stuck", 0)
+    totals, gateway_unreachable = store.attempt_totals()
+    counts = {a: totals.get(a, 0) for a in ACTION_ALLOWLIST}
     write_heartbeat(active_count=active, stuck_count=stuck, action_counts=counts,
                     gateway_unreachable=gateway_unreachable,
-                    unknown_alerts=_UNKNOWN_ALERTS_TOTAL)
+                    unknown_alerts=_UNKNOWN_ALERTS_TOTAL,
+                    intake=EXECUTOR.stats() if EXECUTOR is not None else None,
+                    actions_in_flight=_ACTIONS_PENDING)
 
 
 def heartbeat_loop():
@@ -848,10 +1373,18 @@ class Handler(BaseHTTPRequestHandler):
         body = self.rfile.read(n)
         try:
             payload = json.loads(body)
-            handle_alertmanager_payload(payload)
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            self.wfile.write(b'{"ok":false,"err":"bad json"}\n')
+            return
+        try:
+            # Acknowledge as soon as the alerts are queued; remediation runs on
+            # the executor's workers, not on this request thread.
+            queued = EXECUTOR.submit(payload)
             self.send_response(200)
             self.end_headers()
-            self.wfile.write(b'{"ok":true}\n')
+            self.wfile.write(json.dumps({"ok": True, "queued": queued}).encode() + b"\n")
         except Exception as e:
             print(f"do_POST error: {e!r}", flush=True)
             self.send_response(500)
@@ -863,6 +1396,12 @@ class Handler(BaseHTTPRequestHandler):
 
 
 def main():
+    global EXECUTOR
+    migrate_json_state(state_store(), LEGACY_STATE_PATH)
+    EXECUTOR = AlertExecutor(
+        workers=int(os.environ.get("SELF_HEAL_WORKERS", "4")),
+        queue_max=int(os.environ.get("SELF_HEAL_QUEUE_MAX", "256")),
+    ).start()
     threading.Thread(target=heartbeat_loop, daemon=True).start()
     srv = ThreadingHTTPServer(("127.0.0.1", WEBHOOK_PORT), Handler)
     print(f"hermes-self-heal listening on 127.0.0.1:{WEBHOOK_PORT}", flush=True)
@@ -2,4 +2,16 @@
 import sys
 import pathlib
 
+import pytest
+
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture(autouse=True)
+def fresh_probe_cache():
+    """current_metrics/microvm_active_enter_ts memoize for a few seconds;
+    each test must see its own fixture files and stubs."""
+    import daemon
+    daemon.clear_probe_cache()
+    yield
+    daemon.clear_probe_cache()
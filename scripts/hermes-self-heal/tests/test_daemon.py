@@ -1,4 +1,5 @@
 import daemon
+import json
 import time
 
 import pytest
@@ -88,11 +89,56 @@ def test_should_escalate_after_three_attempts():
     assert daemon.should_escalate(inc)
 
 
+def _store(tmp_path, state=None, now=None):
+    """A fresh StateStore seeded with a legacy {active, history} document."""
+    store = daemon.StateStore(tmp_path / "state.db")
+    if state:
+        store.import_state(state, now=now)
+    return store
+
+
 def test_state_round_trip(tmp_path):
-    state = {"active": {"k": {"status": "in_progress", "attempts": []}}, "history": []}
-    p = tmp_path / "incidents.json"
-    daemon.save_state(p, state)
-    assert daemon.load_state(p) == state
+    state = {"active": {"k": {"status": "in_progress", "attempts": [{"ts": 5, "ok": True}]}},
+             "history": [{"status": "resolved", "first_seen_ts": 1, "attempts": []}]}
+    store = _store(tmp_path, state)
+    assert store.active() == state["active"]
+    assert store.history() == state["history"]
+    reopened = daemon.StateStore(tmp_path / "state.db")
+    assert reopened.active() == state["active"]
+
+
+def test_state_db_is_wal(tmp_path):
+    store = _store(tmp_path)
+    assert store._query("PRAGMA journal_mode")[0][0] == "wal"
+
+
+def test_put_updates_the_active_row_in_place(tmp_path):
+    store = _store(tmp_path)
+    inc = daemon.new_incident({"alert_name": "HermesApiServerDown"})
+    store.put("k", inc)
+    inc["status"] = "stuck"
+    store.put("k", inc)
+    assert store.status_counts() == {"stuck": 1}
+    store.add_attempt("k", {"ts": 7, "action": "restart_mcp"})
+    assert store.get_active("k")["attempts"] == [{"ts": 7, "action": "restart_mcp"}]
+    assert store.get_active("other") is None
+
+
+def test_migrate_json_state_imports_once(tmp_path):
+    legacy = tmp_path / "incidents.json"
+    legacy.write_text(json.dumps({
+        "active": {"k": {"status": "stuck", "first_seen_ts": 10, "alerts": ["A"],
+                         "attempts": [{"ts": 11, "action": "restart_mcp"}]}},
+        "history": [{"status": "resolved", "first_seen_ts": 1, "attempts": []}]}))
+    store = _store(tmp_path)
+    assert daemon.migrate_json_state(store, legacy) is True
+    assert not legacy.exists() and (tmp_path / "incidents.json.migrated").exists()
+    assert store.active()["k"]["attempts"] == [{"ts": 11, "action": "restart_mcp"}]
+    assert len(store.history()) == 1
+    # A stray file reappearing later is not imported a second time.
+    legacy.write_text(json.dumps({"active": {"x": {"status": "stuck"}}, "history": []}))
+    assert daemon.migrate_json_state(store, legacy) is False
+    assert set(store.active()) == {"k"}
 
 
 def test_load_state_returns_empty_when_file_missing(tmp_path):
@@ -289,6 +335,27 @@ def test_current_metrics_returns_empty_when_missing(monkeypatch, tmp_path):
     assert daemon.current_metrics() == {}
 
 
+def test_probes_are_shared_for_a_few_seconds(monkeypatch, tmp_path):
+    """A webhook burst reads the textfile and forks systemctl once."""
+    metrics_file = tmp_path / "hermes_health.prom"
+    metrics_file.write_text("hermes_api_server_ok 1\n")
+    monkeypatch.setattr(daemon, "HERMES_HEALTH_PROM", str(metrics_file))
+    forks = []
+    monkeypatch.setattr(daemon.subprocess, "check_output",
+                        lambda *a, **kw: forks.append(a) or "n/a")
+    assert daemon.current_metrics() == {"hermes_api_server_ok": 1.0}
+    metrics_file.write_text("hermes_api_server_ok 0\n")
+    assert daemon.current_metrics() == {"hermes_api_server_ok": 1.0}
+    for _ in range(5):
+        daemon.microvm_active_enter_ts()
+    assert len(forks) == 1
+
+    monkeypatch.setattr(daemon, "PROBE_CACHE_S", 0.0)
+    assert daemon.current_metrics() == {"hermes_api_server_ok": 0.0}
+    daemon.microvm_active_enter_ts()
+    assert len(forks) == 2
+
+
 def _healthy_metrics(**over):
     """Metrics that satisfy the PASSIVE oracle: api_server up, file fresh."""
     m = {"hermes_api_server_ok": 1.0,
@@ -442,85 +509,105 @@ def _resolved_inc(resolved_ts, attempts=None):
     }
 
 
-def test_sweep_resolved_archives_aged_resolved():
+def test_sweep_resolved_archives_aged_resolved(tmp_path):
     now = 1_000_000
-    state = {"active": {"k1": _resolved_inc(now - daemon.RESOLVED_RETENTION_S - 1)},
-             "history": []}
-    assert daemon.sweep_resolved(state, now=now) == 1
-    assert "k1" not in state["active"]
-    assert len(state["history"]) == 1
-    assert state["history"][0]["status"] == "resolved"
+    store = _store(tmp_path, {
+        "active": {"k1": _resolved_inc(now - daemon.RESOLVED_RETENTION_S - 1)},
+        "history": []})
+    assert daemon.sweep_resolved(store, now=now) == 1
+    assert "k1" not in store.active()
+    assert len(store.history()) == 1
+    assert store.history()[0]["status"] == "resolved"
 
 
-def test_sweep_resolved_retains_recent_resolved_for_dedup():
+def test_sweep_resolved_retains_recent_resolved_for_dedup(tmp_path):
     """A just-resolved incident stays in active so repeat sends of the same
     firing episode (same correlation key) are de-duped, not re-triggered."""
     now = 1_000_000
-    state = {"active": {"k1": _resolved_inc(now - 60)}, "history": []}
-    assert daemon.sweep_resolved(state, now=now) == 0
-    assert "k1" in state["active"]
-    assert state["history"] == []
+    store = _store(tmp_path, {"active": {"k1": _resolved_inc(now - 60)}, "history": []})
+    assert daemon.sweep_resolved(store, now=now) == 0
+    assert "k1" in store.active()
+    assert store.history() == []
 
 
-def test_sweep_resolved_never_archives_in_progress_or_stuck():
+def test_sweep_resolved_never_archives_in_progress_or_stuck(tmp_path):
     now = 1_000_000
     old = now - daemon.RESOLVED_RETENTION_S - 1
-    state = {
+    store = _store(tmp_path, {
         "active": {
             "ip": {"status": "in_progress", "first_seen_ts": old, "attempts": []},
             "st": {"status": "stuck", "first_seen_ts": old, "attempts": []},
         },
         "history": [],
-    }
-    assert daemon.sweep_resolved(state, now=now) == 0
-    assert set(state["active"]) == {"ip", "st"}
-    assert state["history"] == []
+    })
+    assert daemon.sweep_resolved(store, now=now) == 0
+    assert set(store.active()) == {"ip", "st"}
+    assert store.history() == []
 
 
-def test_sweep_resolved_falls_back_to_first_seen_ts_for_legacy():
+def test_sweep_resolved_falls_back_to_first_seen_ts_for_legacy(tmp_path):
     """Legacy resolved incidents (pre-fix) have no resolved_ts; age off first_seen_ts."""
     now = 1_000_000
     inc = {"status": "resolved",
            "first_seen_ts": now - daemon.RESOLVED_RETENTION_S - 1,
            "attempts": []}
-    state = {"active": {"legacy": inc}, "history": []}
-    assert daemon.sweep_resolved(state, now=now) == 1
-    assert "legacy" not in state["active"]
+    store = _store(tmp_path, {"active": {"legacy": inc}, "history": []})
+    assert daemon.sweep_resolved(store, now=now) == 1
+    assert "legacy" not in store.active()
 
 
-def test_sweep_resolved_caps_history():
+def test_sweep_resolved_caps_history(tmp_path):
     now = 1_000_000
     old = now - daemon.RESOLVED_RETENTION_S - 1
-    state = {
+    store = _store(tmp_path, {
         "active": {f"k{i}": _resolved_inc(old) for i in range(5)},
         "history": [{"status": "resolved", "attempts": []}
                     for _ in range(daemon.HISTORY_MAX)],
-    }
-    daemon.sweep_resolved(state, now=now)
-    assert len(state["history"]) == daemon.HISTORY_MAX
-    assert state["active"] == {}
+    }, now=old)
+    daemon.sweep_resolved(store, now=now)
+    history = store.history()
+    assert len(history) == daemon.HISTORY_MAX
+    # The newest archivals are the ones kept.
+    assert sum(1 for h in history if "resolved_ts" in h) == 5
+    assert store.active() == {}
 
 
-def test_sweep_resolved_preserves_attempt_total():
+def test_history_retention_is_configurable_and_ages_out(tmp_path):
+    now = 1_000_000
+    old = now - daemon.RESOLVED_RETENTION_S - 1
+    store = daemon.StateStore(tmp_path / "state.db", history_max=3, history_max_age_s=86400)
+    store.import_state({"active": {f"k{i}": _resolved_inc(old) for i in range(5)},
+                        "history": []}, now=now)
+    daemon.sweep_resolved(store, now=now)
+    assert len(store.history()) == 3
+    store.prune_history(now + 86400 - 1)
+    assert len(store.history()) == 3
+    store.prune_history(now + 86400 + 1)
+    assert store.history() == []
+    assert store._query("SELECT COUNT(*) FROM attempts")[0][0] == 0
+
+
+def test_sweep_resolved_preserves_attempt_total(tmp_path):
     """Moving resolved active->history must not change the active+history
-    attempt total that heartbeat_loop sums for hermes_self_heal_attempts_total."""
+    attempt total that heartbeat_tick counts for hermes_self_heal_attempts_total."""
     now = 1_000_000
     old = now - daemon.RESOLVED_RETENTION_S - 1
-    state = {
+    store = _store(tmp_path, {
         "active": {
             "a": _resolved_inc(old, attempts=[{"action": "restart_microvm"}]),
             "b": _resolved_inc(old, attempts=[{"action": "restart_mcp"}]),
         },
         "history": [{"attempts": [{"action": "restart_microvm"}]}],
-    }
+    })
 
-    def total(s):
+    def total(st):
         return sum(len(i.get("attempts", []))
-                   for i in list(s["active"].values()) + s["history"])
+                   for i in list(st.active().values()) + st.history())
 
-    before = total(state)
-    daemon.sweep_resolved(state, now=now)
-    assert total(state) == before == 3
+    before = total(store)
+    daemon.sweep_resolved(store, now=now)
+    assert total(store) == before == 3
+    assert store.attempt_totals() == ({"restart_microvm": 2, "restart_mcp": 1}, 0)
 
 
 # ---- orphaned-incident reconciliation (reconcile_orphans) ----
@@ -547,107 +634,107 @@ def _orphan_inc(status="in_progress", vm_ts=1000,
     }
 
 
-def test_reconcile_resolves_in_progress_superseded_by_vm_restart():
-    state = {"active": {"k": _orphan_inc()}, "history": []}
-    n = daemon.reconcile_orphans(state, now=_NOW, vm_ts=2000,
+def test_reconcile_resolves_in_progress_superseded_by_vm_restart(tmp_path):
+    store = _store(tmp_path, {"active": {"k": _orphan_inc()}, "history": []})
+    n = daemon.reconcile_orphans(store, now=_NOW, vm_ts=2000,
                                  probe=lambda inc, not_before=0.0: True)
     assert n == 1
-    inc = state["active"]["k"]
+    inc = store.active()["k"]
     assert inc["status"] == "resolved"
     assert inc["resolved_ts"] == _NOW
     assert inc["resolved_by"] == "orphan_reconcile"
 
 
-def test_reconcile_leaves_same_boot_incident():
-    state = {"active": {"k": _orphan_inc(vm_ts=2000)}, "history": []}
-    n = daemon.reconcile_orphans(state, now=_NOW, vm_ts=2000,
+def test_reconcile_leaves_same_boot_incident(tmp_path):
+    store = _store(tmp_path, {"active": {"k": _orphan_inc(vm_ts=2000)}, "history": []})
+    n = daemon.reconcile_orphans(store, now=_NOW, vm_ts=2000,
                                  probe=lambda inc, not_before=0.0: True)
     assert n == 0
-    assert state["active"]["k"]["status"] == "in_progress"
+    assert store.active()["k"]["status"] == "in_progress"
 
 
-def test_reconcile_requires_probe_clear():
-    state = {"active": {"k": _orphan_inc()}, "history": []}
-    n = daemon.reconcile_orphans(state, now=_NOW, vm_ts=2000,
+def test_reconcile_requires_probe_clear(tmp_path):
+    store = _store(tmp_path, {"active": {"k": _orphan_inc()}, "history": []})
+    n = daemon.reconcile_orphans(store, now=_NOW, vm_ts=2000,
                                  probe=lambda inc, not_before=0.0: False)
     assert n == 0
-    assert state["active"]["k"]["status"] == "in_progress"
+    assert store.active()["k"]["status"] == "in_progress"
 
 
-def test_reconcile_skips_recent_activity():
-    state = {"active": {"k": _orphan_inc(attempt_ts=_NOW - 60)}, "history": []}
-    n = daemon.reconcile_orphans(state, now=_NOW, vm_ts=2000,
+def test_reconcile_skips_recent_activity(tmp_path):
+    store = _store(tmp_path, {"active": {"k": _orphan_inc(attempt_ts=_NOW - 60)}, "history": []})
+    n = daemon.reconcile_orphans(store, now=_NOW, vm_ts=2000,
                                  probe=lambda inc, not_before=0.0: True)
     assert n == 0
-    assert state["active"]["k"]["status"] == "in_progress"
+    assert store.active()["k"]["status"] == "in_progress"
 
 
-def test_reconcile_resolves_orphaned_stuck_and_records_prior_status():
-    state = {"active": {"k": _orphan_inc(status="stuck")}, "history": []}
-    n = daemon.reconcile_orphans(state, now=_NOW, vm_ts=2000,
+def test_reconcile_resolves_orphaned_stuck_and_records_prior_status(tmp_path):
+    store = _store(tmp_path, {"active": {"k": _orphan_inc(status="stuck")}, "history": []})
+    n = daemon.reconcile_orphans(store, now=_NOW, vm_ts=2000,
                                  probe=lambda inc, not_before=0.0: True)
     assert n == 1
-    inc = state["active"]["k"]
+    inc = store.active()["k"]
     assert inc["status"] == "resolved"
     assert inc["resolved_from_status"] == "stuck"
 
 
-def test_reconcile_failsafe_on_unknown_vm_ts():
+def test_reconcile_failsafe_on_unknown_vm_ts(tmp_path):
     """microvm_active_enter_ts() returns 0 on any systemctl parse failure;
     we then cannot prove the VM restarted past the incident: touch nothing."""
-    state = {"active": {"k": _orphan_inc()}, "history": []}
-    n = daemon.reconcile_orphans(state, now=_NOW, vm_ts=0,
+    store = _store(tmp_path, {"active": {"k": _orphan_inc()}, "history": []})
+    n = daemon.reconcile_orphans(store, now=_NOW, vm_ts=0,
                                  probe=lambda inc, not_before=0.0: True)
     assert n == 0
-    assert state["active"]["k"]["status"] == "in_progress"
+    assert store.active()["k"]["status"] == "in_progress"
 
 
-def test_reconcile_defaults_read_systemd_and_health_metrics(monkeypatch):
+def test_reconcile_defaults_read_systemd_and_health_metrics(monkeypatch, tmp_path):
     """Default wiring diverges from openclaw: vm_ts comes from systemd
     (microvm_active_enter_ts), the probe from the PASSIVE health signals."""
     monkeypatch.setattr(daemon, "microvm_active_enter_ts", lambda: 2000)
     monkeypatch.setattr(daemon, "current_metrics", _healthy_metrics)
     # Heartbeat must post-date vm_ts=2000, since reconcile passes not_before=vm_ts.
     monkeypatch.setattr(daemon, "_heartbeat_age", lambda: 5.0)
-    state = {"active": {"k": _orphan_inc()}, "history": []}
-    n = daemon.reconcile_orphans(state, now=_NOW)
+    store = _store(tmp_path, {"active": {"k": _orphan_inc()}, "history": []})
+    n = daemon.reconcile_orphans(store, now=_NOW)
     assert n == 1
-    assert state["active"]["k"]["status"] == "resolved"
+    assert store.active()["k"]["status"] == "resolved"
 
 
-def test_reconciled_incident_archives_after_retention():
-    state = {"active": {"k": _orphan_inc()}, "history": []}
-    daemon.reconcile_orphans(state, now=_NOW, vm_ts=2000,
+def test_reconciled_incident_archives_after_retention(tmp_path):
+    store = _store(tmp_path, {"active": {"k": _orphan_inc()}, "history": []})
+    daemon.reconcile_orphans(store, now=_NOW, vm_ts=2000,
                              probe=lambda inc, not_before=0.0: True)
-    assert daemon.sweep_resolved(state, now=_NOW) == 0
+    assert daemon.sweep_resolved(store, now=_NOW) == 0
     assert daemon.sweep_resolved(
-        state, now=_NOW + daemon.RESOLVED_RETENTION_S) == 1
-    assert state["active"] == {}
-    assert state["history"][0]["resolved_by"] == "orphan_reconcile"
+        store, now=_NOW + daemon.RESOLVED_RETENTION_S) == 1
+    assert store.active() == {}
+    assert store.history()[0]["resolved_by"] == "orphan_reconcile"
 
 
 def test_heartbeat_tick_persists_reconciliation(tmp_path, monkeypatch):
     """The heartbeat tick — not just webhook arrival — must reconcile, sweep,
     and PERSIST, so orphans clear even when no hermes alert ever fires
     again."""
-    state_path = tmp_path / "incidents.json"
-    monkeypatch.setattr(daemon, "STATE_PATH", state_path)
+    db_path = tmp_path / "state.db"
+    monkeypatch.setattr(daemon, "STATE_DB", str(db_path))
     monkeypatch.setattr(daemon, "microvm_active_enter_ts", lambda: 2000)
     monkeypatch.setattr(daemon, "current_metrics", _healthy_metrics)
     monkeypatch.setattr(daemon, "_heartbeat_age", lambda: 5.0)
     heartbeats = []
     monkeypatch.setattr(daemon, "write_heartbeat",
                         lambda **kw: heartbeats.append(kw))
-    daemon.save_state(state_path, {"active": {"k": _orphan_inc()},
-                                   "history": []})
+    daemon.state_store().import_state({"active": {"k": _orphan_inc()},
+                                       "history": []})
     daemon.heartbeat_tick()
-    persisted = daemon.load_state(state_path)
-    assert persisted["active"]["k"]["status"] == "resolved"
-    assert persisted["active"]["k"]["resolved_by"] == "orphan_reconcile"
+    persisted = daemon.StateStore(db_path).active()
+    assert persisted["k"]["status"] == "resolved"
+    assert persisted["k"]["resolved_by"] == "orphan_reconcile"
     assert heartbeats and heartbeats[0]["active_count"] == 0
 
 
-def test_recent_action_count_ignores_skipped_preflight():
+def test_recent_action_count_ignores_skipped_preflight(tmp_path):
     """A declined restart must not burn the circuit-breaker budget.
 
     restart_microvm's upstream-model preflight records
@@ -657,7 +744,7 @@ def test_recent_action_count_ignores_skipped_preflight():
     act, which marks the incident stuck and emits a 4h synthetic critical.
     """
     now = 1_000_000
-    state = {
+    store = _store(tmp_path, {
         "active": {
             "k": {
                 "status": "in_progress",
@@ -673,16 +760,16 @@ def test_recent_action_count_ignores_skipped_preflight():
             }
         },
         "history": [],
-    }
+    })
     # Only the one real restart counts, so the breaker stays clear.
-    assert daemon.recent_action_count(state, now=now) == 1
-    assert daemon.recent_action_count(state, now=now) < daemon.CIRCUIT_MAX_ATTEMPTS
+    assert daemon.recent_action_count(store, now=now) == 1
+    assert daemon.recent_action_count(store, now=now) < daemon.CIRCUIT_MAX_ATTEMPTS
 
 
-def test_recent_action_count_still_counts_real_actions():
+def test_recent_action_count_still_counts_real_actions(tmp_path):
     """Guard the other direction: real actions must still trip the breaker."""
     now = 1_000_000
-    state = {
+    store = _store(tmp_path, {
         "active": {
             "k": {
                 "status": "in_progress",
@@ -694,6 +781,6 @@ def test_recent_action_count_still_counts_real_actions():
             }
         },
         "history": [],
-    }
-    assert daemon.recent_action_count(state, now=now) == 3
-    assert daemon.recent_action_count(state, now=now) >= daemon.CIRCUIT_MAX_ATTEMPTS
+    })
+    assert daemon.recent_action_count(store, now=now) == 3
+    assert daemon.recent_action_count(store, now=now) >= daemon.CIRCUIT_MAX_ATTEMPTS
@@ -3,6 +3,7 @@
 These tests monkeypatch run_action, call_litellm, _kick_health_check,
 emit_synthetic_alert, and the textfile so that no I/O escapes the test.
 """
+import os
 import sys
 import pathlib
 
@@ -24,6 +25,11 @@ def stub_microvm_ts(monkeypatch):
     monkeypatch.setattr(daemon, "microvm_active_enter_ts", lambda *a, **kw: 1000)
 
 
+def _now():
+    import time as _time
+    return int(_time.time())
+
+
 def _payload(alertname):
     return {
         "alerts": [{
@@ -36,8 +42,8 @@ def _payload(alertname):
 
 def test_unknown_alert_is_ignored(monkeypatch, tmp_path):
     """Spec §6.2 — no default fallback."""
-    state_path = tmp_path / "incidents.json"
-    monkeypatch.setattr(daemon, "STATE_PATH", str(state_path))
+    db_path = tmp_path / "state.db"
+    monkeypatch.setattr(daemon, "STATE_DB", str(db_path))
     monkeypatch.setattr(daemon, "current_metrics", lambda: {})
     monkeypatch.setattr(daemon, "_kick_health_check", lambda: None)
 
@@ -49,8 +55,8 @@ def test_unknown_alert_is_ignored(monkeypatch, tmp_path):
 
 
 def test_first_attempt_uses_deterministic_action(monkeypatch, tmp_path):
-    state_path = tmp_path / "incidents.json"
-    monkeypatch.setattr(daemon, "STATE_PATH", str(state_path))
+    db_path = tmp_path / "state.db"
+    monkeypatch.setattr(daemon, "STATE_DB", str(db_path))
     monkeypatch.setattr(daemon, "current_metrics", lambda: {"hermes_mcp_ask_hermes_ok": 0.0})
     monkeypatch.setattr(daemon, "_kick_health_check", lambda: None)
     monkeypatch.setattr(daemon, "emit_synthetic_alert", lambda *a, **kw: None)
@@ -63,8 +69,8 @@ def test_first_attempt_uses_deterministic_action(monkeypatch, tmp_path):
 
 
 def test_third_attempt_calls_ai(monkeypatch, tmp_path):
-    state_path = tmp_path / "incidents.json"
-    monkeypatch.setattr(daemon, "STATE_PATH", str(state_path))
+    db_path = tmp_path / "state.db"
+    monkeypatch.setattr(daemon, "STATE_DB", str(db_path))
     monkeypatch.setattr(daemon, "current_metrics", lambda: {"hermes_mcp_ask_hermes_ok": 0.0})
     monkeypatch.setattr(daemon, "_kick_health_check", lambda: None)
     monkeypatch.setattr(daemon, "emit_synthetic_alert", lambda *a, **kw: None)
@@ -91,8 +97,8 @@ def test_third_attempt_calls_ai(monkeypatch, tmp_path):
 
 
 def test_fourth_attempt_marks_stuck(monkeypatch, tmp_path):
-    state_path = tmp_path / "incidents.json"
-    monkeypatch.setattr(daemon, "STATE_PATH", str(state_path))
+    db_path = tmp_path / "state.db"
+    monkeypatch.setattr(daemon, "STATE_DB", str(db_path))
     monkeypatch.setattr(daemon, "current_metrics", lambda: {"hermes_mcp_ask_hermes_ok": 0.0})
     monkeypatch.setattr(daemon, "_kick_health_check", lambda: None)
     monkeypatch.setattr(daemon, "_err_tail", lambda *a, **kw: "")
@@ -104,9 +110,7 @@ def test_fourth_attempt_marks_stuck(monkeypatch, tmp_path):
     monkeypatch.setattr(daemon, "emit_synthetic_alert",
                         lambda name, ann, **kw: synth_alerts.append((name, ann)))
 
-    # Reset state and drive 4 calls
-    state = {"active": {}, "history": []}
-    daemon.save_state(state_path, state)
+    # Fresh store per tmp_path; drive 4 calls
     for _ in range(4):
         daemon.handle_alertmanager_payload(_payload("HermesApiServerDown"))
 
@@ -115,13 +119,13 @@ def test_fourth_attempt_marks_stuck(monkeypatch, tmp_path):
     # single-producer change). The observable contract is the incident status,
     # which is what hermes_self_heal_stuck_incidents counts and what the
     # Prometheus rule now alerts on.
-    inc = list(daemon.load_state(daemon.STATE_PATH)["active"].values())[0]
+    inc = list(daemon.state_store().active().values())[0]
     assert inc["status"] == "stuck"
 
 
 def test_gateway_unreachable_marks_stuck(monkeypatch, tmp_path):
-    state_path = tmp_path / "incidents.json"
-    monkeypatch.setattr(daemon, "STATE_PATH", str(state_path))
+    db_path = tmp_path / "state.db"
+    monkeypatch.setattr(daemon, "STATE_DB", str(db_path))
     monkeypatch.setattr(daemon, "current_metrics", lambda: {"hermes_mcp_ask_hermes_ok": 0.0})
     monkeypatch.setattr(daemon, "_kick_health_check", lambda: None)
     monkeypatch.setattr(daemon, "_err_tail", lambda *a, **kw: "")
@@ -151,19 +155,21 @@ def test_gateway_unreachable_marks_stuck(monkeypatch, tmp_path):
 # breaker bounds real actions in a rolling window regardless of correlation.
 
 
-def test_recent_action_count_sums_real_actions_in_window():
+def test_recent_action_count_sums_real_actions_in_window(tmp_path):
     now = 1_000_000
-    state = {
+    store = daemon.StateStore(tmp_path / "state.db")
+    store.import_state({
         "active": {"a": {"attempts": [{"ts": now - 10, "action": "restart_microvm"},
                                       {"ts": now - 20, "action": "restart_mcp"}]}},
         "history": [{"attempts": [{"ts": now - 30, "action": "restart_microvm"}]}],
-    }
-    assert daemon.recent_action_count(state, now=now) == 3
+    })
+    assert daemon.recent_action_count(store, now=now) == 3
 
 
-def test_recent_action_count_ignores_aged_out_and_placeholder():
+def test_recent_action_count_ignores_aged_out_and_placeholder(tmp_path):
     now = 1_000_000
-    state = {
+    store = daemon.StateStore(tmp_path / "state.db")
+    store.import_state({
         "active": {
             "old":         {"attempts": [{"ts": now - daemon.CIRCUIT_WINDOW_S - 1,
                                           "action": "restart_microvm"}]},
@@ -171,16 +177,16 @@ def test_recent_action_count_ignores_aged_out_and_placeholder():
             "recent":      {"attempts": [{"ts": now - 5, "action": "restart_microvm"}]},
         },
         "history": [],
-    }
-    assert daemon.recent_action_count(state, now=now) == 1
+    })
+    assert daemon.recent_action_count(store, now=now) == 1
 
 
 def test_circuit_breaker_stops_after_budget(monkeypatch, tmp_path):
     """Once CIRCUIT_MAX_ATTEMPTS real remediations have happened in the window,
     a further firing alert is NOT acted on — it is marked stuck (which the
     Prometheus rule alerts on) instead of restarting the VM again."""
-    state_path = tmp_path / "incidents.json"
-    monkeypatch.setattr(daemon, "STATE_PATH", str(state_path))
+    db_path = tmp_path / "state.db"
+    monkeypatch.setattr(daemon, "STATE_DB", str(db_path))
     monkeypatch.setattr(daemon, "current_metrics", lambda: {"hermes_mcp_ask_hermes_ok": 0.0})
     monkeypatch.setattr(daemon, "_kick_health_check", lambda: None)
 
@@ -198,7 +204,7 @@ def test_circuit_breaker_stops_after_budget(monkeypatch, tmp_path):
         },
         "history": [],
     }
-    daemon.save_state(state_path, seed)
+    daemon.state_store().import_state(seed)
 
     ran = []
     monkeypatch.setattr(daemon, "run_action", lambda a, **kw: ran.append(a) or {"ok": True})
@@ -210,9 +216,225 @@ def test_circuit_breaker_stops_after_budget(monkeypatch, tmp_path):
     assert ran == []
     # Assert over ALL incidents: this test seeds CIRCUIT_MAX_ATTEMPTS of them to
     # exhaust the budget, so index 0 is a seeded one, not the newly-stuck one.
-    active = daemon.load_state(daemon.STATE_PATH)["active"].values()
+    active = daemon.state_store().active().values()
     assert any(i["status"] == "stuck" and i.get("stuck_reason") == "circuit_breaker"
                for i in active)
-    persisted = daemon.load_state(str(state_path))
+    persisted = daemon.StateStore(db_path).active()
     assert any(i.get("stuck_reason") == "circuit_breaker"
-               for i in persisted["active"].values())
+               for i in persisted.values())
+
+
+# Webhooks per second the state store must keep up with during a storm
+STORM_TARGET_RATE = 1000
+
+
+def _storm(monkeypatch, tmp_path):
+    """1000 webhooks from 8 concurrent senders, each a distinct firing episode
+    so every one opens its own incident. Returns (send, ran, db_path, total)."""
+    import threading
+    import time as _time
+
+    db_path = tmp_path / "state.db"
+    monkeypatch.setattr(daemon, "STATE_DB", str(db_path))
+    monkeypatch.setattr(daemon, "_kick_health_check", lambda: None)
+    monkeypatch.setattr(daemon, "emit_synthetic_alert", lambda *a, **kw: None)
+    monkeypatch.setattr(daemon, "probe_clear", lambda inc, not_before=0.0: False)
+    ran = []
+    monkeypatch.setattr(daemon, "run_action", lambda a, **kw: ran.append(a) or {"ok": True})
+
+    senders, per_sender = 8, 125
+    base = int(_time.time())
+
+    def episode(i):
+        starts = datetime.fromtimestamp(base - 300 * i, timezone.utc)
+        return {"alerts": [{"status": "firing",
+                            "labels": {"alertname": "HermesApiServerDown"},
+                            "startsAt": starts.isoformat().replace("+00:00", "Z")}]}
+
+    def sender(n):
+        for j in range(per_sender):
+            daemon.handle_alertmanager_payload(episode(n * per_sender + j))
+
+    def send():
+        threads = [threading.Thread(target=sender, args=(i,)) for i in range(senders)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    return send, ran, db_path, senders * per_sender
+
+
+def test_webhook_storm_is_stored_deduped_and_capped_by_the_breaker(monkeypatch, tmp_path):
+    """Every webhook of the storm lands, a replay of it adds nothing, and the
+    breaker caps real remediations at CIRCUIT_MAX_ATTEMPTS across all of them."""
+    send, ran, db_path, total = _storm(monkeypatch, tmp_path)
+    send()
+
+    assert len(ran) == daemon.CIRCUIT_MAX_ATTEMPTS
+    store = daemon.StateStore(db_path)
+    assert store.status_counts() == {"in_progress": daemon.CIRCUIT_MAX_ATTEMPTS,
+                                     "stuck": total - daemon.CIRCUIT_MAX_ATTEMPTS}
+    assert store.cooldown_until("circuit_breaker") > _now()
+    assert sum(len(inc["attempts"]) for inc in store.active().values()) == len(ran)
+
+    # Alertmanager re-sends firing alerts every group_interval: the same 1000
+    # episodes again are the same incidents, not new ones.
+    send()
+    assert len(ran) == daemon.CIRCUIT_MAX_ATTEMPTS
+    assert sum(daemon.StateStore(db_path).status_counts().values()) == total
+
+
+@pytest.mark.skipif(not os.environ.get("SELF_HEAL_BENCHMARK"),
+                    reason="timing benchmark; set SELF_HEAL_BENCHMARK=1 to run")
+def test_webhook_storm_benchmark(monkeypatch, tmp_path):
+    """Opt-in: the storm must be absorbed at STORM_TARGET_RATE webhooks/s.
+
+    Opt-in because CI runners are too noisy for a hard bound; run it on the
+    host the daemon runs on, where the rate is the one committed to."""
+    import time as _time
+
+    send, _, _, total = _storm(monkeypatch, tmp_path)
+    t0 = _time.monotonic()
+    send()
+    elapsed = _time.monotonic() - t0
+    rate = total / elapsed
+    print(f"{total} webhooks in {elapsed:.2f}s ({rate:.0f}/s)")
+    assert rate >= STORM_TARGET_RATE, \
+        f"{total} webhooks took {elapsed:.2f}s: {rate:.0f}/s < {STORM_TARGET_RATE}/s"
+
+
+def test_durable_write_cannot_nest_in_a_plain_transaction(tmp_path):
+    store = daemon.StateStore(tmp_path / "state.db")
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.set_cooldown("circuit_breaker", 10)
+    assert store.cooldown_until("circuit_breaker") == 0
+    with store.transaction(durable=True):
+        store.set_cooldown("circuit_breaker", 10)
+    assert store.cooldown_until("circuit_breaker") == 10
+    assert store._query("PRAGMA synchronous") == [(1,)]   # back to NORMAL
+
+
+# ---- intake / executor ----
+
+
+def _episode(minutes_ago, alertname="HermesApiServerDown"):
+    starts = datetime.fromtimestamp(1_000_000 - 60 * minutes_ago, timezone.utc)
+    return {"alerts": [{"status": "firing", "labels": {"alertname": alertname},
+                        "startsAt": starts.isoformat().replace("+00:00", "Z")}]}
+
+
+def test_executor_coalesces_repeats_and_serializes_per_key():
+    import threading
+
+    release = threading.Event()
+    started, handled = [], []
+
+    def handle(alert):
+        started.append(alert["startsAt"])
+        release.wait(5)
+        handled.append(alert["startsAt"])
+
+    ex = daemon.AlertExecutor(handle=handle, workers=4).start()
+    first, other = _episode(0), _episode(30)
+    assert ex.submit(first) == 1
+    assert ex.submit(other) == 1
+    for _ in range(50):
+        if len(started) == 2:
+            break
+        threading.Event().wait(0.01)
+    # Two incidents run in parallel; repeats of a running one wait as ONE entry.
+    for _ in range(3):
+        ex.submit(first)
+    assert ex.stats() == {"queued": 1, "running": 2, "received": 5,
+                          "coalesced": 2, "dropped": 0, "failed": 0}
+    release.set()
+    assert ex.join(timeout=5)
+    assert sorted(started) == sorted(handled)
+    assert started.count(first["alerts"][0]["startsAt"]) == 2
+
+
+def test_executor_drops_past_queue_bound_and_ignores_unknown():
+    import threading
+
+    block = threading.Event()
+    ex = daemon.AlertExecutor(handle=lambda a: block.wait(5), workers=1, queue_max=2)
+    # Not started: everything stays queued.
+    assert ex.submit(_episode(0)) == 1
+    assert ex.submit(_episode(10)) == 1
+    assert ex.submit(_episode(20)) == 0
+    assert ex.submit(_episode(0, alertname="HermesApiKeyMissing")) == 0
+    assert ex.stats()["dropped"] == 1 and ex.stats()["queued"] == 2
+    block.set()
+    ex.start()
+    assert ex.join(timeout=5)
+
+
+def test_webhook_is_acknowledged_before_remediation_runs(monkeypatch):
+    import json
+    import threading
+    import urllib.request
+    from http.server import ThreadingHTTPServer
+
+    release = threading.Event()
+    ex = daemon.AlertExecutor(handle=lambda a: release.wait(5), workers=1).start()
+    monkeypatch.setattr(daemon, "EXECUTOR", ex)
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), daemon.Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{srv.server_address[1]}/alert"
+        req = urllib.request.Request(url, data=json.dumps(_episode(0)).encode(),
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=2) as r:
+            assert r.status == 200
+            assert json.loads(r.read()) == {"ok": True, "queued": 1}
+        assert ex.stats()["running"] == 1
+    finally:
+        release.set()
+        srv.shutdown()
+        srv.server_close()
+    assert ex.join(timeout=5)
+
+
+def test_breaker_counts_actions_still_running(monkeypatch, tmp_path):
+    """Actions run outside the state lock, so the budget must include the ones
+    cleared but not yet recorded: five concurrent incidents, each action slow,
+    still produce exactly CIRCUIT_MAX_ATTEMPTS remediations."""
+    import threading
+
+    db_path = tmp_path / "state.db"
+    monkeypatch.setattr(daemon, "STATE_DB", str(db_path))
+    monkeypatch.setattr(daemon, "_kick_health_check", lambda: None)
+    monkeypatch.setattr(daemon, "emit_synthetic_alert", lambda *a, **kw: None)
+    monkeypatch.setattr(daemon, "probe_clear", lambda inc, not_before=0.0: False)
+    gate = threading.Event()
+    ran, lock_free = [], []
+
+    def slow_action(a, **kw):
+        lock_free.append(not daemon._STATE_LOCK.locked())
+        ran.append(a)
+        gate.wait(5)
+        return {"ok": True}
+
+    monkeypatch.setattr(daemon, "run_action", slow_action)
+    threads = [threading.Thread(target=daemon.handle_alertmanager_payload,
+                                args=(_episode(10 * i),)) for i in range(5)]
+    for t in threads:
+        t.start()
+    for _ in range(200):
+        if daemon.StateStore(db_path).status_counts().get("stuck") == 2:
+            break
+        threading.Event().wait(0.01)
+    # Heartbeat bookkeeping is not held up behind a running remediation.
+    monkeypatch.setattr(daemon, "write_heartbeat", lambda **kw: None)
+    monkeypatch.setattr(daemon, "reconcile_orphans", lambda store, now=None: 0)
+    daemon.heartbeat_tick()
+    gate.set()
+    for t in threads:
+        t.join(5)
+    assert len(ran) == daemon.CIRCUIT_MAX_ATTEMPTS
+    assert all(lock_free)
+    assert daemon._ACTIONS_PENDING == 0
+    assert daemon.StateStore(db_path).status_counts() == {
+        "in_progress": daemon.CIRCUIT_MAX_ATTEMPTS, "stuck": 2}
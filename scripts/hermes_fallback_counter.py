@@ -19,6 +19,9 @@ Why a separate signal from the e2e probe:
     Two failures within a probe interval would each be counted here
     but only show as one probe failure.
 
+Runs resident with --daemon (scripts/textfile_exporter.py), reading only
+the bytes appended since its last pass; without it, one full scan.
+
 Output: /var/lib/prometheus-node-exporter-textfiles/hermes_fallback.prom
 
   hermes_fallback_chain_triggered_total   monotonic count (resets on log rotate)
@@ -28,10 +31,10 @@ Output: /var/lib/prometheus-node-exporter-textfiles/hermes_fallback.prom
 from __future__ import annotations
 
 import os
-import pathlib
 import re
-import tempfile
-import time
+import sys
+
+from textfile_exporter import Exporter, Registry
 
 LOG_PATH = os.environ.get(
     "HERMES_FALLBACK_LOG_PATH",
@@ -41,66 +44,85 @@ METRIC_PATH = os.environ.get(
     "HERMES_FALLBACK_METRIC_PATH",
     "/var/lib/prometheus-node-exporter-textfiles/hermes_fallback.prom",
 )
+INTERVAL = float(os.environ.get("HERMES_FALLBACK_INTERVAL_SECONDS", "60"))
 # Match the exact phrase Hermes emits, e.g.:
 #   "ERROR ... Non-retryable client error: Error code: 401 - {...}"
 PATTERN = re.compile(r"Non-retryable client error", re.IGNORECASE)
 
 
-def count_occurrences(path: str) -> int:
-    """Count lines matching PATTERN in the log file.
+def _count_lines(chunk: bytes) -> int:
+    # Decode lenient -- errors.log can contain stray utf-8 sequences from tool output
+    # that decode-strict would barf on, and we only need to match an ASCII pattern.
+    return sum(1 for raw in chunk.splitlines()
+               if PATTERN.search(raw.decode("utf-8", errors="replace")))
+
+
+class FallbackCounter:
+    """Running count of PATTERN matches in the log, read incrementally.
+
+    Remembers (inode, offset) so each pass reads only what was appended since the last
+    one, instead of rescanning the whole file every minute. Only complete lines are
+    consumed; a line still being written is picked up next pass. A new inode (rotation)
+    or a file shorter than the offset (truncation) resets the count to 0 -- the reset
+    semantics this counter has always had.
 
-    Returns 0 if the file is missing (counter will look like a reset,
-    which is the correct semantic when the log is freshly rotated).
+    With whole_file there is no next pass to wait for, so a final line without its
+    newline is counted too (the single-pass path, as the oneshot always did).
     """
-    p = pathlib.Path(path)
-    if not p.is_file():
-        return 0
-    total = 0
-    try:
-        # Read in binary mode — errors.log can contain stray utf-8
-        # sequences from tool output that decode-strict would barf on.
-        with p.open("rb") as fh:
-            for raw in fh:
-                # Decode lenient; we only need to match an ASCII pattern.
-                try:
-                    line = raw.decode("utf-8", errors="replace")
-                except Exception:
-                    continue
-                if PATTERN.search(line):
-                    total += 1
-    except OSError:
-        return 0
-    return total
-
-
-def write_metrics(count: int, timestamp: float, target: str = METRIC_PATH) -> None:
-    lines = [
-        "# HELP hermes_fallback_chain_triggered_total Cumulative count of 'Non-retryable client error' events in Hermes errors.log (resets on log rotation)",
-        "# TYPE hermes_fallback_chain_triggered_total counter",
-        f"hermes_fallback_chain_triggered_total {count}",
-        "# HELP hermes_fallback_counter_last_run_timestamp_seconds When the counter last refreshed (Unix epoch)",
-        "# TYPE hermes_fallback_counter_last_run_timestamp_seconds gauge",
-        f"hermes_fallback_counter_last_run_timestamp_seconds {timestamp}",
-        "",
-    ]
-    target_path = pathlib.Path(target)
-    target_path.parent.mkdir(parents=True, exist_ok=True)
-    with tempfile.NamedTemporaryFile(
-        mode="w", dir=str(target_path.parent), delete=False, suffix=".tmp"
-    ) as tmp:
-        tmp.write("\n".join(lines))
-        tmp_path = tmp.name
-    # node-exporter runs as `node-exporter` user; need world-readable
-    os.chmod(tmp_path, 0o644)
-    os.replace(tmp_path, target_path)
+
+    def __init__(self, path: str = LOG_PATH, whole_file: bool = False):
+        self.path = path
+        self.whole_file = whole_file
+        self.inode = None
+        self.offset = 0
+        self.count = 0
+
+    def refresh(self) -> int:
+        try:
+            with open(self.path, "rb") as fh:
+                st = os.fstat(fh.fileno())
+                if st.st_ino != self.inode or st.st_size < self.offset:
+                    self.inode, self.offset, self.count = st.st_ino, 0, 0
+                fh.seek(self.offset)
+                chunk = fh.read()
+        except OSError:
+            # Missing file looks like a reset, which is the correct semantic when the log
+            # is freshly rotated.
+            self.inode, self.offset, self.count = None, 0, 0
+            return 0
+        complete = len(chunk) if self.whole_file else chunk.rfind(b"\n") + 1
+        self.count += _count_lines(chunk[:complete])
+        self.offset += complete
+        return self.count
+
+
+def count_occurrences(path: str) -> int:
+    """Count lines matching PATTERN in the log file (one full scan)."""
+    return FallbackCounter(path, whole_file=True).refresh()
+
+
+def collector(counter: FallbackCounter):
+    def run(reg: Registry) -> None:
+        reg.counter(
+            "hermes_fallback_chain_triggered_total",
+            "Cumulative count of 'Non-retryable client error' events in Hermes errors.log "
+            "(resets on log rotation)",
+        ).add(counter.refresh())
+    return run
 
 
 def main() -> int:
-    count = count_occurrences(LOG_PATH)
-    write_metrics(count, time.time())
-    return 0
+    # Only a daemon comes back for a line still being written.
+    counter = FallbackCounter(whole_file="--daemon" not in sys.argv[1:])
+    exporter = Exporter(METRIC_PATH, splay=15)
+    exporter.collector(
+        "hermes_fallback", collector(counter), INTERVAL,
+        timestamp=("hermes_fallback_counter_last_run_timestamp_seconds",
+                   "When the counter last refreshed (Unix epoch)"),
+        hold_on_failure=True,
+    )
+    return exporter.main()
 
 
 if __name__ == "__main__":
-    import sys
     sys.exit(main())
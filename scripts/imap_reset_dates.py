@@ -6,6 +6,12 @@ This script resets the internal date (INTERNALDATE) of IMAP messages to match
 their Date header. Since IMAP doesn't allow direct modification of INTERNALDATE,
 the script re-uploads each message with the correct date and removes the original.
 
+Messages are rewritten by a pipelined engine: one bulk scan of INTERNALDATE,
+FLAGS, size and ENVELOPE finds the messages whose dates actually differ; only
+their bodies are then streamed, in UID-set batches, re-appended (one
+MULTIAPPEND per batch where the server offers it) and removed with one batched
+UID STORE / UID EXPUNGE. Mailboxes are spread over several connections.
+
 This script supports two connection modes:
 1. Network mode: Connect to remote IMAP server via SSL (--server, --username, --password)
 2. Local process mode: Spawn local Dovecot IMAP process (--process)
@@ -20,9 +26,28 @@ import argparse
 import logging
 import sys
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional
+from dataclasses import dataclass, fields
+
+# Messages per date-scan FETCH. The scan returns a few hundred bytes per
+# message, so this keeps each response small while needing few round trips.
+SCAN_BATCH = 2000
+# A body batch closes at whichever limit comes first. The byte cap bounds
+# memory: a batch is held in full between its FETCH and its APPEND.
+BODY_BATCH_MESSAGES = 100
+BODY_BATCH_BYTES = 16 * 1024 * 1024
+DEFAULT_WORKERS = 4
+
+_SEQ_RE = re.compile(rb'^\d+ \(')
+_UID_RE = re.compile(rb'UID (\d+)')
+_INTERNALDATE_RE = re.compile(rb'INTERNALDATE "([^"]+)"')
+_FLAGS_RE = re.compile(rb'FLAGS \(([^)]*)\)')
+_SIZE_RE = re.compile(rb'RFC822\.SIZE (\d+)')
+# ENVELOPE's first field is the Date header: NIL, a quoted string or a literal.
+_ENVELOPE_DATE_RE = re.compile(rb'ENVELOPE \((?:(NIL)|"((?:[^"\\]|\\.)*)"|\{(\d+)\}$)')
 
 
 @dataclass
@@ -34,6 +59,40 @@ class MessageStats:
     skipped_error: int = 0
     updated: int = 0
     would_update: int = 0
+    bytes_rewrite: int = 0
+    scan_seconds: float = 0.0
+    rewrite_seconds: float = 0.0
+
+    def add(self, other: 'MessageStats') -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+@dataclass
+class ScannedMessage:
+    """One message as seen by the date scan."""
+    uid: int
+    internaldate: str
+    flags: str
+    size: int
+    target: Optional[datetime] = None
+
+
+def uid_set(uids: List[int]) -> str:
+    """Compact IMAP sequence set for sorted UIDs: [1,2,3,7] -> '1:3,7'."""
+    ranges = []
+    start = prev = None
+    for uid in uids:
+        if start is None:
+            start = prev = uid
+        elif uid == prev + 1:
+            prev = uid
+        else:
+            ranges.append(f"{start}:{prev}" if start != prev else str(start))
+            start = prev = uid
+    if start is not None:
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+    return ",".join(ranges)
 
 
 class IMAPDateSynchronizer:
@@ -52,6 +111,15 @@ class IMAPDateSynchronizer:
         self.skip_matching = skip_matching
         self.logger = logging.getLogger(__name__)
         self.imap: Optional[imaplib.IMAP4] = None
+        self.capabilities: set = set()
+        self.debug_fetch = False
+
+    def clone(self) -> 'IMAPDateSynchronizer':
+        """An unconnected synchronizer with the same settings (one per worker)."""
+        other = IMAPDateSynchronizer(self.server, self.port, self.username, self.password,
+                                     self.process, self.dry_run, self.skip_matching)
+        other.debug_fetch = self.debug_fetch
+        return other
 
     def connect(self) -> None:
         """Connect and authenticate to IMAP server or spawn local process."""
@@ -66,6 +134,12 @@ class IMAPDateSynchronizer:
             self.imap = imaplib.IMAP4_SSL(self.server, self.port)
             self.imap.login(self.username, self.password)
             self.logger.info(f"Logged in as {self.username}")
+        # Servers (Dovecot among them) advertise MULTIAPPEND, LITERAL+ and
+        # UIDPLUS only once authenticated, so ask again rather than trusting
+        # the greeting's list.
+        status, data = self.imap.capability()
+        if status == 'OK' and data and data[-1]:
+            self.capabilities = set(data[-1].decode('ascii', 'replace').upper().split())
 
     def disconnect(self) -> None:
         """Disconnect from IMAP server."""
@@ -152,72 +226,6 @@ class IMAPDateSynchronizer:
 
         return f'"{dt.day:02d}-{month_names[dt.month-1]}-{dt.year} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d} {tz_str}"'
 
-    def parse_fetch_response(self, data: list) -> Tuple[Optional[str], Optional[bytes], Optional[str]]:
-        """Parse IMAP FETCH response to extract INTERNALDATE, message, and FLAGS.
-
-        Returns: (internaldate_str, message_bytes, flags_str)
-        """
-        if not data or not data[0]:
-            self.logger.debug("Empty FETCH response")
-            return None, None, None
-
-        # Response format can be:
-        # [(b'1 (UID ... INTERNALDATE "..." BODY[] {size}', b'message...'), b')']
-        # OR
-        # [b'1 (UID ... INTERNALDATE "..." BODY[] "message")', b')']
-
-        parts = data[0]
-
-        # Handle both tuple and bytes responses
-        if isinstance(parts, tuple):
-            if len(parts) < 2:
-                self.logger.debug(f"Unexpected tuple length: {len(parts)}")
-                return None, None, None
-            header_bytes = parts[0]
-            message = parts[1]
-        elif isinstance(parts, bytes):
-            # All in one bytes object - need to split
-            header_bytes = parts
-            message = None
-        else:
-            self.logger.debug(f"Unexpected response type: {type(parts)}")
-            return None, None, None
-
-        # Decode header
-        try:
-            header = header_bytes.decode('utf-8', errors='ignore')
-        except:
-            header = str(header_bytes)
-
-        self.logger.debug(f"FETCH header: {header[:200]}")
-
-        # Extract INTERNALDATE
-        internaldate_match = re.search(r'INTERNALDATE "([^"]+)"', header)
-        internaldate = internaldate_match.group(1) if internaldate_match else None
-
-        if not internaldate:
-            self.logger.debug(f"Could not find INTERNALDATE in: {header}")
-
-        # Extract FLAGS
-        flags_match = re.search(r'FLAGS \(([^)]*)\)', header)
-        flags = flags_match.group(1) if flags_match else ''
-
-        # If message is None, try to extract from header
-        if message is None:
-            # Look for BODY[] content in the same bytes
-            body_match = re.search(rb'BODY\[\] \{(\d+)\}', header_bytes)
-            if body_match:
-                # Message follows after the header
-                # This is complex - imaplib should handle this
-                self.logger.warning("Message embedded in header - using raw response")
-                # Try to get it from the raw data
-                for item in data:
-                    if isinstance(item, tuple) and len(item) > 1:
-                        message = item[1]
-                        break
-
-        return internaldate, message, flags
-
     def normalize_flags(self, flags: str) -> str:
         r"""Normalize flags for APPEND command.
 
@@ -233,147 +241,197 @@ class IMAPDateSynchronizer:
         diff = abs((date1 - date2).total_seconds())
         return diff <= tolerance_seconds
 
-    def process_message(self, uid: bytes, mailbox: str) -> Tuple[bool, str]:
-        """Process a single message.
+    def _parse_scan(self, data: list) -> List[Tuple[ScannedMessage, Optional[str]]]:
+        """Parse a date-scan FETCH response into (message, Date header) pairs.
 
-        Returns: (success, status_message)
+        The Date header comes from the first ENVELOPE field; None when the
+        envelope says NIL. Items that don't parse are skipped (the caller
+        counts them against the FETCH'd range).
         """
-        try:
-            # Fetch message data
-            status, data = self.imap.uid('fetch', uid, '(INTERNALDATE BODY.PEEK[] FLAGS)')
+        out = []
+        for item in data:
+            head = item[0] if isinstance(item, tuple) else item
+            if not isinstance(head, bytes) or not _SEQ_RE.match(head):
+                continue        # continuation of an envelope after a literal
+            if self.debug_fetch:
+                self.logger.info(f"    scan: {head[:300]!r}")
+            uid = _UID_RE.search(head)
+            internaldate = _INTERNALDATE_RE.search(head)
+            envelope = _ENVELOPE_DATE_RE.search(head)
+            if not (uid and internaldate and envelope):
+                continue
+            flags = _FLAGS_RE.search(head)
+            size = _SIZE_RE.search(head)
+            if envelope.group(1):
+                date_header = None
+            elif envelope.group(3) and isinstance(item, tuple):
+                date_header = item[1][:int(envelope.group(3))].decode('utf-8', 'replace')
+            else:
+                date_header = re.sub(rb'\\(.)', rb'\1', envelope.group(2) or b'').decode(
+                    'utf-8', 'replace')
+            out.append((ScannedMessage(
+                uid=int(uid.group(1)),
+                internaldate=internaldate.group(1).decode('ascii'),
+                flags=flags.group(1).decode('utf-8', 'replace') if flags else '',
+                size=int(size.group(1)) if size else 0), date_header))
+        return out
+
+    def scan_dates(self, message_count: int, stats: MessageStats) -> List[ScannedMessage]:
+        """Find the messages that need rewriting, without fetching any body.
+
+        One FETCH per SCAN_BATCH sequence numbers for UID, FLAGS, INTERNALDATE,
+        RFC822.SIZE and ENVELOPE; the returned messages carry their target date.
+        """
+        started = time.monotonic()
+        pending = []
+        for start in range(1, message_count + 1, SCAN_BATCH):
+            end = min(start + SCAN_BATCH - 1, message_count)
+            status, data = self.imap.fetch(
+                f'{start}:{end}', '(UID FLAGS INTERNALDATE RFC822.SIZE ENVELOPE)')
             if status != 'OK':
-                return False, f"FETCH failed: {status}"
-
-            # Debug raw response
-            if hasattr(self, 'debug_fetch') and self.debug_fetch:
-                self.logger.info(f"  Raw FETCH response for UID {uid.decode()}:")
-                for i, item in enumerate(data):
-                    self.logger.info(f"    data[{i}]: type={type(item)}, len={len(item) if hasattr(item, '__len__') else 'N/A'}")
-                    if isinstance(item, tuple):
-                        for j, subitem in enumerate(item):
-                            preview = str(subitem[:100] if isinstance(subitem, bytes) else subitem)
-                            self.logger.info(f"      [{j}]: {type(subitem)} - {preview}")
-                    else:
-                        preview = str(item[:100] if isinstance(item, bytes) else item)
-                        self.logger.info(f"    {preview}")
-
-            internaldate_str, message_bytes, flags_str = self.parse_fetch_response(data)
-
-            if not message_bytes:
-                return False, "Failed to parse message"
-
-            if not internaldate_str:
-                return False, "No INTERNALDATE in response"
-
-            # Parse internal date
-            try:
-                internal_date = self.parse_internaldate(internaldate_str)
-            except Exception as e:
-                return False, f"Failed to parse INTERNALDATE '{internaldate_str}': {e}"
+                self.logger.error(f"  Date scan of {start}:{end} failed: {status}")
+                stats.skipped_error += end - start + 1
+                continue
+            parsed = self._parse_scan(data)
+            stats.total += len(parsed)
+            stats.skipped_error += (end - start + 1) - len(parsed)
+            for msg, date_header in parsed:
+                if not date_header:
+                    stats.skipped_no_date += 1
+                    self.logger.warning(f"  UID {msg.uid}: No Date header")
+                    continue
+                try:
+                    internal_date = self.parse_internaldate(msg.internaldate)
+                    parsed_date = email.utils.parsedate_to_datetime(date_header)
+                except Exception as e:
+                    stats.skipped_error += 1
+                    self.logger.error(f"  UID {msg.uid}: Failed to parse dates: {e}")
+                    continue
+                # Some emails have Date headers without timezone info
+                if parsed_date.tzinfo is None:
+                    parsed_date = parsed_date.replace(tzinfo=timezone.utc)
+                if self.skip_matching and self.dates_match(internal_date, parsed_date):
+                    stats.skipped_matching += 1
+                    continue
+                msg.target = parsed_date
+                pending.append(msg)
+            self.logger.info(f"  Scanned {end}/{message_count}, {len(pending)} to rewrite")
+        stats.scan_seconds += time.monotonic() - started
+        return pending
+
+    def _body_batches(self, pending: List[ScannedMessage]):
+        """Split the messages to rewrite into UID-ordered batches bounded by
+        BODY_BATCH_MESSAGES and BODY_BATCH_BYTES."""
+        batch, batch_bytes = [], 0
+        for msg in sorted(pending, key=lambda m: m.uid):
+            if batch and (len(batch) >= BODY_BATCH_MESSAGES
+                          or batch_bytes + msg.size > BODY_BATCH_BYTES):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(msg)
+            batch_bytes += msg.size
+        if batch:
+            yield batch
+
+    def fetch_bodies(self, batch: List[ScannedMessage]) -> Dict[int, bytes]:
+        """One UID FETCH of BODY.PEEK[] for the whole batch: {uid: body}."""
+        status, data = self.imap.uid('fetch', uid_set([m.uid for m in batch]), '(UID BODY.PEEK[])')
+        if status != 'OK':
+            raise RuntimeError(f"FETCH failed: {status}")
+        bodies = {}
+        for item in data:
+            if isinstance(item, tuple) and len(item) > 1:
+                uid = _UID_RE.search(item[0])
+                if uid:
+                    bodies[int(uid.group(1))] = item[1]
+        return bodies
+
+    def _append_args(self, msg: ScannedMessage) -> Tuple[str, str]:
+        normalized_flags = self.normalize_flags(msg.flags)
+        return f"({normalized_flags})", self.format_imap_date(msg.target)
+
+    def multiappend(self, mailbox: str, batch: List[ScannedMessage],
+                    bodies: Dict[int, bytes]) -> None:
+        """APPEND every message of the batch in one MULTIAPPEND command.
+
+        imaplib sends one synchronizing literal per command, so the command is
+        written directly with non-synchronizing {n+} literals (LITERAL+) and
+        completed through imaplib's own tagged-response handling. The server
+        applies MULTIAPPEND atomically: all messages or none.
+        """
+        parts = [b'APPEND ', self._quote(mailbox).encode('utf-8')]
+        for msg in batch:
+            flags, date = self._append_args(msg)
+            body = imaplib.MapCRLF.sub(imaplib.CRLF, bodies[msg.uid])
+            parts.append(f" {flags} {date} {{{len(body)}+}}\r\n".encode('ascii'))
+            parts.append(body)
+        tag = self.imap._new_tag()
+        self.imap.send(tag + b' ' + b''.join(parts) + imaplib.CRLF)
+        status, response = self.imap._command_complete('APPEND', tag)
+        if status != 'OK':
+            raise RuntimeError(f"MULTIAPPEND failed: {status} - {response}")
 
-            # Parse email Date header
-            msg = email.message_from_bytes(message_bytes)
-            date_header = msg.get('Date')
+    @staticmethod
+    def _quote(mailbox: str) -> str:
+        if mailbox.startswith('"'):
+            return mailbox
+        return '"' + mailbox.replace('\\', '\\\\').replace('"', '\\"') + '"'
 
-            if not date_header:
-                return False, "No Date header"
+    def rewrite_batch(self, mailbox: str, batch: List[ScannedMessage],
+                      stats: MessageStats) -> List[int]:
+        """Re-append one batch with corrected dates; return the UIDs replaced.
 
+        MULTIAPPEND when the server has it (and LITERAL+ to send it in one
+        write); otherwise, or if the batch is refused, one APPEND per message
+        so a single bad message costs only itself.
+        """
+        bodies = self.fetch_bodies(batch)
+        missing = [m for m in batch if m.uid not in bodies]
+        for msg in missing:
+            stats.skipped_error += 1
+            self.logger.error(f"  UID {msg.uid}: Failed to fetch message")
+        batch = [m for m in batch if m.uid in bodies]
+        if not batch:
+            return []
+
+        if {'MULTIAPPEND', 'LITERAL+'} <= self.capabilities and len(batch) > 1:
             try:
-                parsed_date = email.utils.parsedate_to_datetime(date_header)
+                self.multiappend(mailbox, batch, bodies)
+                for msg in batch:
+                    self.logger.debug(f"  Updated UID {msg.uid}: {msg.internaldate} -> "
+                                      f"{self.format_imap_date(msg.target)}")
+                return [m.uid for m in batch]
             except Exception as e:
-                return False, f"Failed to parse Date header: {e}"
-
-            # Ensure timezone-aware datetime
-            # Some emails have Date headers without timezone info
-            if parsed_date.tzinfo is None:
-                self.logger.debug(f"  UID {uid.decode()}: Date header has no timezone, assuming UTC")
-                parsed_date = parsed_date.replace(tzinfo=timezone.utc)
-
-            # Compare dates
-            if self.dates_match(internal_date, parsed_date):
-                return True, "Already matching"
-
-            # Prepare for update
-            formatted_date = self.format_imap_date(parsed_date)
-            normalized_flags = self.normalize_flags(flags_str)
-
-            if self.dry_run:
-                self.logger.info(f"  Would update UID {uid.decode()}: {internaldate_str} -> {formatted_date}")
-                return True, "Would update"
-
-            # Actually update: APPEND then DELETE
-            # Build APPEND command
-            flags_part = f"({normalized_flags})" if normalized_flags else "()"
+                self.logger.warning(f"  MULTIAPPEND of {len(batch)} messages failed ({e}); "
+                                    f"appending one at a time")
 
+        done = []
+        for msg in batch:
+            flags, date = self._append_args(msg)
             try:
-                status, response = self.imap.append(
-                    mailbox,
-                    flags_part,
-                    formatted_date,
-                    message_bytes
-                )
-
-                if status != 'OK':
-                    return False, f"APPEND failed: {status} - {response}"
-
-                # APPEND succeeded, now delete original
-                status, response = self.imap.uid('store', uid, '+FLAGS', '(\\Deleted)')
-                if status != 'OK':
-                    self.logger.warning(f"  Failed to mark UID {uid.decode()} as deleted: {status}")
-                    return False, f"DELETE failed: {status}"
-
-                self.logger.info(f"  Updated UID {uid.decode()}: {internaldate_str} -> {formatted_date}")
-                return True, "Updated"
-
+                status, response = self.imap.append(self._quote(mailbox), flags, date,
+                                                     bodies[msg.uid])
             except Exception as e:
-                return False, f"Update failed: {e}"
-
-        except Exception as e:
-            return False, f"Unexpected error: {e}"
-
-    def get_all_uids_batched(self, total_messages: int, batch_size: int = 10000) -> List[bytes]:
-        """Get all UIDs in batches to avoid buffer overflow.
-
-        Args:
-            total_messages: Total number of messages in the mailbox
-            batch_size: Number of messages to fetch UIDs for in each batch
-
-        Returns:
-            List of all UIDs as bytes
-        """
-        all_uids = []
-
-        # Fetch UIDs in batches using message sequence number (MSN) ranges
-        num_batches = (total_messages + batch_size - 1) // batch_size
-        self.logger.info(f"  Fetching UIDs in {num_batches} batches of up to {batch_size} messages...")
-
-        for batch_num in range(num_batches):
-            start = batch_num * batch_size + 1
-            end = min((batch_num + 1) * batch_size, total_messages)
-
-            self.logger.debug(f"  Batch {batch_num + 1}/{num_batches}: messages {start}:{end}")
-
-            # Fetch UIDs for this range of message sequence numbers
-            # We use FETCH to get the UID for each message in the range
-            status, data = self.imap.fetch(f'{start}:{end}'.encode(), '(UID)')
-
-            if status == 'OK':
-                # Parse UIDs from FETCH response
-                # Format: [b'1 (UID 12345)', b'2 (UID 12346)', ...]
-                for response in data:
-                    if isinstance(response, bytes):
-                        match = re.search(rb'UID (\d+)', response)
-                        if match:
-                            all_uids.append(match.group(1))
-                    elif isinstance(response, tuple) and len(response) > 0:
-                        match = re.search(rb'UID (\d+)', response[0])
-                        if match:
-                            all_uids.append(match.group(1))
-
-                batch_count = sum(1 for resp in data if isinstance(resp, (bytes, tuple)))
-                self.logger.debug(f"    Retrieved {batch_count} UIDs from this batch")
-
-        return all_uids
+                status, response = 'NO', str(e)
+            if status != 'OK':
+                stats.skipped_error += 1
+                self.logger.error(f"  UID {msg.uid}: APPEND failed: {status} - {response}")
+                continue
+            self.logger.debug(f"  Updated UID {msg.uid}: {msg.internaldate} -> {date}")
+            done.append(msg.uid)
+        return done
+
+    def remove_originals(self, uids: List[int]) -> bool:
+        """Flag the replaced originals \\Deleted and, with UIDPLUS, expunge
+        exactly those. Returns whether they are already gone."""
+        uids_str = uid_set(uids)
+        status, _ = self.imap.uid('store', uids_str, '+FLAGS.SILENT', '(\\Deleted)')
+        if status != 'OK':
+            raise RuntimeError(f"STORE \\Deleted failed: {status}")
+        if 'UIDPLUS' in self.capabilities:
+            status, _ = self.imap.uid('expunge', uids_str)
+            return status == 'OK'
+        return False
 
     def process_mailbox(self, mailbox: str) -> MessageStats:
         """Process all messages in a mailbox."""
@@ -383,7 +441,7 @@ class IMAPDateSynchronizer:
 
         try:
             # Select mailbox in read-write mode
-            status, data = self.imap.select(mailbox)
+            status, data = self.imap.select(self._quote(mailbox), readonly=self.dry_run)
             if status != 'OK':
                 self.logger.error(f"Failed to select mailbox {mailbox}: {status}")
                 return stats
@@ -394,59 +452,68 @@ class IMAPDateSynchronizer:
             if message_count == 0:
                 return stats
 
-            # Get all UIDs in batches to avoid buffer overflow
-            uids = self.get_all_uids_batched(message_count)
+            pending = self.scan_dates(message_count, stats)
+            stats.bytes_rewrite = sum(m.size for m in pending)
 
-            if not uids:
-                self.logger.error(f"Failed to fetch UIDs")
+            if self.dry_run:
+                stats.would_update = len(pending)
+                for msg in pending:
+                    self.logger.info(f"  Would update UID {msg.uid}: {msg.internaldate} -> "
+                                     f"{self.format_imap_date(msg.target)}")
                 return stats
 
-            stats.total = len(uids)
-            self.logger.info(f"  Retrieved {stats.total} UIDs")
-
-            # Process each message
-            for i, uid in enumerate(uids, 1):
-                if i % 100 == 0:
-                    self.logger.info(f"  Progress: {i}/{stats.total}")
-
-                success, message = self.process_message(uid, mailbox)
-
-                if not success:
-                    if "No Date header" in message:
-                        stats.skipped_no_date += 1
-                        self.logger.warning(f"  UID {uid.decode()}: {message}")
-                    else:
-                        stats.skipped_error += 1
-                        self.logger.error(f"  UID {uid.decode()}: {message}")
-                elif "Already matching" in message:
-                    stats.skipped_matching += 1
-                elif "Would update" in message:
-                    stats.would_update += 1
-                elif "Updated" in message:
-                    stats.updated += 1
-
-            # Expunge deleted messages (only if not dry-run)
-            if not self.dry_run and stats.updated > 0:
+            started = time.monotonic()
+            needs_expunge = False
+            for batch in self._body_batches(pending):
+                try:
+                    replaced = self.rewrite_batch(mailbox, batch, stats)
+                    if replaced:
+                        needs_expunge |= not self.remove_originals(replaced)
+                        stats.updated += len(replaced)
+                except Exception as e:
+                    stats.skipped_error += len(batch)
+                    self.logger.error(f"  Batch {uid_set([m.uid for m in batch])} failed: {e}")
+                self.logger.info(f"  [{mailbox}] Progress: {stats.updated}/{len(pending)}")
+
+            # Without UIDPLUS the originals were only flagged; expunge them now.
+            if needs_expunge:
                 self.logger.info("  Expunging deleted messages...")
                 self.imap.expunge()
+            stats.rewrite_seconds += time.monotonic() - started
 
         except Exception as e:
             self.logger.error(f"Error processing mailbox {mailbox}: {e}")
 
         return stats
 
-    def process_mailboxes(self, mailboxes: List[str]) -> None:
-        """Process multiple mailboxes."""
+    def _process_on_own_connection(self, mailbox: str) -> MessageStats:
+        worker = self.clone()
+        try:
+            worker.connect()
+            return worker.process_mailbox(mailbox)
+        except Exception as e:
+            self.logger.error(f"Error processing mailbox {mailbox}: {e}")
+            return MessageStats()
+        finally:
+            worker.disconnect()
+
+    def process_mailboxes(self, mailboxes: List[str], workers: int = 1) -> None:
+        """Process multiple mailboxes, on up to `workers` connections at once.
+
+        Each extra worker opens its own connection (or spawns its own local
+        IMAP process); a mailbox is only ever handled by one of them.
+        """
         total_stats = MessageStats()
+        started = time.monotonic()
 
-        for mailbox in mailboxes:
-            stats = self.process_mailbox(mailbox)
-            total_stats.total += stats.total
-            total_stats.skipped_no_date += stats.skipped_no_date
-            total_stats.skipped_matching += stats.skipped_matching
-            total_stats.skipped_error += stats.skipped_error
-            total_stats.updated += stats.updated
-            total_stats.would_update += stats.would_update
+        if workers <= 1 or len(mailboxes) <= 1:
+            for mailbox in mailboxes:
+                total_stats.add(self.process_mailbox(mailbox))
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(mailboxes))) as pool:
+                for stats in pool.map(self._process_on_own_connection, mailboxes):
+                    total_stats.add(stats)
+        elapsed = time.monotonic() - started
 
         # Print summary
         self.logger.info("\n" + "="*60)
@@ -457,12 +524,24 @@ class IMAPDateSynchronizer:
         self.logger.info(f"Missing Date header:      {total_stats.skipped_no_date}")
         self.logger.info(f"Errors:                   {total_stats.skipped_error}")
 
+        mib = total_stats.bytes_rewrite / (1024 * 1024)
+        self.logger.info(f"Wall time:                {elapsed:.1f}s over {len(mailboxes)} mailbox(es)")
+        self.logger.info(f"Date scan:                {total_stats.total} messages in "
+                         f"{total_stats.scan_seconds:.1f}s "
+                         f"({total_stats.total / max(total_stats.scan_seconds, 1e-3):,.0f} msg/s, "
+                         f"summed over connections)")
         if self.dry_run:
-            self.logger.info(f"Would update:             {total_stats.would_update}")
+            self.logger.info(f"Would update:             {total_stats.would_update} "
+                             f"({mib:.1f} MiB to re-upload)")
             self.logger.info("\nDRY RUN - No changes were made")
             self.logger.info("Run with --execute to apply changes")
         else:
             self.logger.info(f"Updated:                  {total_stats.updated}")
+            if total_stats.rewrite_seconds:
+                self.logger.info(f"Rewrite:                  {mib:.1f} MiB in "
+                                 f"{total_stats.rewrite_seconds:.1f}s "
+                                 f"({total_stats.updated / total_stats.rewrite_seconds:,.1f} msg/s, "
+                                 f"{mib / total_stats.rewrite_seconds:.2f} MiB/s)")
 
 
 def main():
@@ -506,6 +585,8 @@ Examples:
     parser.add_argument('--no-skip-matching', action='store_true', help='Process even if dates already match')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose logging')
     parser.add_argument('--debug-fetch', action='store_true', help='Show raw FETCH responses for debugging')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Mailboxes processed concurrently, one connection each (default: {DEFAULT_WORKERS})')
 
     args = parser.parse_args()
 
@@ -578,7 +659,7 @@ Examples:
             logger.info("="*60)
 
         # Process mailboxes
-        sync.process_mailboxes(args.mailboxes)
+        sync.process_mailboxes(args.mailboxes, workers=args.workers)
 
         return 0
 
@@ -35,7 +35,9 @@ import os
 import argparse
 import re
 import socket
+import sqlite3
 import sys
+import time
 from typing import List, Dict, Tuple, Optional, Type, Any
 
 from email.parser import BytesParser
@@ -48,6 +50,61 @@ from email.header import decode_header
 
 imaplib._MAXLINE = max(10_000_000, imaplib._MAXLINE)
 
+# Headers are fetched this many messages at a time, so a large mailbox never
+# arrives as one response that imaplib has to hold in memory.
+HEADER_CHUNK = 500
+
+# UID sets sent with COPY/STORE are kept to this many messages per command.
+STORE_CHUNK = 200
+
+# The local index remembers, per account, which hash each (mailbox,
+# UIDVALIDITY, UID) had when its headers were first read, so later runs only
+# fetch headers for messages that arrived since.  `mode` records which of
+# the -c/-m options produced the hashes; changing them rebuilds the mailbox.
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mailboxes (
+    account TEXT NOT NULL,
+    mailbox TEXT NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    highestmodseq INTEGER,
+    mode TEXT NOT NULL,
+    PRIMARY KEY (account, mailbox)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    account TEXT NOT NULL,
+    mailbox TEXT NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    uid INTEGER NOT NULL,
+    msg_hash TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    subject TEXT,
+    sender TEXT,
+    date TEXT,
+    PRIMARY KEY (account, mailbox, uidvalidity, uid)
+);
+CREATE INDEX IF NOT EXISTS messages_by_hash ON messages (account, msg_hash, deleted);
+"""
+
+# Later copies of a message, in mailbox order then UID order, with the first
+# copy they duplicate.  run_order holds the mailboxes of this run and their
+# position; candidates, when -b is used, the UIDs sent before that date.
+DUPLICATES_QUERY = """
+SELECT mailbox, uid, keeper_mailbox, keeper_uid, subject, sender, date FROM (
+    SELECT m.mailbox, m.uid, m.subject, m.sender, m.date, o.pos,
+           ROW_NUMBER() OVER w AS n,
+           FIRST_VALUE(m.mailbox) OVER w AS keeper_mailbox,
+           FIRST_VALUE(m.uid) OVER w AS keeper_uid
+    FROM messages m JOIN run_order o ON o.mailbox = m.mailbox
+    WHERE m.account = ? AND m.msg_hash IS NOT NULL AND m.deleted = 0
+      AND (? = 0 OR EXISTS (SELECT 1 FROM candidates c
+                            WHERE c.mailbox = m.mailbox AND c.uid = m.uid))
+    WINDOW w AS (PARTITION BY m.msg_hash ORDER BY o.pos, m.uid)
+) WHERE n > 1 ORDER BY pos, uid
+"""
+
+uid_pattern = re.compile(rb"UID (\d+)")
+flags_pattern = re.compile(rb"FLAGS \(([^)]*)\)")
+
 class ImapDedupException(Exception):
     pass
 
@@ -162,6 +219,17 @@ def get_arguments(args: Optional[List[str]] = None) -> Tuple[argparse.Namespace,
         "-y", "--copy", dest="copy_mailbox",
         help="Copy messages to specified mailbox before deleting them from current location."
     )
+    parser.add_argument(
+        "-i", "--index", dest="index",
+        default=os.path.join(
+            os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+            "imapdedup", "index.sqlite3"),
+        help="SQLite file caching message hashes between runs (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--no-index", dest="index", action="store_const", const=":memory:",
+        help="Do not keep an index between runs; read every header again"
+    )
     parser.add_argument('mailbox', nargs='*')
 
     options = parser.parse_args(args)
@@ -342,50 +410,233 @@ def get_tagged_msgnums(server: imaplib.IMAP4, tag_name: str, sent_before: Option
     return get_matching_msgnums(server, f"KEYWORD {tag_name}", sent_before)
 
 
-def process_messages(server: imaplib.IMAP4, msgs_to_delete: List[int], tag_name: Optional[str] = None, copy_mailbox: Optional[str] = None):
+def uid_set(uids: List[int]) -> str:
+    """
+    Compress a list of UIDs into an IMAP sequence set, e.g. 1:4,7,9:10.
+    """
+    ranges: List[str] = []
+    ordered = sorted(uids)
+    i = 0
+    while i < len(ordered):
+        j = i
+        while j + 1 < len(ordered) and ordered[j + 1] == ordered[j] + 1:
+            j += 1
+        ranges.append(str(ordered[i]) if i == j else f"{ordered[i]}:{ordered[j]}")
+        i = j + 1
+    return ",".join(ranges)
+
+
+def parse_uid_set(text: str) -> List[int]:
+    """
+    Expand an IMAP sequence set of explicit UIDs (no '*') into a list.
+    """
+    uids: List[int] = []
+    for part in text.split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition(":")
+        a, b = int(lo), int(hi or lo)
+        uids.extend(range(min(a, b), max(a, b) + 1))
+    return uids
+
+
+def process_messages(server: imaplib.IMAP4, uids_to_delete: List[int], tag_name: Optional[str] = None, copy_mailbox: Optional[str] = None):
     """
     Actually do whatever we want to do to duplicates.
     Tag them with (\Deleted) or the specified tag_name.
     Copy them to another mailbox first if copy_mailbox specified.
     """
-    message_ids = ",".join(map(str, msgs_to_delete))
+    message_uids = uid_set(uids_to_delete)
     action = tag_name or r"(\Deleted)"
     if copy_mailbox:
         check_response(
-            server.copy(message_ids, copy_mailbox)
+            server.uid("COPY", message_uids, copy_mailbox)
         )
     check_response(
-        server.store(message_ids, "+FLAGS", action)
+        server.uid("STORE", message_uids, "+FLAGS", action)
     )
 
 
-def get_msg_headers(server: imaplib.IMAP4, msg_ids: List[int]) -> List[Tuple[int, bytes]]:
+def search_uids(server: imaplib.IMAP4, query: str) -> List[int]:
     """
-    Get the dict of headers for each message in the list of provided IDs.
-    Return a list of tuples:  [ (msgid, header_bytes), (msgid, header_bytes)... ]
-    The returned header_bytes can be parsed by
+    Return the UIDs of the messages in the selected folder matching query.
     """
-    # Get the header info for each message
-    message_ids_str = ",".join(map(str, msg_ids))
-    ms = check_response(server.fetch(message_ids_str, "(RFC822.HEADER)"))
+    found = check_response(server.uid("SEARCH", query))
+    if found and found[0]:
+        return [int(n) for n in found[0].split()]
+    return []
 
-    # There are two lines per message in the response
+
+def get_msg_headers(server: imaplib.IMAP4, uids: List[int]) -> List[Tuple[int, bytes]]:
+    """
+    Get the headers for each message in the list of provided UIDs, at most
+    HEADER_CHUNK messages per FETCH.
+    Return a list of tuples:  [ (uid, header_bytes), (uid, header_bytes)... ]
+    The returned header_bytes can be parsed by BytesParser.
+    """
     resp: List[Tuple[int, bytes]] = []
-    for ci in range(len(ms) // 2):
-        mnum = int(msg_ids[ci])
-        _, hinfo = ms[ci * 2]
-        resp.append((mnum, hinfo))
+    for i in range(0, len(uids), HEADER_CHUNK):
+        ms = check_response(
+            server.uid("FETCH", uid_set(uids[i: i + HEADER_CHUNK]), "(UID RFC822.HEADER)")
+        )
+        # Each message is a (envelope, literal) tuple followed by a closing
+        # b')'; match on the UID rather than assuming the order.
+        for item in ms:
+            if not isinstance(item, tuple):
+                continue
+            m = uid_pattern.search(item[0])
+            if m:
+                resp.append((int(m.group(1)), item[1]))
     return resp
 
 
-def print_message_info(parsed_message: Message):
-    print("From: " + str_header(parsed_message, "From"))
-    print("To: " + str_header(parsed_message, "To"))
-    print("Cc: " + str_header(parsed_message, "Cc"))
-    print("Bcc: " + str_header(parsed_message, "Bcc"))
-    print("Subject: " + str_header(parsed_message, "Subject"))
-    print("Date: " + str_header(parsed_message, "Date"))
-    print("")
+def select_mailbox(server: imaplib.IMAP4, mbox: str, readonly: bool) -> Tuple[int, int, Optional[int]]:
+    """
+    Select the mailbox and return (EXISTS, UIDVALIDITY, HIGHESTMODSEQ).
+    HIGHESTMODSEQ is None unless the server supports CONDSTORE for it.
+    """
+    msgs = check_response(server.select(mailbox=mbox, readonly=readonly))[0]
+    _, validity = server.response("UIDVALIDITY")
+    _, modseq = server.response("HIGHESTMODSEQ")
+    if not validity or validity[0] is None:
+        raise ImapDedupException(f"{mbox} did not report a UIDVALIDITY")
+    highestmodseq = int(modseq[0]) if modseq and modseq[0] is not None else None
+    return int(msgs), int(validity[0]), highestmodseq
+
+
+def get_changed_flags(server: imaplib.IMAP4, modseq: int, qresync: bool) -> Tuple[Dict[int, bool], List[int]]:
+    """
+    Ask a CONDSTORE server for the messages whose flags changed (or which
+    arrived) since modseq.  Return ({uid: is_deleted}, vanished_uids); the
+    vanished list is only known when QRESYNC is enabled.
+    """
+    server.response("VANISHED")  # discard anything left from an earlier command
+    modifier = f"(CHANGEDSINCE {modseq}{' VANISHED' if qresync else ''})"
+    changed: Dict[int, bool] = {}
+    for line in check_response(server.uid("FETCH", "1:*", "(UID FLAGS)", modifier)):
+        if isinstance(line, tuple):
+            line = line[0]
+        if not line:
+            continue
+        m = uid_pattern.search(line)
+        f = flags_pattern.search(line)
+        if m:
+            changed[int(m.group(1))] = bool(f and rb"\Deleted" in f.group(1))
+    vanished: List[int] = []
+    _, lines = server.response("VANISHED")
+    for v in lines or []:
+        if v:
+            vanished.extend(parse_uid_set(v.decode().split()[-1]))
+    return changed, vanished
+
+
+def index_mode(options) -> str:
+    """
+    Name the hashing options, so hashes from different settings never mix.
+    """
+    if options.use_checksum:
+        return "checksum+id" if options.use_id_in_checksum else "checksum"
+    return "message-id"
+
+
+def open_index(path: str) -> sqlite3.Connection:
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    index = sqlite3.connect(path)
+    index.executescript(INDEX_SCHEMA)
+    index.executescript("""
+        CREATE TEMP TABLE run_order (mailbox TEXT PRIMARY KEY, pos INTEGER NOT NULL);
+        CREATE TEMP TABLE candidates (mailbox TEXT NOT NULL, uid INTEGER NOT NULL,
+                                      PRIMARY KEY (mailbox, uid));
+    """)
+    return index
+
+
+def refresh_mailbox(server: imaplib.IMAP4, index: sqlite3.Connection, account: str,
+                    mbox: str, options, parser: BytesParser, qresync: bool) -> int:
+    """
+    Bring the index for one mailbox up to date and return its message count.
+
+    With CONDSTORE, an unchanged HIGHESTMODSEQ means there is nothing to do,
+    and otherwise CHANGEDSINCE names exactly the messages that are new or
+    had their flags changed.  Without it, the UIDs above the highest indexed
+    one are new and a DELETED search refreshes the flags.  Expunges show up
+    as VANISHED (QRESYNC), or else as an EXISTS count the index disagrees
+    with, in which case the indexed UIDs are diffed against a UID SEARCH.
+    Only the new messages have their headers fetched and hashed.
+    """
+    mode = index_mode(options)
+    exists, uidvalidity, modseq = select_mailbox(server, add_quotes(mbox), options.dry_run)
+    row = index.execute(
+        "SELECT uidvalidity, highestmodseq, mode FROM mailboxes WHERE account = ? AND mailbox = ?",
+        (account, mbox)).fetchone()
+    if row and (row[0] != uidvalidity or row[2] != mode):
+        print(f"Index for {mbox} is out of date (UIDVALIDITY or options changed); rebuilding")
+        row = None
+    if row is None:
+        index.execute("DELETE FROM messages WHERE account = ? AND mailbox = ?", (account, mbox))
+
+    key = (account, mbox, uidvalidity)
+    known = {uid for (uid,) in index.execute(
+        "SELECT uid FROM messages WHERE account = ? AND mailbox = ? AND uidvalidity = ?", key)}
+    deleted: Dict[int, bool] = {}
+    vanished: List[int] = []
+
+    if exists == 0:
+        vanished = list(known)
+    elif row and modseq is not None and row[1] is not None:
+        if modseq == row[1] and len(known) == exists:
+            if options.verbose:
+                print(f"{mbox} is unchanged since the last run")
+        else:
+            deleted, vanished = get_changed_flags(server, row[1], qresync)
+    else:
+        last = max(known, default=0)
+        # "n:*" always matches the highest UID, even when it is below n.
+        new = [uid for uid in search_uids(server, f"UID {last + 1}:*") if uid > last]
+        flagged = set(search_uids(server, "DELETED"))
+        deleted = {uid: uid in flagged for uid in known | set(new)}
+
+    vanished = [uid for uid in vanished if uid in known]
+    new_uids = sorted(uid for uid in deleted if uid not in known)
+    if len(known) - len(vanished) + len(new_uids) != exists:
+        # Something was expunged that we were not told about: diff the UIDs.
+        current = set(search_uids(server, "ALL"))
+        vanished = [uid for uid in known if uid not in current]
+        new_uids = sorted(current - known)
+        if any(uid not in deleted for uid in new_uids):
+            flagged = set(search_uids(server, "DELETED"))
+            deleted.update({uid: uid in flagged for uid in new_uids})
+
+    index.executemany(
+        "DELETE FROM messages WHERE account = ? AND mailbox = ? AND uidvalidity = ? AND uid = ?",
+        [key + (uid,) for uid in vanished])
+    index.executemany(
+        "UPDATE messages SET deleted = ? WHERE account = ? AND mailbox = ? AND uidvalidity = ? AND uid = ?",
+        [(int(d),) + key + (uid,) for uid, d in deleted.items() if uid in known])
+
+    if new_uids:
+        print(f"Reading headers of {len(new_uids)} new message(s) in {mbox} (in batches of {HEADER_CHUNK})")
+    rows = []
+    for uid, hinfo in get_msg_headers(server, new_uids):
+        mp = parser.parsebytes(hinfo)
+        if options.verbose:
+            print(f"Checking {mbox} message {uid}")
+        msg_id = get_message_id(mp, options.use_checksum, options.use_id_in_checksum)
+        rows.append(key + (uid, msg_id, int(deleted.get(uid, False)),
+                           str_header(mp, "Subject"), str_header(mp, "From"),
+                           str_header(mp, "Date")))
+    index.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    index.execute(
+        "INSERT OR REPLACE INTO mailboxes VALUES (?, ?, ?, ?, ?)",
+        (account, mbox, uidvalidity, modseq, mode))
+
+    if options.sent_before is not None:
+        index.executemany(
+            "INSERT OR IGNORE INTO candidates VALUES (?, ?)",
+            [(mbox, uid) for uid in search_uids(server, f"UNDELETED SENTBEFORE {options.sent_before}")])
+    index.commit()
+    return exists
 
 
 def add_quotes(mbox: str) -> str:
@@ -476,129 +727,92 @@ def process(options, mboxes: List[str]):
         print("Working with mailboxes in order: %s" % (", ".join(mboxes)))
 
     # OK - let's get started.
-    # Iterate through a set of named mailboxes and delete the later messages discovered.
+    # Bring the index up to date for every named mailbox, then find the
+    # later copies of each message with one query over all of them.
+    index = open_index(options.index)
+    account = f"{options.user or ''}@{options.server or options.process}"
+    qresync = "QRESYNC" in server.capabilities and "ENABLE" in server.capabilities
+    if qresync:
+        # Lets CHANGEDSINCE report expunged UIDs as VANISHED.
+        check_response(server.enable("QRESYNC"))
     try:
         parser = BytesParser()  # can be the same for all mailboxes
-        # Create a list of previously seen message IDs, in any mailbox
-        msg_ids: Dict[str, str] = {}
+        index.executemany("INSERT OR IGNORE INTO run_order VALUES (?, ?)",
+                          [(mbox, pos) for pos, mbox in enumerate(mboxes)])
+        started = time.monotonic()
         for mbox in mboxes:
-            msgs_to_delete = []  # should be reset for each mbox
-            msg_map = {}  # should be reset for each mbox
+            msgs = refresh_mailbox(server, index, account, mbox, options, parser, qresync)
+            print("There are %d messages in %s." % (msgs, add_quotes(mbox)))
+        print("Index refreshed in %.1fs" % (time.monotonic() - started))
+
+        duplicates: Dict[str, List[int]] = {}
+        for mbox, uid, keeper_mbox, keeper_uid, subject, sender, date in index.execute(
+                DUPLICATES_QUERY, (account, int(options.sent_before is not None))):
+            print(
+                "Message %s_%s is a duplicate of %s_%s and %s be %s"
+                % (
+                    add_quotes(mbox), uid, add_quotes(keeper_mbox), keeper_uid,
+                    options.dry_run and "would" or "will",
+                    "tagged as '%s'" % options.tag_name if options.tag_name else "marked as deleted",
+                )
+            )
+            if options.show or options.verbose:
+                print("Subject: %s\nFrom: %s\nDate: %s\n" % (subject, sender, date))
+            duplicates.setdefault(mbox, []).append(uid)
 
+        for mbox in mboxes:
+            msgs_to_delete = duplicates.get(mbox)
             # Make sure mailbox name is surrounded by quotes if it contains a space
-            mbox = add_quotes(mbox)
-
-            # Select the mailbox
-            msgs = check_response(server.select(mailbox=mbox, readonly=options.dry_run))[0]
-            print("There are %d messages in %s." % (int(msgs), mbox))
-
-            # Check how many messages are already marked 'deleted'...
-            numdeleted = len(get_deleted_msgnums(server, options.sent_before))
-            print(f'{numdeleted or "No"} message(s) currently marked as deleted in {mbox}')
-
-            # Now get a list of the ones that aren't deleted.
-            # That's what we'll actually use.
-            msgnums = get_undeleted_msgnums(server, options.sent_before)
-            print(f"{len(msgnums)} others in {mbox}")
-
-            chunkSize = 100
-            if options.verbose:
-                print("Reading the others... (in batches of %d)" % chunkSize)
-
-            for i in range(0, len(msgnums), chunkSize):
-                if options.verbose:
-                    print("Batch starting at item %d" % i)
-
-                # and parse them.
-                for mnum, hinfo in get_msg_headers(server, msgnums[i: i + chunkSize]):
-                    # Parse the header info into a Message object
-                    mp = parser.parsebytes(hinfo)
-
-                    if options.verbose:
-                        print(f"Checking {mbox} message {mnum}")
-                        # Store message only when verbose is enabled (to print it later on)
-                        msg_map[mnum] = mp
-
-                    # Record the message-ID header (or generate one from other headers)
-                    msg_id = get_message_id(
-                        mp, options.use_checksum, options.use_id_in_checksum
-                    )
-
-                    if msg_id:
-                        # If we've seen this message before, record it as one to be
-                        # deleted in this mailbox.
-                        if msg_id in msg_ids:
-                            print(
-                                "Message %s_%s is a duplicate of %s and %s be %s"
-                                % (
-                                    mbox, mnum, msg_ids[msg_id],
-                                    options.dry_run and "would" or "will",
-                                    "tagged as '%s'" % options.tag_name if options.tag_name else "marked as deleted",
-                                )
-                            )
-                            if options.show or options.verbose:
-                                print(
-                                    "Subject: %s\nFrom: %s\nDate: %s\n"
-                                    % (mp["Subject"], mp["From"], mp["Date"])
-                                )
-                            msgs_to_delete.append(mnum)
-                        # Otherwise just record the fact that we've seen it
-                        else:
-                            msg_ids[msg_id] = f"{mbox}_{mnum}"
-
-                print(f"{min(len(msgnums), i + chunkSize)} message(s) in {mbox} processed")
-
-            # OK - we've been through this mailbox, and msgs_to_delete holds
-            # a list of the duplicates we've found.
+            quoted = add_quotes(mbox)
 
             if not msgs_to_delete:
-                print(f"No duplicates were found in {mbox}")
+                print(f"No duplicates were found in {quoted}")
 
-            else:
-                if options.verbose:
-                    print("These are the duplicate messages: ")
-                    for mnum in msgs_to_delete:
-                        print_message_info(msg_map[mnum])
-
-                if options.dry_run:
-                    print(
-                        "If you had NOT selected the 'dry-run' option,\n"
-                        "  %i messages would now be %s."
-                        % (
-                            len(msgs_to_delete),
-                            "tagged as '%s'" % options.tag_name if options.tag_name else "marked as deleted",
-                        )
+            elif options.dry_run:
+                print(
+                    "If you had NOT selected the 'dry-run' option,\n"
+                    "  %i messages in %s would now be %s."
+                    % (
+                        len(msgs_to_delete), quoted,
+                        "tagged as '%s'" % options.tag_name if options.tag_name else "marked as deleted",
                     )
+                )
 
+            else:
+                check_response(server.select(mailbox=quoted))
+                if options.copy_mailbox:
+                    print("Copying %i messages to '%s'..." % (len(msgs_to_delete), options.copy_mailbox))
+                if options.tag_name:
+                    print("Tagging %i messages as '%s'..." % (len(msgs_to_delete), options.tag_name))
                 else:
-                    if options.copy_mailbox:
-                        print("Copying %i messages to '%s'..." % (len(msgs_to_delete), options.copy_mailbox))
-                    if options.tag_name:
-                        print("Tagging %i messages as '%s'..." % (len(msgs_to_delete), options.tag_name))
-                    else:
-                        print("Marking %i messages as deleted..." % (len(msgs_to_delete)))
-                    # Deleting messages one at a time can be slow if there are many,
-                    # so we batch them up.
-                    chunkSize = 30
+                    print("Marking %i messages as deleted..." % (len(msgs_to_delete)))
+                # Deleting messages one at a time can be slow if there are many,
+                # so we batch them up.
+                if options.verbose:
+                    print("(in batches of %d)" % STORE_CHUNK)
+                for i in range(0, len(msgs_to_delete), STORE_CHUNK):
+                    batch = msgs_to_delete[i: i + STORE_CHUNK]
+                    process_messages(server, batch, options.tag_name, options.copy_mailbox)
+                    if not options.tag_name:
+                        index.executemany(
+                            "UPDATE messages SET deleted = 1 WHERE account = ? AND mailbox = ? AND uid = ?",
+                            [(account, mbox, uid) for uid in batch])
+                        index.commit()
                     if options.verbose:
-                        print("(in batches of %d)" % chunkSize)
-                    for i in range(0, len(msgs_to_delete), chunkSize):
-                        process_messages(server, msgs_to_delete[i: i + chunkSize], options.tag_name, options.copy_mailbox)
-                        if options.verbose:
-                            print("Batch starting at item %d marked." % i)
-                    print("Confirming new numbers...")
-                    numdeleted = len(get_deleted_msgnums(server, options.sent_before))
-                    numundel = len(get_undeleted_msgnums(server, options.sent_before))
+                        print("Batch starting at item %d marked." % i)
+                print("Confirming new numbers...")
+                numdeleted = len(get_deleted_msgnums(server, options.sent_before))
+                numundel = len(get_undeleted_msgnums(server, options.sent_before))
+                print(
+                    "There are now %s messages marked as deleted and %s others in %s."
+                    % (numdeleted, numundel, quoted)
+                )
+                if options.tag_name:
+                    numtagged = len(get_tagged_msgnums(server, options.tag_name, options.sent_before))
                     print(
-                        "There are now %s messages marked as deleted and %s others in %s."
-                        % (numdeleted, numundel, mbox)
-                    )
-                    if options.tag_name:
-                        numtagged = len(get_tagged_msgnums(server, options.tag_name, options.sent_before))
-                        print(
-                        "There are now %s messages tagged as '%s' in %s."
-                        % (numtagged, options.tag_name, mbox)
-                    )
+                    "There are now %s messages tagged as '%s' in %s."
+                    % (numtagged, options.tag_name, quoted)
+                )
 
         if not options.no_close:
             server.close()
@@ -606,6 +820,7 @@ def process(options, mboxes: List[str]):
     except ImapDedupException as e:
         print("Error:", e, file=sys.stderr)
     finally:
+        index.close()
         server.logout()
 
 if __name__ == "__main__":
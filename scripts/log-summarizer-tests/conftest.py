@@ -0,0 +1,138 @@
+"""Test fixtures for log-summarizer: a fake journalctl and a stub LLM."""
+from __future__ import annotations
+
+import importlib.util
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / "log-summarizer.py"
+
+
+def load_summarizer_module():
+    """The script's filename has dashes, so it is loaded from its path."""
+    spec = importlib.util.spec_from_file_location("log_summarizer", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def m():
+    return load_summarizer_module()
+
+
+def journal_line(message, ts="2026-10-19 13:05:00", unit="nginx", priority=6, cursor=None):
+    """One `journalctl -o json` line, as bytes with its newline."""
+    micros = int(datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").timestamp() * 1_000_000)
+    record = {
+        "__CURSOR": cursor or f"s=abc;i={micros:x}",
+        "__REALTIME_TIMESTAMP": str(micros),
+        "SYSLOG_IDENTIFIER": unit,
+        "_SYSTEMD_UNIT": f"{unit}.service",
+        "PRIORITY": str(priority),
+        "MESSAGE": message,
+    }
+    return (json.dumps(record) + "\n").encode()
+
+
+class FakeStdout:
+    """Yields the canned lines; with `hang`, then blocks until the process is killed."""
+
+    def __init__(self, lines, hang, killed):
+        self.lines = list(lines)
+        self.hang = hang
+        self.killed = killed
+
+    def __iter__(self):
+        yield from self.lines
+        if self.hang:
+            self.killed.wait(5)
+
+    def close(self):
+        pass
+
+
+class FakeJournal:
+    """Stands in for subprocess.Popen(["journalctl", ...]).
+
+    set() gives a collection group's match arguments their lines, which are
+    served to the command ending in those matches; every command is recorded
+    in `commands`.
+    """
+
+    def __init__(self):
+        self.by_matches = {}
+        self.hang = set()
+        self.commands = []
+
+    def set(self, matches, lines, hang=False):
+        self.by_matches[tuple(matches)] = lines
+        if hang:
+            self.hang.add(tuple(matches))
+
+    def __call__(self, cmd, stdout=None, stderr=None):
+        self.commands.append(cmd)
+        key = next((k for k in self.by_matches if tuple(cmd[-len(k):]) == k), None)
+        killed = threading.Event()
+        proc = type("Proc", (), {})()
+        proc.stdout = FakeStdout(self.by_matches.get(key, []), key in self.hang, killed)
+        proc.kill = killed.set
+        proc.wait = lambda: 0
+        return proc
+
+
+@pytest.fixture
+def journal(m, monkeypatch):
+    fake = FakeJournal()
+    monkeypatch.setattr(m.subprocess, "Popen", fake)
+    return fake
+
+
+@pytest.fixture
+def models_config(tmp_path):
+    path = tmp_path / "models.json"
+    path.write_text(json.dumps({"llm": {
+        "reasoning": {"name": "big", "maxSeconds": 0, "initialDelay": 0, "maxDelay": 0},
+        "fallbacks": [{"name": "small", "maxSeconds": 0, "initialDelay": 0, "maxDelay": 0}],
+    }}))
+    return str(path)
+
+
+class StubLLM:
+    """Replaces AIAnalyzer._post_chat; records each call and answers from `reply`."""
+
+    def __init__(self):
+        self.calls = []
+        self.fail_models = set()
+        self._lock = threading.Lock()
+
+    def reply(self, model, system_prompt, user_prompt, max_tokens):
+        if max_tokens == 500:
+            return "- partition summary"
+        return "REPORT"
+
+    def __call__(self, model, system_prompt, user_prompt, max_tokens, timeout):
+        with self._lock:
+            self.calls.append({"model": model, "system": system_prompt, "user": user_prompt,
+                               "max_tokens": max_tokens, "timeout": timeout})
+        if model in self.fail_models:
+            raise OSError("gateway down")
+        return self.reply(model, system_prompt, user_prompt, max_tokens)
+
+    def map_calls(self):
+        return [c for c in self.calls if c["max_tokens"] == 500]
+
+    def report_calls(self):
+        return [c for c in self.calls if c["max_tokens"] != 500]
+
+
+@pytest.fixture
+def llm(m, monkeypatch):
+    stub = StubLLM()
+    monkeypatch.setattr(m.AIAnalyzer, "_post_chat",
+                        lambda self, *a, **kw: stub(*a, **kw))
+    return stub
@@ -0,0 +1,180 @@
+"""Map-reduce summarisation against a stub LLM: partitions, the cache and timeouts."""
+from collections import defaultdict
+
+import pytest
+
+STATS = {"total": 10, "filtered": 2, "critical": 0, "error": 3, "warning": 1, "info": 0}
+
+
+def logs(m, *specs):
+    """(group, timestamp, priority, message) -> grouped_logs as get_grouped_logs returns it"""
+    grouped = defaultdict(list)
+    for group, ts, priority, message in specs:
+        e = m.LogEntry(ts, group, message, priority)
+        e.group = group
+        grouped[e.severity].append(e)
+    return grouped
+
+
+SPREAD = (("web", "2026-10-19 01:00:00", 3, "upstream failed"),
+          ("web", "2026-10-19 05:59:59", 3, "upstream failed again"),
+          ("web", "2026-10-19 13:00:00", 3, "disk failed"),
+          ("mail", "2026-10-19 13:30:00", 4, "relay access denied"))
+
+
+@pytest.mark.parametrize("ts, window", [
+    ("2026-10-19 00:00:00", "2026-10-19 00:00-06:00"),
+    ("2026-10-19 13:05:00", "2026-10-19 12:00-18:00"),
+    ("2026-10-19 23:59:59", "2026-10-19 18:00-24:00"),
+    ("", "unknown time"),
+])
+def test_slices_are_clock_aligned(m, ts, window):
+    assert m.AIAnalyzer._slice_of(ts) == window
+
+
+def test_partitions_by_group_and_slice(m, models_config):
+    analyzer = m.AIAnalyzer(models_config=models_config)
+    parts = analyzer._partition(logs(m, *SPREAD), STATS)
+    assert {k: len(v) for k, v in parts.items()} == {
+        ("mail", "2026-10-19 12:00-18:00"): 1,
+        ("web", "2026-10-19 00:00-06:00"): 2,
+        ("web", "2026-10-19 12:00-18:00"): 1,
+    }
+
+
+def test_notable_info_is_partitioned_only_on_a_day_without_errors(m, models_config):
+    grouped = logs(m, ("web", "2026-10-19 01:00:00", 6, "backup completed"),
+                   ("web", "2026-10-19 01:00:00", 6, "request served"))
+    analyzer = m.AIAnalyzer(models_config=models_config)
+    quiet = {**STATS, "error": 0}
+    assert sum(map(len, analyzer._partition(grouped, quiet).values())) == 1
+    assert analyzer._partition(grouped, STATS) == {}
+
+
+def test_one_partition_takes_the_single_pass(m, models_config, llm):
+    analyzer = m.AIAnalyzer(models_config=models_config)
+    report = analyzer.analyze_logs(logs(m, SPREAD[0]), STATS)
+    assert report == "REPORT"
+    assert llm.map_calls() == []
+    [call] = llm.report_calls()
+    assert call["timeout"] == analyzer.timeout
+    assert "upstream failed" in call["user"]
+    assert set(analyzer.stage_times) == {"analyze"}
+
+
+def test_map_then_reduce_with_size_based_map_timeouts(m, models_config, llm):
+    analyzer = m.AIAnalyzer(models_config=models_config)
+    assert analyzer.analyze_logs(logs(m, *SPREAD), STATS) == "REPORT"
+    maps = llm.map_calls()
+    assert len(maps) == 3
+    for call in maps:
+        assert call["timeout"] == analyzer._timeout_for(call["user"]) < analyzer.timeout
+        assert call["system"].startswith("You are summarising one slice")
+    [reduce_call] = llm.report_calls()
+    assert reduce_call["timeout"] == analyzer.timeout
+    assert "=== web, 2026-10-19 00:00-06:00 (2 entries) ===\n- partition summary" \
+        in reduce_call["user"]
+    assert analyzer.map_stats == {"partitions": 3, "cached": 0, "failed": 0}
+    assert set(analyzer.stage_times) == {"map", "reduce"}
+
+
+def test_map_timeout_grows_with_the_prompt_and_is_capped(m, models_config):
+    analyzer = m.AIAnalyzer(models_config=models_config)
+    assert analyzer._timeout_for("") == m.CALL_TIMEOUT_BASE
+    assert analyzer._timeout_for("x" * 30_000) == \
+        m.CALL_TIMEOUT_BASE + 30 * m.CALL_TIMEOUT_PER_KCHAR
+    assert analyzer._timeout_for("x" * 10_000_000) == analyzer.timeout
+
+
+def test_map_call_falls_through_the_cascade(m, models_config, llm):
+    llm.fail_models.add("big")
+    analyzer = m.AIAnalyzer(models_config=models_config)
+    analyzer.analyze_logs(logs(m, *SPREAD), STATS)
+    assert [c["model"] for c in llm.map_calls()].count("small") == 3
+    assert analyzer.map_stats["failed"] == 0
+
+
+def test_failed_partition_reaches_the_reduce_raw_and_is_not_cached(m, models_config, llm,
+                                                                   tmp_path):
+    llm.reply = lambda model, system, user, max_tokens: (
+        None if max_tokens == 500 and "disk failed" in user else
+        "- partition summary" if max_tokens == 500 else "REPORT")
+    cache = m.PartitionCache(tmp_path / "partitions.json")
+    analyzer = m.AIAnalyzer(models_config=models_config, partition_cache=cache)
+    analyzer.analyze_logs(logs(m, *SPREAD), STATS)
+    [reduce_call] = llm.report_calls()
+    assert "(unsummarised)\n[2026-10-19 13:00:00] error web: disk failed" in reduce_call["user"]
+    assert analyzer.map_stats["failed"] == 1
+    assert len(cache.entries) == 2
+
+
+def test_cached_partitions_skip_the_model_on_an_overlapping_run(m, models_config, llm,
+                                                                tmp_path):
+    path = tmp_path / "partitions.json"
+    cache = m.PartitionCache(path)
+    m.AIAnalyzer(models_config=models_config, partition_cache=cache) \
+        .analyze_logs(logs(m, *SPREAD), STATS)
+    cache.save()
+    llm.calls.clear()
+
+    # The next window shares two slices and adds one.
+    later = SPREAD[2:] + (("web", "2026-10-19 19:00:00", 3, "upstream failed"),)
+    analyzer = m.AIAnalyzer(models_config=models_config, partition_cache=m.PartitionCache(path))
+    analyzer.analyze_logs(logs(m, *later), STATS)
+    assert len(llm.map_calls()) == 1
+    assert analyzer.map_stats == {"partitions": 3, "cached": 2, "failed": 0}
+
+
+def test_cache_drops_entries_unused_past_retention(m, tmp_path):
+    path = tmp_path / "partitions.json"
+    cache = m.PartitionCache(path)
+    cache.put("fresh", "- summary")
+    cache.entries["old"] = {"summary": "- summary", "used": "2000-01-01"}
+    cache.entries["junk"] = {"used": "2099-01-01"}
+    cache.save()
+    assert set(m.PartitionCache(path).entries) == {"fresh"}
+
+
+def test_partition_text_is_independent_of_run_wide_state(m, models_config):
+    # Same entries, different miners (and NEW flags): the same cache key.
+    def context(seen_before):
+        miner = m.TemplateMiner()
+        if seen_before:
+            miner.add(m.LogEntry("2026-10-18 01:00:00", "web", "upstream failed", 3))
+        entries = [m.LogEntry("2026-10-19 01:00:00", "web", "upstream failed", 3)]
+        for e in entries:
+            e.template = miner.add(e)
+        return m.AIAnalyzer(models_config=models_config, templates=miner) \
+            ._partition_context(entries)
+
+    assert context(False) == context(True)
+
+
+def test_map_workers_zero_sends_one_prompt(m, models_config, llm):
+    analyzer = m.AIAnalyzer(models_config=models_config, map_workers=0)
+    analyzer.analyze_logs(logs(m, *SPREAD), STATS)
+    assert llm.map_calls() == [] and len(llm.report_calls()) == 1
+
+
+def test_all_models_failing_falls_back_to_a_manual_summary(m, models_config, llm, capsys):
+    llm.fail_models.update({"big", "small"})
+    analyzer = m.AIAnalyzer(models_config=models_config, map_workers=0)
+    report = analyzer.analyze_logs(logs(m, *SPREAD), STATS)
+    assert "All models failed" in capsys.readouterr().err
+    assert "upstream failed" in report
+
+
+def test_wisdom_delimiter_splits_off_new_known_conditions(m, models_config, llm):
+    llm.reply = lambda *a: f"REPORT\n{m.WISDOM_DELIMITER}\n- nginx: harmless"
+    analyzer = m.AIAnalyzer(models_config=models_config, map_workers=0)
+    assert analyzer.analyze_logs(logs(m, SPREAD[0]), STATS) == "REPORT"
+    assert analyzer.new_wisdom == "- nginx: harmless"
+
+
+def test_truncation_is_reported_to_the_model(m, models_config, llm):
+    analyzer = m.AIAnalyzer(models_config=models_config, map_workers=0)
+    truncated = {"web": {"count": 7, "limit": 5000, "first": "2026-10-19 01:00:00",
+                         "last": "2026-10-19 02:00:00", "severities": {"info": 7}}}
+    analyzer.analyze_logs(logs(m, SPREAD[0]), STATS, truncated=truncated)
+    assert ("  - web: 7 info entries over the 5,000-entry cap were counted but not kept "
+            "(2026-10-19 01:00:00 .. 2026-10-19 02:00:00)") in llm.report_calls()[0]["user"]
@@ -0,0 +1,152 @@
+"""Journal collection: per-group streaming, cursor checkpoints, timeouts and the cap."""
+import json
+
+from conftest import journal_line, load_summarizer_module
+
+WEB = load_summarizer_module().journal_sources()["web"]
+
+
+def test_each_group_is_one_journalctl_matching_what_dash_u_matches(m, journal):
+    m.LogCollector().collect_logs(since="24 hours ago")
+    mail = next(c for c in journal.commands if "_SYSTEMD_UNIT=dovecot2.service" in c)
+    units = ["dovecot2.service", "postfix.service", "rspamd.service"]
+    matches = mail[mail.index("--since") + 2:]
+    assert mail[mail.index("--since") + 1] == "24 hours ago"
+    assert matches == (
+        [f"_SYSTEMD_UNIT={u}" for u in units]
+        + ["+", "MESSAGE_ID=fc2e22bc6ee647b6b90729ab34a250b1", "_UID=0"]
+        + [f"COREDUMP_UNIT={u}" for u in units]
+        + ["+", "_PID=1"] + [f"UNIT={u}" for u in units]
+        + ["+", "_UID=0"] + [f"OBJECT_SYSTEMD_UNIT={u}" for u in units])
+    assert len(journal.commands) == len(m.SERVICE_GROUPS) + 2   # + systemd, kernel
+
+
+def test_noise_is_dropped_before_the_full_decode_and_counted(m, journal):
+    journal.set(WEB, [journal_line("GET /metrics HTTP/1.1 200"),
+                      journal_line("upstream failed: connection reset", priority=3),
+                      journal_line("")])
+    c = m.LogCollector()
+    c.collect_logs()
+    assert [e.message for e in c.logs] == ["upstream failed: connection reset"]
+    assert c.logs[0].group == "web" and c.logs[0].severity == "error"
+    assert c.stats["total"] == 2 and c.stats["filtered"] == 1 and c.stats["error"] == 1
+
+
+def test_byte_array_message_takes_the_full_decode_path(m, journal):
+    raw = json.dumps({"__CURSOR": "c1", "__REALTIME_TIMESTAMP": "1760879100000000",
+                      "SYSLOG_IDENTIFIER": "nginx", "PRIORITY": "4",
+                      "MESSAGE": list(b"bad \xff byte")}).encode() + b"\n"
+    journal.set(WEB, [raw])
+    c = m.LogCollector()
+    c.collect_logs()
+    assert c.logs[0].message == "bad � byte"
+    assert c.stats["total"] == 1
+
+
+def test_cursor_checkpoint_resumes_after_the_last_entry_read(m, journal, tmp_path):
+    path = tmp_path / "cursors.json"
+    cursors = m.JournalCursors(path)
+    journal.set(WEB, [journal_line("one", cursor="c1"), journal_line("two", cursor="c2")])
+    m.LogCollector(cursors=cursors).collect_logs()
+    assert cursors.get("web") == "c2"
+    # Nothing is written until the report is out: a run that dies re-reads its window.
+    assert not path.exists()
+    cursors.save()
+
+    journal.commands.clear()
+    resumed = m.JournalCursors(path)
+    assert resumed.get("web") == "c2"
+    m.LogCollector(cursors=resumed).collect_logs()
+    web = next(c for c in journal.commands if c[-1] == WEB[-1])
+    assert web[web.index("--after-cursor") + 1] == "c2"
+    assert "--since" not in web
+    # A group with no checkpoint still starts from --since
+    mail = next(c for c in journal.commands if "_SYSTEMD_UNIT=postfix.service" in c)
+    assert "--since" in mail
+
+
+def test_noise_lines_still_move_the_cursor(m, journal, tmp_path):
+    cursors = m.JournalCursors(tmp_path / "cursors.json")
+    journal.set(WEB, [journal_line("real problem: failed", cursor="c1"),
+                      journal_line("GET /metrics HTTP/1.1 200", cursor="c2")])
+    m.LogCollector(cursors=cursors).collect_logs()
+    assert cursors.get("web") == "c2"
+
+
+def test_unreadable_cursor_file_starts_fresh(m, tmp_path):
+    path = tmp_path / "cursors.json"
+    path.write_text("{not json")
+    assert m.JournalCursors(path).get("web") is None
+    path.write_text(json.dumps({"web": "c1", "bad": 3}))
+    assert m.JournalCursors(path).cursors == {"web": "c1"}
+
+
+def test_timeout_keeps_what_was_read_and_checkpoints_it(m, journal, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(m, "JOURNAL_GROUP_TIMEOUT", 0.05)
+    cursors = m.JournalCursors(tmp_path / "cursors.json")
+    journal.set(WEB, [journal_line("slow disk: failed", cursor="c1")], hang=True)
+    c = m.LogCollector(cursors=cursors)
+    assert c.collect_logs() is True
+    assert [e.message for e in c.logs] == ["slow disk: failed"]
+    assert cursors.get("web") == "c1"
+    assert "Timeout collecting logs for web" in capsys.readouterr().err
+
+
+def test_cap_counts_every_entry_but_keeps_only_the_limit(m, journal, capsys):
+    journal.set(WEB, [journal_line(f"request {i} failed", ts=f"2026-10-19 13:0{i}:00", priority=3)
+                      for i in range(5)])
+    c = m.LogCollector(max_entries_per_group=2)
+    c.collect_logs()
+    assert [e.message for e in c.logs] == ["request 0 failed", "request 1 failed"]
+    assert c.stats["error"] == 5
+    assert c.truncated["web"] == {"count": 3, "limit": 2, "first": "2026-10-19 13:02:00",
+                                  "last": "2026-10-19 13:04:00", "severities": {"error": 3}}
+    assert "web: 3 error entries over the 2-entry cap were counted but not kept" \
+        in capsys.readouterr().err
+
+
+def test_errors_and_warnings_get_through_a_cap_full_of_info(m, journal, capsys):
+    lines = [journal_line(f"request {i} served", ts=f"2026-10-19 13:0{i}:00") for i in range(3)]
+    lines += [journal_line("disk failed", ts="2026-10-19 14:00:00", priority=3),
+              journal_line("cert expiring", ts="2026-10-19 14:01:00", priority=4),
+              journal_line("request 9 served", ts="2026-10-19 14:02:00"),
+              journal_line("raid degraded", ts="2026-10-19 14:03:00", priority=2)]
+    journal.set(WEB, lines)
+    c = m.LogCollector(max_entries_per_group=3)
+    c.collect_logs()
+    # Every info entry made way; what is kept stays in read order.
+    assert [e.message for e in c.logs] == ["disk failed", "cert expiring", "raid degraded"]
+    assert c.truncated["web"]["severities"] == {"info": 4}
+    assert (c.truncated["web"]["first"], c.truncated["web"]["last"]) == \
+        ("2026-10-19 13:00:00", "2026-10-19 14:02:00")
+    assert "web: 4 info entries over the 3-entry cap" in capsys.readouterr().err
+
+
+def test_lowest_severity_kept_is_displaced_first(m, journal, capsys):
+    journal.set(WEB, [journal_line("cert expiring", ts="2026-10-19 13:00:00", priority=4),
+                      journal_line("request served", ts="2026-10-19 13:01:00"),
+                      journal_line("disk failed", ts="2026-10-19 13:02:00", priority=3),
+                      journal_line("raid degraded", ts="2026-10-19 13:03:00", priority=2)])
+    c = m.LogCollector(max_entries_per_group=2)
+    c.collect_logs()
+    assert [e.message for e in c.logs] == ["disk failed", "raid degraded"]
+    assert c.truncated["web"]["severities"] == {"info": 1, "warning": 1}
+    assert "web: 2 entries (1 warning, 1 info) over the 2-entry cap" in capsys.readouterr().err
+
+
+def test_zero_cap_keeps_nothing_but_counts_everything(m, journal):
+    journal.set(WEB, [journal_line("disk failed", priority=3)])
+    c = m.LogCollector(max_entries_per_group=0)
+    c.collect_logs()
+    assert c.logs == [] and c.truncated["web"]["count"] == 1
+
+
+def test_miner_sees_entries_beyond_the_cap(m, journal):
+    miner = m.TemplateMiner()
+    journal.set(WEB, [journal_line(f"upstream 10.0.0.{i} timed out", priority=4)
+                      for i in range(5)])
+    c = m.LogCollector(max_entries_per_group=1, miner=miner)
+    c.collect_logs()
+    [template] = miner.active()
+    assert template.count == 5
+    assert c.logs[0].template is template
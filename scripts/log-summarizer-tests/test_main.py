@@ -0,0 +1,57 @@
+"""End to end: fake journal in, stub model, report and checkpoints out."""
+import json
+import sys
+
+import pytest
+
+from conftest import journal_line, load_summarizer_module
+
+WEB = load_summarizer_module().journal_sources()["web"]
+
+
+def run(m, monkeypatch, models_config, tmp_path, *extra):
+    monkeypatch.setenv("MODELS_CONFIG", models_config)
+    monkeypatch.setattr(sys, "argv", ["log-summarizer", "--quiet", "--no-alert-history",
+                                      "--history-dir", str(tmp_path / "history"), *extra])
+    return m.main()
+
+
+def test_incremental_run_saves_cursors_templates_and_report(m, journal, llm, models_config,
+                                                            tmp_path, monkeypatch, capsys):
+    journal.set(WEB, [journal_line("upstream 10.0.0.1 failed", priority=3, cursor="c1"),
+                      journal_line("upstream 10.0.0.2 failed", priority=3, cursor="c2")])
+    assert run(m, monkeypatch, models_config, tmp_path, "--incremental") == 0
+    assert capsys.readouterr().out.startswith("REPORT\n")
+
+    history = tmp_path / "history"
+    assert json.loads((history / m.CURSORS_FILENAME).read_text())["web"] == "c2"
+    [template] = json.loads((history / m.TEMPLATES_FILENAME).read_text())
+    assert template["total"] == 2
+    assert "x2 NEW: upstream <IP> failed" in llm.report_calls()[0]["user"]
+
+    journal.commands.clear()
+    run(m, monkeypatch, models_config, tmp_path, "--incremental")
+    web = next(c for c in journal.commands if c[-1] == WEB[-1])
+    assert web[web.index("--after-cursor") + 1] == "c2"
+
+
+def test_cursors_are_not_moved_when_the_run_dies_before_the_report(m, journal, llm,
+                                                                   models_config, tmp_path,
+                                                                   monkeypatch):
+    journal.set(WEB, [journal_line("upstream failed", priority=3, cursor="c1")])
+
+    def boom(*args, **kwargs):
+        raise RuntimeError("killed mid-analysis")
+
+    monkeypatch.setattr(m.AIAnalyzer, "analyze_logs", boom)
+    with pytest.raises(RuntimeError):
+        run(m, monkeypatch, models_config, tmp_path, "--incremental")
+    assert not (tmp_path / "history" / m.CURSORS_FILENAME).exists()
+
+
+def test_raw_logs_sends_lines_instead_of_templates(m, journal, llm, models_config, tmp_path,
+                                                   monkeypatch):
+    journal.set(WEB, [journal_line("upstream 10.0.0.1 failed", priority=3)])
+    run(m, monkeypatch, models_config, tmp_path, "--raw-logs", "--no-history")
+    user = llm.report_calls()[0]["user"]
+    assert "nginx: upstream 10.0.0.1 failed" in user and "templates" not in user
@@ -0,0 +1,98 @@
+"""The noise filter: literal prefilter, first-match crediting and the verdict memo."""
+import re
+
+import pytest
+
+MESSAGES = [
+    "Started Session 4711 of User container3.",
+    "session-99.scope: Deactivated successfully.",
+    "pam_unix(runuser:session): session opened for user podman by (uid=0)",
+    "10.0.0.7 - - GET /metrics HTTP/1.1 200",
+    "DB saved on disk",
+    "42 changes in 300 seconds. Saving...",
+    "Background saving terminated with success",
+    "container died 3f2a (image=foo)",
+    "container die 3f2a (image=foo)",
+    "Timed out waiting for reply from 162.159.200.1:123",
+    "postfix/smtpd[4242]: connect from unknown[10.1.2.3]",
+    "nginx: upstream timed out (110) while reading from 4.example",
+    "Failed to start unit-7.service.",
+    "HEALTH CHECK passed",
+    "kernel: refused packet: IN=eth0 OUT=",
+]
+
+
+@pytest.mark.parametrize("pattern, literal", [
+    (r"Started Session \d+ of User", "started session "),
+    (r"Removed slice .+\.slice", "removed slice "),
+    (r"GET \/metrics HTTP\/", "get /metrics http/"),
+    (r"container (start|die|attach)", "container "),
+    (r"Background saving (started|terminated)", "background saving "),
+    (r"\d+ changes in \d+ seconds\. Saving", " seconds. saving"),
+    (r"PINGS?", "ping"),
+    (r"Timed out waiting for reply from .+:\d+", "timed out waiting for reply from "),
+    (r"a|b", ""),
+    (r"x{2,3}y", "y"),
+    (r"[abc]+def", "def"),
+])
+def test_required_literal(m, pattern, literal):
+    assert m.required_literal(pattern) == literal
+
+
+def test_every_noise_pattern_literal_occurs_in_its_own_matches(m):
+    # The prefilter is only sound if a pattern can never match without its literal.
+    samples = {
+        r"Started Session \d+ of User": "Started Session 12 of User root",
+        r"\d+ changes in \d+ seconds\. Saving": "1 changes in 60 seconds. Saving",
+        r"Timed out waiting for reply from .+:\d+": "Timed out waiting for reply from x:1",
+        r"container (start|die|attach|init|create|remove|cleanup)": "container cleanup",
+    }
+    for pattern, sample in samples.items():
+        assert re.search(pattern, sample, re.IGNORECASE)
+        assert m.required_literal(pattern) in sample.lower()
+
+
+def test_prefilter_agrees_with_running_every_regex(m):
+    def per_pattern(message):
+        return any(re.search(p, message, re.IGNORECASE) for p in m.NOISE_PATTERNS)
+
+    matcher = m.NoiseMatcher(m.NOISE_PATTERNS)
+    for message in MESSAGES:
+        assert matcher.is_noise(message) == per_pattern(message), message
+
+
+def test_first_matching_pattern_is_credited(m):
+    matcher = m.NoiseMatcher([r"saving", r"DB saved", r"disk"])
+    assert matcher.match("DB saved on disk") == 1
+    assert matcher.match("nothing here") is None
+    assert matcher.top_patterns() == [("DB saved", 1)]
+
+
+def test_verdicts_are_memoised_and_still_credited(m):
+    matcher = m.NoiseMatcher(m.NOISE_PATTERNS)
+    scans = []
+    real_scan = matcher._scan
+    matcher._scan = lambda message: scans.append(message) or real_scan(message)
+    for _ in range(3):
+        assert matcher.is_noise("DB saved on disk")
+        assert not matcher.is_noise("Failed to start unit-7.service.")
+    assert len(scans) == 2
+    assert matcher.cache_hits == 4 and matcher.lookups == 6
+    assert matcher.top_patterns(1) == [("DB saved on disk", 3)]
+
+
+def test_memo_is_dropped_wholesale_when_full(m, monkeypatch):
+    monkeypatch.setattr(m.NoiseMatcher, "CACHE_SIZE", 2)
+    matcher = m.NoiseMatcher(m.NOISE_PATTERNS)
+    for message in ("a", "b", "c"):
+        matcher.is_noise(message)
+    assert list(matcher._verdicts) == ["c"]
+
+
+def test_benchmark_reports_every_variant(m):
+    report = m.benchmark_noise(200)
+    labels = [line.split("  ")[0] for line in report.splitlines()]
+    assert labels == ["per-pattern loop", "single alternation", "literal prefilter",
+                      "prefilter + verdict memo"]
+    noise_counts = {line.rsplit(", ", 1)[1] for line in report.splitlines()}
+    assert len(noise_counts) == 1   # every variant agrees on what is noise
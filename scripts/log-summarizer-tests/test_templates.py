@@ -0,0 +1,127 @@
+"""The Drain-style template miner and its persistence across runs."""
+import json
+from datetime import datetime, timedelta
+
+NOW = datetime.now()
+
+
+def ts(hours_ago=0.0):
+    return (NOW - timedelta(hours=hours_ago)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def entry(m, message, service="nginx", priority=6, when=None):
+    return m.LogEntry(when or ts(), service, message, priority)
+
+
+def test_variable_fields_are_masked_into_one_template(m):
+    miner = m.TemplateMiner()
+    for pid, ip in ((101, "10.0.0.1"), (202, "10.0.0.2"), (303, "192.168.1.9:443")):
+        miner.add(entry(m, f"worker {pid} lost upstream {ip} after 5 retries"))
+    [t] = miner.active()
+    assert t.text == "worker <NUM> lost upstream <IP> after <NUM> retries"
+    assert t.count == 3
+    assert t.exemplars == [["101", "10.0.0.1", "5"], ["202", "10.0.0.2", "5"],
+                           ["303", "192.168.1.9:443", "5"]]
+
+
+def test_disagreeing_positions_become_wildcards(m):
+    miner = m.TemplateMiner()
+    a = miner.add(entry(m, "user alice logged in from office"))
+    b = miner.add(entry(m, "user bob logged in from home"))
+    assert a is b
+    assert a.text == "user <*> logged in from <*>"
+
+
+def test_templates_are_kept_apart_by_service_and_length(m):
+    miner = m.TemplateMiner()
+    miner.add(entry(m, "connection reset by peer", service="nginx"))
+    miner.add(entry(m, "connection reset by peer", service="postfix"))
+    miner.add(entry(m, "connection reset by peer twice", service="nginx"))
+    miner.add(entry(m, "disk quota exceeded now", service="nginx"))
+    assert len(miner.active()) == 4
+
+
+def test_leading_variable_token_shares_a_leaf(m):
+    miner = m.TemplateMiner()
+    a = miner.add(entry(m, "3f2a9c1b7d8e0f12 container exited"))
+    b = miner.add(entry(m, "0x1f container exited"))
+    assert a is b
+
+
+def test_run_span_and_totals(m):
+    miner = m.TemplateMiner()
+    miner.add(entry(m, "backup finished in 12s", when=ts(3)))
+    t = miner.add(entry(m, "backup finished in 15s", when=ts(1)))
+    assert (t.run_first, t.run_last) == (ts(3), ts(1))
+    assert t.total == 2 and t.is_new
+
+
+def test_templates_persist_with_stable_ids_and_lose_new(m, tmp_path):
+    history = m.AnalysisHistory(str(tmp_path))
+    miner = history.load_templates()
+    first = miner.add(entry(m, "cert for mail.example expires in 9 days", priority=4))
+    history.save_templates(miner)
+
+    miner = history.load_templates()
+    again = miner.add(entry(m, "cert for mail.example expires in 8 days", priority=4))
+    fresh = miner.add(entry(m, "totally different message here", priority=4))
+    assert again.id == first.id and not again.is_new
+    assert again.total == 2 and again.count == 1
+    assert fresh.id != first.id and fresh.is_new
+
+
+def test_unreadable_store_starts_empty(m, tmp_path, capsys):
+    (tmp_path / m.TEMPLATES_FILENAME).write_text("[{]")
+    assert m.AnalysisHistory(str(tmp_path)).load_templates().templates == []
+    assert "Ignoring unreadable template store" in capsys.readouterr().err
+
+
+def test_prune_drops_idle_templates_and_caps_the_rest(m, monkeypatch):
+    old = m.LogTemplate(1, "nginx", ["old", "thing"], "info", ts(24 * 30))
+    recent = m.LogTemplate(2, "nginx", ["recent", "thing"], "info", ts(24))
+    stale = m.LogTemplate(3, "nginx", ["stale", "thing"], "info", ts(48))
+    miner = m.TemplateMiner([old, recent, stale])
+    miner.add(entry(m, "seen this run"))
+    monkeypatch.setattr(m.TemplateMiner, "MAX_TEMPLATES", 2)
+    miner.prune()
+    # Seen this run always survives; of the rest the most recently seen wins the cap.
+    assert [t.text for t in miner.templates] == ["seen this run", "recent thing"]
+
+
+def test_prompt_lists_one_line_per_template_new_first(m, models_config):
+    miner = m.TemplateMiner([m.LogTemplate(1, "nginx", ["upstream", "<IP>", "timed", "out"],
+                                           "warning", ts(48))])
+    miner.templates[0].total = 40
+    for i in range(3):
+        miner.add(entry(m, f"upstream 10.0.0.{i} timed out", priority=4))
+    miner.add(entry(m, "certificate rotation denied", priority=4))
+    analyzer = m.AIAnalyzer(models_config=models_config, templates=miner)
+    context = analyzer._prepare_log_context({}, {"critical": 0, "error": 0})
+    lines = context.splitlines()
+    warning = lines.index("=== WARNING LOGS (2 templates, 4 entries) ===")
+    assert lines[warning + 1].endswith("nginx x1 NEW: certificate rotation denied")
+    assert "nginx x3: upstream <IP> timed out  e.g. 10.0.0.0 | 10.0.0.1 | 10.0.0.2" \
+        in lines[warning + 2]
+
+
+def test_severity_shown_is_this_runs_not_the_historical_worst(m, tmp_path, models_config):
+    history = m.AnalysisHistory(str(tmp_path))
+    miner = history.load_templates()
+    miner.add(entry(m, "job 1 finished with status 0", priority=3))
+    history.save_templates(miner)
+
+    miner = history.load_templates()
+    t = miner.add(entry(m, "job 2 finished with status 0", priority=6))
+    assert t.severity == "info" and t.max_severity == "error"
+    analyzer = m.AIAnalyzer(models_config=models_config, templates=miner)
+    assert "ERROR LOGS" not in analyzer._prepare_log_context({}, {"critical": 0, "error": 0})
+
+    history.save_templates(miner)
+    [saved] = json.loads(history.templates_path.read_text())
+    assert saved["max_severity"] == "error" and "severity" not in saved
+
+
+def test_store_written_before_the_split_keeps_its_worst_as_history(m):
+    t = m.LogTemplate.from_json({"id": 1, "service": "nginx", "tokens": ["a"],
+                                 "severity": "critical"})
+    assert t.severity == "info" and t.max_severity == "critical"
@@ -8,14 +8,17 @@ import time
 import urllib.parse
 import argparse
 import glob
+import hashlib
 import json
 import os
 import re
 import subprocess
 import sys
+import threading
 import urllib.request
 import urllib.error
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
@@ -25,6 +28,37 @@ DEFAULT_HISTORY_DIR = "/var/log/logwatch-ai"
 HISTORY_RETENTION_DAYS = 14
 WISDOM_FILENAME = "known-conditions.prompt"
 WISDOM_DELIMITER = "===NEW_KNOWN_CONDITIONS==="
+CURSORS_FILENAME = "journal-cursors.json"
+TEMPLATES_FILENAME = "log-templates.json"
+PARTITION_CACHE_FILENAME = "partition-summaries.json"
+
+# Per-group journalctl budget. A timeout is no longer fatal to the group: the
+# entries read so far are kept and the cursor checkpoint stops at the last one,
+# so the next run picks up exactly where this one was cut off.
+JOURNAL_GROUP_TIMEOUT = 120
+# Non-noise entries kept per group. Counts in `stats` stay exact beyond this;
+# only the retained LogEntry objects are capped, so RSS is bounded by the cap
+# rather than by how chatty a unit was. Once a group is full, a new entry
+# displaces a kept one of lower severity (info first), so errors and warnings
+# get through however much info a unit logged; only when the cap is full of
+# entries at least as severe is the new one dropped. The cursor still moves
+# past the entries that were not kept -- re-reading them would leave a chatty
+# unit behind for good -- so each truncation is recorded (count per severity
+# and time range) and reported.
+MAX_ENTRIES_PER_GROUP = 5000
+
+# Map-reduce summarisation. Significant entries are cut into partitions of one
+# collection group x one SLICE_HOURS window, aligned to the clock so the same
+# slice of an overlapping window hashes the same and its summary is reused.
+SLICE_HOURS = 6
+MAP_WORKERS = 3
+MAP_LINES_PER_PARTITION = 100
+# Map-partition calls get a timeout that grows with the prompt rather than the
+# 2h constant, so a stuck small call gives way to the next model in minutes.
+# Their output is capped at 500 tokens; the single-pass and reduce calls write
+# a full report and keep the 2h budget.
+CALL_TIMEOUT_BASE = 60
+CALL_TIMEOUT_PER_KCHAR = 10
 
 
 # Service groups to monitor
@@ -119,6 +153,8 @@ class LogEntry:
         self.message = message
         self.priority = priority
         self.severity = self._determine_severity()
+        self.group = service                          # collection group, set by LogCollector
+        self.template: Optional["LogTemplate"] = None  # set when a miner is in use
 
     def _determine_severity(self) -> str:
         """Determine severity based on priority and message content"""
@@ -136,17 +172,264 @@ class LogEntry:
 
     def is_noise(self) -> bool:
         """Check if this entry matches noise patterns"""
-        for pattern in NOISE_PATTERNS:
-            if re.search(pattern, self.message, re.IGNORECASE):
-                return True
-        return False
+        return is_noise_message(self.message)
+
+
+def required_literal(pattern: str) -> str:
+    """Longest literal run every match of `pattern` must contain, lowercased.
+
+    A small scanner over the regex source, enough for NOISE_PATTERNS: escapes
+    of punctuation are literal, classes/quantifiers/groups end a run, a
+    quantifier also drops the character it makes optional, and text inside a
+    group is ignored (it may be one branch of an alternation). "" means no
+    usable literal, and the pattern is always run.
+    """
+    best, run, depth, i = "", "", 0, 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\" and i + 1 < len(pattern):
+            nxt = pattern[i + 1]
+            i += 2
+            if nxt.isalnum():               # \d, \s, \w, \b ...
+                best, run = max(best, run, key=len), ""
+            elif depth == 0:
+                run += nxt
+            continue
+        if c in "?*{":                      # previous char optional
+            best, run = max(best, run[:-1], key=len), ""
+            if c == "{":
+                i = pattern.find("}", i)
+        elif c == "+":                      # previous char repeats: run ends here
+            best, run = max(best, run, key=len), ""
+        elif c == "(":
+            best, run = max(best, run, key=len), ""
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c in ".^$[|":
+            best, run = max(best, run, key=len), ""
+            if c == "[":
+                i = pattern.find("]", i)
+            elif c == "|" and depth == 0:
+                return ""                   # top-level alternation: nothing required
+        elif depth == 0:
+            run += c
+        i += 1
+    return max(best, run, key=len).lower()
+
+
+class NoiseMatcher:
+    """Noise patterns compiled once, behind a literal prefilter.
+
+    Running every pattern's regex over every entry was the collector's
+    hottest loop on a busy journal. Each pattern now carries the literal
+    fragment any match must contain (required_literal); the message is
+    lowercased once and a pattern's compiled regex only runs to confirm a
+    message that contains its fragment -- a C substring scan rejects the
+    rest. (One big alternation was tried and is slower: sre retries every
+    branch at every offset; see benchmark_noise.) Patterns are tried in list
+    order and the first to match is credited in `hits`. Verdicts are
+    memoised per exact message, since noise is mostly the same few lines
+    repeated; the memo is dropped wholesale when full, bounding memory
+    without per-entry LRU bookkeeping.
+    """
+
+    CACHE_SIZE = 16384
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self._checks = [(required_literal(p), re.compile(p, re.IGNORECASE))
+                        for p in self.patterns]
+        self._verdicts: Dict[str, int] = {}   # message -> pattern index, -1 = not noise
+        self.hits = [0] * len(self.patterns)
+        self.cache_hits = 0
+        self.lookups = 0
+
+    def _scan(self, message: str) -> int:
+        lowered = message.lower()
+        for index, (literal, regex) in enumerate(self._checks):
+            if literal in lowered and regex.search(message):
+                return index
+        return -1
+
+    def match(self, message: str) -> Optional[int]:
+        """Index of the first noise pattern matching message, or None"""
+        self.lookups += 1
+        index = self._verdicts.get(message)
+        if index is None:
+            index = self._scan(message)
+            if len(self._verdicts) >= self.CACHE_SIZE:
+                self._verdicts.clear()
+            self._verdicts[message] = index
+        else:
+            self.cache_hits += 1
+        if index < 0:
+            return None
+        self.hits[index] += 1
+        return index
+
+    def is_noise(self, message: str) -> bool:
+        return self.match(message) is not None
+
+    def top_patterns(self, n: int = 5) -> List[Tuple[str, int]]:
+        """The n patterns that filtered the most entries, with their counts"""
+        ranked = sorted(zip(self.patterns, self.hits), key=lambda ph: -ph[1])
+        return [(p, h) for p, h in ranked[:n] if h]
+
+
+NOISE = NoiseMatcher(NOISE_PATTERNS)
+
+
+def is_noise_message(message: str) -> bool:
+    """Check a raw MESSAGE against the noise patterns"""
+    return NOISE.is_noise(message)
+
+
+def benchmark_noise(lines: int) -> str:
+    """Time the noise filter over a synthetic journal of `lines` messages.
+
+    Mixes noise and real messages with varying PIDs, session numbers and
+    addresses, the shape of a real day's journal, and reports lines per
+    minute for the one-pattern-at-a-time loop NoiseMatcher replaced, a
+    single alternation, the literal prefilter alone, and with its memo.
+    """
+    import random
+    rng = random.Random(42)
+    templates = [
+        lambda: f"Started Session {rng.randint(1, 99999)} of User container{rng.randint(1, 9)}.",
+        lambda: f"session-{rng.randint(1, 99999)}.scope: Deactivated successfully.",
+        lambda: "pam_unix(runuser:session): session opened for user podman by (uid=0)",
+        lambda: f"10.0.0.{rng.randint(1, 254)} - - GET /metrics HTTP/1.1 200",
+        lambda: "DB saved on disk",
+        lambda: f"postfix/smtpd[{rng.randint(100, 99999)}]: connect from unknown[10.1.2.{rng.randint(1, 254)}]",
+        lambda: f"nginx: upstream timed out (110) while reading from {rng.randint(1, 9)}.example",
+        lambda: "dovecot: imap-login: Disconnected (no auth attempts in 0 secs)",
+        lambda: f"Failed to start unit-{rng.randint(1, 50)}.service.",
+    ]
+    messages = [rng.choice(templates)() for _ in range(lines)]
+
+    def per_pattern(message: str) -> bool:
+        return any(re.search(p, message, re.IGNORECASE) for p in NOISE_PATTERNS)
+
+    alternation = re.compile("|".join(f"(?:{p})" for p in NOISE_PATTERNS), re.IGNORECASE)
+    results = []
+    for label, check in (("per-pattern loop", per_pattern),
+                         ("single alternation", lambda m: bool(alternation.search(m))),
+                         ("literal prefilter", lambda m: NOISE._scan(m) >= 0),
+                         ("prefilter + verdict memo", NoiseMatcher(NOISE_PATTERNS).is_noise)):
+        start = time.perf_counter()
+        noisy = sum(1 for m in messages if check(m))
+        elapsed = time.perf_counter() - start
+        results.append(f"{label:24} {lines / elapsed * 60:14,.0f} lines/min "
+                       f"({elapsed:.2f}s, {noisy:,} noise)")
+    return "\n".join(results)
+
+
+# systemd-coredump's "Process ... dumped core" message
+COREDUMP_MESSAGE_ID = "fc2e22bc6ee647b6b90729ab34a250b1"
+
+
+def unit_matches(units: List[str]) -> List[str]:
+    """journalctl matches for everything `-u unit...` would show.
+
+    The same four disjuncts journalctl builds for -u: what the units logged
+    themselves, their coredumps, systemd's lifecycle lines about them
+    ("Started ...", "Failed ..."), and messages about them from other root
+    daemons. Matches on one field are OR-ed and different fields AND-ed;
+    "+" separates the disjuncts.
+    """
+    def each(field):
+        return [f"{field}={unit}" for unit in units]
+    return (each("_SYSTEMD_UNIT")
+            + ["+", f"MESSAGE_ID={COREDUMP_MESSAGE_ID}", "_UID=0"] + each("COREDUMP_UNIT")
+            + ["+", "_PID=1"] + each("UNIT")
+            + ["+", "_UID=0"] + each("OBJECT_SYSTEMD_UNIT"))
+
+
+def journal_sources() -> Dict[str, List[str]]:
+    """journalctl match arguments per collection group.
+
+    Each SERVICE_GROUPS group is read by ONE journalctl process matching all
+    of its units at once (unit_matches), rather than one `-u` per unit.
+    """
+    sources = {
+        group: unit_matches([f"{service}.service" for service in services])
+        for group, services in SERVICE_GROUPS.items()
+    }
+    sources["systemd"] = ["-t", "systemd"]
+    sources["kernel"] = ["-k"]
+    return sources
+
+
+class JournalCursors:
+    """Last journal cursor consumed per collection group.
+
+    Loaded at start, updated as entries stream past, and written back (atomically)
+    only by save() -- which main() calls after the report is produced, so a run
+    that dies half-way re-reads the same window next time instead of losing it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.cursors: Dict[str, str] = {}
+        try:
+            data = json.loads(path.read_text())
+            if isinstance(data, dict):
+                self.cursors = {k: v for k, v in data.items() if isinstance(v, str)}
+        except (OSError, ValueError):
+            pass
+
+    def get(self, group: str) -> Optional[str]:
+        return self.cursors.get(group)
+
+    def set(self, group: str, cursor: str) -> None:
+        self.cursors[group] = cursor
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.cursors, indent=2, sort_keys=True))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: Failed to save journal cursors: {e}", file=sys.stderr)
+
+
+# Cheap field extraction from one raw `journalctl -o json` line, so noise is
+# dropped before the full json.loads. A MESSAGE journald stored as a byte
+# array (non-UTF-8 payload) doesn't match and takes the full-decode path.
+_RAW_MESSAGE_RE = re.compile(rb'"MESSAGE"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_RAW_CURSOR_RE = re.compile(rb'"__CURSOR"\s*:\s*"([^"]*)"')
+
+
+def describe_truncation(dropped: Dict) -> str:
+    """'1,234 info entries over the 5,000-entry cap were counted but not kept (t0 .. t1)'"""
+    severities = [s for s in ("critical", "error", "warning", "info")
+                  if dropped["severities"].get(s)]
+    if len(severities) == 1:
+        what = f"{dropped['count']:,} {severities[0]} entries"
+    else:
+        what = f"{dropped['count']:,} entries (" + ", ".join(
+            f"{dropped['severities'][s]:,} {s}" for s in severities) + ")"
+    return (f"{what} over the {dropped['limit']:,}-entry cap were counted but not kept "
+            f"({dropped['first']} .. {dropped['last']})")
 
 
 class LogCollector:
-    """Collects and filters logs from journalctl"""
+    """Streams and filters logs from journalctl"""
 
-    def __init__(self):
+    def __init__(self, cursors: Optional[JournalCursors] = None,
+                 max_entries_per_group: int = MAX_ENTRIES_PER_GROUP,
+                 miner: Optional["TemplateMiner"] = None):
         self.logs: List[LogEntry] = []
+        self.cursors = cursors
+        # Mined inline, so templates count every entry, not just the
+        # max_entries_per_group that are retained.
+        self.miner = miner
+        self.max_entries_per_group = max_entries_per_group
+        # group -> {"count", "limit", "first", "last", "severities"} of entries
+        # read but not kept
+        self.truncated: Dict[str, Dict] = {}
         self.stats = {
             "total": 0,
             "filtered": 0,
@@ -157,110 +440,139 @@ class LogCollector:
         }
 
     def collect_logs(self, since: str = "24 hours ago") -> bool:
-        """Collect logs from journalctl"""
+        """Collect logs from journalctl, one streaming process per group"""
         try:
-            # Collect all service logs
-            for group, services in SERVICE_GROUPS.items():
-                for service in services:
-                    self._collect_service_logs(service, since)
-
-            # Collect systemd core logs
-            self._collect_systemd_logs(since)
-
-            # Collect kernel logs
-            self._collect_kernel_logs(since)
-
+            for group, matches in journal_sources().items():
+                self._collect_group(group, matches, since)
             return True
         except Exception as e:
             print(f"Error collecting logs: {e}", file=sys.stderr)
             return False
 
-    def _collect_service_logs(self, service: str, since: str):
-        """Collect logs for a specific service"""
-        try:
-            cmd = [
-                "journalctl",
-                "-u", f"{service}.service",
-                "--since", since,
-                "--output=json",
-                "--no-pager",
-            ]
-
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                self._parse_json_logs(result.stdout)
-        except subprocess.TimeoutExpired:
-            print(f"Warning: Timeout collecting logs for {service}", file=sys.stderr)
-        except Exception as e:
-            # Service might not exist, silently continue
-            pass
+    def _collect_group(self, group: str, matches: List[str], since: str):
+        """Stream one group's journal, resuming after its saved cursor if any"""
+        cmd = ["journalctl", "--output=json", "--no-pager"]
+        cursor = self.cursors.get(group) if self.cursors is not None else None
+        if cursor:
+            cmd += ["--after-cursor", cursor]
+        else:
+            cmd += ["--since", since]
+        cmd += matches
 
-    def _collect_systemd_logs(self, since: str):
-        """Collect systemd core logs (boot, failed services)"""
         try:
-            cmd = [
-                "journalctl",
-                "-t", "systemd",
-                "--since", since,
-                "--output=json",
-                "--no-pager",
-            ]
-
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                self._parse_json_logs(result.stdout)
-        except Exception as e:
-            print(f"Warning: Error collecting systemd logs: {e}", file=sys.stderr)
-
-    def _collect_kernel_logs(self, since: str):
-        """Collect kernel logs"""
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL)
+        except OSError as e:
+            print(f"Warning: Error collecting {group} logs: {e}", file=sys.stderr)
+            return
+        # journalctl exits on its own; the timer only stops a pathological
+        # read. Killing it closes the pipe, which ends the loop below.
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(JOURNAL_GROUP_TIMEOUT, _kill)
+        timer.start()
+        # Kept entries by severity, each tagged with its read order
+        kept: Dict[str, List[Tuple[int, LogEntry]]] = defaultdict(list)
+        held = read = 0
+        last_cursor = None
         try:
-            cmd = [
-                "journalctl",
-                "-k",
-                "--since", since,
-                "--output=json",
-                "--no-pager",
-            ]
-
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                self._parse_json_logs(result.stdout)
-        except Exception as e:
-            print(f"Warning: Error collecting kernel logs: {e}", file=sys.stderr)
-
-    def _parse_json_logs(self, json_output: str):
-        """Parse JSON log output from journalctl"""
-        for line in json_output.strip().split('\n'):
-            if not line:
-                continue
-
+            for raw in proc.stdout:
+                m = _RAW_CURSOR_RE.search(raw)
+                if m:
+                    last_cursor = m.group(1).decode("ascii", "replace")
+                entry = self._parse_json_line(raw)
+                if entry is None:
+                    continue
+                self.stats[entry.severity] += 1
+                entry.group = group
+                if self.miner is not None:
+                    entry.template = self.miner.add(entry)
+                read += 1
+                if held < self.max_entries_per_group:
+                    held += 1
+                else:
+                    lowest = min((s for s in kept if kept[s]), key=SEVERITY_RANK.get,
+                                 default=None)
+                    if lowest is None or SEVERITY_RANK[lowest] >= SEVERITY_RANK[entry.severity]:
+                        self._drop(group, entry)
+                        continue
+                    # Displace the latest-read entry of the lowest severity kept
+                    self._drop(group, kept[lowest].pop()[1])
+                kept[entry.severity].append((read, entry))
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+            proc.wait()
+        self.logs.extend(entry for _, entry in sorted(
+            (item for items in kept.values() for item in items), key=lambda item: item[0]))
+        if timed_out.is_set():
+            print(f"Warning: Timeout collecting logs for {group}; "
+                  f"resuming from the last entry read next run", file=sys.stderr)
+        if group in self.truncated:
+            print(f"Warning: {group}: {describe_truncation(self.truncated[group])}",
+                  file=sys.stderr)
+        if last_cursor and self.cursors is not None:
+            self.cursors.set(group, last_cursor)
+
+    def _drop(self, group: str, entry: LogEntry) -> None:
+        """Record an entry that was counted but not kept"""
+        dropped = self.truncated.setdefault(
+            group, {"count": 0, "limit": self.max_entries_per_group,
+                    "first": entry.timestamp, "last": entry.timestamp,
+                    "severities": defaultdict(int)})
+        dropped["count"] += 1
+        dropped["severities"][entry.severity] += 1
+        dropped["first"] = min(dropped["first"], entry.timestamp)
+        dropped["last"] = max(dropped["last"], entry.timestamp)
+
+    def _parse_json_line(self, raw: bytes) -> Optional[LogEntry]:
+        """One journal line -> LogEntry, or None for noise/empty/unparseable.
+        Noise is decided on the raw MESSAGE field before the full decode."""
+        m = _RAW_MESSAGE_RE.search(raw)
+        if m:
             try:
-                entry = json.loads(line)
-
-                # Extract relevant fields
-                timestamp = entry.get("__REALTIME_TIMESTAMP", "")
-                if timestamp:
-                    # Convert microseconds to datetime
-                    dt = datetime.fromtimestamp(int(timestamp) / 1000000)
-                    timestamp = dt.strftime("%Y-%m-%d %H:%M:%S")
-
-                service = entry.get("SYSLOG_IDENTIFIER", entry.get("_SYSTEMD_UNIT", "system"))
-                message = entry.get("MESSAGE", "")
-                priority = int(entry.get("PRIORITY", "6"))
-
-                if message:
-                    self.stats["total"] += 1
-                    log_entry = LogEntry(timestamp, service, message, priority)
-
-                    if not log_entry.is_noise():
-                        self.logs.append(log_entry)
-                        self.stats[log_entry.severity] += 1
-                    else:
-                        self.stats["filtered"] += 1
-
-            except (json.JSONDecodeError, ValueError, KeyError):
-                continue
+                message = json.loads(b'"' + m.group(1) + b'"')
+            except ValueError:
+                message = None
+            if message is not None:
+                if not message:
+                    return None
+                self.stats["total"] += 1
+                if is_noise_message(message):
+                    self.stats["filtered"] += 1
+                    return None
+        try:
+            entry = json.loads(raw)
+
+            # Extract relevant fields
+            timestamp = entry.get("__REALTIME_TIMESTAMP", "")
+            if timestamp:
+                # Convert microseconds to datetime
+                dt = datetime.fromtimestamp(int(timestamp) / 1000000)
+                timestamp = dt.strftime("%Y-%m-%d %H:%M:%S")
+
+            service = entry.get("SYSLOG_IDENTIFIER", entry.get("_SYSTEMD_UNIT", "system"))
+            message = entry.get("MESSAGE", "")
+            if isinstance(message, list):
+                # journald's encoding for a non-UTF-8 payload: a byte array
+                message = bytes(message).decode("utf-8", "replace")
+            priority = int(entry.get("PRIORITY", "6"))
+        except (json.JSONDecodeError, ValueError, KeyError, TypeError):
+            return None
+
+        if not message:
+            return None
+        if not m:
+            # Not pre-screened above (byte-array MESSAGE): count and screen now.
+            self.stats["total"] += 1
+            if is_noise_message(message):
+                self.stats["filtered"] += 1
+                return None
+        return LogEntry(timestamp, service, message, priority)
 
     def get_grouped_logs(self) -> Dict[str, List[LogEntry]]:
         """Group logs by severity"""
@@ -270,6 +582,165 @@ class LogCollector:
         return grouped
 
 
+# Variable fields masked out of each token before clustering, most specific
+# first so a UUID isn't half-eaten by the hex or number rules.
+TEMPLATE_MASKS = [
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.I), "<UUID>"),
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]?\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<TS>"),
+    (re.compile(r"\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?"), "<IP>"),
+    (re.compile(r"(?:[0-9a-f]{2}:){5}[0-9a-f]{2}", re.I), "<MAC>"),
+    (re.compile(r"0x[0-9a-f]+|\b[0-9a-f]{12,}\b", re.I), "<HEX>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<NUM>"),
+]
+WILDCARD = "<*>"
+SEVERITY_RANK = {"info": 0, "warning": 1, "error": 2, "critical": 3}
+
+
+class LogTemplate:
+    """One mined template: its tokens, and where and how often it occurred"""
+
+    MAX_EXEMPLARS = 3
+
+    def __init__(self, template_id: int, service: str, tokens: List[str],
+                 severity: str, first_seen: str):
+        self.id = template_id
+        self.service = service
+        self.tokens = tokens
+        self.severity = severity          # this run's worst
+        self.max_severity = severity      # ever, across runs
+        self.first_seen = first_seen      # ever, across runs
+        self.last_seen = first_seen
+        self.total = 0                    # ever, across runs
+        self.count = 0                    # this run
+        self.run_first = ""               # this run
+        self.run_last = ""
+        self.exemplars: List[List[str]] = []
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+
+    @property
+    def is_new(self) -> bool:
+        """First seen in this run (never in a persisted earlier one)"""
+        return self.count > 0 and self.total == self.count
+
+    def to_json(self) -> dict:
+        return {"id": self.id, "service": self.service, "tokens": self.tokens,
+                "max_severity": self.max_severity, "first_seen": self.first_seen,
+                "last_seen": self.last_seen, "total": self.total}
+
+    @classmethod
+    def from_json(cls, d: dict) -> "LogTemplate":
+        # Severity is recomputed from this run's entries; only the historical
+        # worst is carried over ("severity" in files written before it was split).
+        t = cls(int(d["id"]), d["service"], list(d["tokens"]), "info", d.get("first_seen", ""))
+        t.max_severity = d.get("max_severity", d.get("severity", "info"))
+        t.last_seen = d.get("last_seen", t.first_seen)
+        t.total = int(d.get("total", 0))
+        return t
+
+
+class TemplateMiner:
+    """Drain-style online log-template miner.
+
+    Each message is split on whitespace and every token carrying a PID,
+    timestamp, IP, UUID, hex id or number is masked (TEMPLATE_MASKS). Candidate
+    templates are found by a fixed-depth lookup -- service, token count, first
+    token -- and the message joins the most similar one if at least
+    SIMILARITY of positions agree; positions that disagree become <*>.
+    Otherwise it starts a new template. One pass, constant work per message,
+    so it runs inline with the journal stream.
+
+    The model then sees one line per template with a count, first/last
+    timestamps and a few exemplar variable values instead of every raw line,
+    so a day of repeated lines that differ only by PID or address costs one
+    prompt line. Templates persist across runs (AnalysisHistory), which keeps
+    their ids stable and lets the view flag a template never seen before.
+    """
+
+    SIMILARITY = 0.5
+    MAX_TEMPLATES = 5000   # persisted; templates seen this run are always kept
+
+    def __init__(self, templates: Optional[List[LogTemplate]] = None):
+        self.templates: List[LogTemplate] = []
+        self._leaves: Dict[Tuple[str, int, str], List[LogTemplate]] = defaultdict(list)
+        self._next_id = 1
+        for t in templates or []:
+            self._index(t)
+
+    def _index(self, t: LogTemplate) -> None:
+        self.templates.append(t)
+        self._leaves[self._leaf_key(t.service, t.tokens)].append(t)
+        self._next_id = max(self._next_id, t.id + 1)
+
+    @staticmethod
+    def _leaf_key(service: str, tokens: List[str]) -> Tuple[str, int, str]:
+        first = tokens[0] if tokens else ""
+        if "<" in first or any(ch.isdigit() for ch in first):
+            first = WILDCARD
+        return (service, len(tokens), first)
+
+    @staticmethod
+    def _mask(token: str) -> str:
+        for regex, placeholder in TEMPLATE_MASKS:
+            token = regex.sub(placeholder, token)
+        return token
+
+    def add(self, entry: LogEntry) -> LogTemplate:
+        raw = entry.message.split()[:64]
+        tokens = [self._mask(tok) for tok in raw]
+        leaf = self._leaves[self._leaf_key(entry.service, tokens)]
+
+        best, best_score = None, -1.0
+        for t in leaf:
+            # A wildcard agrees with anything, so a template doesn't drift
+            # further from its own members as it generalises.
+            same = sum(1 for a, b in zip(t.tokens, tokens) if a == b or a == WILDCARD)
+            score = same / len(tokens) if tokens else 1.0
+            if score > best_score:
+                best, best_score = t, score
+        if best is None or best_score < self.SIMILARITY:
+            best = LogTemplate(self._next_id, entry.service, tokens,
+                               entry.severity, entry.timestamp)
+            self._next_id += 1
+            self._index(best)
+        else:
+            best.tokens = [a if a == b else WILDCARD for a, b in zip(best.tokens, tokens)]
+
+        best.count += 1
+        best.total += 1
+        if SEVERITY_RANK[entry.severity] > SEVERITY_RANK[best.severity]:
+            best.severity = entry.severity
+        if SEVERITY_RANK[entry.severity] > SEVERITY_RANK.get(best.max_severity, 0):
+            best.max_severity = entry.severity
+        ts = entry.timestamp
+        if ts:
+            best.run_first = min(best.run_first, ts) if best.run_first else ts
+            best.run_last = max(best.run_last, ts)
+            best.last_seen = max(best.last_seen, ts)
+        if len(best.exemplars) < LogTemplate.MAX_EXEMPLARS:
+            variables = [r[:40] for r, t in zip(raw, best.tokens) if t != r]
+            if variables and variables not in best.exemplars:
+                best.exemplars.append(variables)
+        return best
+
+    def active(self) -> List[LogTemplate]:
+        """Templates seen this run"""
+        return [t for t in self.templates if t.count]
+
+    def prune(self, keep_days: int = HISTORY_RETENTION_DAYS) -> None:
+        """Forget templates idle for keep_days, then the stalest over the cap"""
+        cutoff = (datetime.now() - timedelta(days=keep_days)).strftime("%Y-%m-%d %H:%M:%S")
+        kept = [t for t in self.templates if t.count or t.last_seen >= cutoff]
+        kept.sort(key=lambda t: (t.count > 0, t.last_seen), reverse=True)
+        survivors = kept[:max(self.MAX_TEMPLATES, len(self.active()))]
+        self.templates = []
+        self._leaves.clear()
+        for t in survivors:
+            self._index(t)
+
+
 class AIAnalyzer:
     """AI-powered log analysis via the host LLM gateway on 127.0.0.1:4000"""
 
@@ -303,8 +774,17 @@ class AIAnalyzer:
 
     def __init__(self, api_url: str = "http://127.0.0.1:4000/v1/chat/completions",
                  model: Optional[str] = None,
-                 models_config: Optional[str] = None):
+                 models_config: Optional[str] = None,
+                 templates: Optional[TemplateMiner] = None,
+                 partition_cache: Optional["PartitionCache"] = None,
+                 map_workers: int = MAP_WORKERS):
         self.api_url = api_url
+        # When given, the prompt carries the mined templates instead of raw lines.
+        self.templates = templates
+        self.partition_cache = partition_cache
+        self.map_workers = map_workers
+        self.stage_times: Dict[str, float] = {}
+        self.map_stats = {"partitions": 0, "cached": 0, "failed": 0}
         self.override_model = model
         config_path = models_config or os.environ.get(
             "MODELS_CONFIG", self.DEFAULT_MODELS_CONFIG)
@@ -316,26 +796,51 @@ class AIAnalyzer:
     def analyze_logs(self, grouped_logs: Dict[str, List[LogEntry]], stats: Dict,
                      time_range: str = "24 hours",
                      recent_history: str = "",
-                     wisdom: str = "") -> str:
+                     wisdom: str = "",
+                     truncated: Optional[Dict[str, Dict]] = None) -> str:
         """Analyze logs using AI and generate summary"""
 
         self.time_range = time_range
+        self.truncated = truncated or {}
         self.recent_history = recent_history
         self.wisdom = wisdom
         self.new_wisdom = ""  # populated after AI call
 
-        # Prepare log context for AI
-        log_context = self._prepare_log_context(grouped_logs, stats)
+        # Several partitions: summarise each concurrently (map), then hand the
+        # partial summaries to the usual analysis prompt (reduce). One
+        # partition or fewer is no better off split, and takes the single pass.
+        partitions = self._partition(grouped_logs, stats) if self.map_workers > 0 else {}
+        if len(partitions) > 1:
+            started = time.monotonic()
+            log_context = self._map_partitions(partitions)
+            self.stage_times["map"] = time.monotonic() - started
+            stage = "reduce"
+        else:
+            log_context = self._prepare_log_context(grouped_logs, stats)
+            stage = "analyze"
 
         # If no significant logs, return simple summary
         if not log_context.strip():
             return self._generate_simple_summary(stats)
 
-        # Try AI analysis with exponential backoff per model
-        import time
-        models = ([(self.override_model, 7200, 5, 60)] if self.override_model
-                  else self.models)
-        for model_name, max_seconds, initial_delay, max_delay in models:
+        started = time.monotonic()
+        report = self._analyze_with_retries(log_context, stats)
+        self.stage_times[stage] = time.monotonic() - started
+        if report is not None:
+            return report
+
+        print("All models failed, falling back to manual summary", file=sys.stderr)
+
+        # Fallback to manual summary
+        return self._generate_fallback_summary(grouped_logs, stats)
+
+    def _cascade(self) -> list:
+        return ([(self.override_model, 7200, 5, 60)] if self.override_model
+                else self.models)
+
+    def _analyze_with_retries(self, log_context: str, stats: Dict) -> Optional[str]:
+        """Run the analysis prompt down the model cascade; None if all fail"""
+        for model_name, max_seconds, initial_delay, max_delay in self._cascade():
             self.model = model_name
             start_time = time.monotonic()
             delay = initial_delay
@@ -372,14 +877,131 @@ class AIAnalyzer:
             total = time.monotonic() - start_time
             print(f"Retries exhausted for {model_name} after {total:.0f}s "
                   f"({attempt} attempts), trying next model...", file=sys.stderr)
+        return None
 
-        print("All models failed, falling back to manual summary", file=sys.stderr)
+    def _timeout_for(self, prompt: str) -> int:
+        """Map-call timeout sized to the prompt, never above self.timeout"""
+        return min(self.timeout,
+                   CALL_TIMEOUT_BASE + CALL_TIMEOUT_PER_KCHAR * len(prompt) // 1000)
+
+    def _partition(self, grouped_logs: Dict[str, List[LogEntry]],
+                   stats: Dict) -> Dict[Tuple[str, str], List[LogEntry]]:
+        """Significant entries keyed by (collection group, clock-aligned slice).
+
+        The same entries the single-pass view would consider: every
+        critical/error/warning entry, plus notable info ones on a day without
+        errors."""
+        entries = [log for severity in ("critical", "error", "warning")
+                   for log in grouped_logs.get(severity, [])]
+        if stats["critical"] == 0 and stats["error"] == 0:
+            entries += [log for log in grouped_logs.get("info", [])
+                        if any(kw in log.message.lower() for kw in
+                               ["started", "stopped", "configured", "updated", "backup",
+                                "connected", "disconnected"])]
+        partitions = defaultdict(list)
+        for log in entries:
+            partitions[(log.group, self._slice_of(log.timestamp))].append(log)
+        return dict(sorted(partitions.items()))
 
-        # Fallback to manual summary
-        return self._generate_fallback_summary(grouped_logs, stats)
+    @staticmethod
+    def _slice_of(timestamp: str) -> str:
+        """'2026-10-19 13:05:00' -> '2026-10-19 12:00-18:00' (SLICE_HOURS=6)"""
+        try:
+            hour = int(timestamp[11:13]) // SLICE_HOURS * SLICE_HOURS
+        except ValueError:
+            return "unknown time"
+        return f"{timestamp[:10]} {hour:02d}:00-{min(hour + SLICE_HOURS, 24):02d}:00"
+
+    def _partition_context(self, entries: List[LogEntry]) -> str:
+        """One partition's lines: per template when mining, raw otherwise.
+
+        Built only from the partition's own entries (no run-wide counts or
+        NEW flags) so that the same entries always give the same text, and
+        therefore the same cache key, whichever run sees them."""
+        entries = sorted(entries, key=lambda log: (-SEVERITY_RANK[log.severity], log.timestamp))
+        if self.templates is None:
+            return "\n".join(f"[{log.timestamp}] {log.severity} {log.service}: {log.message[:200]}"
+                             for log in entries[:MAP_LINES_PER_PARTITION])
+        clusters: Dict[object, List[LogEntry]] = defaultdict(list)
+        for log in entries:
+            clusters[log.template.id if log.template else (log.service, log.message)].append(log)
+        ranked = sorted(clusters.values(),
+                        key=lambda c: (-max(SEVERITY_RANK[log.severity] for log in c), -len(c)))
+        lines = []
+        for cluster in ranked[:MAP_LINES_PER_PARTITION]:
+            first, last = cluster[0].timestamp, cluster[-1].timestamp
+            span = first if first == last else f"{first} .. {last}"
+            head = cluster[0]
+            text = head.template.text if head.template else head.message
+            lines.append(f"[{span}] {head.severity} {head.service} x{len(cluster)}: {text[:200]}"
+                         f"  e.g. {head.message[:160]}")
+        return "\n".join(lines)
+
+    def _map_prompt(self, group: str, window: str) -> str:
+        return f"""You are summarising one slice of a server's logs: the {group} services,
+{window}. List each distinct problem or notable event as one dash-prefixed
+line: the service, how often and when it occurred, and the likely cause if the
+lines show it. Merge lines that describe the same problem. At most 10 lines,
+plain ASCII, no preamble and no overall health assessment."""
+
+    def _map_partitions(self, partitions: Dict[Tuple[str, str], List[LogEntry]]) -> str:
+        """Summarise every partition (cache first, then a bounded worker pool)
+        and return the partial summaries as the reduce pass's log context"""
+        jobs = []
+        for (group, window), entries in partitions.items():
+            system_prompt = self._map_prompt(group, window)
+            context = self._partition_context(entries)
+            key = hashlib.sha256(f"{system_prompt}\0{context}".encode()).hexdigest()
+            jobs.append((group, window, len(entries), system_prompt, context, key))
+
+        summaries: Dict[str, Optional[str]] = {}
+        pending = []
+        for job in jobs:
+            cached = self.partition_cache.get(job[5]) if self.partition_cache else None
+            if cached is not None:
+                summaries[job[5]] = cached
+            else:
+                pending.append(job)
+        self.map_stats = {"partitions": len(jobs), "cached": len(jobs) - len(pending),
+                          "failed": 0}
+
+        with ThreadPoolExecutor(max_workers=self.map_workers) as pool:
+            futures = {job[5]: pool.submit(self._summarise_partition, job[3], job[4])
+                       for job in pending}
+            for key, future in futures.items():
+                summaries[key] = future.result()
+
+        parts = ["The logs were summarised per service group and time window. "
+                 "Partial summaries follow; lines marked unsummarised are the raw "
+                 "entries of a window whose summary failed."]
+        for group, window, count, _, context, key in jobs:
+            summary = summaries[key]
+            if summary is None:
+                self.map_stats["failed"] += 1
+                summary = "(unsummarised)\n" + context[:2000]
+            elif self.partition_cache is not None:
+                self.partition_cache.put(key, summary)
+            parts.append(f"\n=== {group}, {window} ({count} entries) ===\n{summary.strip()}")
+        return "\n".join(parts)
+
+    def _summarise_partition(self, system_prompt: str, context: str) -> Optional[str]:
+        """One attempt per model in the cascade, each with a size-based timeout.
+        A partition that fails everywhere is passed to the reduce step raw."""
+        timeout = self._timeout_for(context)
+        for model_name, *_ in self._cascade():
+            try:
+                content = self._post_chat(model_name, system_prompt, context,
+                                          max_tokens=500, timeout=timeout)
+                if content:
+                    return content
+            except Exception as e:
+                print(f"Partition summary failed (model={model_name}): {e}", file=sys.stderr)
+        return None
 
     def _prepare_log_context(self, grouped_logs: Dict[str, List[LogEntry]], stats: Dict) -> str:
         """Prepare log context for AI analysis"""
+        if self.templates is not None:
+            return self._prepare_template_context(stats)
         context_parts = []
 
         # Include critical, error, and warning logs (limit to prevent token overflow)
@@ -403,6 +1025,53 @@ class AIAnalyzer:
 
         return "\n".join(context_parts)
 
+    TEMPLATES_PER_SEVERITY = 50
+
+    def _prepare_template_context(self, stats: Dict) -> str:
+        """The clustered view: one line per mined template seen this run.
+
+        Same severity sections and limits as the raw view, but each line
+        stands for every entry of its template, so the limit covers 50
+        distinct problems rather than the first 50 lines of one noisy one.
+        """
+        by_severity = defaultdict(list)
+        for t in self.templates.active():
+            by_severity[t.severity].append(t)
+
+        def line(t: LogTemplate) -> str:
+            span = t.run_first if t.run_first == t.run_last else f"{t.run_first} .. {t.run_last}"
+            new = " NEW" if t.is_new else ""
+            text = f"[{span}] {t.service} x{t.count}{new}: {t.text[:200]}"
+            if t.exemplars:
+                text += "  e.g. " + " | ".join(" ".join(v) for v in t.exemplars)[:160]
+            return text
+
+        context_parts = []
+        for severity in ["critical", "error", "warning"]:
+            templates = sorted(by_severity.get(severity, []),
+                               key=lambda t: (not t.is_new, -t.count))
+            if templates:
+                context_parts.append(
+                    f"\n=== {severity.upper()} LOGS ({len(templates)} templates, "
+                    f"{sum(t.count for t in templates):,} entries) ===")
+                context_parts.extend(line(t) for t in templates[:self.TEMPLATES_PER_SEVERITY])
+
+        if stats["critical"] == 0 and stats["error"] == 0:
+            notable = [t for t in sorted(by_severity.get("info", []), key=lambda t: -t.count)
+                       if any(kw in t.text.lower() for kw in
+                              ["started", "stopped", "configured", "updated", "backup",
+                               "connected", "disconnected"])][:20]
+            if notable:
+                context_parts.append("\n=== NOTABLE EVENTS ===")
+                context_parts.extend(line(t) for t in notable)
+
+        if context_parts:
+            context_parts.insert(0, "Entries are clustered into templates: <*> and <NUM>, "
+                                    "<IP>, <TS>, <UUID>, <HEX> mark variable fields, xN is "
+                                    "the number of entries, NEW marks a template not seen "
+                                    "in earlier runs.")
+        return "\n".join(context_parts)
+
     def _call_ai_api(self, log_context: str, stats: Dict) -> Optional[str]:
         """Call the LLM gateway's OpenAI-compatible API for analysis"""
 
@@ -479,17 +1148,30 @@ Statistics:
 - Critical: {stats['critical']}
 - Errors: {stats['error']}
 - Warnings: {stats['warning']}
-{wisdom_section}{history_section}
+{self._truncation_section()}{wisdom_section}{history_section}
 Provide a clear, actionable summary. Omit known conditions and recurring harmless items."""
 
+        try:
+            return self._post_chat(self.model, system_prompt, user_prompt,
+                                   max_tokens=1500, timeout=self.timeout)
+        except urllib.error.URLError as e:
+            print(f"API connection error: {e}", file=sys.stderr)
+        except Exception as e:
+            print(f"API call error: {e}", file=sys.stderr)
+
+        return None
+
+    def _post_chat(self, model: str, system_prompt: str, user_prompt: str,
+                   max_tokens: int, timeout: int) -> Optional[str]:
+        """One chat completion against the gateway; raises on transport errors"""
         payload = {
-            "model": self.model,
+            "model": model,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
             "temperature": 0.3,
-            "max_tokens": 1500,
+            "max_tokens": max_tokens,
             "chat_template_kwargs": {"enable_thinking": False},
         }
 
@@ -500,31 +1182,33 @@ Provide a clear, actionable summary. Omit known conditions and recurring harmles
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
 
-        try:
-            req = urllib.request.Request(
-                self.api_url,
-                data=json.dumps(payload).encode('utf-8'),
-                headers=headers,
-                method='POST'
-            )
-
-            with urllib.request.urlopen(req, timeout=self.timeout) as response:
-                result = json.loads(response.read().decode('utf-8'))
-
-                if "choices" in result and len(result["choices"]) > 0:
-                    msg = result["choices"][0]["message"]
-                    content = msg.get("content", "")
-                    # reasoning_content holds internal thinking/chain-of-thought from
-                    # reasoning models — never include it in the report.
-                    return content if content else None
-
-        except urllib.error.URLError as e:
-            print(f"API connection error: {e}", file=sys.stderr)
-        except Exception as e:
-            print(f"API call error: {e}", file=sys.stderr)
-
+        req = urllib.request.Request(
+            self.api_url,
+            data=json.dumps(payload).encode('utf-8'),
+            headers=headers,
+            method='POST'
+        )
+
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            result = json.loads(response.read().decode('utf-8'))
+
+            if "choices" in result and len(result["choices"]) > 0:
+                msg = result["choices"][0]["message"]
+                content = msg.get("content", "")
+                # reasoning_content holds internal thinking/chain-of-thought from
+                # reasoning models — never include it in the report.
+                return content if content else None
         return None
 
+    def _truncation_section(self) -> str:
+        """Statistics lines naming the groups whose entries were capped"""
+        if not self.truncated:
+            return ""
+        lines = ["- Truncated (counted above, not shown):"]
+        lines += [f"  - {group}: {describe_truncation(dropped)}"
+                  for group, dropped in sorted(self.truncated.items())]
+        return "\n".join(lines) + "\n"
+
     def _generate_simple_summary(self, stats: Dict) -> str:
         """Generate simple summary when no significant logs"""
         return f"""System Log Summary - {datetime.now().strftime('%Y-%m-%d %H:%M')}
@@ -540,7 +1224,7 @@ STATISTICS:
 - Total log entries processed: {stats['total']:,}
 - Routine entries filtered: {stats['filtered']:,}
 - Significant entries: {stats['critical'] + stats['error'] + stats['warning'] + stats['info']}
-
+{self._truncation_section()}
 All monitored services (mail, databases, web, IoT, monitoring, certificates,
 containers, and file sharing) are functioning within normal parameters.
 """
@@ -611,6 +1295,8 @@ containers, and file sharing) are functioning within normal parameters.
         lines.append(f"  Errors: {stats['error']}")
         lines.append(f"  Warnings: {stats['warning']}")
         lines.append(f"  Notable events: {stats['info']}")
+        for group, dropped in sorted(self.truncated.items()):
+            lines.append(f"  Truncated {group}: {describe_truncation(dropped)}")
 
         return "\n".join(lines)
 
@@ -670,6 +1356,32 @@ class AnalysisHistory:
     def wisdom_path(self) -> Path:
         return self.history_dir / WISDOM_FILENAME
 
+    @property
+    def templates_path(self) -> Path:
+        return self.history_dir / TEMPLATES_FILENAME
+
+    def load_templates(self) -> TemplateMiner:
+        """The template miner, seeded with the templates earlier runs mined"""
+        try:
+            data = json.loads(self.templates_path.read_text())
+            return TemplateMiner([LogTemplate.from_json(d) for d in data])
+        except FileNotFoundError:
+            return TemplateMiner()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Ignoring unreadable template store: {e}", file=sys.stderr)
+            return TemplateMiner()
+
+    def save_templates(self, miner: TemplateMiner) -> None:
+        """Persist the miner's templates (pruned to the retention window)"""
+        try:
+            miner.prune()
+            self.history_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.templates_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps([t.to_json() for t in miner.templates]))
+            os.replace(tmp, self.templates_path)
+        except Exception as e:
+            print(f"Warning: Failed to save log templates: {e}", file=sys.stderr)
+
     def load_wisdom(self) -> str:
         """Load the accumulated known-conditions wisdom file"""
         if not self.wisdom_path.exists():
@@ -718,6 +1430,53 @@ class AnalysisHistory:
             print(f"Warning: Failed to append to wisdom file: {e}", file=sys.stderr)
 
 
+class PartitionCache:
+    """Partition summaries keyed by a hash of their prompt and contents.
+
+    Runs over overlapping windows (the daily run, a manual --since 2d, a rerun
+    after a failure) share most of their clock-aligned partitions; those are
+    answered from here rather than by the model. Entries unused for the
+    history retention period are dropped on save.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        try:
+            data = json.loads(path.read_text())
+            if isinstance(data, dict):
+                self.entries = {k: v for k, v in data.items()
+                                if isinstance(v, dict) and isinstance(v.get("summary"), str)}
+        except (OSError, ValueError):
+            pass
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            entry["used"] = datetime.now().strftime("%Y-%m-%d")
+            return entry["summary"]
+
+    def put(self, key: str, summary: str) -> None:
+        with self._lock:
+            self.entries[key] = {"summary": summary,
+                                 "used": datetime.now().strftime("%Y-%m-%d")}
+
+    def save(self) -> None:
+        cutoff = (datetime.now() - timedelta(days=HISTORY_RETENTION_DAYS)).strftime("%Y-%m-%d")
+        try:
+            with self._lock:
+                kept = {k: v for k, v in self.entries.items() if v.get("used", "") >= cutoff}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(kept))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: Failed to save partition summaries: {e}", file=sys.stderr)
+
+
 class AlertHistory:
     """Deterministic 7-day alert history from Prometheus.
 
@@ -1008,6 +1767,13 @@ Examples:
         action='store_true',
         help='Disable history save/load (useful for one-off runs)'
     )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Resume each service group after the journal cursor saved by the '
+             'previous incremental run (falls back to --since for a group with no '
+             'checkpoint) and save new cursors once the report is produced'
+    )
     parser.add_argument(
         '--model', '-m',
         default=None,
@@ -1027,6 +1793,26 @@ Examples:
         metavar='N',
         help='Window for the alert-history section (default: 7)'
     )
+    parser.add_argument(
+        '--map-workers',
+        type=int,
+        default=MAP_WORKERS,
+        metavar='N',
+        help=f'Concurrent partition summaries in the map stage; 0 sends one '
+             f'prompt for the whole window (default: {MAP_WORKERS})'
+    )
+    parser.add_argument(
+        '--raw-logs',
+        action='store_true',
+        help='Send the model raw log lines instead of mined log templates'
+    )
+    parser.add_argument(
+        '--benchmark-noise',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Time the noise filter over N synthetic journal lines and exit'
+    )
     parser.add_argument(
         '--models-config',
         default=None,
@@ -1037,27 +1823,45 @@ Examples:
 
     args = parser.parse_args()
 
+    if args.benchmark_noise:
+        print(benchmark_noise(args.benchmark_noise))
+        return 0
+
     # Parse the time range
     since_value, time_description = parse_time_range(args.since)
 
     # Collect logs
     if not args.quiet:
         print(f"Collecting logs from the past {time_description}...", file=sys.stderr)
-    collector = LogCollector()
+    cursors = None
+    if args.incremental and not args.no_history:
+        cursors = JournalCursors(Path(args.history_dir) / CURSORS_FILENAME)
+    history = AnalysisHistory(args.history_dir)
+    miner = None
+    if not args.raw_logs:
+        miner = TemplateMiner() if args.no_history else history.load_templates()
+    collector = LogCollector(cursors=cursors, miner=miner)
 
+    started = time.monotonic()
     if not collector.collect_logs(since=since_value):
         print("Error: Failed to collect logs", file=sys.stderr)
         return 1
+    collect_seconds = time.monotonic() - started
 
     if not args.quiet:
         print(f"Collected {collector.stats['total']} log entries, filtered {collector.stats['filtered']} routine entries",
               file=sys.stderr)
+        for pattern, hits in NOISE.top_patterns():
+            print(f"  noise {hits:>8,}  {pattern}", file=sys.stderr)
+        if miner is not None:
+            active = miner.active()
+            print(f"Clustered into {len(active)} templates "
+                  f"({sum(1 for t in active if t.is_new)} new)", file=sys.stderr)
 
     # Group logs
     grouped_logs = collector.get_grouped_logs()
 
     # Load recent analysis history and wisdom for deduplication
-    history = AnalysisHistory(args.history_dir)
     recent_history = ""
     wisdom = ""
     if not args.no_history:
@@ -1071,7 +1875,12 @@ Examples:
     # Analyze with AI
     if not args.quiet:
         print("Analyzing logs...", file=sys.stderr)
-    analyzer = AIAnalyzer(model=args.model, models_config=args.models_config)
+    partition_cache = None
+    if not args.no_history:
+        partition_cache = PartitionCache(Path(args.history_dir) / PARTITION_CACHE_FILENAME)
+    analyzer = AIAnalyzer(model=args.model, models_config=args.models_config,
+                          templates=miner, partition_cache=partition_cache,
+                          map_workers=args.map_workers)
     if args.model and not args.quiet:
         print(f"Using model: {args.model}", file=sys.stderr)
     summary = analyzer.analyze_logs(
@@ -1079,12 +1888,30 @@ Examples:
         time_range=time_description,
         recent_history=recent_history,
         wisdom=wisdom,
+        truncated=collector.truncated,
     )
+    stages = [f"collect {collect_seconds:.1f}s"]
+    if "map" in analyzer.stage_times:
+        ms = analyzer.map_stats
+        stages.append(f"map {analyzer.stage_times['map']:.1f}s ({ms['partitions']} partitions, "
+                      f"{ms['cached']} cached, {ms['failed']} failed)")
+    stages += [f"{stage} {seconds:.1f}s" for stage, seconds in analyzer.stage_times.items()
+               if stage != "map"]
+    if not args.quiet:
+        print("Stage times: " + ", ".join(stages), file=sys.stderr)
+    if partition_cache is not None:
+        partition_cache.save()
+
+    # The window is summarised: only now is it safe to move the checkpoints.
+    if cursors is not None:
+        cursors.save()
 
     # Save today's analysis and any new wisdom
     if not args.no_history:
         history.save(summary)
         history.cleanup()
+        if miner is not None:
+            history.save_templates(miner)
         if analyzer.new_wisdom:
             history.append_wisdom(analyzer.new_wisdom)
             if not args.quiet:
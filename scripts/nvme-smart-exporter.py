@@ -29,13 +29,17 @@ Metrics emitted (all labelled device="nvme0n1"):
   nvme_smart_data_units_written      512,000-byte units, for endurance trending
   nvme_smart_collector_success       0 if this script could not read the device
   nvme_smart_collector_timestamp_seconds
+
+With `--daemon` it stays resident and re-reads the device every INTERVAL_SECONDS (see
+scripts/textfile_exporter.py); without it, one read and exit.
 """
 
 import json
 import os
 import subprocess
 import sys
-import time
+
+from textfile_exporter import Exporter, Registry
 
 DEVICE = os.environ.get("NVME_DEVICE", "/dev/nvme0n1")
 LABEL = os.path.basename(DEVICE)
@@ -43,6 +47,7 @@ OUT = os.environ.get(
     "TEXTFILE_PATH",
     "/var/lib/prometheus-node-exporter-textfiles/nvme_smart.prom",
 )
+INTERVAL = float(os.environ.get("INTERVAL_SECONDS", "900"))
 
 # Deliberately NOT passing --log=error or -x: those hit log page 0x109 on Apple ANS NVMe
 # and make smartctl exit 4. -H (health) plus -A (attributes) is the combination proven to
@@ -59,95 +64,81 @@ HELP = {
     "nvme_smart_available_spare_threshold": ("Vendor floor below which spare is critical", "gauge"),
     "nvme_smart_temperature_celsius": ("Composite temperature", "gauge"),
     "nvme_smart_data_units_written": ("Data units written (512,000 bytes each)", "counter"),
-    "nvme_smart_collector_success": ("1 if this collector read the device successfully", "gauge"),
-    "nvme_smart_collector_timestamp_seconds": ("Unix time of the last collector run", "gauge"),
 }
+SUCCESS = ("nvme_smart_collector_success", "1 if this collector read the device successfully")
+TIMESTAMP = ("nvme_smart_collector_timestamp_seconds", "Unix time of the last collector run")
+
+
+class SmartFailure(Exception):
+    """smartctl answered, but not with anything trustworthy enough to publish."""
 
 
-def _emit(rows: dict, ok: int) -> None:
-    lines = []
+def read_smart() -> dict:
+    """Run smartctl and return {metric: value}; raises when the device can't be read."""
+    rows: dict = {}
+    proc = subprocess.run(CMD, capture_output=True, text=True, timeout=60, check=False)
+    data = json.loads(proc.stdout)
+    # smartctl's exit status is a BITFIELD, not a simple code: bits 0-2 are hard
+    # failures (command line / device open / SMART command failed) while higher bits
+    # are advisory (e.g. bit 3 = disk failing, which is exactly what we want to
+    # REPORT rather than treat as a collector error). Only bail on the low bits.
+    status = data.get("smartctl", {}).get("exit_status", 0)
+    hard = status & 0b111
+    # Bit 3 means "DISK FAILING" -- an advisory we must REPORT, not swallow. But a real
+    # failing disk often sets bit 3 TOGETHER with a low bit (e.g. exit_status 12 = bits
+    # 3+2), and the first version of this code bailed on any low bit, dropping every
+    # device metric. That made NVMeSmartFailed (critical) unable to fire in exactly the
+    # case it exists for, leaving only NVMeSmartCollectorFailing (warning). So when bit 3
+    # is set we continue and publish, even if a low bit is also set.
+    disk_failing = bool(status & 0b1000)
+    if hard and not disk_failing:
+        print(f"smartctl hard failure, exit_status bits {hard}", file=sys.stderr)
+        raise SmartFailure("hard failure")
+    log = data.get("nvme_smart_health_information_log", {}) or {}
+    # Only trust smart_status if it is actually PRESENT. Assigning unconditionally (as the
+    # first version did) turned malformed or truncated smartctl JSON into healthy=0 with
+    # collector_success=1 -- i.e. NVMeSmartFailed CRITICAL on a perfectly healthy disk,
+    # the exact inverse of this collector's purpose. It also made the later
+    # "not in rows" guard unreachable.
+    smart_status = data.get("smart_status") or {}
+    if "passed" not in smart_status:
+        print("smartctl output has no smart_status.passed field", file=sys.stderr)
+        raise SmartFailure("no smart_status")
+    rows["nvme_smart_healthy"] = 1 if smart_status.get("passed") else 0
+    if disk_failing:
+        print("smartctl reports DISK FAILING (exit_status bit 3)", file=sys.stderr)
+        rows["nvme_smart_healthy"] = 0
+    for key, metric in (
+        ("critical_warning", "nvme_smart_critical_warning"),
+        ("media_errors", "nvme_smart_media_errors"),
+        ("num_err_log_entries", "nvme_smart_error_log_entries"),
+        ("percentage_used", "nvme_smart_percentage_used"),
+        ("available_spare", "nvme_smart_available_spare"),
+        ("available_spare_threshold", "nvme_smart_available_spare_threshold"),
+        ("data_units_written", "nvme_smart_data_units_written"),  # 512,000-byte units
+    ):
+        if key in log:
+            rows[metric] = log[key]
+    temp = log.get("temperature", data.get("temperature", {}).get("current"))
+    if temp is not None:
+        rows["nvme_smart_temperature_celsius"] = temp
+    return rows
+
+
+def collect(reg: Registry) -> None:
+    # A raise here publishes collector_success=0 and no device metrics rather than
+    # nothing: an ABSENT metric set is indistinguishable from a healthy disk, which is the
+    # failure mode this whole effort exists to remove.
+    rows = read_smart()
     for name, (help_text, kind) in HELP.items():
-        if name not in rows and name not in (
-            "nvme_smart_collector_success",
-            "nvme_smart_collector_timestamp_seconds",
-        ):
-            continue
-        lines.append(f"# HELP {name} {help_text}")
-        lines.append(f"# TYPE {name} {kind}")
-        if name == "nvme_smart_collector_success":
-            lines.append(f"{name} {ok}")
-        elif name == "nvme_smart_collector_timestamp_seconds":
-            lines.append(f"{name} {time.time():.0f}")
-        else:
-            lines.append(f'{name}{{device="{LABEL}"}} {rows[name]}')
-    tmp = f"{OUT}.{os.getpid()}"
-    with open(tmp, "w", encoding="utf-8") as fh:
-        fh.write("\n".join(lines) + "\n")
-    os.replace(tmp, OUT)  # atomic; avoids half-written .prom files
-    os.chmod(OUT, 0o644)  # health metrics only, no secrets
+        if name in rows:
+            reg.family(name, help_text, kind).add(rows[name], device=LABEL)
 
 
 def main() -> int:
-    rows: dict = {}
-    try:
-        proc = subprocess.run(CMD, capture_output=True, text=True, timeout=60, check=False)
-        data = json.loads(proc.stdout)
-        # smartctl's exit status is a BITFIELD, not a simple code: bits 0-2 are hard
-        # failures (command line / device open / SMART command failed) while higher bits
-        # are advisory (e.g. bit 3 = disk failing, which is exactly what we want to
-        # REPORT rather than treat as a collector error). Only bail on the low bits.
-        status = data.get("smartctl", {}).get("exit_status", 0)
-        hard = status & 0b111
-        # Bit 3 means "DISK FAILING" -- an advisory we must REPORT, not swallow. But a real
-        # failing disk often sets bit 3 TOGETHER with a low bit (e.g. exit_status 12 = bits
-        # 3+2), and the first version of this code bailed on any low bit, dropping every
-        # device metric. That made NVMeSmartFailed (critical) unable to fire in exactly the
-        # case it exists for, leaving only NVMeSmartCollectorFailing (warning). So when bit 3
-        # is set we continue and publish, even if a low bit is also set.
-        disk_failing = bool(status & 0b1000)
-        if hard and not disk_failing:
-            print(f"smartctl hard failure, exit_status bits {hard}", file=sys.stderr)
-            _emit({}, 0)
-            return 1
-        log = data.get("nvme_smart_health_information_log", {}) or {}
-        # Only trust smart_status if it is actually PRESENT. Assigning unconditionally (as the
-        # first version did) turned malformed or truncated smartctl JSON into healthy=0 with
-        # collector_success=1 -- i.e. NVMeSmartFailed CRITICAL on a perfectly healthy disk,
-        # the exact inverse of this collector's purpose. It also made the later
-        # "not in rows" guard unreachable.
-        smart_status = data.get("smart_status") or {}
-        if "passed" not in smart_status:
-            print("smartctl output has no smart_status.passed field", file=sys.stderr)
-            _emit({}, 0)
-            return 1
-        rows["nvme_smart_healthy"] = 1 if smart_status.get("passed") else 0
-        if disk_failing:
-            print("smartctl reports DISK FAILING (exit_status bit 3)", file=sys.stderr)
-            rows["nvme_smart_healthy"] = 0
-        for key, metric in (
-            ("critical_warning", "nvme_smart_critical_warning"),
-            ("media_errors", "nvme_smart_media_errors"),
-            ("num_err_log_entries", "nvme_smart_error_log_entries"),
-            ("percentage_used", "nvme_smart_percentage_used"),
-            ("available_spare", "nvme_smart_available_spare"),
-            ("available_spare_threshold", "nvme_smart_available_spare_threshold"),
-            ("data_units_written", "nvme_smart_data_units_written"),  # 512,000-byte units
-        ):
-            if key in log:
-                rows[metric] = log[key]
-        temp = log.get("temperature", data.get("temperature", {}).get("current"))
-        if temp is not None:
-            rows["nvme_smart_temperature_celsius"] = temp
-    except Exception as exc:  # noqa: BLE001
-        # Emit collector_success=0 rather than nothing: an ABSENT metric set is
-        # indistinguishable from a healthy disk, which is the failure mode this whole
-        # effort exists to remove.
-        print(f"nvme-smart-exporter: {type(exc).__name__}", file=sys.stderr)
-        _emit({}, 0)
-        return 1
-
-    _emit(rows, 1)
-    return 0
+    exporter = Exporter(OUT, splay=120)
+    exporter.collector("nvme_smart", collect, INTERVAL, success=SUCCESS, timestamp=TIMESTAMP)
+    return exporter.main()
 
 
 if __name__ == "__main__":
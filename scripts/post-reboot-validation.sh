@@ -527,30 +527,38 @@ else
 fi
 
 # ===========================================================================
-# (o) Monitoring exporter timers all active.
+# (o) Monitoring exporter timers and daemons all active.
 # ===========================================================================
-check "monitoring exporter timers active"
+check "monitoring exporters active"
 timers=(
   container-cve-exporter
   port-drift-exporter
-  config-drift-exporter
   container-image-staleness-exporter
   microvm-resource-exporter
   dovecot-fts-staleness-check
   asymmetric-routing-exporter
   restic-metrics
 )
-timer_bad=""
+# Textfile exporters that run as resident daemons (scripts/textfile_exporter.py)
+# rather than timer-driven oneshots.
+daemons=(
+  config-drift-exporter
+)
+exporter_bad=""
 for t in "${timers[@]}"; do
   st=$(active_state "$t.timer")
-  [ "$st" = "active" ] || timer_bad+="$t.timer($st) "
+  [ "$st" = "active" ] || exporter_bad+="$t.timer($st) "
+done
+for d in "${daemons[@]}"; do
+  st=$(active_state "$d.service")
+  [ "$st" = "active" ] || exporter_bad+="$d.service($st) "
 done
-if [ -z "$timer_bad" ]; then
-  pass "all ${#timers[@]} exporter timers active"
+if [ -z "$exporter_bad" ]; then
+  pass "all ${#timers[@]} exporter timers and ${#daemons[@]} exporter daemons active"
 elif in_boot_window; then
-  warn "not active yet: $timer_bad(boot window)"
+  warn "not active yet: $exporter_bad(boot window)"
 else
-  fail "not active: $timer_bad"
+  fail "not active: $exporter_bad"
 fi
 
 # ===========================================================================
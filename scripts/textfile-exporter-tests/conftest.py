@@ -0,0 +1,20 @@
+"""Test fixtures for the textfile exporter runtime and the exporters built on it."""
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+# The exporters import the shared runtime as a top-level module, as they do when it is
+# installed next to them by modules/monitoring/textfile-exporter-lib.nix.
+sys.path.insert(0, str(SCRIPTS))
+
+
+def load_script(filename: str):
+    """Exporter filenames have dashes, so they are loaded from their path."""
+    name = filename.removesuffix(".py").replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, SCRIPTS / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
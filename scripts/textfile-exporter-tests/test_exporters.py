@@ -0,0 +1,110 @@
+import json
+
+from conftest import load_script
+
+import textfile_exporter as tx
+
+
+def test_hermes_fallback_counter_reads_only_appended_lines(tmp_path):
+    m = load_script("hermes_fallback_counter.py")
+    log = tmp_path / "errors.log"
+    log.write_text("x Non-retryable client error: 401\nunrelated\n")
+    counter = m.FallbackCounter(str(log))
+    assert counter.refresh() == 1
+
+    with log.open("a") as fh:
+        fh.write("y Non-retryable client error: 403\nz Non-retryable client")
+    assert counter.refresh() == 2          # the half-written line waits
+    with log.open("a") as fh:
+        fh.write(" error: 404\n")
+    assert counter.refresh() == 3
+
+    log.write_text("")                     # truncation resets, as rotation always has
+    assert counter.refresh() == 0
+    log.unlink()
+    assert counter.refresh() == 0
+
+
+def test_hermes_fallback_single_pass_counts_an_unterminated_last_line(tmp_path):
+    m = load_script("hermes_fallback_counter.py")
+    log = tmp_path / "errors.log"
+    log.write_text("x Non-retryable client error: 401\ny Non-retryable client error: 403")
+    assert m.count_occurrences(str(log)) == 2
+    assert m.FallbackCounter(str(log)).refresh() == 1
+
+
+def test_cgroup_paths_are_cached_and_re_resolved_when_stale(tmp_path, monkeypatch):
+    m = load_script("cgroup-pressure-exporter.py")
+    cg = tmp_path / "cg"
+    cg.mkdir()
+    for res in ("memory", "io", "cpu"):
+        (cg / f"{res}.pressure").write_text(
+            "some avg10=0.00 avg60=0.00 avg300=0.00 total=1500000\n"
+            "full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n")
+    (cg / "memory.high").write_text("max\n")
+    read = m._read
+    monkeypatch.setattr(m, "_read", lambda path: read(path.replace("/sys/fs/cgroup/live", str(cg))))
+
+    answers = {"loki": "/live"}
+    calls = []
+
+    def resolve(unit):
+        calls.append(unit)
+        return answers.get(unit, "")
+
+    cgroups = m.ControlGroups(ttl=900, resolve=resolve)
+    reg = tx.Registry()
+    for _ in range(3):
+        m.collect("loki", reg, cgroups)
+    assert calls == ["loki"]
+    text = reg.render()
+    assert ('cgroup_pressure_stall_seconds_total{unit="loki",resource="io",scope="some"} '
+            "1.500000") in text
+    assert 'cgroup_memory_high_bytes{unit="loki"} +Inf' in text
+
+    # The unit moved: the cached path stops reading, so systemd is asked again at once.
+    for f in cg.iterdir():
+        f.unlink()
+    answers["loki"] = "/moved"
+    calls.clear()
+    reg = tx.Registry()
+    m.collect("loki", reg, cgroups)
+    assert calls == ["loki"]
+    assert 'cgroup_pressure_unit_present{unit="loki"} 0' in reg.render()
+
+    # A stopped unit has no cgroup; that answer is never cached.
+    calls.clear()
+    m.collect("grafana", tx.Registry(), cgroups)
+    m.collect("grafana", tx.Registry(), cgroups)
+    assert calls == ["grafana", "grafana"]
+
+
+def test_config_drift_baselines_reload_after_external_rebaseline(tmp_path, monkeypatch):
+    m = load_script("config-drift-exporter.py")
+    watched = tmp_path / "automations.yaml"
+    watched.write_text("a: 1\n")
+    monkeypatch.setattr(m, "FILES", {"automations.yaml": {
+        "path": str(watched), "normalize": None, "anchor": "generation"}})
+    monkeypatch.setattr(m, "BASELINE_DIR", str(tmp_path / "drift"))
+    monkeypatch.setattr(m, "BASELINE_PATH", str(tmp_path / "drift" / "baselines.json"))
+    monkeypatch.setattr(m, "_generation_anchor", lambda: 0.0)
+
+    store = m.BaselineStore()
+    collect = m.drift_collector(store)
+    reg = tx.Registry()
+    collect(reg)                                   # first run: baseline, never drift
+    assert 'config_file_drift{file="automations.yaml"} 0' in reg.render()
+
+    watched.write_text("a: 2\n")                   # out-of-band edit
+    reg = tx.Registry()
+    collect(reg)
+    assert 'config_file_drift{file="automations.yaml"} 1' in reg.render()
+
+    # The operator approves via the separate rebaseline oneshot ...
+    m.drift_collector(m.BaselineStore(), rebaseline=True)(tx.Registry())
+    # ... and the running daemon must pick that up rather than overwrite it.
+    reg = tx.Registry()
+    collect(reg)
+    assert 'config_file_drift{file="automations.yaml"} 0' in reg.render()
+    saved = json.loads((tmp_path / "drift" / "baselines.json").read_text())
+    assert set(saved) == {"automations.yaml"}
@@ -0,0 +1,137 @@
+import os
+import threading
+
+import pytest
+
+import textfile_exporter as tx
+
+
+def _samples(text):
+    return [line for line in text.splitlines() if line and not line.startswith("#")]
+
+
+def test_label_values_are_escaped():
+    reg = tx.Registry()
+    reg.gauge("m", "help\nwith newline").add(1, repo='we"ird\\name\n')
+    text = reg.render()
+    assert "# HELP m help\\nwith newline" in text
+    assert 'm{repo="we\\"ird\\\\name\\n"} 1' in text
+
+
+def test_values_render_in_exposition_format():
+    assert [tx.format_value(v) for v in (True, 3, 2.0, 0.25, float("inf"), float("nan"),
+                                         "+Inf")] == ["1", "3", "2", "0.25", "+Inf", "NaN",
+                                                      "+Inf"]
+
+
+def test_family_redeclaration_returns_same_family_and_rejects_type_clash():
+    reg = tx.Registry()
+    assert reg.gauge("m", "h") is reg.gauge("m", "h")
+    with pytest.raises(ValueError):
+        reg.counter("m", "h")
+
+
+def test_write_is_atomic_and_world_readable(tmp_path):
+    path = tmp_path / "sub" / "x.prom"
+    tx.write_textfile(str(path), "a 1\n")
+    assert path.read_text() == "a 1\n"
+    assert oct(path.stat().st_mode & 0o777) == "0o644"
+    # Nothing but the target is left behind, and no temp file ever ends in .prom
+    assert os.listdir(path.parent) == ["x.prom"]
+
+
+def test_failed_collector_publishes_success_zero_and_drops_samples(tmp_path):
+    def good(reg):
+        reg.gauge("good_value", "v").add(7)
+
+    def bad(reg):
+        reg.gauge("bad_value", "v").add(1)
+        raise RuntimeError("secret-bearing text")
+
+    exporter = tx.Exporter(str(tmp_path / "x.prom"))
+    exporter.collector("good", good, 60, success=("good_success", "ok"))
+    exporter.collector("bad", bad, 60, success=("bad_success", "ok"),
+                       timestamp=("bad_timestamp_seconds", "ts"))
+    assert exporter.run_once() is False
+    lines = _samples((tmp_path / "x.prom").read_text())
+    assert "good_value 7" in lines and "good_success 1" in lines
+    assert "bad_success 0" in lines and not any(line.startswith("bad_value") for line in lines)
+    assert any(line.startswith("bad_timestamp_seconds ") for line in lines)
+    assert 'textfile_collector_success{collector="bad"} 0' in lines
+    assert 'textfile_collector_errors_total{collector="bad"} 1' in lines
+    assert 'textfile_collector_errors_total{collector="good"} 0' in lines
+    assert 'textfile_collector_interval_seconds{collector="good"} 60' in lines
+
+
+def test_hold_on_failure_republishes_last_good_output_so_the_timestamp_ages():
+    state = {"fail": True}
+
+    def flaky(reg):
+        if state["fail"]:
+            raise OSError("baseline write failed")
+        reg.gauge("drift", "v").add(1, file="sshd")
+
+    c = tx.Collector("drift", flaky, 60, timestamp=("drift_last_run_timestamp_seconds", "ts"),
+                     hold_on_failure=True)
+    # Nothing good to hold yet: the timestamp reads 0, which is as stale as it gets.
+    assert c.run(now=1000.0) is False
+    assert _samples(tx.render(c.families)) == ["drift_last_run_timestamp_seconds 0"]
+
+    state["fail"] = False
+    assert c.run(now=2000.0) is True
+    good = _samples(tx.render(c.families))
+    assert good == ['drift{file="sshd"} 1', "drift_last_run_timestamp_seconds 2000"]
+
+    state["fail"] = True
+    assert c.run(now=3000.0) is False
+    assert _samples(tx.render(c.families)) == good
+    assert c.errors == 2 and c.last_success == 2000.0
+
+
+def test_partial_pass_keeps_samples():
+    c = tx.Collector("p", lambda reg: reg.gauge("p_value", "v").add(3) or False, 60,
+                     success=("p_success", "ok"))
+    assert c.run() is False
+    text = tx.render(c.families)
+    assert "p_value 3" in text and "p_success 0" in text
+
+
+def test_daemon_runs_collectors_on_their_own_intervals(tmp_path):
+    runs = {"fast": 0, "slow": 0}
+
+    def counting(name):
+        def fn(reg):
+            runs[name] += 1
+            reg.counter(f"{name}_runs_total", "runs").add(runs[name])
+        return fn
+
+    exporter = tx.Exporter(str(tmp_path / "x.prom"), jitter=0)
+    exporter.collector("fast", counting("fast"), 0.05)
+    exporter.collector("slow", counting("slow"), 10)
+    t = threading.Thread(target=exporter.run_forever)
+    t.start()
+    try:
+        threading.Event().wait(0.5)
+    finally:
+        exporter.stop()
+        t.join(2)
+    assert not t.is_alive()
+    assert runs["slow"] == 1 and runs["fast"] >= 4
+    text = (tmp_path / "x.prom").read_text()
+    assert "slow_runs_total 1" in text
+
+
+def test_jitter_stays_within_bounds():
+    exporter = tx.Exporter("/unused", jitter=0.1)
+    c = exporter.collector("c", lambda reg: None, 100)
+    for _ in range(200):
+        exporter._schedule(c, 0.0)
+        assert 90.0 <= c.next_run <= 110.0
+
+
+def test_oneshot_exit_code_reflects_collectors(tmp_path):
+    exporter = tx.Exporter(str(tmp_path / "x.prom"))
+    exporter.collector("ok", lambda reg: None, 60)
+    assert exporter.main([]) == 0
+    exporter.collector("bad", lambda reg: 1 / 0, 60)
+    assert exporter.main([]) == 1
@@ -0,0 +1,347 @@
+"""Shared runtime for the node-exporter textfile collectors.
+
+The textfile exporters (cgroup-pressure, nvme-smart, config-drift, gitea-push-mirror,
+hass-entity-availability, hermes-fallback-counter) used to be timer-driven oneshots that
+each hand-rolled the same three things: building HELP/TYPE/sample lines, escaping label
+values (or not), and a tmp-file-plus-rename write. This module is that code, once, plus
+the piece a oneshot cannot have: a long-lived daemon loop, so the interpreter, caches
+(unit -> cgroup paths, repo lists, drift baselines, log offsets) and subprocess tooling
+stay warm between runs instead of being rebuilt every minute.
+
+Stdlib-only on purpose -- every exporter using it is packaged with writePython3Bin and
+some run in tight sandboxes; see modules/monitoring/textfile-exporter-lib.nix.
+
+Usage:
+
+    exporter = Exporter("/var/lib/prometheus-node-exporter-textfiles/foo.prom")
+    exporter.collector("foo", collect_foo, interval=60,
+                       success=("foo_exporter_success", "1 if ..."),
+                       timestamp=("foo_exporter_timestamp_seconds", "Unix time ..."))
+    sys.exit(exporter.main())
+
+A collector is a callable taking a Registry and filling it. It raises to report failure
+(its samples are then dropped and its success gauge reads 0) or returns False for a
+partial pass (samples kept, success 0). Each collector runs on its own interval; after
+every run the whole file is re-rendered from the latest output of every collector and
+replaced atomically.
+
+A collector registered with hold_on_failure=True instead keeps publishing its last good
+output, legacy timestamp included, when a run fails. That is for exporters whose only
+health signal is a "last run" timestamp (config-drift, hermes-fallback-counter): as
+oneshots a failure crashed before writing, so the timestamp aged into their staleness
+alert and the alerting series (config_file_drift, ...) stayed as last seen. Before any
+good run there is nothing to hold, and the timestamp is published as 0.
+
+Every file also carries the runtime's own per-collector series, at no cost to the
+exporter:
+
+  textfile_collector_duration_seconds{collector}            wall time of the last run
+  textfile_collector_success{collector}                     1 if the last run succeeded
+  textfile_collector_errors_total{collector}                failed runs since start
+  textfile_collector_last_success_timestamp_seconds{collector}
+  textfile_collector_interval_seconds{collector}            configured cadence
+
+Staleness is a gauge, not a sample timestamp: node-exporter's textfile collector rejects
+files with client-side timestamps outright. `time() - last_success > 3 * interval` is the
+generic "collector wedged" expression.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+TEXTFILE_DIR = "/var/lib/prometheus-node-exporter-textfiles"
+
+KINDS = ("gauge", "counter", "untyped")
+
+
+def escape_label(value) -> str:
+    """Escape a label value per the text exposition format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def format_value(value) -> str:
+    """Render a sample value. Strings pass through, so callers can say "+Inf"."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def write_textfile(path: str, text: str, mode: int = 0o644) -> None:
+    """Replace `path` with `text` atomically.
+
+    The temp file sits in the same directory (so the rename is rename(2), never a torn
+    read) and does not end in .prom (so node-exporter never picks it up half-written).
+    The mode is explicit because textfile dirs are read by the node-exporter user.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.",
+                               suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class MetricFamily:
+    """One metric name: its HELP/TYPE header and the samples under it."""
+
+    def __init__(self, name: str, help_text: str, kind: str = "gauge"):
+        if kind not in KINDS:
+            raise ValueError(f"{name}: unknown metric type {kind!r}")
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.samples: list[tuple[tuple, object]] = []
+
+    def add(self, value, **labels) -> None:
+        self.samples.append((tuple(labels.items()), value))
+
+    def lines(self) -> list[str]:
+        out = [f"# HELP {self.name} {escape_help(self.help)}",
+               f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.samples:
+            if labels:
+                body = ",".join(f'{k}="{escape_label(v)}"' for k, v in labels)
+                out.append(f"{self.name}{{{body}}} {format_value(value)}")
+            else:
+                out.append(f"{self.name} {format_value(value)}")
+        return out
+
+
+class Registry:
+    """Metric families in declaration order.
+
+    Declaring a family again returns the existing one, so a collector can declare its
+    families up front and add samples as it goes. A clashing type is a bug and raises.
+    """
+
+    def __init__(self):
+        self._families: dict[str, MetricFamily] = {}
+
+    def family(self, name: str, help_text: str, kind: str = "gauge") -> MetricFamily:
+        existing = self._families.get(name)
+        if existing is not None:
+            if existing.kind != kind:
+                raise ValueError(f"{name} declared as {existing.kind} and {kind}")
+            return existing
+        family = MetricFamily(name, help_text, kind)
+        self._families[name] = family
+        return family
+
+    def gauge(self, name: str, help_text: str) -> MetricFamily:
+        return self.family(name, help_text, "gauge")
+
+    def counter(self, name: str, help_text: str) -> MetricFamily:
+        return self.family(name, help_text, "counter")
+
+    def families(self):
+        return list(self._families.values())
+
+    def render(self) -> str:
+        return render(self.families())
+
+
+def render(families) -> str:
+    """Exposition text for `families`, merging same-named ones from different collectors."""
+    merged: dict[str, MetricFamily] = {}
+    for family in families:
+        into = merged.get(family.name)
+        if into is None:
+            into = merged[family.name] = MetricFamily(family.name, family.help, family.kind)
+        into.samples.extend(family.samples)
+    lines = []
+    for family in merged.values():
+        lines.extend(family.lines())
+    return "\n".join(lines) + "\n"
+
+
+class Collector:
+    """A named collect function with its schedule and last published output."""
+
+    def __init__(self, name, fn, interval, success=None, timestamp=None,
+                 hold_on_failure=False):
+        self.name = name
+        self.fn = fn
+        self.interval = float(interval)
+        self.success_metric = success
+        self.timestamp_metric = timestamp
+        self.hold_on_failure = hold_on_failure
+        self.families: list[MetricFamily] = []
+        self.ok = None
+        self.duration = 0.0
+        self.errors = 0
+        self.last_success = None
+        self.next_run = 0.0
+
+    def run(self, now=None) -> bool:
+        registry = Registry()
+        started = time.monotonic()
+        try:
+            ok = self.fn(registry) is not False
+        except Exception as exc:  # noqa: BLE001 - a collector bug must not stop the others
+            # Type only: exception text from these collectors can quote credentials
+            # (gitea URLs) or file paths that are deliberately never logged.
+            print(f"{self.name}: collector failed: {type(exc).__name__}", file=sys.stderr)
+            registry = Registry()
+            ok = False
+        self.duration = time.monotonic() - started
+        now = time.time() if now is None else now
+        self.ok = ok
+        if ok:
+            self.last_success = now
+        else:
+            self.errors += 1
+            if self.hold_on_failure:
+                if self.last_success is None:
+                    registry = Registry()
+                    if self.timestamp_metric:
+                        registry.gauge(*self.timestamp_metric).add(0)
+                    self.families = registry.families()
+                return ok
+
+        # The exporter's own success/timestamp gauges (names predate this library and
+        # alerts are written against them). Emitted on failure too: an ABSENT metric set
+        # is indistinguishable from a healthy system.
+        if self.success_metric:
+            registry.gauge(*self.success_metric).add(1 if ok else 0)
+        if self.timestamp_metric:
+            registry.gauge(*self.timestamp_metric).add(f"{now:.0f}")
+        self.families = registry.families()
+        return ok
+
+
+def _runtime_families(collectors) -> list[MetricFamily]:
+    reg = Registry()
+    duration = reg.gauge("textfile_collector_duration_seconds",
+                         "Wall time of the collector's last run")
+    success = reg.gauge("textfile_collector_success",
+                        "1 if the collector's last run succeeded")
+    errors = reg.counter("textfile_collector_errors_total",
+                         "Collector runs that failed since the exporter started")
+    last = reg.gauge("textfile_collector_last_success_timestamp_seconds",
+                     "Unix time of the collector's last successful run; 0 if none yet")
+    interval = reg.gauge("textfile_collector_interval_seconds",
+                         "Configured run interval of the collector")
+    for c in collectors:
+        if c.ok is None:
+            continue
+        duration.add(f"{c.duration:.6f}", collector=c.name)
+        success.add(1 if c.ok else 0, collector=c.name)
+        errors.add(c.errors, collector=c.name)
+        last.add(f"{c.last_success or 0:.0f}", collector=c.name)
+        interval.add(c.interval, collector=c.name)
+    return reg.families()
+
+
+class Exporter:
+    """One .prom file fed by one or more collectors.
+
+    `jitter` spreads each run by +/- that fraction of its interval and `splay` delays the
+    first daemon pass by up to that many seconds -- the daemon equivalents of
+    RandomizedDelaySec, so exporters restarted together by a switch do not run in
+    lockstep forever after.
+    """
+
+    def __init__(self, path: str, jitter: float = 0.1, splay: float = 0.0):
+        self.path = path
+        self.jitter = jitter
+        self.splay = splay
+        self.collectors: list[Collector] = []
+        self._stop = threading.Event()
+
+    def collector(self, name, fn, interval, success=None, timestamp=None,
+                  hold_on_failure=False) -> Collector:
+        c = Collector(name, fn, interval, success=success, timestamp=timestamp,
+                      hold_on_failure=hold_on_failure)
+        self.collectors.append(c)
+        return c
+
+    def render(self) -> str:
+        families = []
+        for c in self.collectors:
+            families.extend(c.families)
+        families.extend(_runtime_families(self.collectors))
+        return render(families)
+
+    def write(self) -> None:
+        write_textfile(self.path, self.render())
+
+    def run_once(self) -> bool:
+        """Run every collector once and write the file; True if all succeeded."""
+        ok = True
+        for c in self.collectors:
+            ok = c.run() and ok
+        self.write()
+        return ok
+
+    def _schedule(self, c: Collector, started: float) -> None:
+        spread = c.interval * self.jitter
+        c.next_run = started + c.interval + random.uniform(-spread, spread)
+
+    def run_forever(self) -> None:
+        """Daemon loop: run each collector when due, rewrite the file after each pass."""
+        first = time.monotonic() + (random.uniform(0, self.splay) if self.splay else 0)
+        for c in self.collectors:
+            c.next_run = first
+        while not self._stop.is_set():
+            now = time.monotonic()
+            due = [c for c in self.collectors if c.next_run <= now]
+            for c in due:
+                c.run()
+                self._schedule(c, now)
+            if due:
+                try:
+                    self.write()
+                except OSError as exc:
+                    # Keep running: the next pass retries, and the stale timestamps in
+                    # the old file are what the staleness alerts key on.
+                    print(f"{self.path}: write failed: {exc}", file=sys.stderr)
+            wait = min(c.next_run for c in self.collectors) - time.monotonic()
+            self._stop.wait(max(0.0, wait))
+
+    def stop(self, *_args) -> None:
+        self._stop.set()
+
+    def main(self, argv=None) -> int:
+        parser = argparse.ArgumentParser(description=f"Write {os.path.basename(self.path)}")
+        parser.add_argument("--daemon", action="store_true",
+                            help="keep running and re-collect on each collector's interval")
+        args = parser.parse_args(argv)
+        if not args.daemon:
+            # Oneshot: non-zero on any failed collector so the unit fails loudly.
+            return 0 if self.run_once() else 1
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.run_forever()
+        return 0
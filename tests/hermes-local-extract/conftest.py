@@ -0,0 +1,90 @@
+import http.server
+import importlib.util
+import pathlib
+import socket
+import threading
+
+import pytest
+
+HERE = pathlib.Path(__file__).resolve().parent
+WORKER = next(p for p in (HERE.parent / "extract_worker.py",
+                          HERE.parents[1] / "pkgs" / "hermes-local-extract" / "extract_worker.py")
+              if p.exists())
+
+# Stands in for a public web server. Binding a second loopback address lets
+# the suite tell "the public host" from "the internal service it redirects to"
+# without leaving the machine.
+PUBLIC_ADDR = "127.0.0.2"
+
+
+@pytest.fixture
+def m(monkeypatch):
+    spec = importlib.util.spec_from_file_location("extract_worker", WORKER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    real = module._address_reject_reason
+    monkeypatch.setattr(module, "_address_reject_reason",
+                        lambda address: None if address == PUBLIC_ADDR else real(address))
+
+    # Fake DNS: public.test is "public", internal.test is an RFC1918 name.
+    zone = {"public.test": PUBLIC_ADDR, "internal.test": "10.0.0.5"}
+    real_getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host in zone:
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (zone[host], port or 0))]
+        return real_getaddrinfo(host, port, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    return module
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def _serve(address, routes):
+    """A route is (status, headers, body, delay), or a callable taking the
+    request headers and returning one -- for conditional responses."""
+    hits = []
+    requests = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            requests.append(self.headers)
+            route = routes.get(self.path, (404, {}, b"", 0))
+            status, headers, body, delay = route(self.headers) if callable(route) else route
+            if delay:
+                threading.Event().wait(delay)
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = _Server((address, 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.hits = hits
+    server.requests = requests
+    server.routes = routes
+    return server
+
+
+@pytest.fixture
+def public_server():
+    server = _serve(PUBLIC_ADDR, {})
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def internal_server():
+    server = _serve("127.0.0.1", {})
+    yield server
+    server.shutdown()
@@ -0,0 +1,195 @@
+"""ExtractCache: the key, the LRU bound, 304 revalidation and the counters.
+
+The end-to-end tests drive extract_one against the loopback server, so a
+"hit" is checked by the server seeing no request at all, not just by the
+counter moving.
+"""
+import asyncio
+
+import pytest
+
+ARTICLE = ("<html><head><title>Docs</title></head><body><article>"
+           + "".join(f"<p>Paragraph {i} explains the configuration option in enough words "
+                     f"that the extractor treats it as prose rather than chrome.</p>"
+                     for i in range(8))
+           + "</article></body></html>").encode()
+
+
+@pytest.mark.parametrize("url, normalised", [
+    ("HTTP://Example.COM", "http://example.com/"),
+    ("http://example.com:80/a", "http://example.com/a"),
+    ("https://example.com:443/a", "https://example.com/a"),
+    ("https://example.com:8443/a", "https://example.com:8443/a"),
+    ("http://example.com/a#section-2", "http://example.com/a"),
+    ("http://example.com/a?b=2&a=1&a=0", "http://example.com/a?a=0&a=1&b=2"),
+    ("http://example.com/a?flag=&x=1", "http://example.com/a?flag=&x=1"),
+    ("  http://example.com/Path/  ", "http://example.com/Path/"),
+    ("http://user:pw@Example.com:8080/", "http://user:pw@example.com:8080/"),
+    ("http://[::1]:8080/a", "http://[::1]:8080/a"),
+    ("http://[2001:DB8::1]:80/", "http://[2001:db8::1]/"),
+])
+def test_normalise_url(m, url, normalised):
+    assert m.normalise_url(url) == normalised
+
+
+def test_equivalent_urls_share_a_key_and_distinct_ones_do_not(m):
+    key = m.ExtractCache.key_for
+    assert key("http://Example.com/?b=2&a=1#top") == key("http://example.com:80/?a=1&b=2")
+    assert key("http://example.com/a") != key("http://example.com/A")
+    assert key("http://example.com/") != key("https://example.com/")
+    assert len(key("http://example.com/")) == 64
+
+
+def page(title="t", content="c"):
+    return {"title": title, "content": content}
+
+
+@pytest.fixture
+def clock(m, monkeypatch):
+    """Drive time.time() by hand so access order is never a tie."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(m.time, "time", lambda: now[0])
+    return now
+
+
+def test_store_then_lookup_round_trips(m, tmp_path):
+    cache = m.ExtractCache(str(tmp_path))
+    assert cache.lookup("http://example.com/") is None
+    cache.store("http://example.com/", page("Title", "body"), '"v1"', "Mon, 19 Oct 2026")
+    entry = cache.lookup("HTTP://example.com:80/")
+    assert (entry.title, entry.content, entry.etag, entry.last_modified) == \
+        ("Title", "body", '"v1"', "Mon, 19 Oct 2026")
+    assert entry.result("http://x/") == {"url": "http://x/", "title": "Title", "content": "body"}
+
+
+def test_least_recently_used_entry_is_evicted_first(m, tmp_path, clock):
+    cache = m.ExtractCache(str(tmp_path), max_bytes=25)
+    cache.store("http://a/", page(content="a" * 9), None, None)     # 10 bytes each
+    clock[0] += 1
+    cache.store("http://b/", page(content="b" * 9), None, None)
+    clock[0] += 1
+    assert cache.lookup("http://a/") is not None                    # a is now newer than b
+    clock[0] += 1
+    cache.store("http://c/", page(content="c" * 9), None, None)
+    assert cache.lookup("http://b/") is None
+    assert cache.lookup("http://a/") is not None and cache.lookup("http://c/") is not None
+    assert cache.session["evictions"] == 1
+    assert cache.stats()["bytes"] == 20
+
+
+def test_entry_larger_than_the_whole_cache_is_not_stored(m, tmp_path):
+    cache = m.ExtractCache(str(tmp_path), max_bytes=10)
+    cache.store("http://small/", page(content="s"), None, None)
+    cache.store("http://big/", page(content="x" * 50), None, None)
+    assert cache.lookup("http://big/") is None
+    assert cache.lookup("http://small/") is not None            # not evicted to make room
+    assert cache.session["evictions"] == 0
+
+
+def test_revalidation_restarts_the_ttl_and_keeps_validators_not_resent(m, tmp_path, clock):
+    cache = m.ExtractCache(str(tmp_path))
+    cache.store("http://a/", page(), '"v1"', "Mon, 19 Oct 2026")
+    entry = cache.lookup("http://a/")
+    clock[0] += m.CACHE_TTL_SECONDS
+    assert not entry.is_fresh(clock[0])
+    cache.mark_revalidated(entry, None, "Tue, 20 Oct 2026")
+    again = cache.lookup("http://a/")
+    assert again.is_fresh(clock[0])
+    assert (again.etag, again.last_modified) == ('"v1"', "Tue, 20 Oct 2026")
+
+
+def test_disabled_cache_answers_nothing_and_fails_nothing(m):
+    cache = m.ExtractCache("")
+    assert not cache.enabled
+    cache.store("http://a/", page(), None, None)
+    assert cache.lookup("http://a/") is None
+    cache.count("misses")
+    assert cache.stats()["misses"] == 0 and cache.session["misses"] == 1
+
+
+def test_corrupt_database_disables_the_cache(m, tmp_path, capsys):
+    (tmp_path / "cache.sqlite3").write_bytes(b"not a database" * 100)
+    cache = m.ExtractCache(str(tmp_path))
+    assert not cache.enabled
+    assert cache.lookup("http://a/") is None
+    assert "extract cache disabled" in capsys.readouterr().err
+
+
+def extract(m, cache, url):
+    async def run():
+        fetcher = m.Fetcher()
+        try:
+            return await m.extract_one(url, fetcher, cache)
+        finally:
+            await fetcher.close()
+    return asyncio.run(run())
+
+
+def conditional(etag):
+    def route(headers):
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b"", 0
+        return 200, {"Content-Type": "text/html", "ETag": etag}, ARTICLE, 0
+    return route
+
+
+def test_miss_then_fresh_hit_then_304(m, tmp_path, monkeypatch, public_server):
+    public_server.routes["/doc"] = conditional('"v1"')
+    url = f"http://public.test:{public_server.server_port}/doc"
+    cache = m.ExtractCache(str(tmp_path))
+
+    first = extract(m, cache, url)
+    assert "Paragraph 0" in first["content"] and "error" not in first
+    assert public_server.hits == ["/doc"]
+
+    assert extract(m, cache, url) == first
+    assert public_server.hits == ["/doc"]                 # fresh: no request at all
+
+    monkeypatch.setattr(m, "CACHE_TTL_SECONDS", 0)
+    assert extract(m, cache, url) == first
+    assert public_server.hits == ["/doc", "/doc"]
+    assert public_server.requests[-1]["If-None-Match"] == '"v1"'
+
+    assert cache.session == {"hits": 1, "revalidated": 1, "misses": 1, "evictions": 0}
+    stats = cache.stats()
+    assert {k: stats[k] for k in ("hits", "revalidated", "misses", "entries")} == \
+        {"hits": 1, "revalidated": 1, "misses": 1, "entries": 1}
+    assert stats["hit_rate"] == round(2 / 3, 4)
+
+
+def test_changed_page_is_re_extracted_and_replaces_the_entry(m, tmp_path, monkeypatch,
+                                                             public_server):
+    public_server.routes["/doc"] = conditional('"v1"')
+    url = f"http://public.test:{public_server.server_port}/doc"
+    cache = m.ExtractCache(str(tmp_path))
+    extract(m, cache, url)
+
+    monkeypatch.setattr(m, "CACHE_TTL_SECONDS", 0)
+    public_server.routes["/doc"] = conditional('"v2"')
+    extract(m, cache, url)
+    assert cache.lookup(url).etag == '"v2"'
+    assert cache.session["misses"] == 2 and cache.session["revalidated"] == 0
+
+
+def test_stale_entry_whose_page_is_gone_is_dropped(m, tmp_path, monkeypatch, public_server):
+    public_server.routes["/doc"] = conditional('"v1"')
+    url = f"http://public.test:{public_server.server_port}/doc"
+    cache = m.ExtractCache(str(tmp_path))
+    extract(m, cache, url)
+
+    monkeypatch.setattr(m, "CACHE_TTL_SECONDS", 0)
+    del public_server.routes["/doc"]
+    assert "error" in extract(m, cache, url)
+    assert cache.lookup(url) is None
+
+
+def test_lifetime_counters_outlive_the_process_but_session_counts_do_not(m, tmp_path):
+    first = m.ExtractCache(str(tmp_path))
+    first.count("hits")
+    first.count("misses")
+    first.close()
+    second = m.ExtractCache(str(tmp_path))
+    second.count("hits")
+    assert second.session == {"hits": 1, "revalidated": 0, "misses": 0, "evictions": 0}
+    stats = second.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 1, round(2 / 3, 4))
@@ -0,0 +1,101 @@
+"""Fetcher.get: the SSRF guard holds on every hop, and queueing is not timing.
+
+Every rejection test also asserts the internal listener saw no request --
+the point of the guard is that the connection is never made, not that the
+response is thrown away afterwards.
+"""
+import asyncio
+import time
+
+import pytest
+
+PAGE = b"<html><head><title>ok</title></head><body><p>hello</p></body></html>"
+
+
+def fetch(m, *urls):
+    async def run():
+        fetcher = m.Fetcher()
+        try:
+            return await asyncio.gather(*(fetcher.get(u) for u in urls),
+                                        return_exceptions=True)
+        finally:
+            await fetcher.close()
+    results = asyncio.run(run())
+    return results[0] if len(urls) == 1 else results
+
+
+def test_public_page_is_fetched(m, public_server):
+    public_server.routes["/"] = (200, {"Content-Type": "text/html"}, PAGE, 0)
+    status, body, headers = fetch(m, f"http://public.test:{public_server.server_port}/")
+    assert (status, body) == (200, PAGE)
+
+
+@pytest.mark.parametrize("host", ["127.0.0.1", "169.254.169.254", "[::1]", "10.1.2.3"])
+def test_ip_literal_target_is_rejected(m, internal_server, host):
+    port = internal_server.server_port
+    error = fetch(m, f"http://{host}:{port}/secret")
+    assert isinstance(error, m.FetchError)
+    assert "refusing to fetch" in str(error)
+    assert internal_server.hits == []
+
+
+def test_name_resolving_to_private_address_is_rejected(m):
+    error = fetch(m, "http://internal.test/")
+    assert isinstance(error, m.FetchError)
+    assert "refusing to fetch" in str(error)
+
+
+def test_localhost_is_rejected(m, internal_server):
+    error = fetch(m, f"http://localhost:{internal_server.server_port}/secret")
+    assert isinstance(error, m.FetchError)
+    assert "refusing to fetch" in str(error)
+    assert internal_server.hits == []
+
+
+@pytest.mark.parametrize("target", ["http://127.0.0.1:{port}/secret",
+                                    "http://169.254.169.254/latest/meta-data/",
+                                    "http://internal.test/"])
+def test_redirect_to_internal_address_is_rejected(m, public_server, internal_server, target):
+    location = target.format(port=internal_server.server_port)
+    public_server.routes["/go"] = (302, {"Location": location}, b"", 0)
+    error = fetch(m, f"http://public.test:{public_server.server_port}/go")
+    assert isinstance(error, m.FetchError)
+    assert public_server.hits == ["/go"]
+    assert internal_server.hits == []
+
+
+def test_relative_redirect_is_followed(m, public_server):
+    public_server.routes["/old"] = (301, {"Location": "/new"}, b"", 0)
+    public_server.routes["/new"] = (200, {"Content-Type": "text/html"}, PAGE, 0)
+    status, body, _ = fetch(m, f"http://public.test:{public_server.server_port}/old")
+    assert (status, body) == (200, PAGE)
+    assert public_server.hits == ["/old", "/new"]
+
+
+def test_redirect_loop_stops_at_the_hop_limit(m, public_server):
+    public_server.routes["/loop"] = (302, {"Location": "/loop"}, b"", 0)
+    error = fetch(m, f"http://public.test:{public_server.server_port}/loop")
+    assert isinstance(error, m.FetchError)
+    assert "redirects" in str(error)
+    assert len(public_server.hits) == m.CONFIG.getint("DEFAULT", "MAX_REDIRECTS") + 1
+
+
+def test_time_queued_for_a_host_slot_does_not_count_against_the_timeout(
+        m, monkeypatch, public_server):
+    # Six requests, two per host at a time, 0.3s each: the last pair waits
+    # 0.6s for a slot. Only the 0.3s it is actually on the wire counts.
+    monkeypatch.setattr(m, "DOWNLOAD_TIMEOUT", "0.5")
+    public_server.routes["/slow"] = (200, {"Content-Type": "text/html"}, PAGE, 0.3)
+    url = f"http://public.test:{public_server.server_port}/slow"
+    started = time.monotonic()
+    results = fetch(m, *[url] * 6)
+    assert time.monotonic() - started >= 0.8
+    assert all(not isinstance(r, Exception) for r in results), results
+
+
+def test_slow_response_still_times_out(m, monkeypatch, public_server):
+    monkeypatch.setattr(m, "DOWNLOAD_TIMEOUT", "0.2")
+    public_server.routes["/stuck"] = (200, {}, PAGE, 1.0)
+    error = fetch(m, f"http://public.test:{public_server.server_port}/stuck")
+    assert isinstance(error, m.FetchError)
+    assert "timed out" in str(error)